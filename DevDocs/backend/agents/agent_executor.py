@@ -0,0 +1,222 @@
+"""
+Agent Executor for running blocking agent calls off the event loop.
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+from .agent_manager import AgentManager
+
+class AgentTimeoutError(TimeoutError):
+    """Raised when an agent call does not finish within the request timeout."""
+
+class AgentBusyError(RuntimeError):
+    """Raised when too many calls are already waiting for an agent."""
+
+def _run_agent_in_worker(
+    manager_factory: Callable[[], AgentManager],
+    agent_id: str,
+    kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run an agent with the worker's own agent manager."""
+    return manager_factory().run_agent(agent_id, **kwargs)
+
+class AgentExecutor:
+    """
+    Runs agent calls on a thread or process pool so async handlers only await results.
+
+    Calls are limited per agent, wait in a per-agent queue when the limit is
+    reached and are subject to a request timeout. In process mode each worker
+    process gets its agent manager from ``manager_factory``, which must be a
+    picklable module-level function.
+    """
+
+    def __init__(
+        self,
+        manager_factory: Callable[[], AgentManager],
+        executor_type: str = "thread",
+        max_workers: Optional[int] = None,
+        agent_limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the agent executor.
+
+        Args:
+            manager_factory: Function returning the agent manager to run agents with
+            executor_type: "thread" or "process"
+            max_workers: Number of pool workers
+            agent_limits: Maximum concurrent calls per agent ID
+            default_limit: Maximum concurrent calls for agents not in agent_limits
+                (defaults to max_workers)
+            max_queue_size: Maximum calls waiting per agent before new calls are
+                rejected (None for no limit)
+            timeout: Seconds a call may wait and run before timing out (None for no limit)
+        """
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type: {executor_type}")
+
+        self.manager_factory = manager_factory
+        self.executor_type = executor_type
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.agent_limits = agent_limits or {}
+        self.default_limit = default_limit or self.max_workers
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        self.logger = logging.getLogger("agent_executor")
+
+        self.executor: Optional[Executor] = None
+        self.semaphores = {}
+        self.stats = {}
+
+    def _get_executor(self) -> Executor:
+        """Create the worker pool on first use."""
+        if self.executor is None:
+            if self.executor_type == "process":
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="agent"
+                )
+
+        return self.executor
+
+    def _get_agent_state(self, agent_id: str):
+        """Get the concurrency semaphore and counters of an agent."""
+        if agent_id not in self.semaphores:
+            limit = self.agent_limits.get(agent_id, self.default_limit)
+            self.semaphores[agent_id] = asyncio.Semaphore(limit)
+            self.stats[agent_id] = {
+                "limit": limit,
+                "waiting": 0,
+                "running": 0,
+                "completed": 0,
+                "failed": 0,
+                "timeouts": 0,
+                "rejected": 0
+            }
+
+        return self.semaphores[agent_id], self.stats[agent_id]
+
+    async def run_agent(self, agent_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Run an agent in the worker pool and wait for its result.
+
+        Args:
+            agent_id: Agent ID
+            **kwargs: Keyword arguments for the agent
+
+        Returns:
+            Agent result
+
+        Raises:
+            AgentBusyError: If the agent's queue is full
+            AgentTimeoutError: If the call does not finish within the timeout
+        """
+        loop = asyncio.get_running_loop()
+        semaphore, stats = self._get_agent_state(agent_id)
+        deadline = loop.time() + self.timeout if self.timeout is not None else None
+
+        if not semaphore.locked():
+            # A slot is free, so this does not suspend
+            await semaphore.acquire()
+        else:
+            if self.max_queue_size is not None and stats["waiting"] >= self.max_queue_size:
+                stats["rejected"] += 1
+                raise AgentBusyError(f"Too many requests waiting for agent '{agent_id}'")
+
+            # Wait for a free slot for this agent
+            stats["waiting"] += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                raise AgentTimeoutError(f"Timed out waiting for agent '{agent_id}'")
+            finally:
+                stats["waiting"] -= 1
+
+        stats["running"] += 1
+
+        def release(future: asyncio.Future) -> None:
+            # The slot is only freed once the work itself has finished
+            semaphore.release()
+            stats["running"] -= 1
+            if future.cancelled() or future.exception() is not None:
+                stats["failed"] += 1
+            else:
+                stats["completed"] += 1
+
+        try:
+            future = loop.run_in_executor(
+                self._get_executor(),
+                _run_agent_in_worker,
+                self.manager_factory,
+                agent_id,
+                kwargs
+            )
+        except Exception:
+            semaphore.release()
+            stats["running"] -= 1
+            raise
+
+        future.add_done_callback(release)
+
+        remaining = max(0.0, deadline - loop.time()) if deadline is not None else None
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            self.logger.warning(f"Agent '{agent_id}' timed out after {self.timeout} seconds")
+            raise AgentTimeoutError(f"Agent '{agent_id}' timed out")
+
+    async def run_pipeline(self, pipeline: List[Dict[str, Any]], input_data: Any = None) -> Dict[str, Any]:
+        """
+        Run a pipeline of agents as a dependency graph, each call through this executor.
+
+        Every agent call of the pipeline is subject to the per-agent limits,
+        queue limit and timeout of a single run_agent call.
+
+        Args:
+            pipeline: List of pipeline steps (see AgentManager.run_pipeline)
+            input_data: Input data for the first steps
+
+        Returns:
+            Pipeline results (see AgentManager.run_pipeline)
+        """
+        async def run_task(agent_id: str, task: Dict[str, Any]) -> Any:
+            return await self.run_agent(agent_id, **task)
+
+        return await self.manager_factory().run_pipeline_async(pipeline, input_data, run_task)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get queue depth and call counters.
+
+        Returns:
+            Executor metrics, overall and per agent
+        """
+        agents = {agent_id: dict(stats) for agent_id, stats in self.stats.items()}
+
+        return {
+            "executor_type": self.executor_type,
+            "max_workers": self.max_workers,
+            "timeout": self.timeout,
+            "queue_depth": sum(stats["waiting"] for stats in agents.values()),
+            "running": sum(stats["running"] for stats in agents.values()),
+            "agents": agents
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the worker pool.
+
+        Args:
+            wait: Whether to wait for running calls to finish
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
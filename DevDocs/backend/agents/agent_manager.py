@@ -2,8 +2,13 @@
 Agent Manager for managing and orchestrating multiple agents.
 """
 import os
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Type, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Type, Union, Callable, Awaitable
 from .base_agent import BaseAgent
 
 class AgentManager:
@@ -20,6 +25,11 @@ class AgentManager:
         self.agents = {}
         self.logger = logging.getLogger("agent_manager")
         
+        # Agents registered for lazy creation: agent_id -> (agent_class, kwargs)
+        self.agent_specs = {}
+        self._lock = threading.Lock()
+        self._creation_locks = {}
+        
         if not self.api_key:
             self.logger.warning("No API key provided. Some agents may not work properly.")
     
@@ -47,13 +57,35 @@ class AgentManager:
         agent = agent_class(api_key=self.api_key, **kwargs)
         
         # Store the agent
-        self.agents[agent_id] = agent
+        with self._lock:
+            self.agents[agent_id] = agent
         
         return agent
     
+    def register_agent(
+        self, 
+        agent_id: str, 
+        agent_class: Type[BaseAgent], 
+        **kwargs
+    ) -> None:
+        """
+        Register an agent to be created on first use.
+        
+        Registering an agent that already exists replaces its configuration;
+        the agent is re-created the next time it is used.
+        
+        Args:
+            agent_id: Unique identifier for the agent
+            agent_class: Agent class to instantiate
+            **kwargs: Additional parameters for the agent
+        """
+        with self._lock:
+            self.agent_specs[agent_id] = (agent_class, kwargs)
+            self.agents.pop(agent_id, None)
+    
     def get_agent(self, agent_id: str) -> Optional[BaseAgent]:
         """
-        Get an agent by ID.
+        Get an agent by ID, creating registered agents on first use.
         
         Args:
             agent_id: Agent ID
@@ -61,7 +93,72 @@ class AgentManager:
         Returns:
             The agent, or None if not found
         """
-        return self.agents.get(agent_id)
+        agent = self.agents.get(agent_id)
+        if agent is not None or agent_id not in self.agent_specs:
+            return agent
+        
+        with self._lock:
+            creation_lock = self._creation_locks.setdefault(agent_id, threading.Lock())
+        
+        # Only one thread creates a given agent; others wait for it
+        with creation_lock:
+            agent = self.agents.get(agent_id)
+            if agent is not None:
+                return agent
+            
+            spec = self.agent_specs.get(agent_id)
+            if spec is None:
+                return None
+            
+            agent_class, kwargs = spec
+            self.logger.info(f"Creating agent '{agent_id}'")
+            agent = agent_class(api_key=self.api_key, **kwargs)
+            
+            with self._lock:
+                # Skip storing the agent if it was reloaded while being created
+                if self.agent_specs.get(agent_id) is spec:
+                    self.agents[agent_id] = agent
+        
+        return agent
+    
+    def warm_up(self, agent_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Create registered agents ahead of their first use.
+        
+        Args:
+            agent_ids: Agents to create (defaults to all registered agents)
+            
+        Returns:
+            IDs of the agents that are ready
+        """
+        ready = []
+        
+        for agent_id in agent_ids or list(self.agent_specs):
+            try:
+                if self.get_agent(agent_id) is not None:
+                    ready.append(agent_id)
+                else:
+                    self.logger.warning(f"Cannot warm up unknown agent '{agent_id}'")
+            except Exception as e:
+                self.logger.error(f"Error warming up agent '{agent_id}': {e}")
+        
+        return ready
+    
+    def reload(self, api_key: Optional[str] = None) -> None:
+        """
+        Drop registered agents so they are re-created with the current configuration.
+        
+        Args:
+            api_key: New OpenRouter API key (keeps the current key if not given)
+        """
+        with self._lock:
+            if api_key:
+                self.api_key = api_key
+            
+            # Give each spec a new identity so agents being created are discarded
+            for agent_id, (agent_class, kwargs) in list(self.agent_specs.items()):
+                self.agent_specs[agent_id] = (agent_class, kwargs)
+                self.agents.pop(agent_id, None)
     
     def run_agent(
         self, 
@@ -93,74 +190,350 @@ class AgentManager:
     def run_pipeline(
         self, 
         pipeline: List[Dict[str, Any]], 
-        input_data: Any
+        input_data: Any,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Run a pipeline of agents.
+        Run a pipeline of agents as a dependency graph.
+        
+        Steps run on a worker pool as soon as the steps they depend on have
+        finished, so independent steps run concurrently. A step that omits
+        ``depends_on`` depends on the previous step, so a plain list of steps
+        still runs as a linear chain.
+        
+        This method blocks until the pipeline has finished and cannot be called
+        from a running event loop. Async code should await
+        AgentExecutor.run_pipeline, which applies the executor's per-agent
+        limits and timeouts to every step, or run_pipeline_async.
         
         Args:
             pipeline: List of pipeline steps, each with:
                 - agent_id: Agent ID
                 - params: Parameters for the agent
                 - output_key: Key to store the output
-            input_data: Input data for the first agent
+                - id: Step ID used in depends_on (defaults to output_key)
+                - depends_on: IDs of the steps this step needs ([] to start from input_data)
+                - for_each: Dotted path to a list in the step input; the agent
+                  runs once per item concurrently and the output is the list of results
+                - inputs: Mapping of agent parameters to dotted paths in the
+                  step input (or in the item for for_each steps); a parameter
+                  also given in params keeps that value if its path is missing
+              A step's input is input_data, the output of its single
+              dependency, or a dict of outputs keyed by dependency ID.
+            input_data: Input data for the first steps
+            max_workers: Maximum number of agents running at once
             
         Returns:
-            Pipeline results
+            Pipeline results. "steps" holds each step's result and duration in
+            pipeline order, and "output" is the output of the last successful step.
+            
+        Raises:
+            RuntimeError: If called from a running event loop
         """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "run_pipeline cannot be called from a running event loop; "
+                "await AgentExecutor.run_pipeline or run_pipeline_async instead"
+            )
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            async def run_task(agent_id: str, task: Dict[str, Any]) -> Any:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, partial(self.run_agent, agent_id, **task))
+            
+            return asyncio.run(self.run_pipeline_async(pipeline, input_data, run_task))
+    
+    async def run_pipeline_async(
+        self, 
+        pipeline: List[Dict[str, Any]], 
+        input_data: Any,
+        run_task: Callable[[str, Dict[str, Any]], Awaitable[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Run a pipeline of agents as a dependency graph on the running event loop.
+        
+        Args:
+            pipeline: List of pipeline steps (see run_pipeline)
+            input_data: Input data for the first steps
+            run_task: Coroutine function running one agent task, called with
+                the agent ID and the task
+            
+        Returns:
+            Pipeline results (see run_pipeline). Failed steps hold the "error"
+            message and its "error_type".
+        """
+        nodes = self._build_pipeline_graph(pipeline)
+        
         results = {
             "input": input_data,
             "steps": []
         }
         
-        current_input = input_data
+        outputs = {}
+        step_results = {}
+        failed = set()
+        pending = dict(nodes)
+        node_states = {}
+        running = {}
         
-        for step in pipeline:
-            agent_id = step.get("agent_id")
-            params = step.get("params", {})
-            output_key = step.get("output_key")
+        async def run_item(agent_id: str, task: Dict[str, Any]):
+            started = time.perf_counter()
+            output = await run_task(agent_id, task)
+            return output, time.perf_counter() - started
+        
+        def finish_node(node_id: str, state: Dict[str, Any]) -> None:
+            node = nodes[node_id]
+            step_result = {
+                "id": node_id,
+                "agent_id": node["agent_id"],
+                "success": state["error"] is None,
+                "duration": time.perf_counter() - state["started"]
+            }
             
-            if not agent_id:
-                raise ValueError("Pipeline step must have an agent_id")
+            if node["for_each"] is not None:
+                step_result["item_durations"] = state["durations"]
             
-            # Create the task
-            task = params.copy()
-            task["input"] = current_input
+            if state["error"] is None:
+                output = state["outputs"] if node["for_each"] is not None else state["outputs"][0]
+                outputs[node_id] = output
+                step_result["output"] = output
+                
+                if node["output_key"]:
+                    results[node["output_key"]] = output
+            else:
+                failed.add(node_id)
+                step_result["error"] = str(state["error"])
+                step_result["error_type"] = type(state["error"]).__name__
+                
+                # Drop the other items of this step
+                for future, (future_node_id, _) in running.items():
+                    if future_node_id == node_id:
+                        future.cancel()
             
-            # Run the agent
-            try:
-                output = self.run_agent(agent_id, **task)
+            step_results[node_id] = step_result
+        
+        def start_ready_nodes() -> bool:
+            """Start or settle every pending step whose dependencies are done."""
+            progressed = False
+            
+            for node_id, node in list(pending.items()):
+                dependencies = node["depends_on"]
                 
-                # Store the step result
-                step_result = {
-                    "agent_id": agent_id,
-                    "success": True,
-                    "output": output
-                }
+                if any(dependency in failed for dependency in dependencies):
+                    del pending[node_id]
+                    failed.add(node_id)
+                    step_results[node_id] = {
+                        "id": node_id,
+                        "agent_id": node["agent_id"],
+                        "success": False,
+                        "skipped": True,
+                        "error": "Skipped because a step it depends on failed"
+                    }
+                    progressed = True
+                    continue
                 
-                # Update the current input for the next step
-                if output_key:
-                    results[output_key] = output
+                if not all(dependency in outputs for dependency in dependencies):
+                    continue
                 
-                current_input = output
-            except Exception as e:
-                self.logger.error(f"Error running agent '{agent_id}': {e}")
+                del pending[node_id]
+                progressed = True
+                
+                if not dependencies:
+                    node_input = input_data
+                elif len(dependencies) == 1:
+                    node_input = outputs[dependencies[0]]
+                else:
+                    node_input = {dependency: outputs[dependency] for dependency in dependencies}
+                
+                state = {"started": time.perf_counter(), "error": None, "outputs": [], "durations": []}
+                
+                try:
+                    if node["for_each"] is not None:
+                        items = self._resolve_pipeline_path(node_input, node["for_each"])
+                        if not isinstance(items, (list, tuple)):
+                            raise ValueError(f"for_each path '{node['for_each']}' does not refer to a list")
+                        items = list(items)
+                    else:
+                        items = [node_input]
+                    
+                    tasks = [self._build_pipeline_task(node, item) for item in items]
+                except Exception as e:
+                    self.logger.error(f"Error preparing pipeline step '{node_id}': {e}")
+                    state["error"] = e
+                    finish_node(node_id, state)
+                    continue
+                
+                state["outputs"] = [None] * len(tasks)
+                state["durations"] = [None] * len(tasks)
+                state["remaining"] = len(tasks)
+                node_states[node_id] = state
                 
-                # Store the error
-                step_result = {
-                    "agent_id": agent_id,
-                    "success": False,
-                    "error": str(e)
-                }
+                if not tasks:
+                    finish_node(node_id, state)
                 
-                # Stop the pipeline
-                break
+                for index, task in enumerate(tasks):
+                    future = asyncio.ensure_future(run_item(node["agent_id"], task))
+                    running[future] = (node_id, index)
             
-            results["steps"].append(step_result)
+            return progressed
+        
+        try:
+            while True:
+                # Steps finishing without running an agent can make later-listed
+                # steps ready, so scan until nothing changes
+                while start_ready_nodes():
+                    pass
+                
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                
+                for future in done:
+                    node_id, index = running.pop(future)
+                    state = node_states[node_id]
+                    
+                    # Ignore items of a step that has already failed
+                    if node_id in step_results or future.cancelled():
+                        continue
+                    
+                    try:
+                        output, duration = future.result()
+                        state["outputs"][index] = output
+                        state["durations"][index] = duration
+                        state["remaining"] -= 1
+                    except Exception as e:
+                        self.logger.error(f"Error running agent '{nodes[node_id]['agent_id']}': {e}")
+                        state["error"] = e
+                    
+                    if state["error"] is not None or state["remaining"] == 0:
+                        finish_node(node_id, state)
+        finally:
+            for future in running:
+                future.cancel()
+        
+        # Report steps that never became ready instead of dropping them
+        for node_id, node in pending.items():
+            missing = [dependency for dependency in node["depends_on"] if dependency not in outputs]
+            step_results[node_id] = {
+                "id": node_id,
+                "agent_id": node["agent_id"],
+                "success": False,
+                "skipped": True,
+                "error": f"Dependencies not satisfied: {', '.join(missing)}"
+            }
+        
+        results["steps"] = [step_results[node_id] for node_id in nodes if node_id in step_results]
+        
+        # The output of the last successful step, as for a linear chain
+        results["output"] = input_data
+        for node_id in nodes:
+            if node_id in outputs:
+                results["output"] = outputs[node_id]
         
-        results["output"] = current_input
         return results
     
+    def _build_pipeline_graph(self, pipeline: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Normalize pipeline steps into graph nodes and validate their dependencies.
+        
+        Args:
+            pipeline: List of pipeline steps
+            
+        Returns:
+            Nodes keyed by step ID, in pipeline order
+        """
+        nodes = {}
+        previous_id = None
+        
+        for index, step in enumerate(pipeline):
+            agent_id = step.get("agent_id")
+            if not agent_id:
+                raise ValueError("Pipeline step must have an agent_id")
+            
+            node_id = step.get("id") or step.get("output_key") or f"{agent_id}_{index}"
+            if node_id in nodes:
+                raise ValueError(f"Duplicate pipeline step ID '{node_id}'")
+            
+            depends_on = step.get("depends_on")
+            if depends_on is None:
+                depends_on = [previous_id] if previous_id is not None else []
+            elif isinstance(depends_on, str):
+                depends_on = [depends_on]
+            
+            nodes[node_id] = {
+                "agent_id": agent_id,
+                "params": step.get("params", {}),
+                "output_key": step.get("output_key"),
+                "depends_on": list(depends_on),
+                "for_each": step.get("for_each"),
+                "inputs": step.get("inputs", {})
+            }
+            previous_id = node_id
+        
+        # Check that dependencies exist and contain no cycles
+        remaining = {node_id: set(node["depends_on"]) for node_id, node in nodes.items()}
+        for node_id, dependencies in remaining.items():
+            unknown = dependencies - set(nodes)
+            if unknown:
+                raise ValueError(f"Pipeline step '{node_id}' depends on unknown steps: {', '.join(sorted(unknown))}")
+        
+        while remaining:
+            ready = [node_id for node_id, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle between: {', '.join(remaining)}")
+            
+            for node_id in ready:
+                del remaining[node_id]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+        
+        return nodes
+    
+    def _build_pipeline_task(self, node: Dict[str, Any], node_input: Any) -> Dict[str, Any]:
+        """Build the agent task of a pipeline step from its parameters and input."""
+        task = node["params"].copy()
+        task["input"] = node_input
+        
+        for param, path in node["inputs"].items():
+            try:
+                task[param] = self._resolve_pipeline_path(node_input, path)
+            except (KeyError, IndexError, AttributeError):
+                # A value given in params is the default for a missing path
+                if param not in node["params"]:
+                    raise
+        
+        return task
+    
+    @staticmethod
+    def _resolve_pipeline_path(data: Any, path: Optional[str]) -> Any:
+        """
+        Resolve a dotted path such as "tables.0.data" in step data.
+        
+        Args:
+            data: Data to resolve the path in
+            path: Dotted path of dict keys, list indices or attributes
+            
+        Returns:
+            The value at the path
+        """
+        if not path:
+            return data
+        
+        for part in path.split("."):
+            if isinstance(data, dict):
+                data = data[part]
+            elif isinstance(data, (list, tuple)) and part.lstrip("-").isdigit():
+                data = data[int(part)]
+            else:
+                data = getattr(data, part)
+        
+        return data
+    
     def list_agents(self) -> List[Dict[str, Any]]:
         """
         List all registered agents.
@@ -175,5 +548,5 @@ class AgentManager:
                 "description": getattr(agent, "description", ""),
                 "type": agent.__class__.__name__
             }
-            for agent_id, agent in self.agents.items()
+            for agent_id, agent in list(self.agents.items())
         ]
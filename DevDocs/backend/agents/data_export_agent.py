@@ -13,28 +13,44 @@ from datetime import datetime
 from pathlib import Path
 import base64
 import io
-from typing import Dict, List, Any, Optional, Tuple, Union, BinaryIO
+from itertools import chain, islice
+from typing import Dict, List, Any, Optional, Tuple, Union, BinaryIO, Iterable, Iterator
+
+# Number of records written at a time by the streaming exports
+DEFAULT_CHUNK_SIZE = 1000
+
+# Number of leading records used to find the columns of a streaming export
+DEFAULT_COLUMN_SAMPLE_SIZE = 1000
 
 class DataExportAgent:
     """
     Agent that handles exporting financial data to various formats.
     """
     
-    def __init__(self):
-        """Initialize the DataExportAgent"""
+    def __init__(self, export_dir: str = "exports"):
+        """
+        Initialize the DataExportAgent
+        
+        Args:
+            export_dir: Directory the exports are written to
+        """
         self.name = "DataExportAgent"
         self.version = "1.0.0"
         self.supported_formats = ['json', 'csv', 'excel', 'pdf', 'html']
+        self.streaming_formats = ['json', 'jsonl', 'csv', 'excel', 'html']
         
         # Create exports directory if it doesn't exist
-        self.export_dir = "exports"
-        Path(self.export_dir).mkdir(exist_ok=True)
+        self.export_dir = export_dir
+        Path(self.export_dir).mkdir(parents=True, exist_ok=True)
     
     def export_data(self, data: Dict[str, Any], format_type: str, 
                    filename: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Export data to the specified format.
         
+        Iterators of records (such as generators) are exported with export_records,
+        without loading them into memory.
+        
         Args:
             data: Data to export
             format_type: Format to export to ('json', 'csv', 'excel', 'pdf', 'html')
@@ -44,6 +60,9 @@ class DataExportAgent:
         Returns:
             Dictionary with export result
         """
+        if isinstance(data, Iterator):
+            return self.export_records(data, format_type, filename, options)
+        
         if format_type.lower() not in self.supported_formats:
             return {
                 'status': 'error',
@@ -53,20 +72,7 @@ class DataExportAgent:
         if not options:
             options = {}
         
-        # Generate default filename if not provided
-        if not filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"export_{timestamp}.{self._get_extension(format_type)}"
-        elif not Path(filename).suffix:
-            # Add extension if not provided
-            filename = f"{filename}.{self._get_extension(format_type)}"
-        
-        # Ensure file has correct extension
-        if not filename.endswith(f".{self._get_extension(format_type)}"):
-            filename = f"{filename}.{self._get_extension(format_type)}"
-        
-        # Create full path
-        file_path = os.path.join(self.export_dir, filename)
+        filename, file_path = self._get_file_path(format_type, filename)
         
         try:
             # Call the appropriate export method
@@ -96,6 +102,32 @@ class DataExportAgent:
                 'filename': filename
             }
     
+    def _get_file_path(self, format_type: str, filename: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Get the filename and path of an export.
+        
+        Args:
+            format_type: Format type
+            filename: Optional filename (default is auto-generated)
+        
+        Returns:
+            Tuple of (filename, file path)
+        """
+        # Generate default filename if not provided
+        if not filename:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"export_{timestamp}.{self._get_extension(format_type)}"
+        elif not Path(filename).suffix:
+            # Add extension if not provided
+            filename = f"{filename}.{self._get_extension(format_type)}"
+        
+        # Ensure file has correct extension
+        if not filename.endswith(f".{self._get_extension(format_type)}"):
+            filename = f"{filename}.{self._get_extension(format_type)}"
+        
+        # Create full path
+        return filename, os.path.join(self.export_dir, filename)
+    
     def _get_extension(self, format_type: str) -> str:
         """
         Get the file extension for the specified format.
@@ -108,6 +140,7 @@ class DataExportAgent:
         """
         extension_map = {
             'json': 'json',
+            'jsonl': 'jsonl',
             'csv': 'csv',
             'excel': 'xlsx',
             'pdf': 'pdf',
@@ -531,43 +564,7 @@ class DataExportAgent:
             include_charts = options.get('include_charts', False)
             
             # Create HTML content
-            html_content = [
-                '<!DOCTYPE html>',
-                '<html>',
-                '<head>',
-                f'  <title>{title}</title>',
-                '  <meta charset="UTF-8">',
-            ]
-            
-            # Add styles if requested
-            if include_styles:
-                html_content.extend([
-                    '  <style>',
-                    '    body { font-family: Arial, sans-serif; margin: 20px; }',
-                    '    h1 { color: #2c3e50; }',
-                    '    h2 { color: #34495e; margin-top: 20px; }',
-                    '    table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }',
-                    '    th { background-color: #34495e; color: white; text-align: left; padding: 8px; }',
-                    '    td { border: 1px solid #ddd; padding: 8px; }',
-                    '    tr:nth-child(even) { background-color: #f2f2f2; }',
-                    '    .timestamp { color: #7f8c8d; font-style: italic; margin-bottom: 20px; }',
-                    '    .disclaimer { color: #7f8c8d; font-style: italic; margin-top: 30px; font-size: 0.9em; }',
-                    '  </style>',
-                ])
-            
-            # Add charts library if requested
-            if include_charts:
-                html_content.extend([
-                    '  <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>',
-                ])
-            
-            # Close head and start body
-            html_content.extend([
-                '</head>',
-                '<body>',
-                f'  <h1>{title}</h1>',
-                f'  <p class="timestamp">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>',
-            ])
+            html_content = self._html_document_start(title, include_styles, include_charts)
             
             # Process different data types
             if isinstance(data, pd.DataFrame):
@@ -611,11 +608,7 @@ class DataExportAgent:
                         html_content.append(f'  <p>{key}: {value}</p>')
             
             # Add disclaimer and close HTML
-            html_content.extend([
-                '  <p class="disclaimer">Disclaimer: This report is for informational purposes only.</p>',
-                '</body>',
-                '</html>',
-            ])
+            html_content.extend(self._html_document_end())
             
             # Write to file
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -668,6 +661,409 @@ class DataExportAgent:
         html_table.append('  </table>')
         return '\n'.join(html_table)
     
+    def _html_document_start(self, title: str, include_styles: bool = True, 
+                             include_charts: bool = False) -> List[str]:
+        """
+        Get the lines of an HTML export up to the start of the content.
+        
+        Args:
+            title: Document title
+            include_styles: Whether to include the table styles
+            include_charts: Whether to include the charts library
+        
+        Returns:
+            List of HTML lines
+        """
+        html_content = [
+            '<!DOCTYPE html>',
+            '<html>',
+            '<head>',
+            f'  <title>{title}</title>',
+            '  <meta charset="UTF-8">',
+        ]
+        
+        # Add styles if requested
+        if include_styles:
+            html_content.extend([
+                '  <style>',
+                '    body { font-family: Arial, sans-serif; margin: 20px; }',
+                '    h1 { color: #2c3e50; }',
+                '    h2 { color: #34495e; margin-top: 20px; }',
+                '    table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }',
+                '    th { background-color: #34495e; color: white; text-align: left; padding: 8px; }',
+                '    td { border: 1px solid #ddd; padding: 8px; }',
+                '    tr:nth-child(even) { background-color: #f2f2f2; }',
+                '    .timestamp { color: #7f8c8d; font-style: italic; margin-bottom: 20px; }',
+                '    .disclaimer { color: #7f8c8d; font-style: italic; margin-top: 30px; font-size: 0.9em; }',
+                '  </style>',
+            ])
+        
+        # Add charts library if requested
+        if include_charts:
+            html_content.extend([
+                '  <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>',
+            ])
+        
+        # Close head and start body
+        html_content.extend([
+            '</head>',
+            '<body>',
+            f'  <h1>{title}</h1>',
+            f'  <p class="timestamp">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>',
+        ])
+        
+        return html_content
+    
+    def _html_document_end(self) -> List[str]:
+        """
+        Get the closing lines of an HTML export.
+        
+        Returns:
+            List of HTML lines
+        """
+        return [
+            '  <p class="disclaimer">Disclaimer: This report is for informational purposes only.</p>',
+            '</body>',
+            '</html>',
+        ]
+    
+    def export_records(self, records: Iterable[Dict[str, Any]], format_type: str, 
+                       filename: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Export records to the specified format, writing them as they are read.
+        
+        The records are consumed once and never held in memory together, so memory
+        use does not grow with the number of records. The columns of CSV, Excel and
+        HTML exports are taken from the 'columns' option, or else from the keys of
+        the first records (see the 'column_sample_size' option); keys only found
+        in later records are left out and listed in the result.
+        
+        Args:
+            records: Iterable of records (dictionaries), such as a generator
+            format_type: Format to export to ('json', 'jsonl', 'csv', 'excel', 'html')
+            filename: Optional filename (default is auto-generated)
+            options: Optional export options, as for export_data, plus:
+                columns: Columns to export
+                column_sample_size: Number of leading records used to find the columns
+                chunk_size: Number of records written at a time
+                sheet_name: Name of the Excel worksheet
+        
+        Returns:
+            Dictionary with export result
+        """
+        format_type = format_type.lower()
+        if format_type not in self.streaming_formats:
+            return {
+                'status': 'error',
+                'message': f"Unsupported streaming format: {format_type}. Supported formats: {', '.join(self.streaming_formats)}"
+            }
+        
+        if not options:
+            options = {}
+        
+        filename, file_path = self._get_file_path(format_type, filename)
+        
+        try:
+            # Call the appropriate streaming export method
+            if format_type in ('json', 'jsonl'):
+                export_result = self._stream_json(records, file_path, options, lines=format_type == 'jsonl')
+            elif format_type == 'csv':
+                export_result = self._stream_csv(records, file_path, options)
+            elif format_type == 'excel':
+                export_result = self._stream_excel(records, file_path, options)
+            elif format_type == 'html':
+                export_result = self._stream_html(records, file_path, options)
+            
+            # Add metadata to result
+            export_result['file_path'] = file_path
+            export_result['file_size'] = os.path.getsize(file_path)
+            export_result['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            return export_result
+            
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': f"Export failed: {str(e)}",
+                'format': format_type,
+                'filename': filename
+            }
+    
+    def _chunk_records(self, records: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+        """
+        Split records or rows into lists of at most chunk_size items.
+        
+        Args:
+            records: Iterable of records or rows
+            chunk_size: Maximum number of items per chunk
+        
+        Returns:
+            Iterator over the chunks
+        """
+        iterator = iter(records)
+        while True:
+            chunk = list(islice(iterator, max(1, chunk_size)))
+            if not chunk:
+                return
+            yield chunk
+    
+    def _stream_columns(self, records: Iterable[Dict[str, Any]], 
+                        options: Dict[str, Any]) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+        """
+        Get the columns of a streaming export.
+        
+        Args:
+            records: Iterable of records
+            options: Export options
+        
+        Returns:
+            Tuple of (columns, iterator over all records)
+        """
+        iterator = iter(records)
+        if options.get('columns'):
+            return list(options['columns']), iterator
+        
+        # Collect the keys of the leading records, in order of appearance
+        sample = list(islice(iterator, max(1, options.get('column_sample_size', DEFAULT_COLUMN_SAMPLE_SIZE))))
+        columns = {}
+        for record in sample:
+            columns.update(dict.fromkeys(record))
+        
+        return list(columns), chain(sample, iterator)
+    
+    def _stream_cell(self, value: Any) -> Any:
+        """
+        Convert a record value to a cell value of a tabular export.
+        
+        Args:
+            value: Record value
+        
+        Returns:
+            Cell value ('' for missing values)
+        """
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list, tuple, set, np.ndarray)):
+            return str(value)
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return ''
+        return value
+    
+    def _stream_rows(self, records: Iterable[Dict[str, Any]], columns: List[str], 
+                     stats: Dict[str, Any]) -> Iterator[List[Any]]:
+        """
+        Convert records to rows of cell values, counting rows and ignored keys.
+        
+        Args:
+            records: Iterable of records
+            columns: Columns to export
+            stats: Dictionary updated with 'row_count' and 'ignored_columns'
+        
+        Returns:
+            Iterator over the rows
+        """
+        known = set(columns)
+        for record in records:
+            stats['row_count'] += 1
+            if not known.issuperset(record):
+                stats['ignored_columns'].update(key for key in record if key not in known)
+            yield [self._stream_cell(record.get(column)) for column in columns]
+    
+    def _stream_result(self, format_type: str, columns: List[str], 
+                       stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the result of a tabular streaming export.
+        
+        Args:
+            format_type: Format type
+            columns: Exported columns
+            stats: Export statistics
+        
+        Returns:
+            Dictionary with export result
+        """
+        result = {
+            'status': 'success',
+            'format': format_type,
+            'message': f"Data exported to {format_type.upper() if format_type != 'excel' else 'Excel'} successfully",
+            'row_count': stats['row_count'],
+            'column_count': len(columns)
+        }
+        if stats['ignored_columns']:
+            result['ignored_columns'] = sorted(map(str, stats['ignored_columns']))
+        return result
+    
+    def _stream_json(self, records: Iterable[Dict[str, Any]], file_path: str, 
+                     options: Dict[str, Any], lines: bool = False) -> Dict[str, Any]:
+        """
+        Export records to a JSON array or to JSON Lines, one record at a time.
+        
+        Args:
+            records: Iterable of records
+            file_path: Path to save file
+            options: Export options
+            lines: Whether to write JSON Lines instead of a JSON array
+        
+        Returns:
+            Dictionary with export result
+        """
+        # Get export options
+        indent = None if lines else options.get('indent', 2)
+        ensure_ascii = options.get('ensure_ascii', False)
+        chunk_size = options.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        
+        # Separate and indent the records like json.dump does for a list
+        if lines:
+            separator, prefix = '\n', ''
+        elif indent is None:
+            separator, prefix = ', ', ''
+        else:
+            prefix = ' ' * indent if isinstance(indent, int) else indent
+            separator = ',\n' + prefix
+        
+        row_count = 0
+        with open(file_path, 'w', encoding='utf-8') as f:
+            if not lines:
+                f.write('[')
+            
+            for chunk in self._chunk_records(records, chunk_size):
+                encoded = [
+                    json.dumps(self._prepare_data_for_json(record), indent=indent, ensure_ascii=ensure_ascii)
+                    for record in chunk
+                ]
+                if indent is not None and not lines:
+                    encoded = [text.replace('\n', '\n' + prefix) for text in encoded]
+                
+                if row_count:
+                    f.write(separator)
+                elif indent is not None and not lines:
+                    f.write('\n' + prefix)
+                f.write(separator.join(encoded))
+                row_count += len(chunk)
+            
+            if lines:
+                if row_count:
+                    f.write('\n')
+            elif indent is not None and row_count:
+                f.write('\n]')
+            else:
+                f.write(']')
+        
+        return {
+            'status': 'success',
+            'format': 'jsonl' if lines else 'json',
+            'message': f"Data exported to {'JSON Lines' if lines else 'JSON'} successfully",
+            'row_count': row_count
+        }
+    
+    def _stream_csv(self, records: Iterable[Dict[str, Any]], file_path: str, 
+                    options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Export records to CSV format in chunks.
+        
+        Args:
+            records: Iterable of records
+            file_path: Path to save file
+            options: Export options
+        
+        Returns:
+            Dictionary with export result
+        """
+        # Get export options
+        delimiter = options.get('delimiter', ',')
+        quotechar = options.get('quotechar', '"')
+        encoding = options.get('encoding', 'utf-8')
+        chunk_size = options.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        
+        columns, records = self._stream_columns(records, options)
+        stats = {'row_count': 0, 'ignored_columns': set()}
+        
+        with open(file_path, 'w', encoding=encoding, newline='') as f:
+            writer = csv.writer(f, delimiter=delimiter, quotechar=quotechar)
+            writer.writerow(columns)
+            
+            for chunk in self._chunk_records(self._stream_rows(records, columns, stats), chunk_size):
+                writer.writerows(chunk)
+        
+        return self._stream_result('csv', columns, stats)
+    
+    def _stream_excel(self, records: Iterable[Dict[str, Any]], file_path: str, 
+                      options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Export records to Excel format with a write-only worksheet.
+        
+        Args:
+            records: Iterable of records
+            file_path: Path to save file
+            options: Export options
+        
+        Returns:
+            Dictionary with export result
+        """
+        from openpyxl import Workbook
+        
+        columns, records = self._stream_columns(records, options)
+        stats = {'row_count': 0, 'ignored_columns': set()}
+        
+        # Write-only worksheets write their rows out instead of keeping them in memory
+        workbook = Workbook(write_only=True)
+        try:
+            worksheet = workbook.create_sheet(str(options.get('sheet_name', 'Data'))[:31])
+            worksheet.append(columns)
+            
+            for row in self._stream_rows(records, columns, stats):
+                worksheet.append(row)
+            
+            workbook.save(file_path)
+        finally:
+            workbook.close()
+        
+        return self._stream_result('excel', columns, stats)
+    
+    def _stream_html(self, records: Iterable[Dict[str, Any]], file_path: str, 
+                     options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Export records to an HTML table, written in chunks.
+        
+        Args:
+            records: Iterable of records
+            file_path: Path to save file
+            options: Export options
+        
+        Returns:
+            Dictionary with export result
+        """
+        # Get export options
+        title = options.get('title', 'Financial Data Export')
+        include_styles = options.get('include_styles', True)
+        include_charts = options.get('include_charts', False)
+        chunk_size = options.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        
+        columns, records = self._stream_columns(records, options)
+        stats = {'row_count': 0, 'ignored_columns': set()}
+        
+        with open(file_path, 'w', encoding='utf-8') as f:
+            header = self._html_document_start(title, include_styles, include_charts)
+            header.append('  <table>')
+            header.append('    <tr>')
+            header.extend(f'      <th>{col}</th>' for col in columns)
+            header.append('    </tr>')
+            f.write('\n'.join(header))
+            
+            for chunk in self._chunk_records(self._stream_rows(records, columns, stats), chunk_size):
+                html_rows = []
+                for row in chunk:
+                    html_rows.append('    <tr>')
+                    html_rows.extend(f'      <td>{cell_value}</td>' for cell_value in row)
+                    html_rows.append('    </tr>')
+                f.write('\n' + '\n'.join(html_rows))
+            
+            f.write('\n' + '\n'.join(['  </table>'] + self._html_document_end()))
+        
+        return self._stream_result('html', columns, stats)
+    
     def export_portfolio(self, portfolio_data: Dict[str, Any], format_type: str, 
                         filename: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -755,6 +1151,7 @@ class DataExportAgent:
                 'Export data to JSON, CSV, Excel, PDF, and HTML formats',
                 'Specialized export for portfolio data',
                 'Specialized export for analysis data',
+                'Streaming export of large record sets to JSON, JSON Lines, CSV, Excel and HTML',
                 'Support for various export options'
             ]
         }
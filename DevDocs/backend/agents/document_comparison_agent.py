@@ -12,7 +12,187 @@ from datetime import datetime
 from pathlib import Path
 import difflib
 import copy
-from typing import Dict, List, Any, Optional, Tuple, Union, Set
+from typing import Dict, List, Any, Optional, Tuple, Union, Set, Callable
+
+class HoldingsSnapshotTable:
+    """
+    Holdings of several document snapshots in one keyed columnar table.
+    
+    Every row is one holding of one snapshot, identified by its key. Attributes are
+    stored column-wise as object arrays aligned with the rows, together with masks
+    for whether a holding has the attribute, whether it is None and whether it is
+    numeric. The holding dictionaries themselves are never modified.
+    """
+    
+    def __init__(self, snapshots: List[List[Dict[str, Any]]], key_func: Callable[[Dict[str, Any]], str]):
+        """
+        Build the table.
+        
+        Args:
+            snapshots: Holdings of each snapshot, in snapshot order
+            key_func: Function returning the key identifying a holding across snapshots
+        """
+        self.snapshot_count = len(snapshots)
+        self.records = [holding for holdings in snapshots for holding in (holdings or [])]
+        
+        keys = [key_func(holding) for holding in self.records]
+        snapshot_ids = np.repeat(
+            np.arange(self.snapshot_count),
+            [len(holdings or []) for holdings in snapshots]
+        )
+        
+        # Rows grouped by key (in order of first appearance), then by snapshot
+        index = pd.DataFrame({
+            'key': pd.Series(keys, dtype=object),
+            'snapshot': snapshot_ids.astype(np.int64),
+            'row': np.arange(len(self.records), dtype=np.int64)
+        })
+        index['key_order'] = pd.factorize(index['key'])[0]
+        self.index = index.sort_values(['key_order', 'snapshot', 'row'], kind='stable').reset_index(drop=True)
+        
+        # Attribute columns
+        fields = sorted({field for holding in self.records for field in holding})
+        row_count = len(self.records)
+        self.values = {field: np.full(row_count, None, dtype=object) for field in fields}
+        self.present = {field: np.zeros(row_count, dtype=bool) for field in fields}
+        self.null = {field: np.ones(row_count, dtype=bool) for field in fields}
+        self.numeric = {field: np.zeros(row_count, dtype=bool) for field in fields}
+        
+        for row, holding in enumerate(self.records):
+            for field, value in holding.items():
+                self.values[field][row] = value
+                self.present[field][row] = True
+                self.null[field][row] = value is None
+                self.numeric[field][row] = isinstance(value, (int, float))
+    
+    @property
+    def key_count(self) -> int:
+        """Number of distinct keys in the table."""
+        return int(self.index['key_order'].max()) + 1 if len(self.index) else 0
+    
+    def presence_changes(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Find keys added or removed between adjacent snapshots.
+        
+        Returns:
+            Tuple of (added, removed) index rows. Added rows are the first holding of a
+            key in a snapshot whose previous snapshot lacks the key, removed rows the
+            first holding of a key in a snapshot whose next snapshot lacks it
+        """
+        first = self.index.drop_duplicates(['key', 'snapshot'])
+        present = pd.MultiIndex.from_arrays([first['key'], first['snapshot']])
+        
+        in_previous = pd.MultiIndex.from_arrays([first['key'], first['snapshot'] - 1]).isin(present)
+        in_next = pd.MultiIndex.from_arrays([first['key'], first['snapshot'] + 1]).isin(present)
+        
+        added = first[~in_previous & (first['snapshot'] > 0).to_numpy()]
+        removed = first[~in_next & (first['snapshot'] < self.snapshot_count - 1).to_numpy()]
+        
+        return added, removed
+    
+    def consecutive_pairs(self) -> pd.DataFrame:
+        """
+        Pair every holding with the next occurrence of the same key.
+        
+        Returns:
+            DataFrame with key, old_row, new_row, old_snapshot and new_snapshot columns
+        """
+        grouped = self.index.groupby('key_order', sort=False)
+        new_row = grouped['row'].shift(-1)
+        new_snapshot = grouped['snapshot'].shift(-1)
+        has_next = new_row.notna().to_numpy()
+        
+        return pd.DataFrame({
+            'key': self.index['key'].to_numpy()[has_next],
+            'old_row': self.index['row'].to_numpy()[has_next],
+            'new_row': new_row.to_numpy()[has_next].astype(np.int64),
+            'old_snapshot': self.index['snapshot'].to_numpy()[has_next],
+            'new_snapshot': new_snapshot.to_numpy()[has_next].astype(np.int64)
+        })
+    
+    def attribute_changes(self, old_rows: np.ndarray, new_rows: np.ndarray,
+                          numeric_fields: Set[str], significant_percent: float,
+                          significant_absolute: float) -> List[List[Dict[str, Any]]]:
+        """
+        Compute attribute changes between pairs of rows, one field column at a time.
+        
+        Args:
+            old_rows: Rows of the old holdings
+            new_rows: Rows of the new holdings, aligned with old_rows
+            numeric_fields: Fields for which numeric changes are measured
+            significant_percent: Percent change from which a change is significant
+            significant_absolute: Absolute change from which a change is significant
+        
+        Returns:
+            List with the changes of each pair, fields in sorted order
+        """
+        changes = [[] for _ in range(len(old_rows))]
+        
+        for field in sorted(self.values):
+            old_present = self.present[field][old_rows]
+            new_present = self.present[field][new_rows]
+            compared = ~(self.null[field][old_rows] & self.null[field][new_rows])
+            
+            added = compared & ~old_present
+            removed = compared & old_present & ~new_present
+            both = compared & old_present & new_present
+            
+            old_values = self.values[field][old_rows]
+            new_values = self.values[field][new_rows]
+            
+            changed = np.zeros(len(old_rows), dtype=bool)
+            if both.any():
+                changed[both] = (old_values[both] != new_values[both]).astype(bool)
+            
+            if not (added.any() or removed.any() or changed.any()):
+                continue
+            
+            # Numeric deltas for all changed numeric pairs at once
+            deltas = {}
+            if field in numeric_fields:
+                measured = changed & self.numeric[field][old_rows] & self.numeric[field][new_rows]
+                if measured.any():
+                    absolute = new_values[measured] - old_values[measured]
+                    absolute_float = absolute.astype(float)
+                    old_float = old_values[measured].astype(float)
+                    
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        percent = np.where(
+                            old_float != 0,
+                            absolute_float / old_float * 100,
+                            np.sign(absolute_float) * np.inf
+                        )
+                    percent = np.where(np.isnan(percent) & (old_float == 0), 0.0, percent)
+                    
+                    significant = (
+                        (np.abs(percent) >= significant_percent) |
+                        (np.abs(absolute_float) >= significant_absolute)
+                    )
+                    
+                    for position, pair in enumerate(np.flatnonzero(measured)):
+                        deltas[pair] = (absolute[position], percent[position].item(), bool(significant[position]))
+            
+            for pair in np.flatnonzero(added | removed | changed):
+                if added[pair]:
+                    change = {'field': field, 'change_type': 'added', 'new_value': new_values[pair]}
+                elif removed[pair]:
+                    change = {'field': field, 'change_type': 'removed', 'old_value': old_values[pair]}
+                else:
+                    change = {
+                        'field': field,
+                        'change_type': 'changed',
+                        'old_value': old_values[pair],
+                        'new_value': new_values[pair]
+                    }
+                    if pair in deltas:
+                        absolute_change, percent_change, is_significant = deltas[pair]
+                        change['absolute_change'] = absolute_change
+                        change['percent_change'] = percent_change
+                        change['is_significant'] = is_significant
+                
+                changes[pair].append(change)
+        
+        return changes
 
 class DocumentComparisonAgent:
     """
@@ -230,7 +410,7 @@ class DocumentComparisonAgent:
         
         Args:
             documents: List of documents to compare
-            
+        
         Returns:
             Dictionary with securities comparison results
         """
@@ -238,18 +418,7 @@ class DocumentComparisonAgent:
             return None
         
         # Extract securities from each document
-        all_securities = []
-        for i, doc in enumerate(documents):
-            securities = doc.get('securities', [])
-            if not securities:
-                all_securities.append([])
-                continue
-            
-            # Add document index to each security
-            for security in securities:
-                security['_doc_index'] = i
-            
-            all_securities.append(securities)
+        all_securities = [doc.get('securities') or [] for doc in documents]
         
         # Check if any securities were found
         if all(not securities for securities in all_securities):
@@ -258,113 +427,89 @@ class DocumentComparisonAgent:
                 'message': "No securities found in documents"
             }
         
-        # Identify all unique securities
-        unique_securities = self._identify_unique_securities(all_securities)
+        return self._compare_holdings(all_securities, 'securities', 'security')
+    
+    def _compare_holdings(self, snapshots: List[List[Dict[str, Any]]],
+                          holding_type: str, item_name: str) -> Dict[str, Any]:
+        """
+        Compare holdings across document snapshots using a columnar snapshot table.
         
-        # Compare securities across documents
-        comparison_results = []
+        Args:
+            snapshots: Holdings of each document, in document order
+            holding_type: Holding type, "securities" or "positions"
+            item_name: Singular name used in result keys, "security" or "position"
         
-        for sec_id, security_group in unique_securities.items():
-            # Skip if security only appears in one document
-            if len(security_group) < 2:
+        Returns:
+            Dictionary with holdings comparison results
+        """
+        key_fields = self.comparison_config['key_fields'][holding_type]
+        table = HoldingsSnapshotTable(
+            snapshots,
+            lambda holding: self._generate_security_id(holding, key_fields)
+        )
+        
+        id_field = f'{item_name}_id'
+        data_field = f'{item_name}_data'
+        
+        # Compare each holding with its next occurrence
+        pairs = table.consecutive_pairs()
+        pair_changes = table.attribute_changes(
+            pairs['old_row'].to_numpy(),
+            pairs['new_row'].to_numpy(),
+            set(self.comparison_config['numeric_fields']),
+            self.comparison_config['significant_percent_change'],
+            self.comparison_config['significant_absolute_change']
+        )
+        
+        comparison_results = []
+        for pair, changes in zip(pairs.itertuples(index=False), pair_changes):
+            if not changes:
                 continue
             
-            # Find changes between consecutive documents
-            for i in range(len(security_group) - 1):
-                old_sec = security_group[i]
-                new_sec = security_group[i + 1]
-                
-                old_doc_index = old_sec.pop('_doc_index')
-                new_doc_index = new_sec.pop('_doc_index')
-                
-                # Compare the securities
-                changes = self._compare_security_attributes(old_sec, new_sec)
-                
-                if changes['has_changes']:
-                    comparison_results.append({
-                        'security_id': sec_id,
-                        'security_name': old_sec.get('name', '') or new_sec.get('name', ''),
-                        'old_document_index': old_doc_index,
-                        'new_document_index': new_doc_index,
-                        'changes': changes['changes']
-                    })
-        
-        # Find added and removed securities
-        added_securities = []
-        removed_securities = []
-        
-        for sec_id, security_group in unique_securities.items():
-            # Get list of document indices this security appears in
-            doc_indices = [sec.get('_doc_index') for sec in security_group]
-            
-            # Check for missing documents (gaps in sequence)
-            for i in range(len(documents) - 1):
-                if i in doc_indices and i + 1 not in doc_indices:
-                    # Security removed in next document
-                    security = next(sec for sec in security_group if sec.get('_doc_index') == i)
-                    security.pop('_doc_index', None)
-                    removed_securities.append({
-                        'security_id': sec_id,
-                        'security_name': security.get('name', ''),
-                        'document_index': i,
-                        'next_document_index': i + 1,
-                        'security_data': security
-                    })
-                
-                if i not in doc_indices and i + 1 in doc_indices:
-                    # Security added in next document
-                    security = next(sec for sec in security_group if sec.get('_doc_index') == i + 1)
-                    security.pop('_doc_index', None)
-                    added_securities.append({
-                        'security_id': sec_id,
-                        'security_name': security.get('name', ''),
-                        'document_index': i + 1,
-                        'previous_document_index': i,
-                        'security_data': security
-                    })
-        
-        # Calculate statistics
-        total_securities = len(unique_securities)
-        securities_with_changes = len({result['security_id'] for result in comparison_results})
+            old_holding = table.records[pair.old_row]
+            new_holding = table.records[pair.new_row]
+            comparison_results.append({
+                id_field: pair.key,
+                'security_name': old_holding.get('name', '') or new_holding.get('name', ''),
+                'old_document_index': int(pair.old_snapshot),
+                'new_document_index': int(pair.new_snapshot),
+                'changes': changes
+            })
+        
+        # Find holdings added or removed between adjacent documents
+        added, removed = table.presence_changes()
+        
+        added_holdings = []
+        for key, snapshot, row in zip(added['key'], added['snapshot'], added['row']):
+            holding = table.records[row]
+            added_holdings.append({
+                id_field: key,
+                'security_name': holding.get('name', ''),
+                'document_index': int(snapshot),
+                'previous_document_index': int(snapshot) - 1,
+                data_field: holding
+            })
+        
+        removed_holdings = []
+        for key, snapshot, row in zip(removed['key'], removed['snapshot'], removed['row']):
+            holding = table.records[row]
+            removed_holdings.append({
+                id_field: key,
+                'security_name': holding.get('name', ''),
+                'document_index': int(snapshot),
+                'next_document_index': int(snapshot) + 1,
+                data_field: holding
+            })
         
         return {
             'status': 'success',
-            'total_unique_securities': total_securities,
-            'securities_with_changes': securities_with_changes,
-            'added_securities': added_securities,
-            'removed_securities': removed_securities,
+            f'total_unique_{holding_type}': table.key_count,
+            f'{holding_type}_with_changes': len({result[id_field] for result in comparison_results}),
+            f'added_{holding_type}': added_holdings,
+            f'removed_{holding_type}': removed_holdings,
             'changes': comparison_results
         }
     
-    def _identify_unique_securities(self, all_securities: List[List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        Identify unique securities across all documents.
-        
-        Args:
-            all_securities: List of securities lists from each document
-            
-        Returns:
-            Dictionary mapping unique security IDs to all instances of that security
-        """
-        # Get key fields for securities
-        key_fields = self.comparison_config['key_fields']['securities']
-        
-        # Dictionary to store unique securities
-        unique_securities = {}
-        
-        # Process securities from each document
-        for doc_securities in all_securities:
-            for security in doc_securities:
-                # Generate a unique identifier for the security
-                sec_id = self._generate_security_id(security, key_fields)
-                
-                if sec_id in unique_securities:
-                    unique_securities[sec_id].append(security)
-                else:
-                    unique_securities[sec_id] = [security]
-        
-        return unique_securities
-    
     def _generate_security_id(self, security: Dict[str, Any], key_fields: List[str]) -> str:
         """
         Generate a unique identifier for a security.
@@ -486,27 +631,13 @@ class DocumentComparisonAgent:
         
         Args:
             documents: List of documents to compare
-            
+        
         Returns:
             Dictionary with positions comparison results
         """
-        # Extract positions from each document
-        all_positions = []
-        for i, doc in enumerate(documents):
-            positions = []
-            
-            # Check for dedicated positions section
-            if 'positions' in doc and doc['positions']:
-                positions = doc['positions']
-            # Alternatively, use securities as positions
-            elif 'securities' in doc and doc['securities']:
-                positions = doc['securities']
-            
-            # Add document index to each position
-            for position in positions:
-                position['_doc_index'] = i
-            
-            all_positions.append(positions)
+        # Extract positions from each document, using securities as positions
+        # when there is no dedicated positions section
+        all_positions = [doc.get('positions') or doc.get('securities') or [] for doc in documents]
         
         # Check if any positions were found
         if all(not positions for positions in all_positions):
@@ -515,127 +646,7 @@ class DocumentComparisonAgent:
                 'message': "No positions found in documents"
             }
         
-        # Identify unique positions
-        unique_positions = self._identify_unique_positions(all_positions)
-        
-        # Compare positions across documents
-        comparison_results = []
-        
-        for pos_id, position_group in unique_positions.items():
-            # Skip if position only appears in one document
-            if len(position_group) < 2:
-                continue
-            
-            # Find changes between consecutive documents
-            for i in range(len(position_group) - 1):
-                old_pos = position_group[i]
-                new_pos = position_group[i + 1]
-                
-                old_doc_index = old_pos.pop('_doc_index')
-                new_doc_index = new_pos.pop('_doc_index')
-                
-                # Compare the positions
-                changes = self._compare_position_attributes(old_pos, new_pos)
-                
-                if changes['has_changes']:
-                    comparison_results.append({
-                        'position_id': pos_id,
-                        'security_name': old_pos.get('name', '') or new_pos.get('name', ''),
-                        'old_document_index': old_doc_index,
-                        'new_document_index': new_doc_index,
-                        'changes': changes['changes']
-                    })
-        
-        # Find added and removed positions
-        added_positions = []
-        removed_positions = []
-        
-        for pos_id, position_group in unique_positions.items():
-            # Get list of document indices this position appears in
-            doc_indices = [pos.get('_doc_index') for pos in position_group]
-            
-            # Check for missing documents (gaps in sequence)
-            for i in range(len(documents) - 1):
-                if i in doc_indices and i + 1 not in doc_indices:
-                    # Position removed in next document
-                    position = next(pos for pos in position_group if pos.get('_doc_index') == i)
-                    position.pop('_doc_index', None)
-                    removed_positions.append({
-                        'position_id': pos_id,
-                        'security_name': position.get('name', ''),
-                        'document_index': i,
-                        'next_document_index': i + 1,
-                        'position_data': position
-                    })
-                
-                if i not in doc_indices and i + 1 in doc_indices:
-                    # Position added in next document
-                    position = next(pos for pos in position_group if pos.get('_doc_index') == i + 1)
-                    position.pop('_doc_index', None)
-                    added_positions.append({
-                        'position_id': pos_id,
-                        'security_name': position.get('name', ''),
-                        'document_index': i + 1,
-                        'previous_document_index': i,
-                        'position_data': position
-                    })
-        
-        # Calculate statistics
-        total_positions = len(unique_positions)
-        positions_with_changes = len({result['position_id'] for result in comparison_results})
-        
-        return {
-            'status': 'success',
-            'total_unique_positions': total_positions,
-            'positions_with_changes': positions_with_changes,
-            'added_positions': added_positions,
-            'removed_positions': removed_positions,
-            'changes': comparison_results
-        }
-    
-    def _identify_unique_positions(self, all_positions: List[List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
-        """
-        Identify unique positions across all documents.
-        
-        Args:
-            all_positions: List of positions lists from each document
-            
-        Returns:
-            Dictionary mapping unique position IDs to all instances of that position
-        """
-        # Get key fields for positions
-        key_fields = self.comparison_config['key_fields']['positions']
-        
-        # Dictionary to store unique positions
-        unique_positions = {}
-        
-        # Process positions from each document
-        for doc_positions in all_positions:
-            for position in doc_positions:
-                # Generate a unique identifier for the position
-                pos_id = self._generate_security_id(position, key_fields)
-                
-                if pos_id in unique_positions:
-                    unique_positions[pos_id].append(position)
-                else:
-                    unique_positions[pos_id] = [position]
-        
-        return unique_positions
-    
-    def _compare_position_attributes(self, old_position: Dict[str, Any], 
-                                   new_position: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Compare attributes of two position objects.
-        
-        Args:
-            old_position: Old position data
-            new_position: New position data
-            
-        Returns:
-            Dictionary with comparison results
-        """
-        # This uses the same comparison logic as for securities
-        return self._compare_security_attributes(old_position, new_position)
+        return self._compare_holdings(all_positions, 'positions', 'position')
     
     def _compare_transactions(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -652,11 +663,8 @@ class DocumentComparisonAgent:
         for i, doc in enumerate(documents):
             transactions = doc.get('transactions', [])
             
-            # Add document index to each transaction
-            for transaction in transactions:
-                transaction['_doc_index'] = i
-            
-            all_transactions.append(transactions)
+            # Tag copies of the transactions with their document index
+            all_transactions.append([dict(transaction, _doc_index=i) for transaction in transactions])
         
         # Check if any transactions were found
         if all(not transactions for transactions in all_transactions):
@@ -767,16 +775,7 @@ class DocumentComparisonAgent:
             return None
         
         # Extract summary data from each document
-        summaries = []
-        for i, doc in enumerate(documents):
-            summary = doc.get('summary', {})
-            if not summary:
-                summaries.append({})
-                continue
-            
-            # Add document index
-            summary['_doc_index'] = i
-            summaries.append(summary)
+        summaries = [doc.get('summary') or {} for doc in documents]
         
         # Check if any summaries were found
         if all(not summary for summary in summaries):
@@ -797,16 +796,13 @@ class DocumentComparisonAgent:
             if not old_summary or not new_summary:
                 continue
             
-            old_doc_index = old_summary.pop('_doc_index')
-            new_doc_index = new_summary.pop('_doc_index')
-            
             # Compare the summaries
             changes = self._compare_summary_attributes(old_summary, new_summary)
             
             if changes['has_changes']:
                 comparison_results.append({
-                    'old_document_index': old_doc_index,
-                    'new_document_index': new_doc_index,
+                    'old_document_index': i,
+                    'new_document_index': i + 1,
                     'changes': changes['changes']
                 })
         
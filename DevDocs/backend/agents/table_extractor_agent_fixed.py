@@ -28,12 +28,17 @@ class TableExtractorAgent(BaseAgent):
 
         Args:
             api_key: OpenRouter API key (optional)
-            **kwargs: Additional parameters for the base agent
+            **kwargs: Additional parameters, including quality_threshold (table quality
+                between 0 and 1 that ends extraction for a page) and max_workers
         """
         super().__init__(name="Table Extractor Agent")
         self.api_key = api_key
         self.description = "I extract tables from documents."
 
+        # Stop trying further extractors on a page once it yields a table of this quality
+        self.quality_threshold = kwargs.get('quality_threshold', 0.7)
+        self.max_workers = kwargs.get('max_workers', None)
+
         # Check for required libraries
         self.available_extractors = self._check_available_extractors()
         if not self.available_extractors:
@@ -163,35 +168,26 @@ class TableExtractorAgent(BaseAgent):
         else:
             extractors = self.available_extractors
         
-        # Extract tables using available extractors
-        tables = []
+        from services.table_ensemble import run_extractor_ensemble, resolve_pages, DEFAULT_MAX_WORKERS
         
-        # Extract with pdfplumber
-        if extractors.get('pdfplumber', False):
-            try:
-                pdfplumber_tables = self._extract_with_pdfplumber(file_path, pages)
-                tables.extend(pdfplumber_tables)
-                logger.info(f"Extracted {len(pdfplumber_tables)} tables with pdfplumber")
-            except Exception as e:
-                logger.error(f"Error extracting tables with pdfplumber: {str(e)}")
-        
-        # Extract with camelot
-        if extractors.get('camelot', False):
-            try:
-                camelot_tables = self._extract_with_camelot(file_path, pages)
-                tables.extend(camelot_tables)
-                logger.info(f"Extracted {len(camelot_tables)} tables with camelot")
-            except Exception as e:
-                logger.error(f"Error extracting tables with camelot: {str(e)}")
-        
-        # Extract with tabula
-        if extractors.get('tabula', False):
-            try:
-                tabula_tables = self._extract_with_tabula(file_path, pages)
-                tables.extend(tabula_tables)
-                logger.info(f"Extracted {len(tabula_tables)} tables with tabula")
-            except Exception as e:
-                logger.error(f"Error extracting tables with tabula: {str(e)}")
+        # Extractors in order of preference
+        ensemble = [
+            (name, lambda selection, method=method: method(file_path, selection))
+            for name, method in (
+                ('pdfplumber', self._extract_with_pdfplumber),
+                ('camelot', self._extract_with_camelot),
+                ('tabula', self._extract_with_tabula)
+            )
+            if extractors.get(name, False)
+        ]
+        
+        # Run the extractors concurrently per page range, stopping early on pages with a good table
+        tables = run_extractor_ensemble(
+            ensemble,
+            resolve_pages(file_path, pages),
+            quality_threshold=self.quality_threshold,
+            max_workers=self.max_workers or DEFAULT_MAX_WORKERS
+        )
         
         # Remove duplicates
         tables = self._remove_duplicate_tables(tables)
@@ -549,42 +545,10 @@ class TableExtractorAgent(BaseAgent):
         Returns:
             List of dictionaries with table information
         """
-        import tabula
-        
-        tables = []
-        
-        # Convert pages string to tabula format
-        if pages == 'all':
-            tabula_pages = 'all'
-        else:
-            tabula_pages = pages
+        from services.table_extraction_service import get_table_extraction_service
         
-        # Extract tables
-        tabula_tables = tabula.read_pdf(
-            pdf_path,
-            pages=tabula_pages,
-            multiple_tables=True
-        )
-        
-        # Process tables
-        for i, df in enumerate(tabula_tables):
-            if not df.empty:
-                # Create table info
-                table_info = {
-                    'id': f'tabula_{i+1}',
-                    'page': i + 1,  # Approximate page number
-                    'extraction_method': 'tabula',
-                    'table_number': i + 1,
-                    'data': df.to_dict(orient='records'),
-                    'headers': df.columns.tolist(),
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'confidence': 0.75  # Arbitrary confidence for tabula
-                }
-                
-                tables.append(table_info)
-        
-        return tables
+        # The shared service keeps the tabula JVM running between calls
+        return get_table_extraction_service().extract_tables(pdf_path, pages, backends=['tabula'])
 
     def _extract_table_data_from_image(self, table_img) -> List[List[str]]:
         """
@@ -648,119 +612,9 @@ class TableExtractorAgent(BaseAgent):
         Returns:
             List of unique tables
         """
-        if not tables:
-            return []
-        
-        # Group tables by page
-        tables_by_page = {}
-        for table in tables:
-            page = table.get('page', 1)
-            if page not in tables_by_page:
-                tables_by_page[page] = []
-            tables_by_page[page].append(table)
-        
-        # Process each page
-        unique_tables = []
-        for page, page_tables in tables_by_page.items():
-            # Sort tables by confidence
-            sorted_tables = sorted(page_tables, key=lambda t: t.get('confidence', 0), reverse=True)
-            
-            # Keep track of processed tables
-            processed = set()
-            
-            for i, table1 in enumerate(sorted_tables):
-                if i in processed:
-                    continue
-                
-                # Add to unique tables
-                unique_tables.append(table1)
-                processed.add(i)
-                
-                # Check for duplicates
-                for j, table2 in enumerate(sorted_tables):
-                    if j in processed or i == j:
-                        continue
-                    
-                    # Check if tables are similar
-                    if self._are_tables_similar(table1, table2):
-                        processed.add(j)
-        
-        return unique_tables
-
-    def _are_tables_similar(self, table1: Dict[str, Any], table2: Dict[str, Any]) -> bool:
-        """
-        Check if two tables are similar based on content.
-
-        Args:
-            table1: First table
-            table2: Second table
-
-        Returns:
-            True if tables are similar, False otherwise
-        """
-        # Check if tables are on the same page
-        if 'page' in table1 and 'page' in table2 and table1['page'] != table2['page']:
-            return False
-        
-        # Check if tables have similar bounding boxes
-        if 'bbox' in table1 and 'bbox' in table2:
-            bbox1 = table1['bbox']
-            bbox2 = table2['bbox']
-            
-            # Calculate overlap
-            x_overlap = max(0, min(bbox1[2], bbox2[2]) - max(bbox1[0], bbox2[0]))
-            y_overlap = max(0, min(bbox1[3], bbox2[3]) - max(bbox1[1], bbox2[1]))
-            
-            # Calculate areas
-            area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
-            area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
-            overlap_area = x_overlap * y_overlap
-            
-            # Check if overlap is significant
-            if overlap_area > 0.5 * min(area1, area2):
-                return True
-        
-        # Check if tables have similar content
-        if 'headers' in table1 and 'headers' in table2:
-            headers1 = table1['headers']
-            headers2 = table2['headers']
-            
-            # Check if headers are similar
-            if len(headers1) == len(headers2):
-                similar_headers = sum(1 for h1, h2 in zip(headers1, headers2) if self._are_strings_similar(h1, h2))
-                if similar_headers >= 0.7 * len(headers1):
-                    return True
-        
-        return False
-
-    def _are_strings_similar(self, str1: str, str2: str) -> bool:
-        """
-        Check if two strings are similar.
-
-        Args:
-            str1: First string
-            str2: Second string
-
-        Returns:
-            True if strings are similar, False otherwise
-        """
-        # Convert to lowercase and remove whitespace
-        s1 = str(str1).lower().strip()
-        s2 = str(str2).lower().strip()
-        
-        # Check if strings are identical
-        if s1 == s2:
-            return True
-        
-        # Check if one string is a substring of the other
-        if s1 in s2 or s2 in s1:
-            return True
-        
-        # Calculate similarity
-        from difflib import SequenceMatcher
-        similarity = SequenceMatcher(None, s1, s2).ratio()
+        from services.table_ensemble import remove_duplicate_tables
         
-        return similarity > 0.7
+        return remove_duplicate_tables(tables)
 
     def classify_tables(self, tables: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -4,7 +4,9 @@ API endpoints for financial agents.
 import os
 import io
 import base64
+import logging
 import tempfile
+import threading
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
 from fastapi.responses import JSONResponse
@@ -14,6 +16,7 @@ import numpy as np
 import pandas as pd
 
 from ..agents.agent_manager import AgentManager
+from ..agents.agent_executor import AgentExecutor, AgentTimeoutError, AgentBusyError
 from ..agents.financial_table_detector_agent import FinancialTableDetectorAgent
 from ..agents.financial_data_analyzer_agent import FinancialDataAnalyzerAgent
 from ..agents.document_integration_agent import DocumentIntegrationAgent
@@ -28,6 +31,8 @@ from ..agents.hebrew_ocr_agent import HebrewOCRAgent
 from ..agents.isin_extractor_agent import ISINExtractorAgent
 from ..agents.enhanced_securities_extractor_agent import EnhancedSecuritiesExtractorAgent
 
+logger = logging.getLogger(__name__)
+
 # Create router
 router = APIRouter(
     prefix="/api/financial",
@@ -118,98 +123,187 @@ class SecuritiesExtractRequest(BaseModel):
     document_path: Optional[str] = None
     enhanced_extraction: Optional[bool] = True
 
+# Maximum concurrent calls for CPU-heavy agents; other agents share the pool freely
+AGENT_CONCURRENCY_LIMITS = {
+    "table_detector": 2,
+    "document_preprocessor": 2,
+    "hebrew_ocr": 2,
+    "enhanced_securities_extractor": 1
+}
+
 # Helper functions
+_agent_manager: Optional[AgentManager] = None
+_agent_manager_lock = threading.Lock()
+_agent_executor: Optional[AgentExecutor] = None
+
+def _register_agents(manager: AgentManager) -> None:
+    """Register the agents served by this API for creation on first use."""
+    manager.register_agent("table_detector", FinancialTableDetectorAgent)
+    manager.register_agent("data_analyzer", FinancialDataAnalyzerAgent)
+    manager.register_agent("document_integration", DocumentIntegrationAgent)
+    manager.register_agent("query_engine", QueryEngineAgent)
+    manager.register_agent("notification", NotificationAgent)
+    manager.register_agent("data_export", DataExportAgent)
+    manager.register_agent("document_comparison", DocumentComparisonAgent)
+    manager.register_agent("financial_advisor", FinancialAdvisorAgent)
+    manager.register_agent("document_merge", DocumentMergeAgent)
+    manager.register_agent("document_preprocessor", DocumentPreprocessorAgent)
+    manager.register_agent("hebrew_ocr", HebrewOCRAgent)
+    manager.register_agent("isin_extractor", ISINExtractorAgent)
+    manager.register_agent(
+        "enhanced_securities_extractor",
+        EnhancedSecuritiesExtractorAgent,
+        debug=True,
+        log_level="INFO",
+        reference_db_path=os.path.join(os.getcwd(), "data", "securities_reference.json")
+    )
+
 def get_agent_manager():
-    """Get the agent manager."""
+    """
+    Get the process-wide agent manager.
+
+    Agents are created on first use and reused across requests. If the
+    OpenRouter API key changes, agents are re-created with the new key.
+    """
+    global _agent_manager
+
     api_key = os.environ.get("OPENROUTER_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="OpenRouter API key not configured")
 
-    manager = AgentManager(api_key=api_key)
+    manager = _agent_manager
+    if manager is None or manager.api_key != api_key:
+        with _agent_manager_lock:
+            if _agent_manager is None:
+                _agent_manager = AgentManager(api_key=api_key)
+                _register_agents(_agent_manager)
+            elif _agent_manager.api_key != api_key:
+                _agent_manager.reload(api_key=api_key)
+            manager = _agent_manager
 
-    # Create agents if they don't exist
-    if "table_detector" not in manager.agents:
-        manager.create_agent(
-            "table_detector",
-            FinancialTableDetectorAgent
-        )
+    return manager
 
-    if "data_analyzer" not in manager.agents:
-        manager.create_agent(
-            "data_analyzer",
-            FinancialDataAnalyzerAgent
-        )
+def reload_agent_manager() -> AgentManager:
+    """
+    Reload the agent configuration from the environment.
 
-    if "document_integration" not in manager.agents:
-        manager.create_agent(
-            "document_integration",
-            DocumentIntegrationAgent
-        )
+    Existing agents are dropped and re-created on their next use.
 
-    if "query_engine" not in manager.agents:
-        manager.create_agent(
-            "query_engine",
-            QueryEngineAgent
-        )
+    Returns:
+        The agent manager
+    """
+    manager = get_agent_manager()
 
-    if "notification" not in manager.agents:
-        manager.create_agent(
-            "notification",
-            NotificationAgent
-        )
+    with _agent_manager_lock:
+        manager.reload(api_key=os.environ.get("OPENROUTER_API_KEY"))
+        _register_agents(manager)
 
-    if "data_export" not in manager.agents:
-        manager.create_agent(
-            "data_export",
-            DataExportAgent
-        )
+    return manager
 
-    if "document_comparison" not in manager.agents:
-        manager.create_agent(
-            "document_comparison",
-            DocumentComparisonAgent
-        )
+def warm_up_agents(agent_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Create agents ahead of their first request.
 
-    if "financial_advisor" not in manager.agents:
-        manager.create_agent(
-            "financial_advisor",
-            FinancialAdvisorAgent
-        )
+    Args:
+        agent_ids: Agents to create (defaults to all agents)
 
-    if "document_merge" not in manager.agents:
-        manager.create_agent(
-            "document_merge",
-            DocumentMergeAgent
-        )
+    Returns:
+        IDs of the agents that are ready
+    """
+    return get_agent_manager().warm_up(agent_ids)
 
-    if "document_preprocessor" not in manager.agents:
-        manager.create_agent(
-            "document_preprocessor",
-            DocumentPreprocessorAgent
-        )
+@router.on_event("startup")
+def warm_up_agents_on_startup():
+    """Warm up the agents listed in FINANCIAL_AGENTS_WARM_UP ("all" or comma-separated IDs)."""
+    warm_up = os.environ.get("FINANCIAL_AGENTS_WARM_UP", "").strip()
+    if not warm_up or not os.environ.get("OPENROUTER_API_KEY"):
+        return
 
-    if "hebrew_ocr" not in manager.agents:
-        manager.create_agent(
-            "hebrew_ocr",
-            HebrewOCRAgent
-        )
+    agent_ids = None if warm_up == "all" else [agent_id.strip() for agent_id in warm_up.split(",") if agent_id.strip()]
+    ready = warm_up_agents(agent_ids)
+    logger.info(f"Warmed up agents: {', '.join(ready)}")
 
-    if "isin_extractor" not in manager.agents:
-        manager.create_agent(
-            "isin_extractor",
-            ISINExtractorAgent
-        )
-        
-    if "enhanced_securities_extractor" not in manager.agents:
-        manager.create_agent(
-            "enhanced_securities_extractor",
-            EnhancedSecuritiesExtractorAgent,
-            debug=True,
-            log_level="INFO",
-            reference_db_path=os.path.join(os.getcwd(), "data", "securities_reference.json")
-        )
+def get_agent_executor():
+    """
+    Get the process-wide agent executor.
 
-    return manager
+    Configured with FINANCIAL_AGENTS_EXECUTOR ("thread" or "process"),
+    FINANCIAL_AGENTS_MAX_WORKERS, FINANCIAL_AGENTS_MAX_QUEUE and
+    FINANCIAL_AGENTS_TIMEOUT (seconds).
+    """
+    global _agent_executor
+
+    # Fail early if the agents cannot be configured
+    get_agent_manager()
+
+    if _agent_executor is None:
+        with _agent_manager_lock:
+            if _agent_executor is None:
+                max_workers = os.environ.get("FINANCIAL_AGENTS_MAX_WORKERS")
+                max_queue_size = os.environ.get("FINANCIAL_AGENTS_MAX_QUEUE")
+                timeout = os.environ.get("FINANCIAL_AGENTS_TIMEOUT", "300")
+
+                _agent_executor = AgentExecutor(
+                    get_agent_manager,
+                    executor_type=os.environ.get("FINANCIAL_AGENTS_EXECUTOR", "thread"),
+                    max_workers=int(max_workers) if max_workers else None,
+                    agent_limits=AGENT_CONCURRENCY_LIMITS,
+                    max_queue_size=int(max_queue_size) if max_queue_size else None,
+                    timeout=float(timeout) if timeout else None
+                )
+
+    return _agent_executor
+
+async def run_agent(executor: AgentExecutor, agent_id: str, **kwargs) -> Dict[str, Any]:
+    """
+    Run an agent off the event loop, mapping executor errors to HTTP errors.
+
+    Args:
+        executor: Agent executor
+        agent_id: Agent ID
+        **kwargs: Keyword arguments for the agent
+
+    Returns:
+        Agent result
+    """
+    try:
+        return await executor.run_agent(agent_id, **kwargs)
+    except AgentTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except AgentBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def run_pipeline(executor: AgentExecutor, pipeline: List[Dict[str, Any]], input_data: Any = None) -> Dict[str, Any]:
+    """
+    Run an agent pipeline off the event loop, mapping a failed step to an HTTP error.
+
+    Args:
+        executor: Agent executor
+        pipeline: Pipeline steps (see AgentManager.run_pipeline)
+        input_data: Input data for the first steps
+
+    Returns:
+        Pipeline results, with the output of each step under its output_key
+    """
+    results = await executor.run_pipeline(pipeline, input_data)
+
+    for step in results["steps"]:
+        if step["success"] or step.get("skipped"):
+            continue
+
+        if step.get("error_type") == AgentTimeoutError.__name__:
+            raise HTTPException(status_code=504, detail=step["error"])
+        if step.get("error_type") == AgentBusyError.__name__:
+            raise HTTPException(status_code=503, detail=step["error"])
+        raise HTTPException(status_code=500, detail=f"Agent '{step['agent_id']}' failed: {step['error']}")
+
+    return results
+
+@router.on_event("shutdown")
+def shutdown_agent_executor():
+    """Shut down the agent executor's worker pool."""
+    if _agent_executor is not None:
+        _agent_executor.shutdown(wait=False)
 
 def decode_image(image_base64: str):
     """Decode base64 image."""
@@ -243,17 +337,32 @@ async def health_check():
         "api_key_configured": bool(os.environ.get("OPENROUTER_API_KEY"))
     }
 
+@router.get("/agents/metrics")
+async def agent_metrics(
+    executor: AgentExecutor = Depends(get_agent_executor)
+):
+    """
+    Get agent executor queue depth and call counters.
+
+    Args:
+        executor: Agent executor
+
+    Returns:
+        Executor metrics
+    """
+    return executor.get_metrics()
+
 @router.post("/detect-tables")
 async def detect_tables(
     request: TableDetectionRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Detect tables in an image.
 
     Args:
         request: Table detection request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Detected tables
@@ -263,40 +372,46 @@ async def detect_tables(
         image = decode_image(request.image_base64)
 
         # Detect tables
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "table_detector",
             image=image,
             lang=request.lang
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting tables: {str(e)}")
 
 @router.post("/analyze-data")
 async def analyze_data(
     request: DataAnalysisRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Analyze financial data.
 
     Args:
         request: Data analysis request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Analyzed data
     """
     try:
         # Analyze data
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "data_analyzer",
             table_data=request.table_data,
             table_type=request.table_type
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing data: {str(e)}")
 
@@ -304,7 +419,7 @@ async def analyze_data(
 async def upload_and_analyze(
     file: UploadFile = File(...),
     lang: str = Form("heb+eng"),
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Upload a file, detect tables, and analyze the data.
@@ -312,7 +427,7 @@ async def upload_and_analyze(
     Args:
         file: Uploaded file
         lang: OCR language
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Analysis results
@@ -330,26 +445,35 @@ async def upload_and_analyze(
             if image is None:
                 raise HTTPException(status_code=400, detail="Invalid image file")
 
-            # Detect tables
-            detection_result = manager.run_agent(
-                "table_detector",
-                image=image,
-                lang=lang
-            )
-
-            # Analyze each table
-            analysis_results = []
-            for table in detection_result['tables']:
-                analysis = manager.run_agent(
-                    "data_analyzer",
-                    table_data=table['data'],
-                    table_type=table['region'].get('table_type', 'unknown')
-                )
+            # Detect tables, then analyze all tables concurrently
+            results = await run_pipeline(executor, [
+                {
+                    "id": "detection",
+                    "agent_id": "table_detector",
+                    "depends_on": [],
+                    "params": {"image": image, "lang": lang},
+                    "output_key": "detection"
+                },
+                {
+                    "id": "analyses",
+                    "agent_id": "data_analyzer",
+                    "depends_on": ["detection"],
+                    "for_each": "tables",
+                    "params": {"table_type": "unknown"},
+                    "inputs": {"table_data": "data", "table_type": "region.table_type"},
+                    "output_key": "analyses"
+                }
+            ])
+            detection_result = results["detection"]
+            analyses = results["analyses"]
 
-                analysis_results.append({
+            analysis_results = [
+                {
                     'region': table['region'],
                     'analysis': analysis
-                })
+                }
+                for table, analysis in zip(detection_result['tables'], analyses)
+            ]
 
             return {
                 'detection': detection_result,
@@ -361,7 +485,8 @@ async def upload_and_analyze(
             df = pd.read_csv(io.BytesIO(content))
 
             # Analyze data
-            analysis = manager.run_agent(
+            analysis = await run_agent(
+                executor,
                 "data_analyzer",
                 table_data=df
             )
@@ -373,6 +498,8 @@ async def upload_and_analyze(
         else:
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
@@ -380,7 +507,7 @@ async def upload_and_analyze(
 async def process_document(
     file: UploadFile = File(...),
     lang: str = Form("heb+eng"),
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Process a financial document.
@@ -388,7 +515,7 @@ async def process_document(
     Args:
         file: Uploaded file
         lang: OCR language
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Processing results
@@ -410,42 +537,53 @@ async def process_document(
                 if image is None:
                     raise HTTPException(status_code=400, detail="Invalid image file")
 
-                # Detect tables
-                detection_result = manager.run_agent(
-                    "table_detector",
-                    image_path=temp_path,
-                    lang=lang
-                )
-
-                # Analyze each table
-                analysis_results = []
-                for table in detection_result['tables']:
-                    analysis = manager.run_agent(
-                        "data_analyzer",
-                        table_data=table['data'],
-                        table_type=table['region'].get('table_type', 'unknown')
-                    )
+                # Detect tables, then analyze every table and integrate the document
+                # concurrently; integration only needs the detected tables and text
+                results = await run_pipeline(executor, [
+                    {
+                        "id": "detection",
+                        "agent_id": "table_detector",
+                        "depends_on": [],
+                        "params": {"image_path": temp_path, "lang": lang},
+                        "output_key": "detection"
+                    },
+                    {
+                        "id": "analyses",
+                        "agent_id": "data_analyzer",
+                        "depends_on": ["detection"],
+                        "for_each": "tables",
+                        "params": {"table_type": "unknown"},
+                        "inputs": {"table_data": "data", "table_type": "region.table_type"},
+                        "output_key": "analyses"
+                    },
+                    {
+                        "id": "integration",
+                        "agent_id": "document_integration",
+                        "depends_on": ["detection"],
+                        "params": {
+                            "extracted_text": "",
+                            "financial_data": {
+                                'portfolio': {
+                                    'securities': [],
+                                    'summary': {}
+                                }
+                            }
+                        },
+                        "inputs": {"extracted_text": "text", "tables_data": "tables"},
+                        "output_key": "integration"
+                    }
+                ])
+                detection_result = results["detection"]
+                analyses = results["analyses"]
+                integrated_data = results["integration"]
 
-                    analysis_results.append({
+                analysis_results = [
+                    {
                         'region': table['region'],
                         'analysis': analysis
-                    })
-
-                # Extract text from the image
-                extracted_text = detection_result.get('text', '')
-
-                # Integrate document data
-                integrated_data = manager.run_agent(
-                    "document_integration",
-                    extracted_text=extracted_text,
-                    tables_data=detection_result['tables'],
-                    financial_data={
-                        'portfolio': {
-                            'securities': [],
-                            'summary': {}
-                        }
                     }
-                )
+                    for table, analysis in zip(detection_result['tables'], analyses)
+                ]
 
                 return {
                     'file_name': file.filename,
@@ -459,7 +597,8 @@ async def process_document(
                 df = pd.read_csv(temp_path)
 
                 # Analyze data
-                analysis = manager.run_agent(
+                analysis = await run_agent(
+                    executor,
                     "data_analyzer",
                     table_data=df
                 )
@@ -469,7 +608,8 @@ async def process_document(
                     csv_text = f.read()
 
                 # Integrate document data
-                integrated_data = manager.run_agent(
+                integrated_data = await run_agent(
+                    executor,
                     "document_integration",
                     extracted_text=csv_text,
                     tables_data=[{
@@ -503,27 +643,30 @@ async def process_document(
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 @router.post("/integrate-document")
 async def integrate_document(
     request: DocumentIntegrationRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Integrate document data.
 
     Args:
         request: Document integration request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Integrated document data
     """
     try:
         # Integrate document data
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_integration",
             extracted_text=request.extracted_text,
             tables_data=request.tables_data,
@@ -533,81 +676,90 @@ async def integrate_document(
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error integrating document data: {str(e)}")
 
 @router.post("/query")
 async def query_document(
     request: QueryRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Query document data.
 
     Args:
         request: Query request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Query results
     """
     try:
         # Process query
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "query_engine",
             query=request.query,
             document_data=request.document_data
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 @router.post("/notifications")
 async def generate_notifications(
     request: NotificationRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Generate notifications based on document data.
 
     Args:
         request: Notification request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Generated notifications
     """
     try:
         # Generate notifications
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "notification",
             document_data=request.document_data,
             user_settings=request.user_settings
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating notifications: {str(e)}")
 
 @router.post("/export")
 async def export_data(
     request: DataExportRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Export data to various formats.
 
     Args:
         request: Data export request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Export results
     """
     try:
         # Export data
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "data_export",
             data=request.data,
             format_type=request.format_type,
@@ -616,54 +768,60 @@ async def export_data(
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting data: {str(e)}")
 
 @router.post("/compare-documents")
 async def compare_documents(
     request: DocumentComparisonRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Compare documents and identify changes.
 
     Args:
         request: Document comparison request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Comparison results
     """
     try:
         # Compare documents
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_comparison",
             current_doc=request.current_doc,
             previous_doc=request.previous_doc
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error comparing documents: {str(e)}")
 
 @router.post("/financial-advice")
 async def get_financial_advice(
     request: FinancialAdvisorRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Get financial advice based on document data.
 
     Args:
         request: Financial advisor request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Financial advice and recommendations
     """
     try:
         # Get financial advice
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "financial_advisor",
             analysis_type=request.analysis_type,
             document_data=request.document_data,
@@ -672,100 +830,111 @@ async def get_financial_advice(
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting financial advice: {str(e)}")
 
 @router.post("/merge-documents")
 async def merge_documents(
     request: DocumentMergeRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Merge multiple documents into a single document.
 
     Args:
         request: Document merge request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Merged document
     """
     try:
         # Merge documents
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_merge",
             documents=request.documents
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error merging documents: {str(e)}")
 
 @router.post("/compare-over-time")
 async def compare_over_time(
     request: DocumentCompareOverTimeRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Compare merged documents over time.
 
     Args:
         request: Document compare over time request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Comparison results
     """
     try:
         # Compare documents over time
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_merge",
             method="compare_merged_document_over_time",
             merged_documents=request.merged_documents
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error comparing documents over time: {str(e)}")
 
 @router.post("/comprehensive-report")
 async def generate_comprehensive_report(
     request: ComprehensiveReportRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Generate a comprehensive financial report.
 
     Args:
         request: Comprehensive report request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Comprehensive report
     """
     try:
         # Generate comprehensive report
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_merge",
             method="generate_comprehensive_report",
             merged_document=request.merged_document
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating comprehensive report: {str(e)}")
 
 @router.post("/preprocess-document")
 async def preprocess_document(
     request: DocumentPreprocessRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Preprocess a document image for better OCR results.
 
     Args:
         request: Document preprocess request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Preprocessed image
@@ -775,7 +944,8 @@ async def preprocess_document(
         image = decode_image(request.image_base64)
 
         # Preprocess the image
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "document_preprocessor",
             image=image,
             options=request.options
@@ -790,20 +960,22 @@ async def preprocess_document(
             del result['preprocessed_image']
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error preprocessing document: {str(e)}")
 
 @router.post("/hebrew-ocr")
 async def hebrew_ocr(
     request: HebrewOCRRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Extract text from an image with Hebrew OCR.
 
     Args:
         request: Hebrew OCR request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Extracted text
@@ -813,7 +985,8 @@ async def hebrew_ocr(
         image = decode_image(request.image_base64)
 
         # Extract text
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "hebrew_ocr",
             image=image,
             with_positions=request.with_positions,
@@ -821,27 +994,30 @@ async def hebrew_ocr(
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting text: {str(e)}")
 
 @router.post("/extract-isins")
 async def extract_isins(
     request: ISINExtractRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Extract ISIN numbers from text.
 
     Args:
         request: ISIN extract request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Extracted ISIN numbers
     """
     try:
         # Extract ISINs
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "isin_extractor",
             text=request.text,
             validate=request.validate,
@@ -849,20 +1025,22 @@ async def extract_isins(
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting ISINs: {str(e)}")
 
 @router.post("/extract-securities")
 async def extract_securities(
     request: SecuritiesExtractRequest,
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Extract securities information from a financial document.
 
     Args:
         request: Securities extract request
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Extracted securities information
@@ -887,13 +1065,16 @@ async def extract_securities(
             )
         
         # Extract securities
-        result = manager.run_agent(
+        result = await run_agent(
+            executor,
             "enhanced_securities_extractor",
             pdf_path=pdf_path,
             enhanced_extraction=request.enhanced_extraction
         )
 
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting securities: {str(e)}")
 
@@ -901,7 +1082,7 @@ async def extract_securities(
 async def upload_and_extract_securities(
     file: UploadFile = File(...),
     enhanced_extraction: bool = Form(True),
-    manager: AgentManager = Depends(get_agent_manager)
+    executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """
     Upload a PDF file and extract securities information.
@@ -909,7 +1090,7 @@ async def upload_and_extract_securities(
     Args:
         file: Uploaded PDF file
         enhanced_extraction: Whether to use enhanced extraction
-        manager: Agent manager
+        executor: Agent executor
 
     Returns:
         Extracted securities information
@@ -931,7 +1112,8 @@ async def upload_and_extract_securities(
         
         try:
             # Extract securities
-            result = manager.run_agent(
+            result = await run_agent(
+                executor,
                 "enhanced_securities_extractor",
                 pdf_path=temp_path,
                 enhanced_extraction=enhanced_extraction
@@ -948,5 +1130,8 @@ async def upload_and_extract_securities(
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
                 
+    except HTTPException:
+        raise
+                
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting securities: {str(e)}")
@@ -1,10 +1,11 @@
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Dict, Any, Tuple
 import logging
 import sys
 import asyncio
 import os
-import requests
 import json
+import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pydantic import BaseModel
 from urllib.parse import urljoin, urlparse, urlsplit
@@ -30,6 +31,21 @@ CRAWL4AI_API_TOKEN = os.environ.get("CRAWL4AI_API_TOKEN", DEFAULT_API_KEY)
 headers = {"Authorization": f"Bearer {CRAWL4AI_API_TOKEN}"}
 logger.info(f"API token is {'set' if CRAWL4AI_API_TOKEN else 'not set'}")
 
+# Maximum number of pages crawled at once
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "16"))
+
+# Maximum number of pages crawled at once per host, and minimum seconds between
+# submitting pages of the same host
+CRAWL_HOST_CONCURRENCY = int(os.environ.get("CRAWL_HOST_CONCURRENCY", "8"))
+CRAWL_HOST_DELAY = float(os.environ.get("CRAWL_HOST_DELAY", "0"))
+
+# Task polling starts at a short interval and backs off while the task is running
+POLL_INITIAL_INTERVAL = 0.2
+POLL_MAX_INTERVAL = 5.0
+POLL_BACKOFF = 1.5
+POLL_TIMEOUT = 120.0
+MAX_POLLING_ERRORS = 5
+
 class InternalLink(BaseModel):
     href: str
     text: str
@@ -270,6 +286,316 @@ os.makedirs("storage/markdown", exist_ok=True)
 # Log that we're redirecting files
 logger.info("File redirection active: All files from crawl_results will be redirected to storage/markdown")
 
+class CrawlTaskError(Exception):
+    """Raised when a Crawl4AI task cannot be submitted or does not complete."""
+
+class HostRateLimiter:
+    """
+    Limits how many crawl tasks run at once for each host and how often new
+    tasks are submitted for it.
+    """
+    
+    def __init__(self, max_concurrency: int = CRAWL_HOST_CONCURRENCY, min_interval: float = CRAWL_HOST_DELAY):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+    
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """Wait for a free slot for the URL's host and keep it while the block runs."""
+        host = urlparse(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency))
+        
+        async with semaphore:
+            if self.min_interval > 0:
+                # Reserve the next submission slot for this host
+                loop = asyncio.get_running_loop()
+                now = loop.time()
+                slot = max(now, self._next_slot.get(host, now))
+                self._next_slot[host] = slot + self.min_interval
+                if slot > now:
+                    await asyncio.sleep(slot - now)
+            
+            yield
+
+# Shared HTTP client with a connection pool for all Crawl4AI requests
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared Crawl4AI HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=CRAWL4AI_URL,
+            headers=headers,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=CRAWL_CONCURRENCY * 2,
+                max_keepalive_connections=CRAWL_CONCURRENCY
+            )
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared Crawl4AI HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def run_crawl_task(url: str, client: Optional[httpx.AsyncClient] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Submit a URL to Crawl4AI and wait for the task result.
+    
+    The task is polled with an interval that starts short and backs off while the
+    task is still running.
+    
+    Args:
+        url: URL to crawl
+        client: HTTP client to use (defaults to the shared client)
+    
+    Returns:
+        Tuple of (task_id, result)
+    
+    Raises:
+        CrawlTaskError: If the task cannot be submitted, fails or does not complete in time
+    """
+    client = client or get_http_client()
+    
+    logger.info(f"Submitting crawl job for {url} to Crawl4AI API")
+    try:
+        response = await client.post("/crawl", json={"urls": url})
+    except httpx.ConnectError as e:
+        logger.error(f"Could not connect to Crawl4AI service at {CRAWL4AI_URL}: {str(e)}")
+        raise CrawlTaskError(f"Connection Error: Could not connect to Crawl4AI service at {CRAWL4AI_URL}")
+    except httpx.HTTPError as e:
+        logger.error(f"Request failed: {str(e)}")
+        raise CrawlTaskError(f"Request Error: {str(e)}")
+    
+    try:
+        response_json = response.json()
+    except ValueError as json_error:
+        logger.error(f"Response is not valid JSON: {str(json_error)}")
+        logger.error(f"Response text: {response.text[:500]}")
+        raise CrawlTaskError("Invalid Response: Crawl4AI service returned invalid JSON")
+    
+    if response.is_error:
+        logger.error(f"Response status: {response.status_code}")
+        logger.error(f"Response body: {response.text[:500]}")
+        raise CrawlTaskError(f"Request Error: Crawl4AI service returned status {response.status_code}")
+    
+    task_id = response_json.get("task_id")
+    if not task_id:
+        logger.error(f"No task_id in response: {response_json}")
+        raise CrawlTaskError("Invalid Response: No task_id in Crawl4AI response")
+    
+    logger.info(f"Submitted crawl job for {url}, task ID: {task_id}")
+    
+    # Poll for the result, backing off while the task is running
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + POLL_TIMEOUT
+    poll_interval = POLL_INITIAL_INTERVAL
+    polling_errors = 0
+    
+    while True:
+        status = {}
+        try:
+            status_response = await client.get(f"/task/{task_id}", timeout=10)
+            status_response.raise_for_status()
+            status = status_response.json()
+            polling_errors = 0
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Error polling task {task_id}: {str(e)}")
+            polling_errors += 1
+            
+            # If we've had too many consecutive errors, give up
+            if polling_errors >= MAX_POLLING_ERRORS:
+                logger.error(f"Too many consecutive polling errors ({polling_errors}), giving up")
+                raise CrawlTaskError(f"Polling Error: {str(e)}")
+        
+        task_status = status.get("status")
+        if task_status == "completed":
+            if "result" not in status:
+                logger.error(f"Task completed but no 'result' field in response: {status}")
+                raise CrawlTaskError("Invalid Response: No result in completed task response")
+            
+            logger.info(f"Task {task_id} completed successfully")
+            return task_id, status["result"]
+        
+        if task_status == "failed":
+            error_message = status.get('error', 'Unknown error')
+            logger.error(f"Task {task_id} failed: {error_message}")
+            raise CrawlTaskError(f"Task Failed: {error_message}")
+        
+        if task_status and task_status != "running":
+            logger.warning(f"Unknown task status: {task_status}")
+        
+        if loop.time() + poll_interval > deadline:
+            logger.warning(f"Timeout waiting for crawl result for {url} after {POLL_TIMEOUT} seconds")
+            raise CrawlTaskError("Timeout Error: Crawl4AI service did not complete the task in time")
+        
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+def save_consolidated_result(url: str, result: Dict[str, Any], task_id: str,
+                             root_url: Optional[str], root_task_id: Optional[str]) -> None:
+    """
+    Append a crawled page to the consolidated markdown file of its root URL and
+    record it in the metadata file.
+    """
+    try:
+        # Only create the storage directory for consolidated files
+        os.makedirs("storage/markdown", exist_ok=True)
+        
+        # Skip any code that might try to write to crawl_results
+        if "crawl_results" in str(task_id):
+            logger.warning(f"Attempted to create file in crawl_results directory - skipping")
+            return
+        
+        # Use the root_task_id for file naming to consolidate all related content
+        file_id = root_task_id if root_task_id else task_id
+        
+        # Set the task context for file redirection
+        set_task_context(
+            task_id=task_id,
+            root_url=root_url,
+            content=result.get("markdown", "")
+        )
+        
+        if not result.get("markdown"):
+            logger.warning(f"No markdown content in result for task {task_id}")
+            return
+        
+        # For the consolidated file, we'll append to the root file
+        storage_file = f"storage/markdown/{file_id}.md"
+        
+        # Create a section header for this page
+        page_section = f"\n\n## {result.get('title', 'Untitled Page')}\n"
+        page_section += f"URL: {url}\n\n"
+        page_section += result["markdown"]
+        page_section += "\n\n---\n\n"
+        
+        # If this is the first write to the file, add a header
+        if not os.path.exists(storage_file):
+            header = f"# Consolidated Documentation for {root_url}\n\n"
+            header += f"This file contains content from multiple pages related to {root_url}.\n"
+            header += f"Each section represents a different page that was crawled.\n\n"
+            header += "---\n"
+            page_section = header + page_section
+        
+        # Append to the file if it exists, otherwise create it
+        mode = 'a' if os.path.exists(storage_file) else 'w'
+        with open(storage_file, mode) as f:
+            f.write(page_section)
+        logger.info(f"{'Appended to' if mode == 'a' else 'Created'} consolidated markdown file: {storage_file}")
+        
+        # Update the metadata file with this page's info
+        metadata_file = f"storage/markdown/{file_id}.json"
+        
+        # Read existing metadata if it exists
+        metadata = {}
+        if os.path.exists(metadata_file):
+            try:
+                with open(metadata_file, 'r') as f:
+                    metadata = json.load(f)
+            except json.JSONDecodeError:
+                logger.error(f"Error reading metadata file: {metadata_file}")
+        
+        # Initialize or update the pages list
+        if "pages" not in metadata:
+            metadata = {
+                "title": f"Documentation for {root_url}",
+                "root_url": root_url,
+                "timestamp": datetime.now().isoformat(),
+                "pages": [],
+                "is_consolidated": True
+            }
+        
+        # Add this page to the pages list
+        metadata["pages"].append({
+            "title": result.get("title", "Untitled"),
+            "url": url,
+            "timestamp": datetime.now().isoformat(),
+            "internal_links": len(result.get("links", {}).get("internal", [])),
+            "external_links": len(result.get("links", {}).get("external", []))
+        })
+        
+        # Update the last_updated timestamp
+        metadata["last_updated"] = datetime.now().isoformat()
+        
+        # Write the updated metadata
+        with open(metadata_file, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        logger.info(f"Updated metadata in {metadata_file}")
+    except Exception as e:
+        logger.error(f"Error saving result to files: {str(e)}", exc_info=True)
+
+def extract_page_title(result: Dict[str, Any]) -> str:
+    """Get the page title from a crawl result, falling back to the first markdown line."""
+    title = "Untitled Page"
+    if "title" in result:
+        title = result["title"]
+    elif "markdown" in result and result["markdown"]:
+        content_lines = result["markdown"].split('\n')
+        if content_lines:
+            potential_title = content_lines[0].strip('# ').strip()
+            if potential_title:
+                title = potential_title
+    return title
+
+def extract_internal_links(
+    url: str,
+    result: Dict[str, Any],
+    parent_urls: Set[str],
+    all_internal_links: Set[str]
+) -> List[InternalLink]:
+    """
+    Get the new same-domain links of a crawled page.
+    
+    Links to pages that were already visited or found on another page are skipped,
+    and the remaining links are added to all_internal_links.
+    """
+    internal_links = []
+    if "links" not in result or not isinstance(result["links"], dict):
+        return internal_links
+    
+    base_domain = urlparse(url).netloc
+    seen_internal_links = set()
+    
+    for link in result["links"].get("internal", []):
+        href = link.get("href", "")
+        if not href:
+            continue
+        
+        if not href.startswith(('http://', 'https://')):
+            href = urljoin(url, href)
+        href = normalize_url(href)
+        
+        if (href in parent_urls or
+            href in all_internal_links or
+            href in seen_internal_links):
+            continue
+        
+        if any(excluded in href.lower() for excluded in [
+            "login", "signup", "register", "logout",
+            "account", "profile", "admin"
+        ]):
+            continue
+        
+        if urlparse(href).netloc != base_domain:
+            continue
+        
+        seen_internal_links.add(href)
+        all_internal_links.add(href)
+        
+        internal_links.append(InternalLink(
+            href=href,
+            text=link.get("text", "").strip()
+        ))
+    
+    return internal_links
+
 async def discover_pages(
     url: str,
     max_depth: int = 3,
@@ -278,8 +604,17 @@ async def discover_pages(
     parent_urls: Set[str] = None,
     all_internal_links: Set[str] = None,
     root_url: str = None,
-    root_task_id: str = None
+    root_task_id: str = None,
+    max_concurrency: int = CRAWL_CONCURRENCY
 ) -> List[DiscoveredPage]:
+    """
+    Discover pages breadth-first, starting from a URL.
+    
+    The pages of each depth level are crawled concurrently, limited overall by
+    max_concurrency and per host by the host rate limits. Pages are returned level
+    by level in the order their links were found, and each page is appended to the
+    consolidated markdown as soon as its crawl completes.
+    """
     if seen_urls is None:
         seen_urls = set()
     if parent_urls is None:
@@ -294,448 +629,112 @@ async def discover_pages(
         root_task_id = url_to_filename(root_url)
         logger.info(f"Starting crawl for root URL: {root_url} with filename: {root_task_id}")
     
-    # No longer replacing docs.crawl4ai.com URLs
-    logger.info(f"Processing URL: {url} without replacement")
+    client = get_http_client()
+    limiter = HostRateLimiter()
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    url = normalize_url(url)
-    discovered_pages = []
-    logger.info(f"Starting discovery for URL: {url} at depth {current_depth}/{max_depth}")
-    
-    if url in seen_urls or current_depth > max_depth:
-        logger.info(f"Skipping URL: {url} (seen: {url in seen_urls}, depth: {current_depth})")
-        return discovered_pages
+    async def discover_page(page_url: str):
+        logger.info(f"Starting discovery for URL: {page_url}")
+        try:
+            async with limiter.limit(page_url), semaphore:
+                task_id, result = await run_crawl_task(page_url, client)
+        except CrawlTaskError as e:
+            return None, str(e)
+        except Exception as e:
+            logger.error(f"Error discovering page {page_url}: {str(e)}")
+            return None, f"Connection Error: {str(e)}"
         
-    seen_urls.add(url)
-    parent_urls.add(url)
+        save_consolidated_result(page_url, result, task_id, root_url, root_task_id)
+        return result, None
     
-    try:
-        # Simplify the request for testing
-        # The error in the logs shows that there's an issue with the 'magic' parameter
-        # Let's remove any extra parameters and keep it simple
-        simple_request = {
-            "urls": url
-        }
-        
-        # Submit crawl job to Crawl4AI
-        logger.info(f"Submitting crawl job for {url} to Crawl4AI API with auth headers")
-        
-        # Log the full request for debugging
-        logger.info(f"Request URL: {CRAWL4AI_URL}/crawl")
-        logger.info(f"Headers: {headers}")
-        logger.info(f"Request data: {json.dumps(simple_request)}")
+    discovered_pages = []
+    frontier = [normalize_url(url)]
+    depth = current_depth
+    
+    while frontier and depth <= max_depth:
+        # Visit each URL once
+        level = []
+        for page_url in frontier:
+            if page_url in seen_urls:
+                logger.info(f"Skipping URL: {page_url} (already seen)")
+                continue
+            seen_urls.add(page_url)
+            parent_urls.add(page_url)
+            level.append(page_url)
         
-        # Log environment variables for debugging
-        logger.info(f"CRAWL4AI_URL environment variable: {os.environ.get('CRAWL4AI_URL', 'Not set')}")
-        logger.info(f"CRAWL4AI_API_TOKEN environment variable: {'Set' if os.environ.get('CRAWL4AI_API_TOKEN') else 'Not set'}")
+        logger.info(f"Discovering {len(level)} pages at depth {depth}/{max_depth}")
+        outcomes = await asyncio.gather(*(discover_page(page_url) for page_url in level))
         
-        # Make the request with explicit timeout and error handling
-        try:
-            # Try to ping the Crawl4AI service first
-            import socket
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(2)
-            crawl4ai_host = CRAWL4AI_URL.split('//')[1].split(':')[0]
-            crawl4ai_port = int(CRAWL4AI_URL.split(':')[-1])
-            logger.info(f"Attempting to connect to {crawl4ai_host}:{crawl4ai_port}")
-            result = s.connect_ex((crawl4ai_host, crawl4ai_port))
-            s.close()
-            
-            if result == 0:
-                logger.info(f"Successfully connected to {crawl4ai_host}:{crawl4ai_port}")
-            else:
-                logger.error(f"Could not connect to {crawl4ai_host}:{crawl4ai_port}, error code: {result}")
-                # Instead of raising an exception, return a page with error status
-                # This allows the frontend to display the error instead of failing silently
-                return [DiscoveredPage(
-                    url=url,
-                    title=f"Connection Error: Could not connect to Crawl4AI service at {crawl4ai_host}:{crawl4ai_port}",
-                    status="error",
-                    internalLinks=[]
-                )]
-            
-            # Now make the actual request
-            logger.info(f"Sending POST request to {CRAWL4AI_URL}/crawl")
-            response = requests.post(
-                f"{CRAWL4AI_URL}/crawl",
-                headers=headers,
-                json=simple_request,
-                timeout=30
-            )
-            
-            # Log the response status and headers
-            logger.info(f"Response status code: {response.status_code}")
-            logger.info(f"Response headers: {response.headers}")
-            
-            # Check if the response is valid JSON
-            try:
-                response_json = response.json()
-                logger.info(f"Response JSON: {response_json}")
-            except Exception as json_error:
-                logger.error(f"Response is not valid JSON: {str(json_error)}")
-                logger.error(f"Response text: {response.text[:500]}")
-                # Return a page with error status
-                return [DiscoveredPage(
-                    url=url,
-                    title=f"Invalid Response: Crawl4AI service returned invalid JSON",
+        # Collect links in frontier order so the discovered pages do not depend on completion order
+        frontier = []
+        for page_url, (result, error) in zip(level, outcomes):
+            if error:
+                discovered_pages.append(DiscoveredPage(
+                    url=page_url,
+                    title=error,
                     status="error",
                     internalLinks=[]
-                )]
-            
-            response.raise_for_status()
-            task_id = response_json.get("task_id")
-            
-            if not task_id:
-                logger.error(f"No task_id in response: {response_json}")
-                # Return a page with error status
-                return [DiscoveredPage(
-                    url=url,
-                    title=f"Invalid Response: No task_id in Crawl4AI response",
-                    status="error",
-                    internalLinks=[]
-                )]
-                
-            logger.info(f"Submitted crawl job for {url}, task ID: {task_id}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response body: {e.response.text[:500]}")
-            
-            # Return a page with error status instead of raising an exception
-            return [DiscoveredPage(
-                url=url,
-                title=f"Request Error: {str(e)}",
-                status="error",
-                internalLinks=[]
-            )]
-        except Exception as e:
-            logger.error(f"Connection error: {str(e)}")
-            
-            # Return a page with error status instead of raising an exception
-            return [DiscoveredPage(
-                url=url,
-                title=f"Connection Error: {str(e)}",
-                status="error",
-                internalLinks=[]
-            )]
-        
-        # Poll for result with increased frequency and longer total timeout
-        result = None
-        max_attempts = 120  # Increased from 60 to 120 for complex URLs
-        poll_interval = 1  # Keep at 1 second
-        polling_errors = 0  # Track consecutive polling errors
-        
-        logger.info(f"Starting to poll for task {task_id} result (max attempts: {max_attempts})")
-        for attempt in range(max_attempts):
-            logger.info(f"Polling for task {task_id} result (attempt {attempt+1}/{max_attempts})")
-            try:
-                # Log the polling request details
-                poll_url = f"{CRAWL4AI_URL}/task/{task_id}"
-                logger.info(f"Sending GET request to {poll_url}")
-                
-                status_response = requests.get(
-                    poll_url,
-                    headers=headers,
-                    timeout=10
-                )
-                
-                # Log the response status and headers
-                logger.info(f"Poll response status code: {status_response.status_code}")
-                
-                # Check if the response is valid JSON
-                try:
-                    status = status_response.json()
-                    logger.info(f"Poll response JSON: {status}")
-                except Exception as json_error:
-                    logger.error(f"Poll response is not valid JSON: {str(json_error)}")
-                    logger.error(f"Poll response text: {status_response.text[:500]}")
-                    polling_errors += 1
-                    
-                    # If we've had too many consecutive errors, return an error page
-                    if polling_errors >= 5:
-                        logger.error(f"Too many consecutive polling errors ({polling_errors}), giving up")
-                        return [DiscoveredPage(
-                            url=url,
-                            title=f"Polling Error: Invalid JSON response from Crawl4AI service",
-                            status="error",
-                            internalLinks=[]
-                        )]
-                    
-                    # Otherwise, wait and try again
-                    await asyncio.sleep(poll_interval)
-                    continue
-                
-                status_response.raise_for_status()
-                
-                # Reset the error counter on successful response
-                polling_errors = 0
-                
-                # Check if status field exists
-                if "status" not in status:
-                    logger.error(f"No 'status' field in response: {status}")
-                    continue
-                
-                logger.info(f"Task {task_id} status: {status['status']}")
-                
-                if status["status"] == "completed":
-                    # Check if result field exists
-                    if "result" not in status:
-                        logger.error(f"Task completed but no 'result' field in response: {status}")
-                        return [DiscoveredPage(
-                            url=url,
-                            title=f"Invalid Response: No result in completed task response",
-                            status="error",
-                            internalLinks=[]
-                        )]
-                    
-                    result = status["result"]
-                    logger.info(f"Task {task_id} completed successfully")
-                    
-                    # Save the result to files
-                    try:
-                        # Only create the storage directory for consolidated files
-                        # Disable creation of crawl_results directory to prevent individual files
-                        # os.makedirs("crawl_results", exist_ok=True)
-                        os.makedirs("storage/markdown", exist_ok=True)
-                        
-                        # Skip any code that might try to write to crawl_results
-                        if "crawl_results" in str(task_id):
-                            logger.warning(f"Attempted to create file in crawl_results directory - skipping")
-                            return [DiscoveredPage(
-                                url=url,
-                                title="Configuration Error",
-                                status="error",
-                                internalLinks=[]
-                            )]
-                        
-                        # Use the root_task_id for file naming to consolidate all related content
-                        file_id = root_task_id if root_task_id else task_id
-                        
-                        # We no longer save individual files, only consolidated ones
-                        logger.info(f"Skipping individual file creation for task {task_id} - using consolidated approach only")
-                        
-                        # Set the task context for file redirection
-                        set_task_context(
-                            task_id=task_id,
-                            root_url=root_url,
-                            content=result.get("markdown", "")
-                        )
-                        
-                        # Extract the markdown content if available
-                        if "markdown" in result and result["markdown"]:
-                            # Log that we're using the consolidated approach
-                            logger.info(f"Using consolidated approach for task {task_id}")
-                            
-                            # For the consolidated file, we'll append to the root file
-                            storage_file = f"storage/markdown/{file_id}.md"
-                            
-                            # Create a section header for this page
-                            page_section = f"\n\n## {result.get('title', 'Untitled Page')}\n"
-                            page_section += f"URL: {url}\n\n"
-                            page_section += result["markdown"]
-                            page_section += "\n\n---\n\n"
-                            
-                            # If this is the first write to the file, add a header
-                            if not os.path.exists(storage_file):
-                                header = f"# Consolidated Documentation for {root_url}\n\n"
-                                header += f"This file contains content from multiple pages related to {root_url}.\n"
-                                header += f"Each section represents a different page that was crawled.\n\n"
-                                header += "---\n"
-                                page_section = header + page_section
-                            
-                            # Append to the file if it exists, otherwise create it
-                            mode = 'a' if os.path.exists(storage_file) else 'w'
-                            with open(storage_file, mode) as f:
-                                f.write(page_section)
-                            logger.info(f"{'Appended to' if mode == 'a' else 'Created'} consolidated markdown file: {storage_file}")
-                            
-                            # Update the metadata file with this page's info
-                            metadata_file = f"storage/markdown/{file_id}.json"
-                            
-                            # Read existing metadata if it exists
-                            metadata = {}
-                            if os.path.exists(metadata_file):
-                                try:
-                                    with open(metadata_file, 'r') as f:
-                                        metadata = json.load(f)
-                                except json.JSONDecodeError:
-                                    logger.error(f"Error reading metadata file: {metadata_file}")
-                            
-                            # Initialize or update the pages list
-                            if "pages" not in metadata:
-                                metadata = {
-                                    "title": f"Documentation for {root_url}",
-                                    "root_url": root_url,
-                                    "timestamp": datetime.now().isoformat(),
-                                    "pages": [],
-                                    "is_consolidated": True
-                                }
-                            
-                            # Add this page to the pages list
-                            metadata["pages"].append({
-                                "title": result.get("title", "Untitled"),
-                                "url": url,
-                                "timestamp": datetime.now().isoformat(),
-                                "internal_links": len(result.get("links", {}).get("internal", [])),
-                                "external_links": len(result.get("links", {}).get("external", []))
-                            })
-                            
-                            # Update the last_updated timestamp
-                            metadata["last_updated"] = datetime.now().isoformat()
-                            
-                            # Write the updated metadata
-                            with open(metadata_file, 'w') as f:
-                                json.dump(metadata, f, indent=2)
-                            logger.info(f"Updated metadata in {metadata_file}")
-                        else:
-                            logger.warning(f"No markdown content in result for task {task_id}")
-                    except Exception as e:
-                        logger.error(f"Error saving result to files: {str(e)}")
-                        logger.error(f"Error details: {str(e)}", exc_info=True)
-                    
-                    break
-                elif status["status"] == "failed":
-                    error_message = status.get('error', 'Unknown error')
-                    logger.error(f"Task {task_id} failed: {error_message}")
-                    return [DiscoveredPage(
-                        url=url,
-                        title=f"Task Failed: {error_message}",
-                        status="error",
-                        internalLinks=[]
-                    )]
-                elif status["status"] == "running":
-                    logger.info(f"Task {task_id} is still running")
-                else:
-                    logger.warning(f"Unknown task status: {status['status']}")
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error polling task {task_id}: {str(e)}")
-                polling_errors += 1
-                
-                # If we've had too many consecutive errors, return an error page
-                if polling_errors >= 5:
-                    logger.error(f"Too many consecutive polling errors ({polling_errors}), giving up")
-                    return [DiscoveredPage(
-                        url=url,
-                        title=f"Polling Error: {str(e)}",
-                        status="error",
-                        internalLinks=[]
-                    )]
-            except Exception as e:
-                logger.error(f"Error polling task {task_id}: {str(e)}")
-                polling_errors += 1
-                
-                # If we've had too many consecutive errors, return an error page
-                if polling_errors >= 5:
-                    logger.error(f"Too many consecutive polling errors ({polling_errors}), giving up")
-                    return [DiscoveredPage(
-                        url=url,
-                        title=f"Polling Error: {str(e)}",
-                        status="error",
-                        internalLinks=[]
-                    )]
-                
-            await asyncio.sleep(poll_interval)
-        
-        if not result:
-            logger.warning(f"Timeout waiting for crawl result for {url} after {max_attempts} attempts")
-            # Return a basic page with error status
-            return [DiscoveredPage(
-                url=url,
-                title="Timeout Error: Crawl4AI service did not complete the task in time",
-                status="error",
-                internalLinks=[]
-            )]
+                ))
+                continue
             
-        # Extract title and links from result
-        title = "Untitled Page"
-        if "title" in result:
-            title = result["title"]
-        elif "markdown" in result and result["markdown"]:
-            content_lines = result["markdown"].split('\n')
-            if content_lines:
-                potential_title = content_lines[0].strip('# ').strip()
-                if potential_title:
-                    title = potential_title
-        
-        internal_links = []
-        if "links" in result and isinstance(result["links"], dict):
-            seen_internal_links = set()
+            internal_links = extract_internal_links(page_url, result, parent_urls, all_internal_links)
+            logger.info(f"Found {len(internal_links)} unique internal links on {page_url} at depth {depth}")
             
-            for link in result["links"].get("internal", []):
-                href = link.get("href", "")
-                if not href:
-                    continue
-                    
-                if not href.startswith(('http://', 'https://')):
-                    href = urljoin(url, href)
-                href = normalize_url(href)
-                    
-                if (href in parent_urls or 
-                    href in all_internal_links or 
-                    href in seen_internal_links):
-                    continue
-                    
-                if any(excluded in href.lower() for excluded in [
-                    "login", "signup", "register", "logout",
-                    "account", "profile", "admin"
-                ]):
-                    continue
-                    
-                base_domain = urlparse(url).netloc
-                link_domain = urlparse(href).netloc
-                if base_domain != link_domain:
-                    continue
-                    
-                seen_internal_links.add(href)
-                all_internal_links.add(href)
-                
-                internal_links.append(InternalLink(
-                    href=href,
-                    text=link.get("text", "").strip()
-                ))
+            discovered_pages.append(DiscoveredPage(
+                url=page_url,
+                title=extract_page_title(result),
+                internalLinks=internal_links
+            ))
             
-            logger.info(f"Found {len(internal_links)} unique internal links at depth {current_depth}")
+            if depth < max_depth:
+                frontier.extend(link.href for link in internal_links)
         
-        primary_page = DiscoveredPage(
-            url=url,
-            title=title,
-            internalLinks=internal_links
-        )
-        discovered_pages.append(primary_page)
-        
-        if current_depth < max_depth:
-            for link in internal_links:
-                sub_pages = await discover_pages(
-                    url=link.href,
-                    max_depth=max_depth,
-                    current_depth=current_depth + 1,
-                    seen_urls=seen_urls,
-                    parent_urls=parent_urls,
-                    all_internal_links=all_internal_links,
-                    root_url=root_url,
-                    root_task_id=root_task_id
-                )
-                discovered_pages.extend(sub_pages)
-        
-        return discovered_pages
+        depth += 1
+    
+    return discovered_pages
+
+def filter_page_markdown(content: str) -> str:
+    """Remove navigation and search chrome from a page's markdown."""
+    filtered_lines = []
+    skip_next = False
+    for line in content.split('\n'):
+        if skip_next:
+            skip_next = False
+            continue
         
-    except Exception as e:
-        logger.error(f"Error discovering pages: {str(e)}")
-        return [DiscoveredPage(url=url, title="Main Page", status="error")]
+        if 'To navigate the symbols, press' in line:
+            skip_next = True
+            continue
+        
+        if any(x in line for x in [
+            'Skip Navigation',
+            'Search...',
+            '⌘K',
+            'symbols inside <root>'
+        ]):
+            continue
+        
+        filtered_lines.append(line)
+    
+    return '\n'.join(filtered_lines).strip()
 
-async def crawl_pages(pages: List[DiscoveredPage], root_url: str = None) -> CrawlResult:
+async def crawl_pages(
+    pages: List[DiscoveredPage],
+    root_url: str = None,
+    max_concurrency: int = CRAWL_CONCURRENCY
+) -> CrawlResult:
     """
     Crawl multiple pages and combine their content into a single markdown document.
     
+    Pages are crawled concurrently, limited overall by max_concurrency and per host
+    by the host rate limits. Each page is appended to the consolidated markdown file
+    as soon as it completes, and the combined markdown keeps the order of the pages.
+    
     Args:
         pages: List of pages to crawl
         root_url: The root URL that initiated the crawl. Used for file naming.
+        max_concurrency: Maximum number of pages crawled at once
     """
-    all_markdown = []
-    total_size = 0
-    errors = 0
-    crawled_urls = set()
-    
     # Generate a consistent file ID based on the root URL
     if root_url:
         root_task_id = url_to_filename(root_url)
@@ -751,229 +750,57 @@ async def crawl_pages(pages: List[DiscoveredPage], root_url: str = None) -> Craw
             root_task_id = None
             logger.warning("No root URL or pages provided, will use individual task IDs")
     
+    client = get_http_client()
+    limiter = HostRateLimiter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def crawl_page(page: DiscoveredPage) -> Optional[str]:
+        url = page.url
+        try:
+            async with limiter.limit(url), semaphore:
+                logger.info(f"Crawling page: {url}")
+                task_id, result = await run_crawl_task(url, client)
+        except CrawlTaskError as e:
+            logger.warning(f"Skipping {url} - {str(e)}")
+            page.status = "error"
+            return None
+        except Exception as e:
+            logger.error(f"Error crawling page {url}: {str(e)}")
+            page.status = "error"
+            return None
+        
+        save_consolidated_result(url, result, task_id, root_url, root_task_id)
+        
+        if not result.get("markdown"):
+            logger.warning(f"Skipping {url} - no markdown content available")
+            page.status = "error"
+            return None
+        
+        filtered_content = filter_page_markdown(result["markdown"])
+        if not filtered_content:
+            logger.warning(f"Skipping {url} - filtered content was empty")
+            page.status = "error"
+            return None
+        
+        logger.info(f"Successfully extracted content from {url}")
+        page.status = "crawled"
+        
+        page_markdown = f"# {page.title or 'Untitled Page'}\n"
+        page_markdown += f"URL: {page.url}\n\n"
+        page_markdown += filtered_content
+        page_markdown += "\n\n---\n\n"
+        return page_markdown
+    
     try:
-        for page in pages:
-            if page.url in crawled_urls:
-                continue
-                
-            try:
-                logger.info(f"Crawling page: {page.url}")
-                
-                # No longer replacing docs.crawl4ai.com URLs
-                url = page.url
-                logger.info(f"Processing URL: {url} without replacement")
-                
-                # Simplify the request for testing
-                # The error in the logs shows that there's an issue with the 'magic' parameter
-                # Let's remove any extra parameters and keep it simple
-                simple_request = {
-                    "urls": url
-                }
-                
-                # Submit crawl job to Crawl4AI
-                logger.info(f"Submitting crawl job for {url} to Crawl4AI API")
-                
-                # Log the full request for debugging
-                logger.info(f"Request URL: {CRAWL4AI_URL}/crawl")
-                logger.info(f"Headers: {headers}")
-                logger.info(f"Request data: {json.dumps(simple_request)}")
-                
-                # Log environment variables for debugging
-                logger.info(f"CRAWL4AI_URL environment variable: {os.environ.get('CRAWL4AI_URL', 'Not set')}")
-                logger.info(f"CRAWL4AI_API_TOKEN environment variable: {'Set' if os.environ.get('CRAWL4AI_API_TOKEN') else 'Not set'}")
-                response = requests.post(
-                    f"{CRAWL4AI_URL}/crawl", 
-                    headers=headers, 
-                    json=simple_request,
-                    timeout=30
-                )
-                response.raise_for_status()
-                task_id = response.json()["task_id"]
-                logger.info(f"Submitted crawl job for {url}, task ID: {task_id}")
-                
-                # Poll for result with increased frequency and longer total timeout
-                result = None
-                max_attempts = 120  # Increased from 60 to 120 for complex URLs
-                poll_interval = 1  # Keep at 1 second
-                for attempt in range(max_attempts):
-                    logger.info(f"Polling for task {task_id} result (attempt {attempt+1}/{max_attempts})")
-                    try:
-                        status_response = requests.get(
-                            f"{CRAWL4AI_URL}/task/{task_id}",
-                            headers=headers,
-                            timeout=10
-                        )
-                        status_response.raise_for_status()
-                        status = status_response.json()
-                        
-                        logger.info(f"Task {task_id} status: {status['status']}")
-                        
-                        if status["status"] == "completed":
-                            result = status["result"]
-                            logger.info(f"Task {task_id} completed successfully")
-                            
-                            # Save the result to files
-                            try:
-                                # Only create the storage directory for consolidated files
-                                # Disable creation of crawl_results directory to prevent individual files
-                                # os.makedirs("crawl_results", exist_ok=True)
-                                os.makedirs("storage/markdown", exist_ok=True)
-                                
-                                # Skip any code that might try to write to crawl_results
-                                if "crawl_results" in str(task_id):
-                                    logger.warning(f"Attempted to create file in crawl_results directory - skipping")
-                                    return
-                                
-                                # Use the root_task_id for file naming to consolidate all related content
-                                file_id = root_task_id if root_task_id else task_id
-                                
-                                # We no longer save individual files, only consolidated ones
-                                logger.info(f"Skipping individual file creation for task {task_id} - using consolidated approach only")
-                                
-                                # Set the task context for file redirection
-                                set_task_context(
-                                    task_id=task_id,
-                                    root_url=root_url,
-                                    content=result.get("markdown", "")
-                                )
-                                
-                                # Extract the markdown content if available
-                                if "markdown" in result and result["markdown"]:
-                                    # Log that we're using the consolidated approach
-                                    logger.info(f"Using consolidated approach for task {task_id}")
-                                    
-                                    # For the consolidated file, we'll append to the root file
-                                    storage_file = f"storage/markdown/{file_id}.md"
-                                    
-                                    # Create a section header for this page
-                                    page_section = f"\n\n## {result.get('title', 'Untitled Page')}\n"
-                                    page_section += f"URL: {url}\n\n"
-                                    page_section += result["markdown"]
-                                    page_section += "\n\n---\n\n"
-                                    
-                                    # If this is the first write to the file, add a header
-                                    if not os.path.exists(storage_file):
-                                        header = f"# Consolidated Documentation for {root_url}\n\n"
-                                        header += f"This file contains content from multiple pages related to {root_url}.\n"
-                                        header += f"Each section represents a different page that was crawled.\n\n"
-                                        header += "---\n"
-                                        page_section = header + page_section
-                                    
-                                    # Append to the file if it exists, otherwise create it
-                                    mode = 'a' if os.path.exists(storage_file) else 'w'
-                                    with open(storage_file, mode) as f:
-                                        f.write(page_section)
-                                    logger.info(f"{'Appended to' if mode == 'a' else 'Created'} consolidated markdown file: {storage_file}")
-                                    
-                                    # Update the metadata file with this page's info
-                                    metadata_file = f"storage/markdown/{file_id}.json"
-                                    
-                                    # Read existing metadata if it exists
-                                    metadata = {}
-                                    if os.path.exists(metadata_file):
-                                        try:
-                                            with open(metadata_file, 'r') as f:
-                                                metadata = json.load(f)
-                                        except json.JSONDecodeError:
-                                            logger.error(f"Error reading metadata file: {metadata_file}")
-                                    
-                                    # Initialize or update the pages list
-                                    if "pages" not in metadata:
-                                        metadata = {
-                                            "title": f"Documentation for {root_url}",
-                                            "root_url": root_url,
-                                            "timestamp": datetime.now().isoformat(),
-                                            "pages": [],
-                                            "is_consolidated": True
-                                        }
-                                    
-                                    # Add this page to the pages list
-                                    metadata["pages"].append({
-                                        "title": result.get("title", "Untitled"),
-                                        "url": url,
-                                        "timestamp": datetime.now().isoformat(),
-                                        "internal_links": len(result.get("links", {}).get("internal", [])),
-                                        "external_links": len(result.get("links", {}).get("external", []))
-                                    })
-                                    
-                                    # Update the last_updated timestamp
-                                    metadata["last_updated"] = datetime.now().isoformat()
-                                    
-                                    # Write the updated metadata
-                                    with open(metadata_file, 'w') as f:
-                                        json.dump(metadata, f, indent=2)
-                                    logger.info(f"Updated metadata in {metadata_file}")
-                            except Exception as e:
-                                logger.error(f"Error saving result to files: {str(e)}")
-                            
-                            break
-                        elif status["status"] == "failed":
-                            logger.error(f"Task {task_id} failed: {status.get('error', 'Unknown error')}")
-                            break
-                        elif status["status"] == "running":
-                            logger.info(f"Task {task_id} is still running")
-                    except Exception as e:
-                        logger.error(f"Error polling task {task_id}: {str(e)}")
-                        
-                    await asyncio.sleep(poll_interval)
-                
-                if not result:
-                    logger.warning(f"Timeout waiting for crawl result for {url} after {max_attempts} attempts")
-                    errors += 1
-                    page.status = "error"
-                    continue
-                
-                if "markdown" in result and result["markdown"]:
-                    page_markdown = f"# {page.title or 'Untitled Page'}\n"
-                    page_markdown += f"URL: {page.url}\n\n"
-                    
-                    content = result["markdown"]
-                    
-                    filtered_lines = []
-                    skip_next = False
-                    for line in content.split('\n'):
-                        if skip_next:
-                            skip_next = False
-                            continue
-                            
-                        if 'To navigate the symbols, press' in line:
-                            skip_next = True
-                            continue
-                            
-                        if any(x in line for x in [
-                            'Skip Navigation',
-                            'Search...',
-                            '⌘K',
-                            'symbols inside <root>'
-                        ]):
-                            continue
-                            
-                        filtered_lines.append(line)
-                    
-                    filtered_content = '\n'.join(filtered_lines).strip()
-                    if filtered_content:
-                        page_markdown += filtered_content
-                        page_markdown += "\n\n---\n\n"
-                        all_markdown.append(page_markdown)
-                        total_size += len(page_markdown.encode('utf-8'))
-                        logger.info(f"Successfully extracted content from {url}")
-                        
-                        # Mark URL as crawled
-                        crawled_urls.add(page.url)
-                        page.status = "crawled"
-                    else:
-                        logger.warning(f"Skipping {url} - filtered content was empty")
-                        errors += 1
-                        page.status = "error"
-                else:
-                    logger.warning(f"Skipping {url} - no markdown content available")
-                    errors += 1
-                    page.status = "error"
-                    
-            except Exception as e:
-                logger.error(f"Error crawling page {page.url}: {str(e)}")
-                errors += 1
-                page.status = "error"
+        # Crawl each URL once, keeping the first page of each URL in page order
+        seen_urls = set()
+        unique_pages = [page for page in pages if not (page.url in seen_urls or seen_urls.add(page.url))]
+        page_markdowns = await asyncio.gather(*(crawl_page(page) for page in unique_pages))
+        
+        all_markdown = [markdown for markdown in page_markdowns if markdown]
+        crawled_urls = {page.url for page, markdown in zip(unique_pages, page_markdowns) if markdown}
+        errors = len(unique_pages) - len(crawled_urls)
+        total_size = sum(len(markdown.encode('utf-8')) for markdown in all_markdown)
         
         combined_markdown = "".join(all_markdown)
         
@@ -995,7 +822,7 @@ async def crawl_pages(pages: List[DiscoveredPage], root_url: str = None) -> Craw
             markdown=combined_markdown,
             stats=stats
         )
-        
+    
     except Exception as e:
         logger.error(f"Error in crawl_pages: {str(e)}")
         return CrawlResult(
@@ -1006,4 +833,4 @@ async def crawl_pages(pages: List[DiscoveredPage], root_url: str = None) -> Craw
                 data_extracted="0 KB",
                 errors_encountered=1
             )
-        )
\ No newline at end of file
+        )
@@ -11,7 +11,7 @@ import json
 import asyncio
 from pathlib import Path
 from datetime import datetime
-from .crawler import discover_pages, crawl_pages, DiscoveredPage, CrawlResult, url_to_filename, in_memory_files, is_individual_file
+from .crawler import discover_pages, crawl_pages, close_http_client, DiscoveredPage, CrawlResult, url_to_filename, in_memory_files, is_individual_file
 
 # Configure logging
 logging.basicConfig(
@@ -73,6 +73,11 @@ class TestCrawl4AIResponse(BaseModel):
     result: dict | None = None
     error: str | None = None
 
+@app.on_event("shutdown")
+async def shutdown_crawler():
+    """Close the pooled Crawl4AI HTTP client."""
+    await close_http_client()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -13,7 +13,6 @@ try:
     import PyPDF2
     import fitz  # PyMuPDF
     from docx import Document as DocxDocument
-    import tabula
     from PIL import Image
     import pytesseract
     HAS_ADVANCED_PROCESSING = True
@@ -21,6 +20,8 @@ except ImportError:
     HAS_ADVANCED_PROCESSING = False
     logging.warning("Advanced document processing libraries not available. Some features will be limited.")
 
+from services.table_extraction_service import get_table_extraction_service
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -233,19 +234,8 @@ class DocumentProcessor:
                     # Extract tables if requested
                     if options.get('extractTables', True):
                         try:
-                            # Use tabula for table extraction
-                            tables = tabula.read_pdf(file_path, pages='all', multiple_tables=True)
-
-                            # Convert tables to JSON-serializable format
-                            for i, table in enumerate(tables):
-                                if isinstance(table, pd.DataFrame):
-                                    result["tables"].append({
-                                        "page": i + 1,  # Approximate page number
-                                        "rows": len(table),
-                                        "columns": len(table.columns),
-                                        "headers": table.columns.tolist(),
-                                        "data": table.to_dict(orient='records')
-                                    })
+                            # Extract tables from the already opened document
+                            result["tables"] = get_table_extraction_service().extract_tables(doc, 'all')
                         except Exception as e:
                             logger.warning(f"Error extracting tables: {str(e)}")
 
@@ -3,13 +3,21 @@ AI Validator Module
 
 This module provides AI-enhanced validation for financial data extraction.
 It uses LlamaIndex and AI models to validate and enhance extracted data.
+
+Missing security fields are completed in batches: the contexts of many ISINs are
+sent to the model in one request, sized by a token budget, and the batches are
+sent concurrently. Completed fields are cached by ISIN, context and requested
+fields, so unchanged securities are not sent to the model again.
 """
 
 import os
 import logging
 import json
-import tempfile
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import requests
 from dotenv import load_dotenv
 
@@ -20,22 +28,154 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# A model client takes a prompt and returns the response text
+ModelClient = Callable[[str], str]
+
+# Fields completed for securities that are missing them
+SECURITY_FIELDS = ['name', 'quantity', 'price', 'value', 'asset_class']
+
+# Defaults for batched field completion
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_BATCH_TOKEN_BUDGET = 3000
+DEFAULT_CONTEXT_CHARS = 200
+
+# Rough size of a token, and of one completed field in a response
+CHARS_PER_TOKEN = 4
+RESPONSE_TOKENS_PER_FIELD = 12
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text.
+    
+    Args:
+        text: Text to estimate
+        
+    Returns:
+        Estimated number of tokens
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+class FieldCompletionCache:
+    """
+    In-memory cache of security fields completed by AI.
+    
+    Entries are keyed by ISIN, a hash of the context the fields were extracted
+    from and the requested fields. One cache is shared by all validators of a
+    process (see get_field_completion_cache).
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of entries, the least recently used are evicted
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(isin: str, context: str, fields: List[str]) -> Tuple[str, str, Tuple[str, ...]]:
+        """
+        Make the cache key of a field completion request.
+        
+        Args:
+            isin: ISIN code
+            context: Text context around the ISIN
+            fields: Requested fields
+            
+        Returns:
+            Cache key
+        """
+        context_hash = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        return isin, context_hash, tuple(sorted(fields))
+    
+    def get(self, key: Tuple[str, str, Tuple[str, ...]]) -> Optional[Dict[str, Any]]:
+        """
+        Get cached fields.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Copy of the cached fields, or None if not cached
+        """
+        with self._lock:
+            fields = self.entries.get(key)
+            if fields is None:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return dict(fields)
+    
+    def set(self, key: Tuple[str, str, Tuple[str, ...]], fields: Dict[str, Any]) -> None:
+        """
+        Cache completed fields.
+        
+        Args:
+            key: Cache key
+            fields: Completed fields
+        """
+        with self._lock:
+            self.entries[key] = dict(fields)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self.entries.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
+
+_field_cache = FieldCompletionCache()
+
+def get_field_completion_cache() -> FieldCompletionCache:
+    """Get the field completion cache shared by this process."""
+    return _field_cache
+
 class AIValidator:
     """
     AI-enhanced validation for financial data extraction.
     Uses LlamaIndex and AI models to validate and enhance extracted data.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 model_client: Optional[ModelClient] = None,
+                 max_concurrent_requests: Optional[int] = None,
+                 batch_token_budget: Optional[int] = None,
+                 context_chars: int = DEFAULT_CONTEXT_CHARS,
+                 field_cache: Optional[FieldCompletionCache] = None):
         """
         Initialize the AIValidator.
         
         Args:
             api_key: API key for AI service (defaults to environment variable)
+            model_client: Callable sending a prompt to a model and returning the response
+                text (defaults to the Google or OpenAI API)
+            max_concurrent_requests: Maximum number of field completion requests in flight
+                (defaults to AI_VALIDATOR_MAX_CONCURRENCY or 4)
+            batch_token_budget: Estimated tokens of prompt and response per field completion
+                request (defaults to AI_VALIDATOR_BATCH_TOKENS or 3000)
+            context_chars: Characters of text on each side of an ISIN sent as its context
+            field_cache: Cache of completed fields (defaults to the shared cache)
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY') or os.getenv('OPENAI_API_KEY')
-        
-        if not self.api_key:
+        self.model_client = model_client
+        self.max_concurrent_requests = max(1, max_concurrent_requests or int(
+            os.getenv('AI_VALIDATOR_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENT_REQUESTS)))
+        self.batch_token_budget = batch_token_budget or int(
+            os.getenv('AI_VALIDATOR_BATCH_TOKENS', DEFAULT_BATCH_TOKEN_BUDGET))
+        self.context_chars = context_chars
+        self.field_cache = field_cache if field_cache is not None else get_field_completion_cache()
+        
+        if not self.api_key and not self.model_client:
             logger.warning("No API key provided, AI validation will be limited")
         
         logger.info("Initialized AIValidator")
@@ -54,8 +194,8 @@ class AIValidator:
         """
         logger.info("Validating financial data with AI")
         
-        # Check if we have an API key
-        if not self.api_key:
+        # Check if we have an API key or model client
+        if not self.api_key and not self.model_client:
             logger.warning("No API key available, skipping AI validation")
             return financial_data
         
@@ -110,17 +250,10 @@ class AIValidator:
             securities.extend(additional_securities)
             logger.info(f"Added {len(additional_securities)} additional securities")
         
-        # Validate each security
-        validated_securities = []
-        
-        for security in securities:
-            # Skip if no ISIN
-            if 'isin' not in security:
-                continue
-            
-            # Validate security data
-            validated_security = self._validate_security(security, extracted_text)
-            validated_securities.append(validated_security)
+        # Validate the securities with an ISIN, completing their missing fields in batches
+        validated_securities = self._validate_security_batch(
+            [security for security in securities if 'isin' in security], extracted_text
+        )
         
         # Remove duplicates
         unique_securities = self._remove_duplicate_securities(validated_securities)
@@ -141,67 +274,198 @@ class AIValidator:
         Returns:
             Validated and enhanced security data
         """
-        # Create a copy to avoid modifying the original
-        validated_security = security.copy()
-        
-        # Check if we have an ISIN
-        if 'isin' not in validated_security:
-            return validated_security
+        return self._validate_security_batch([security], extracted_text)[0]
+    
+    def _validate_security_batch(self, securities: List[Dict[str, Any]], 
+                                extracted_text: str) -> List[Dict[str, Any]]:
+        """
+        Validate and enhance securities, completing their missing fields with AI.
         
-        isin = validated_security['isin']
+        Args:
+            securities: List of securities
+            extracted_text: Raw text extracted from the document
+            
+        Returns:
+            Validated and enhanced copies of the securities, in the same order
+        """
+        # Create copies to avoid modifying the originals
+        validated_securities = [security.copy() for security in securities]
         
-        # Find context around this ISIN in the extracted text
-        isin_index = extracted_text.find(isin)
-        if isin_index >= 0:
-            context_start = max(0, isin_index - 200)
-            context_end = min(len(extracted_text), isin_index + 200)
-            context = extracted_text[context_start:context_end]
+        # Collect the missing fields of the securities found in the text
+        pending = []
+        for validated_security in validated_securities:
+            if 'isin' not in validated_security:
+                continue
             
-            # Use AI to extract missing information from context
-            missing_fields = []
+            isin = validated_security['isin']
+            context = self._find_isin_context(isin, extracted_text)
+            if context is None:
+                continue
             
-            if 'name' not in validated_security or not validated_security['name']:
-                missing_fields.append('name')
+            missing_fields = [
+                field for field in SECURITY_FIELDS
+                if field not in validated_security or (field == 'name' and not validated_security['name'])
+            ]
+            if missing_fields:
+                pending.append((validated_security, isin, context, missing_fields))
+        
+        # Use AI to extract the missing fields of all securities at once
+        completed = self._complete_fields_with_ai(
+            [(isin, context, missing_fields) for _, isin, context, missing_fields in pending]
+        )
+        
+        for (validated_security, _, _, missing_fields), extracted_fields in zip(pending, completed):
+            # Update security with extracted fields
+            for field, value in extracted_fields.items():
+                if field in missing_fields and value is not None:
+                    validated_security[field] = value
+        
+        for validated_security in validated_securities:
+            # Ensure consistency
+            if 'quantity' in validated_security and 'price' in validated_security and 'value' not in validated_security:
+                # Calculate value from quantity and price
+                validated_security['value'] = validated_security['quantity'] * validated_security['price']
             
-            if 'quantity' not in validated_security:
-                missing_fields.append('quantity')
+            if 'quantity' in validated_security and 'value' in validated_security and 'price' not in validated_security:
+                # Calculate price from quantity and value
+                if validated_security['quantity'] > 0:
+                    validated_security['price'] = validated_security['value'] / validated_security['quantity']
+        
+        return validated_securities
+    
+    def _find_isin_context(self, isin: str, extracted_text: str) -> Optional[str]:
+        """
+        Find the text context around the first occurrence of an ISIN.
+        
+        Args:
+            isin: ISIN code
+            extracted_text: Raw text extracted from the document
             
-            if 'price' not in validated_security:
-                missing_fields.append('price')
+        Returns:
+            Text around the ISIN, or None if the ISIN is not in the text
+        """
+        isin_index = extracted_text.find(isin)
+        if isin_index < 0:
+            return None
+        
+        context_start = max(0, isin_index - self.context_chars)
+        context_end = min(len(extracted_text), isin_index + self.context_chars)
+        return extracted_text[context_start:context_end]
+    
+    def _extract_fields_with_ai(self, isin: str, context: str, 
+                               fields: List[str]) -> Dict[str, Any]:
+        """
+        Extract fields from context using AI.
+        
+        Args:
+            isin: ISIN code
+            context: Text context around the ISIN
+            fields: List of fields to extract
+            
+        Returns:
+            Dictionary with extracted fields
+        """
+        return self._complete_fields_with_ai([(isin, context, fields)])[0]
+    
+    def _complete_fields_with_ai(self, field_requests: List[Tuple[str, str, List[str]]]) -> List[Dict[str, Any]]:
+        """
+        Extract the fields of many securities using AI.
+        
+        Cached results are reused; the remaining requests are grouped into batches
+        within the token budget, which are sent concurrently.
+        
+        Args:
+            field_requests: List of (ISIN, text context, fields to extract) tuples
             
-            if 'value' not in validated_security:
-                missing_fields.append('value')
+        Returns:
+            Dictionary with extracted fields for each request, in the same order
+        """
+        results = [{} for _ in field_requests]
+        
+        # Look up cached results, sending identical requests only once
+        uncached = OrderedDict()
+        for i, (isin, context, fields) in enumerate(field_requests):
+            if not fields:
+                continue
             
-            if 'asset_class' not in validated_security:
-                missing_fields.append('asset_class')
+            key = self.field_cache.make_key(isin, context, fields)
+            if key in uncached:
+                uncached[key][1].append(i)
+                continue
             
-            if missing_fields:
-                # Use AI to extract missing fields
-                extracted_fields = self._extract_fields_with_ai(
-                    isin, context, missing_fields
-                )
+            cached_fields = self.field_cache.get(key)
+            if cached_fields is not None:
+                results[i] = cached_fields
+            else:
+                uncached[key] = ((isin, context, list(fields)), [i])
+        
+        if not uncached:
+            return results
+        
+        batches = self._make_field_batches(list(uncached.items()))
+        logger.info(f"Completing fields of {len(uncached)} securities with AI in {len(batches)} requests "
+                   f"({len(field_requests) - sum(len(indexes) for _, indexes in uncached.values())} cached)")
+        
+        if len(batches) == 1:
+            batch_results = [self._complete_field_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrent_requests, len(batches))) as executor:
+                batch_results = list(executor.map(self._complete_field_batch, batches))
+        
+        for batch, extracted in zip(batches, batch_results):
+            for key, (_, indexes) in batch:
+                if key not in extracted:
+                    continue
                 
-                # Update security with extracted fields
-                for field, value in extracted_fields.items():
-                    if field in missing_fields and value is not None:
-                        validated_security[field] = value
+                self.field_cache.set(key, extracted[key])
+                for i in indexes:
+                    results[i] = dict(extracted[key])
         
-        # Ensure consistency
-        if 'quantity' in validated_security and 'price' in validated_security and 'value' not in validated_security:
-            # Calculate value from quantity and price
-            validated_security['value'] = validated_security['quantity'] * validated_security['price']
+        return results
+    
+    def _make_field_batches(self, items: List[Tuple[Any, Tuple[Tuple[str, str, List[str]], List[int]]]]) -> List[List[Any]]:
+        """
+        Group field completion requests into batches within the token budget.
+        
+        The estimate of a request covers its part of the prompt and its expected
+        response. A request exceeding the budget on its own is sent alone. As
+        responses are keyed by ISIN, a batch holds at most one request per ISIN.
+        
+        Args:
+            items: List of (cache key, (request, result indexes)) tuples
+            
+        Returns:
+            List of batches of items
+        """
+        budget = self.batch_token_budget - estimate_tokens(self._field_batch_prompt([]))
+        batches = []
+        batch = []
+        batch_tokens = 0
+        batch_isins = set()
+        
+        for item in items:
+            isin, context, fields = item[1][0]
+            tokens = estimate_tokens(self._field_batch_entry(isin, context, fields)) + \
+                RESPONSE_TOKENS_PER_FIELD * len(fields)
+            
+            if batch and (batch_tokens + tokens > budget or isin in batch_isins):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+                batch_isins = set()
+            
+            batch.append(item)
+            batch_tokens += tokens
+            batch_isins.add(isin)
         
-        if 'quantity' in validated_security and 'value' in validated_security and 'price' not in validated_security:
-            # Calculate price from quantity and value
-            if validated_security['quantity'] > 0:
-                validated_security['price'] = validated_security['value'] / validated_security['quantity']
+        if batch:
+            batches.append(batch)
         
-        return validated_security
+        return batches
     
-    def _extract_fields_with_ai(self, isin: str, context: str, 
-                               fields: List[str]) -> Dict[str, Any]:
+    def _field_batch_entry(self, isin: str, context: str, fields: List[str]) -> str:
         """
-        Extract fields from context using AI.
+        Format one security of a field completion prompt.
         
         Args:
             isin: ISIN code
@@ -209,52 +473,94 @@ class AIValidator:
             fields: List of fields to extract
             
         Returns:
-            Dictionary with extracted fields
+            Prompt section of the security
         """
-        # Prepare prompt for AI
-        prompt = f"""
-Extract the following information for the security with ISIN {isin} from this financial document text:
-{', '.join(fields)}
-
+        return f"""
+ISIN: {isin}
+Fields: {', '.join(fields)}
 Text context:
 {context}
-
-Format your response as a JSON object with the following fields:
-{json.dumps({field: None for field in fields}, indent=2)}
+---
+"""
+    
+    def _field_batch_prompt(self, field_requests: List[Tuple[str, str, List[str]]]) -> str:
+        """
+        Build the prompt extracting the fields of several securities.
+        
+        Args:
+            field_requests: List of (ISIN, text context, fields to extract) tuples
+            
+        Returns:
+            Prompt for the AI
+        """
+        entries = ''.join(self._field_batch_entry(isin, context, fields) for isin, context, fields in field_requests)
+        example = {isin: {field: None for field in fields} for isin, _, fields in field_requests[:1]}
+        
+        return f"""
+Extract the requested information for each of the following securities from the financial document text given for it.
+Only use the text context of a security for its fields.
+{entries}
+Format your response as a JSON object with one entry per ISIN, holding an object with the requested fields, for example:
+{json.dumps(example or {'ISIN': {'field': None}}, indent=2)}
 
 If you cannot find a value for a field, leave it as null.
 """
+    
+    def _complete_field_batch(self, batch: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract the fields of a batch of securities with one AI request.
+        
+        Args:
+            batch: List of (cache key, (request, result indexes)) tuples
+            
+        Returns:
+            Dictionary mapping the cache keys of the requests answered in the
+            response to their extracted fields
+        """
+        requests_by_isin = {isin: (key, fields) for key, ((isin, _, fields), _) in batch}
         
         try:
             # Call AI API
-            response = self._call_ai_api(prompt)
-            
-            # Parse response
-            extracted_fields = {}
-            
-            try:
-                # Try to parse as JSON
-                json_match = self._extract_json_from_text(response)
-                if json_match:
-                    extracted_fields = json.loads(json_match)
-                else:
-                    # Parse manually
-                    for field in fields:
-                        field_match = self._extract_field_from_text(response, field)
-                        if field_match:
-                            extracted_fields[field] = field_match
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse AI response as JSON: {response}")
-                # Parse manually
-                for field in fields:
-                    field_match = self._extract_field_from_text(response, field)
-                    if field_match:
-                        extracted_fields[field] = field_match
-            
-            return extracted_fields
+            response = self._call_ai_api(self._field_batch_prompt([request for _, (request, _) in batch]))
         except Exception as e:
             logger.error(f"Error extracting fields with AI: {e}")
             return {}
+        
+        # Parse response
+        parsed = None
+        try:
+            json_match = self._extract_json_from_text(response)
+            if json_match:
+                parsed = json.loads(json_match)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse AI response as JSON: {response}")
+        
+        if isinstance(parsed, list):
+            parsed = {item.get('isin'): item for item in parsed if isinstance(item, dict)}
+        
+        extracted = {}
+        if isinstance(parsed, dict):
+            if len(requests_by_isin) == 1 and not any(isin in parsed for isin in requests_by_isin):
+                # A single security may be answered without the ISIN level
+                parsed = {next(iter(requests_by_isin)): parsed}
+            
+            for isin, (key, fields) in requests_by_isin.items():
+                if isinstance(parsed.get(isin), dict):
+                    extracted[key] = {field: parsed[isin].get(field) for field in fields}
+        elif len(requests_by_isin) == 1:
+            # Parse manually
+            key, fields = next(iter(requests_by_isin.values()))
+            extracted[key] = {}
+            for field in fields:
+                field_match = self._extract_field_from_text(response, field)
+                if field_match:
+                    extracted[key][field] = field_match
+        
+        missing = len(requests_by_isin) - len(extracted)
+        if missing:
+            logger.warning(f"AI response did not include {missing} of {len(requests_by_isin)} securities")
+        
+        return extracted
     
     def _extract_additional_securities(self, extracted_text: str, 
                                       existing_securities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -538,35 +844,27 @@ For example:
         text_isins = re.findall(isin_pattern, extracted_text)
         
         # Get existing ISINs
-        existing_isins = [s['isin'] for s in financial_data.get('securities', []) if 'isin' in s]
+        existing_isins = set(s['isin'] for s in financial_data.get('securities', []) if 'isin' in s)
         
-        # Find missing ISINs
-        missing_isins = [isin for isin in text_isins if isin not in existing_isins]
+        # Find missing ISINs, once each
+        missing_isins = list(dict.fromkeys(isin for isin in text_isins if isin not in existing_isins))
         
         if missing_isins:
             logger.info(f"Found {len(missing_isins)} missing ISINs")
             
+            # Use AI to extract the information of all missing securities at once
+            fields = ['name', 'quantity', 'price', 'value', 'currency', 'asset_class']
+            completed = self._complete_fields_with_ai(
+                [(isin, self._find_isin_context(isin, extracted_text) or "", fields) for isin in missing_isins]
+            )
+            
             # Add missing ISINs to securities
-            for isin in missing_isins:
-                # Find context around this ISIN
-                isin_index = extracted_text.find(isin)
-                context = ""
-                
-                if isin_index >= 0:
-                    context_start = max(0, isin_index - 200)
-                    context_end = min(len(extracted_text), isin_index + 200)
-                    context = extracted_text[context_start:context_end]
-                
+            for isin, extracted_fields in zip(missing_isins, completed):
                 # Extract security information
                 security = {
                     'isin': isin
                 }
                 
-                # Use AI to extract additional information
-                extracted_fields = self._extract_fields_with_ai(
-                    isin, context, ['name', 'quantity', 'price', 'value', 'currency', 'asset_class']
-                )
-                
                 # Update security with extracted fields
                 for field, value in extracted_fields.items():
                     if value is not None:
@@ -642,6 +940,10 @@ For example:
         Raises:
             Exception: If API call fails
         """
+        # Use the configured model client if there is one
+        if self.model_client:
+            return self.model_client(prompt)
+        
         # Check if we're using Google API
         if 'GOOGLE_API_KEY' in os.environ or (self.api_key and len(self.api_key) > 30 and self.api_key.startswith('AIza')):
             return self._call_google_ai_api(prompt)
@@ -803,7 +1105,7 @@ For example:
         import re
         
         # Pattern: field: value or "field": value
-        pattern = rf'["\']?{field}["\']?\s*:\s*([^,\n\}]+)'
+        pattern = rf'["\']?{field}["\']?\s*:\s*([^,\n}}]+)'
         match = re.search(pattern, text, re.IGNORECASE)
         
         if match:
@@ -867,7 +1169,6 @@ For example:
 if __name__ == "__main__":
     # This will only run when the script is executed directly
     import sys
-    import json
     
     if len(sys.argv) > 2:
         financial_data_path = sys.argv[1]
@@ -7,21 +7,43 @@ and financial-specific post-processing to achieve higher accuracy in text extrac
 """
 
 import os
+import io
 import logging
 import tempfile
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List, Dict, Any, Optional, Tuple
 import json
 import numpy as np
 import cv2
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Mean word confidence (0-1) below which extra preprocessing variants are tried
+DEFAULT_CONFIDENCE_THRESHOLD = 0.80
+
+# Document types that benefit from table- and text-optimized preprocessing
+FINANCIAL_DOCUMENT_TYPES = ["portfolio_statement", "financial_statement", "trading_statement"]
+
+# LSTM engine, assume single block of text
+TESSERACT_CONFIG = '--oem 1 --psm 6'
+
+# JPEG quality used to hand rendered pages back for the output PDF
+PAGE_IMAGE_QUALITY = 90
+
+
+def _init_ocr_worker() -> None:
+    """Limit Tesseract to one thread per worker process to avoid oversubscription."""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
 class EnhancedOCRProcessor:
     """
     Enhanced OCR processing optimized for financial documents.
@@ -30,20 +52,31 @@ class EnhancedOCRProcessor:
     structure analysis, and financial-specific post-processing.
     """
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, max_workers: Optional[int] = None,
+                 confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+                 debug_image_dir: Optional[str] = None):
         """
         Initialize the EnhancedOCRProcessor with a PDF file path.
         
         Args:
             pdf_path: Path to the PDF file
+            max_workers: Number of processes used to OCR pages in parallel
+                (defaults to the CPU count, 1 processes pages sequentially)
+            confidence_threshold: Mean word confidence (0-1) below which
+                additional preprocessing variants are tried for financial documents
+            debug_image_dir: Directory to save preprocessed page images to for
+                debugging (disabled when None)
         """
         self.pdf_path = pdf_path
         self.output_path = None
-        self.images = []
+        self.page_count = 0
         self.ocr_text = ""
         self.document_type = "unknown"
         self.document_language = "eng"
         self.confidence_scores = []
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.confidence_threshold = confidence_threshold
+        self.debug_image_dir = debug_image_dir
         
         # Financial terms for post-processing and correction
         self.financial_terms = [
@@ -99,43 +132,53 @@ class EnhancedOCRProcessor:
         
         logger.info(f"Initialized EnhancedOCRProcessor for {pdf_path}")
     
-    def process(self, languages: List[str] = ['eng'], dpi: int = 300) -> str:
+    def process(self, languages: List[str] = ['eng'], dpi: int = 300, output_pdf: bool = True) -> Optional[str]:
         """
         Process the PDF with enhanced OCR.
         
         Args:
             languages: List of language codes for OCR
             dpi: DPI for image conversion
+            output_pdf: Whether to assemble the page images into the output PDF
+                when falling back to Tesseract. Skip it when only text is needed;
+                the text is then only kept in memory (see extract_text).
             
         Returns:
-            Path to the OCR-processed PDF
+            Path to the OCR-processed PDF, or None if no output PDF was written
         """
         logger.info(f"Processing {self.pdf_path} with enhanced OCR (languages: {languages}, dpi: {dpi})")
         
-        # Create a temporary output file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-            self.output_path = tmp_file.name
-        
-        # Convert PDF to images
-        self.images = convert_from_path(self.pdf_path, dpi=dpi)
-        logger.info(f"Converted PDF to {len(self.images)} images")
+        # Pages are rendered one at a time when they are OCRed
+        self.page_count = pdfinfo_from_path(self.pdf_path)['Pages']
+        logger.info(f"PDF has {self.page_count} pages")
         
         # Detect document type and language from first page
-        self._detect_document_properties(self.images[0])
+        self._detect_document_properties(self._render_page(1, dpi))
         logger.info(f"Detected document type: {self.document_type}, language: {self.document_language}")
         
         # Add detected language to the language list if not already present
         if self.document_language not in languages:
             languages.append(self.document_language)
         
+        # OCRmyPDF always writes an output PDF, Tesseract only when requested
+        use_ocrmypdf = self._is_ocrmypdf_available()
+        self.output_path = None
+        if use_ocrmypdf or output_pdf:
+            # Create a temporary output file
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
+                self.output_path = tmp_file.name
+        
         # Try to use OCRmyPDF if available
-        if self._is_ocrmypdf_available():
+        if use_ocrmypdf:
             self._process_with_ocrmypdf(languages, self.output_path)
         else:
             # Process each page with enhanced OCR
             self._process_with_enhanced_ocr(languages, dpi, self.output_path)
         
-        logger.info(f"OCR processing complete, output saved to {self.output_path}")
+        if self.output_path:
+            logger.info(f"OCR processing complete, output saved to {self.output_path}")
+        else:
+            logger.info("OCR processing complete, no output PDF written")
         
         return self.output_path
     
@@ -197,105 +240,189 @@ class EnhancedOCRProcessor:
             # Fallback to enhanced OCR
             self._process_with_enhanced_ocr(languages, 300, output_path)
     
-    def _process_with_enhanced_ocr(self, languages: List[str], dpi: int, output_path: str) -> None:
+    def _process_with_enhanced_ocr(self, languages: List[str], dpi: int, output_path: Optional[str]) -> None:
         """
         Process the PDF with enhanced Tesseract OCR.
         
         Args:
             languages: List of languages for OCR
             dpi: DPI for image conversion
-            output_path: Path to save the output PDF
+            output_path: Path to save the output PDF and its text file to
+                (None to keep the text in memory only)
         """
         try:
             # Prepare language parameter
             lang_param = '+'.join(languages)
             
-            # Process each image with enhanced OCR
             all_text = []
+            self.confidence_scores = []
+            pages_written = 0
             
-            for i, image in enumerate(self.images):
-                logger.info(f"Processing image {i+1}/{len(self.images)}")
-                
-                # Convert PIL image to OpenCV format for preprocessing
-                img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                
-                # Analyze document structure to identify regions
-                regions = self._analyze_document_structure(img_cv)
-                
-                # Preprocess image based on document type
-                img_processed = self._enhanced_preprocess_image(img_cv)
-                
-                # For financial documents, try multiple preprocessing approaches
-                if self.document_type in ["portfolio_statement", "financial_statement", "trading_statement"]:
-                    # Get multiple versions of the processed image
-                    img_versions = [
-                        img_processed,  # Standard processing
-                        self._preprocess_for_tables(img_cv),  # Table-optimized
-                        self._preprocess_for_financial_text(img_cv)  # Text-optimized
-                    ]
-                    
-                    # Process each version
-                    version_texts = []
-                    version_scores = []
-                    
-                    for v, img_version in enumerate(img_versions):
-                        # Process with Tesseract
-                        config = f'--oem 1 --psm 6'  # LSTM engine, assume single block of text
-                        text = pytesseract.image_to_string(img_version, lang=lang_param, config=config)
-                        
-                        # Calculate confidence score
-                        confidence = self._assess_ocr_quality(text)
-                        version_texts.append(text)
-                        version_scores.append(confidence)
-                        
-                        logger.debug(f"Page {i+1} version {v+1} confidence: {confidence:.2f}")
-                    
-                    # Select the best version
-                    best_idx = version_scores.index(max(version_scores))
-                    text = version_texts[best_idx]
-                    logger.debug(f"Selected version {best_idx+1} with confidence {version_scores[best_idx]:.2f}")
-                else:
-                    # For non-financial documents, use standard processing
-                    config = f'--oem 1 --psm 6'
-                    text = pytesseract.image_to_string(img_processed, lang=lang_param, config=config)
-                
-                # Apply financial-specific post-processing
-                text = self._financial_post_processing(text)
-                
+            # OCR the pages, in parallel when possible, and append each page
+            # to the output PDF as soon as it is done so no page is kept around
+            for text, confidence, page_image in self._ocr_pages(lang_param, dpi, output_path is not None):
                 all_text.append(text)
+                self.confidence_scores.append(confidence)
                 
-                # Save processed image for debugging
-                with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_img:
-                    debug_path = tmp_img.name
-                    cv2.imwrite(debug_path, img_processed)
-                    logger.debug(f"Saved processed image to {debug_path}")
+                if page_image is not None:
+                    with Image.open(io.BytesIO(page_image)) as image:
+                        image.save(output_path, format='PDF', resolution=dpi, append=pages_written > 0)
+                    pages_written += 1
             
             # Combine all text
             self.ocr_text = '\n\n'.join(all_text)
             
             # Save OCR text to a file
-            text_path = output_path.replace('.pdf', '.txt')
-            with open(text_path, 'w', encoding='utf-8') as f:
-                f.write(self.ocr_text)
-            
-            logger.info(f"Saved OCR text to {text_path}")
-            
-            # Create a PDF from the processed images
-            self.images[0].save(
-                output_path,
-                save_all=True,
-                append_images=self.images[1:],
-                resolution=dpi
-            )
+            if output_path:
+                text_path = output_path.replace('.pdf', '.txt')
+                with open(text_path, 'w', encoding='utf-8') as f:
+                    f.write(self.ocr_text)
+                
+                logger.info(f"Saved OCR text to {text_path}")
             
             logger.info("Enhanced OCR processing successful")
         except Exception as e:
             logger.error(f"Error in enhanced OCR processing: {e}")
             # If output file doesn't exist, copy the original
-            if not os.path.exists(output_path):
+            if output_path and not os.path.exists(output_path):
                 import shutil
                 shutil.copy(self.pdf_path, output_path)
     
+    def _render_page(self, page_number: int, dpi: int):
+        """
+        Render a single page of the PDF.
+        
+        Args:
+            page_number: One-based page number
+            dpi: DPI for image conversion
+            
+        Returns:
+            PIL Image of the page
+        """
+        return convert_from_path(self.pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+    
+    def _ocr_pages(self, lang_param: str, dpi: int, keep_images: bool):
+        """
+        OCR all pages, in a process pool when more than one worker is configured.
+        
+        Each page is rendered by the process that OCRs it and released once it
+        is done, so at most one page image per worker is in memory. If the pool
+        fails, the pages not yet yielded are OCRed sequentially.
+        
+        Args:
+            lang_param: Tesseract language parameter
+            dpi: DPI for image conversion
+            keep_images: Whether to return the JPEG-encoded page images
+            
+        Yields:
+            Tuples of (text, confidence, JPEG bytes or None) in page order
+        """
+        pages = range(1, self.page_count + 1)
+        workers = min(self.max_workers, self.page_count)
+        next_page = 1
+        
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker) as executor:
+                    for result in executor.map(self._ocr_page, pages, repeat(lang_param), repeat(dpi),
+                                               repeat(keep_images)):
+                        yield result
+                        next_page += 1
+                return
+            except Exception as e:
+                logger.warning(f"Parallel OCR failed at page {next_page}, processing remaining pages sequentially: {e}")
+        
+        for page_number in range(next_page, self.page_count + 1):
+            yield self._ocr_page(page_number, lang_param, dpi, keep_images)
+    
+    def _ocr_page(self, page_number: int, lang_param: str, dpi: int,
+                  keep_image: bool = False) -> Tuple[str, float, Optional[bytes]]:
+        """
+        Render and OCR a single page.
+        
+        The page is OCRed once with the standard preprocessing. For financial
+        documents, table- and text-optimized variants are only tried when the
+        mean word confidence of that pass is below the confidence threshold.
+        
+        Args:
+            page_number: One-based page number
+            lang_param: Tesseract language parameter
+            dpi: DPI for image conversion
+            keep_image: Whether to return the JPEG-encoded page image
+            
+        Returns:
+            Tuple of (post-processed text, confidence between 0 and 1, JPEG bytes or None)
+        """
+        logger.info(f"Processing page {page_number}/{self.page_count}")
+        
+        image = self._render_page(page_number, dpi)
+        
+        # Convert PIL image to OpenCV format for preprocessing
+        img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        
+        page_image = None
+        if keep_image:
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, format='JPEG', quality=PAGE_IMAGE_QUALITY)
+            page_image = buffer.getvalue()
+        image.close()
+        
+        img_processed = self._enhanced_preprocess_image(img_cv)
+        text, confidence = self._ocr_with_confidence(img_processed, lang_param)
+        logger.debug(f"Page {page_number} standard confidence: {confidence:.2f}")
+        
+        if self.document_type in FINANCIAL_DOCUMENT_TYPES and confidence < self.confidence_threshold:
+            for variant in (self._preprocess_for_tables, self._preprocess_for_financial_text):
+                variant_text, variant_confidence = self._ocr_with_confidence(variant(img_cv), lang_param)
+                logger.debug(f"Page {page_number} {variant.__name__} confidence: {variant_confidence:.2f}")
+                
+                if variant_confidence > confidence:
+                    text, confidence = variant_text, variant_confidence
+                    
+        # Save processed image for debugging
+        if self.debug_image_dir:
+            os.makedirs(self.debug_image_dir, exist_ok=True)
+            debug_path = os.path.join(self.debug_image_dir, f"page_{page_number}.jpg")
+            cv2.imwrite(debug_path, img_processed)
+            logger.debug(f"Saved processed image to {debug_path}")
+        
+        # Apply financial-specific post-processing
+        return self._financial_post_processing(text), confidence, page_image
+    
+    def _ocr_with_confidence(self, image: np.ndarray, lang_param: str) -> Tuple[str, float]:
+        """
+        Run Tesseract once and return the text with its mean word confidence.
+        
+        Args:
+            image: Preprocessed image as numpy array
+            lang_param: Tesseract language parameter
+            
+        Returns:
+            Tuple of (text, confidence between 0 and 1)
+        """
+        data = pytesseract.image_to_data(image, lang=lang_param, config=TESSERACT_CONFIG,
+                                         output_type=pytesseract.Output.DICT)
+        
+        lines = {}
+        confidences = []
+        
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            if not word:
+                continue
+                
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line_key, []).append(word)
+            
+            confidence = float(data['conf'][i])
+            if confidence >= 0:
+                confidences.append(confidence)
+                
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+        
+        return text, confidence
+    
     def _detect_document_properties(self, image) -> None:
         """
         Detect document type and language from the first page.
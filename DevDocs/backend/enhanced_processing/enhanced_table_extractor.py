@@ -15,7 +15,6 @@ import pandas as pd
 import numpy as np
 import cv2
 from pathlib import Path
-from collections import defaultdict
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -36,12 +35,8 @@ except ImportError:
     CAMELOT_AVAILABLE = False
     logger.warning("camelot-py library not available. Install with: pip install camelot-py")
 
-try:
-    import tabula
-    TABULA_AVAILABLE = True
-except ImportError:
-    TABULA_AVAILABLE = False
-    logger.warning("tabula-py library not available. Install with: pip install tabula-py")
+from services.table_extraction_service import get_table_extraction_service
+from services.table_ensemble import run_extractor_ensemble, resolve_pages, remove_duplicate_tables, DEFAULT_MAX_WORKERS
 
 try:
     import pytesseract
@@ -64,7 +59,8 @@ class EnhancedTableExtractor:
         use_tabula: bool = True,
         use_ocr: bool = True,
         lang: str = "eng+heb",
-        confidence_threshold: float = 0.7
+        confidence_threshold: float = 0.7,
+        max_workers: int = DEFAULT_MAX_WORKERS
     ):
         """
         Initialize the EnhancedTableExtractor.
@@ -75,14 +71,17 @@ class EnhancedTableExtractor:
             use_tabula: Whether to use Tabula for table extraction
             use_ocr: Whether to use OCR-based table detection
             lang: OCR language
-            confidence_threshold: Confidence threshold for table detection
+            confidence_threshold: Confidence threshold for table detection; once a page yields
+                a table of this quality, the remaining methods skip the page
+            max_workers: Maximum number of page ranges extracted at the same time
         """
         self.use_camelot = use_camelot and CAMELOT_AVAILABLE
         self.use_pdfplumber = use_pdfplumber and PDFPLUMBER_AVAILABLE
-        self.use_tabula = use_tabula and TABULA_AVAILABLE
+        self.use_tabula = use_tabula and get_table_extraction_service().is_available('tabula')
         self.use_ocr = use_ocr and TESSERACT_AVAILABLE
         self.lang = lang
         self.confidence_threshold = confidence_threshold
+        self.max_workers = max_workers
         self.tables = []
         
         # Check if at least one method is available
@@ -111,26 +110,25 @@ class EnhancedTableExtractor:
             return []
         
         try:
-            # Extract tables using multiple methods
-            if self.use_pdfplumber:
-                pdfplumber_tables = self._extract_with_pdfplumber(pdf_path, pages)
-                self.tables.extend(pdfplumber_tables)
-                logger.info(f"Extracted {len(pdfplumber_tables)} tables with pdfplumber")
-            
-            if self.use_camelot:
-                camelot_tables = self._extract_with_camelot(pdf_path, pages)
-                self.tables.extend(camelot_tables)
-                logger.info(f"Extracted {len(camelot_tables)} tables with camelot")
-            
-            if self.use_tabula:
-                tabula_tables = self._extract_with_tabula(pdf_path, pages)
-                self.tables.extend(tabula_tables)
-                logger.info(f"Extracted {len(tabula_tables)} tables with tabula")
-            
-            if self.use_ocr:
-                ocr_tables = self._extract_with_ocr(pdf_path, pages)
-                self.tables.extend(ocr_tables)
-                logger.info(f"Extracted {len(ocr_tables)} tables with OCR")
+            # Extraction methods in order of preference
+            methods = [
+                (name, lambda selection, method=method: method(pdf_path, selection))
+                for name, method, enabled in (
+                    ('pdfplumber', self._extract_with_pdfplumber, self.use_pdfplumber),
+                    ('camelot', self._extract_with_camelot, self.use_camelot),
+                    ('tabula', self._extract_with_tabula, self.use_tabula),
+                    ('OCR', self._extract_with_ocr, self.use_ocr)
+                )
+                if enabled
+            ]
+            
+            # Run the methods concurrently per page range, stopping early on pages with a good table
+            self.tables = run_extractor_ensemble(
+                methods,
+                resolve_pages(pdf_path, pages),
+                quality_threshold=self.confidence_threshold,
+                max_workers=self.max_workers
+            )
             
             # Remove duplicates
             self.tables = self._remove_duplicate_tables(self.tables)
@@ -337,38 +335,13 @@ class EnhancedTableExtractor:
         if not self.use_tabula:
             return []
         
-        tables = []
-        
         try:
-            # Convert pages string to tabula format
-            if pages == 'all':
-                tabula_pages = 'all'
-            else:
-                tabula_pages = pages
-            
-            # Extract tables
-            tabula_tables = tabula.read_pdf(
-                pdf_path,
-                pages=tabula_pages,
-                multiple_tables=True
-            )
+            # The shared service keeps the tabula JVM running between calls
+            tables = get_table_extraction_service().extract_tables(pdf_path, pages, backends=['tabula'])
             
-            # Process tables
-            for i, df in enumerate(tabula_tables):
-                if not df.empty:
-                    # Create table info
-                    table_info = {
-                        'id': f'tabula_{i+1}',
-                        'page': i + 1,  # Approximate page number
-                        'extraction_method': 'tabula',
-                        'table_number': i + 1,
-                        'data': df.to_dict(orient='records'),
-                        'headers': df.columns.tolist(),
-                        'rows': df.values.tolist(),
-                        'confidence': 0.75  # Arbitrary confidence for tabula
-                    }
-                    
-                    tables.append(table_info)
+            # Keep the body rows as values, like the other methods of this extractor
+            for table in tables:
+                table['rows'] = [[record.get(header) for header in table['headers']] for record in table['data']]
             
             return tables
             
@@ -564,116 +537,7 @@ class EnhancedTableExtractor:
         Returns:
             List of unique tables
         """
-        if not tables:
-            return []
-        
-        # Group tables by page
-        tables_by_page = defaultdict(list)
-        for table in tables:
-            tables_by_page[table['page']].append(table)
-        
-        # Process each page
-        unique_tables = []
-        for page, page_tables in tables_by_page.items():
-            # Sort tables by confidence
-            sorted_tables = sorted(page_tables, key=lambda t: t.get('confidence', 0), reverse=True)
-            
-            # Keep track of processed tables
-            processed = set()
-            
-            for i, table1 in enumerate(sorted_tables):
-                if i in processed:
-                    continue
-                
-                # Add to unique tables
-                unique_tables.append(table1)
-                processed.add(i)
-                
-                # Check for duplicates
-                for j, table2 in enumerate(sorted_tables):
-                    if j in processed or i == j:
-                        continue
-                    
-                    # Check if tables are similar
-                    if self._are_tables_similar(table1, table2):
-                        processed.add(j)
-        
-        return unique_tables
-    
-    def _are_tables_similar(self, table1: Dict[str, Any], table2: Dict[str, Any]) -> bool:
-        """
-        Check if two tables are similar based on content.
-        
-        Args:
-            table1: First table
-            table2: Second table
-            
-        Returns:
-            True if tables are similar, False otherwise
-        """
-        # Check if tables are on the same page
-        if table1['page'] != table2['page']:
-            return False
-        
-        # Check if tables have similar bounding boxes
-        if 'bbox' in table1 and 'bbox' in table2:
-            bbox1 = table1['bbox']
-            bbox2 = table2['bbox']
-            
-            # Calculate overlap
-            x_overlap = max(0, min(bbox1[2], bbox2[2]) - max(bbox1[0], bbox2[0]))
-            y_overlap = max(0, min(bbox1[3], bbox2[3]) - max(bbox1[1], bbox2[1]))
-            
-            # Calculate areas
-            area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
-            area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
-            overlap_area = x_overlap * y_overlap
-            
-            # Check if overlap is significant
-            if overlap_area > 0.5 * min(area1, area2):
-                return True
-        
-        # Check if tables have similar content
-        if 'headers' in table1 and 'headers' in table2:
-            headers1 = table1['headers']
-            headers2 = table2['headers']
-            
-            # Check if headers are similar
-            if len(headers1) == len(headers2):
-                similar_headers = sum(1 for h1, h2 in zip(headers1, headers2) if self._are_strings_similar(h1, h2))
-                if similar_headers >= 0.7 * len(headers1):
-                    return True
-        
-        return False
-    
-    def _are_strings_similar(self, str1: str, str2: str) -> bool:
-        """
-        Check if two strings are similar.
-        
-        Args:
-            str1: First string
-            str2: Second string
-            
-        Returns:
-            True if strings are similar, False otherwise
-        """
-        # Convert to lowercase and remove whitespace
-        s1 = str1.lower().strip()
-        s2 = str2.lower().strip()
-        
-        # Check if strings are identical
-        if s1 == s2:
-            return True
-        
-        # Check if one string is a substring of the other
-        if s1 in s2 or s2 in s1:
-            return True
-        
-        # Calculate similarity
-        from difflib import SequenceMatcher
-        similarity = SequenceMatcher(None, s1, s2).ratio()
-        
-        return similarity > 0.7
+        return remove_duplicate_tables(tables)
     
     def _classify_tables(self):
         """
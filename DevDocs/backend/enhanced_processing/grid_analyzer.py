@@ -8,6 +8,7 @@ It analyzes the spatial relationships between elements to improve data extractio
 import os
 import logging
 from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
 from unstructured.partition.pdf import partition_pdf
 from unstructured.documents.elements import (
     Element, Text, Title, NarrativeText, ListItem, Table, TableCell
@@ -17,6 +18,20 @@ from unstructured.documents.elements import (
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Pixels tolerance for considering elements in the same row
+ROW_TOLERANCE = 5
+
+# Pixels tolerance for considering positions as the same column
+COLUMN_TOLERANCE = 10
+
+# Compact cell record referencing an element by its index on the page
+CELL_DTYPE = np.dtype([
+    ('element', np.int32),
+    ('row', np.int32),
+    ('col_start', np.int32),
+    ('col_end', np.int32)
+])
+
 class GridAnalyzer:
     """
     Grid-based analysis for financial documents using Unstructured.
@@ -122,18 +137,21 @@ class GridAnalyzer:
         """
         Create a grid representation of a page.
         
+        Bounding boxes are held in a NumPy array. Rows and columns are found
+        by splitting sorted coordinates where consecutive gaps exceed the
+        tolerance, and elements are assigned to columns with a binary search
+        over the column boundaries.
+        
         Args:
             elements: List of elements on the page
             
         Returns:
-            Dictionary containing grid data
+            Dictionary containing grid data. Elements are ordered top to
+            bottom; rows, element columns and cells refer to elements by
+            their index in that order.
         """
-        grid = {
-            'elements': [],
-            'rows': [],
-            'columns': [],
-            'cells': {}
-        }
+        page_elements = []
+        boxes = []
         
         # Extract coordinates for each element
         for element in elements:
@@ -141,115 +159,79 @@ class GridAnalyzer:
             coordinates = metadata.get('coordinates', {})
             
             if coordinates:
-                # Extract bounding box
-                x0 = coordinates.get('x0', 0)
-                y0 = coordinates.get('y0', 0)
-                x1 = coordinates.get('x1', 0)
-                y1 = coordinates.get('y1', 0)
-                
-                # Add element with its coordinates
-                grid['elements'].append({
-                    'element': element,
-                    'x0': x0,
-                    'y0': y0,
-                    'x1': x1,
-                    'y1': y1,
-                    'text': str(element)
-                })
+                page_elements.append(element)
+                boxes.append((
+                    coordinates.get('x0', 0),
+                    coordinates.get('y0', 0),
+                    coordinates.get('x1', 0),
+                    coordinates.get('y1', 0)
+                ))
+        
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
         
         # Sort elements by y-coordinate (top to bottom)
-        grid['elements'].sort(key=lambda e: e['y0'])
-        
-        # Identify rows based on y-coordinates
-        current_row = []
-        current_y = None
-        row_tolerance = 5  # Pixels tolerance for considering elements in the same row
-        
-        for element in grid['elements']:
-            if current_y is None:
-                # First element
-                current_row.append(element)
-                current_y = element['y0']
-            elif abs(element['y0'] - current_y) <= row_tolerance:
-                # Same row
-                current_row.append(element)
-            else:
-                # New row
-                if current_row:
-                    # Sort elements in the row by x-coordinate (left to right)
-                    current_row.sort(key=lambda e: e['x0'])
-                    grid['rows'].append(current_row)
-                
-                # Start new row
-                current_row = [element]
-                current_y = element['y0']
-        
-        # Add the last row
-        if current_row:
-            current_row.sort(key=lambda e: e['x0'])
-            grid['rows'].append(current_row)
-        
-        # Identify columns based on x-coordinates
-        x_positions = []
-        for element in grid['elements']:
-            x_positions.append(element['x0'])
-            x_positions.append(element['x1'])
-        
-        # Find distinct column boundaries
-        x_positions = sorted(set(x_positions))
-        column_boundaries = []
-        
-        # Merge close x-positions
-        column_tolerance = 10  # Pixels tolerance for considering positions as the same column
-        current_x = None
-        
-        for x in x_positions:
-            if current_x is None:
-                current_x = x
-            elif x - current_x <= column_tolerance:
-                # Same column, update to the rightmost position
-                current_x = x
-            else:
-                # New column
-                column_boundaries.append(current_x)
-                current_x = x
-        
-        # Add the last column boundary
-        if current_x is not None:
-            column_boundaries.append(current_x)
-        
-        grid['columns'] = column_boundaries
-        
-        # Create cells based on row and column intersections
-        for row_idx, row in enumerate(grid['rows']):
-            for element in row:
-                # Find which columns this element spans
-                start_col = None
-                end_col = None
-                
-                for col_idx, col_x in enumerate(column_boundaries):
-                    if start_col is None and abs(element['x0'] - col_x) <= column_tolerance:
-                        start_col = col_idx
-                    
-                    if start_col is not None and end_col is None and abs(element['x1'] - col_x) <= column_tolerance:
-                        end_col = col_idx
-                
-                if start_col is not None:
-                    # If end_col wasn't found, assume it spans only one column
-                    if end_col is None:
-                        end_col = start_col
-                    
-                    # Create cell
-                    cell_key = f"{row_idx}_{start_col}_{end_col}"
-                    grid['cells'][cell_key] = {
-                        'element': element,
-                        'row': row_idx,
-                        'col_start': start_col,
-                        'col_end': end_col,
-                        'text': element['text']
-                    }
-        
-        return grid
+        order = np.argsort(boxes[:, 1], kind='stable')
+        boxes = boxes[order]
+        page_elements = [page_elements[i] for i in order]
+        element_count = len(page_elements)
+        
+        # Identify rows: a new row starts wherever the vertical gap exceeds the tolerance
+        row_ids = np.zeros(element_count, dtype=np.int32)
+        if element_count:
+            row_ids[1:] = np.cumsum(np.diff(boxes[:, 1]) > ROW_TOLERANCE)
+        
+        # Sort elements in each row by x-coordinate (left to right)
+        row_order = np.lexsort((boxes[:, 0], row_ids))
+        row_breaks = np.flatnonzero(np.diff(row_ids[row_order])) + 1
+        rows = np.split(row_order, row_breaks) if element_count else []
+        
+        # Identify column boundaries: merge close x-positions, keeping the rightmost
+        x_positions = np.unique(np.concatenate((boxes[:, 0], boxes[:, 2])))
+        column_boundaries = x_positions[np.append(np.diff(x_positions) > COLUMN_TOLERANCE, True)] \
+            if len(x_positions) else x_positions
+        column_count = len(column_boundaries)
+        
+        # Find the first column boundary within tolerance of each element's left edge
+        col_start = np.searchsorted(column_boundaries, boxes[:, 0] - COLUMN_TOLERANCE)
+        has_start = col_start < column_count
+        has_start[has_start] = column_boundaries[col_start[has_start]] <= boxes[has_start, 0] + COLUMN_TOLERANCE
+        
+        # Find the first boundary at or after the start column matching the right edge;
+        # if none is found, assume the element spans only one column
+        col_end = np.maximum(np.searchsorted(column_boundaries, boxes[:, 2] - COLUMN_TOLERANCE), col_start)
+        has_end = col_end < column_count
+        has_end[has_end] = column_boundaries[col_end[has_end]] <= boxes[has_end, 2] + COLUMN_TOLERANCE
+        col_end = np.where(has_end, col_end, col_start)
+        
+        col_start = np.where(has_start, col_start, -1).astype(np.int32)
+        col_end = np.where(has_start, col_end, -1).astype(np.int32)
+        
+        # Create cells for elements that line up with a column, in row order
+        cell_elements = row_order[has_start[row_order]]
+        cells = np.empty(len(cell_elements), dtype=CELL_DTYPE)
+        cells['element'] = cell_elements
+        cells['row'] = row_ids[cell_elements]
+        cells['col_start'] = col_start[cell_elements]
+        cells['col_end'] = col_end[cell_elements]
+        
+        # Look up cells by (row, start column)
+        cell_lookup = {
+            (row, col): element_index
+            for element_index, row, col in zip(cells['element'].tolist(), cells['row'].tolist(),
+                                               cells['col_start'].tolist())
+        }
+        
+        return {
+            'elements': page_elements,
+            'texts': [str(element) for element in page_elements],
+            'boxes': boxes,
+            'rows': rows,
+            'row_ids': row_ids,
+            'columns': column_boundaries,
+            'element_columns': col_start,
+            'cells': cells,
+            'cell_lookup': cell_lookup
+        }
     
     def _extract_financial_data(self) -> Dict[str, Any]:
         """
@@ -414,14 +396,19 @@ class GridAnalyzer:
         asset_class_keywords = ['liquidity', 'bonds', 'equities', 'structured products', 'other assets']
         
         for page_number, grid in self.grid_data.items():
+            texts = grid['texts']
+            
             for row_idx, row in enumerate(grid['rows']):
+                row = row.tolist()
+                
                 # Check if this row contains asset allocation information
-                row_text = ' '.join(element['text'].lower() for element in row)
+                row_text = ' '.join(texts[element].lower() for element in row)
                 
                 if any(keyword in row_text for keyword in asset_class_keywords):
                     # This row might contain asset allocation information
                     for element in row:
-                        element_text = element['text'].lower()
+                        element_text = texts[element].lower()
+                        element_col = int(grid['element_columns'][element])
                         
                         # Check if this element contains an asset class
                         for keyword in asset_class_keywords:
@@ -436,10 +423,10 @@ class GridAnalyzer:
                                     if value_element != element:
                                         # Try to parse as numeric value
                                         try:
-                                            numeric_value = self._parse_numeric_value(value_element['text'])
+                                            numeric_value = self._parse_numeric_value(texts[value_element])
                                             
                                             # Determine if this is value or weight
-                                            if '%' in value_element['text']:
+                                            if '%' in texts[value_element]:
                                                 weight = numeric_value / 100 if numeric_value > 1 else numeric_value
                                             elif numeric_value > 1000:
                                                 value = numeric_value
@@ -447,25 +434,25 @@ class GridAnalyzer:
                                             pass
                                 
                                 # If not found in the same row, look in adjacent cells
-                                if value is None or weight is None:
+                                if (value is None or weight is None) and element_col >= 0:
                                     # Look in the next column
-                                    next_col_key = f"{row_idx}_{element['col'] + 1}"
-                                    if next_col_key in grid['cells']:
-                                        next_cell = grid['cells'][next_col_key]
+                                    next_col_key = (row_idx, element_col + 1)
+                                    if next_col_key in grid['cell_lookup']:
+                                        next_text = texts[grid['cell_lookup'][next_col_key]]
                                         try:
-                                            numeric_value = self._parse_numeric_value(next_cell['text'])
+                                            numeric_value = self._parse_numeric_value(next_text)
                                             if value is None and numeric_value > 1000:
                                                 value = numeric_value
                                         except (ValueError, TypeError):
                                             pass
                                     
                                     # Look in the next row, same column
-                                    next_row_key = f"{row_idx + 1}_{element['col']}"
-                                    if next_row_key in grid['cells']:
-                                        next_cell = grid['cells'][next_row_key]
+                                    next_row_key = (row_idx + 1, element_col)
+                                    if next_row_key in grid['cell_lookup']:
+                                        next_text = texts[grid['cell_lookup'][next_row_key]]
                                         try:
-                                            numeric_value = self._parse_numeric_value(next_cell['text'])
-                                            if weight is None and '%' in next_cell['text']:
+                                            numeric_value = self._parse_numeric_value(next_text)
+                                            if weight is None and '%' in next_text:
                                                 weight = numeric_value / 100 if numeric_value > 1 else numeric_value
                                         except (ValueError, TypeError):
                                             pass
@@ -21,24 +21,26 @@ import time
 import threading
 import queue
 import multiprocessing as mp
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple, Union, Callable, Generator
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import traceback
+import itertools
 import psutil
 import io
 
 # Import enhanced processing modules
 from .document_processor import DocumentProcessor
+from services.table_extraction_service import get_table_extraction_service
 
 # Import libraries for document processing
 try:
     import PyPDF2
     import fitz  # PyMuPDF
     from docx import Document as DocxDocument
-    import tabula
     import camelot
     from PIL import Image
     import pytesseract
@@ -47,6 +49,13 @@ except ImportError:
     HAS_ADVANCED_PROCESSING = False
     logging.warning("Advanced document processing libraries not available. Some features will be limited.")
 
+# Import libraries for streaming Excel ingestion
+try:
+    import openpyxl
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -56,6 +65,13 @@ DEFAULT_CHUNK_SIZE = 10  # Number of pages to process in a single chunk
 DEFAULT_MAX_WORKERS = max(1, min(os.cpu_count() or 1, 8))  # Cap at 8 or number of CPUs
 DEFAULT_MEMORY_LIMIT = 0.8  # Max memory usage (percentage of total)
 DEFAULT_QUEUE_SIZE = 100   # Default size for processing queue
+DEFAULT_EXCEL_CHUNK_ROWS = 1000  # Number of spreadsheet rows per DataFrame chunk
+STREAMED_EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')  # Formats openpyxl can stream
+ISIN_PATTERN = re.compile(r'\b[A-Z]{2}[A-Z0-9]{9}[0-9]\b')
+DEFAULT_TASK_PRIORITY = 0  # Lower values run first
+DEFAULT_MAX_RESULTS = 1000  # Finished task results kept in memory
+DEFAULT_RESULT_TTL = 3600  # Seconds a finished result is kept after its last access
+FINISHED_TASK_STATUSES = ("completed", "failed", "cancelled", "unknown")
 
 class PerformanceMetrics:
     """Track performance metrics for document processing."""
@@ -228,6 +244,208 @@ class PageStreamProcessor:
                 return 0
 
 
+class ExcelRowStreamer:
+    """
+    Stream Excel worksheet rows as DataFrame chunks to bound memory usage.
+    
+    The workbook is opened once in openpyxl's read-only mode and rows are
+    pulled through a row iterator, so only one chunk of a sheet is held in
+    memory at a time. Only the formats in STREAMED_EXCEL_EXTENSIONS are
+    supported; see PandasExcelStreamer for the others.
+    """
+    
+    def __init__(self, file_path: str):
+        """Initialize with Excel file path."""
+        self.file_path = file_path
+        self.workbook = None
+        
+    def __enter__(self):
+        self.open()
+        return self
+        
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+        
+    def open(self):
+        """Open the workbook in read-only mode."""
+        if self.workbook is not None:
+            return
+            
+        if not HAS_OPENPYXL:
+            raise ImportError("openpyxl is required to stream .xlsx files")
+        self.workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+            
+    def close(self):
+        """Close the workbook and release its file handle."""
+        if self.workbook is None:
+            return
+            
+        self.workbook.close()
+        self.workbook = None
+        
+    @property
+    def sheet_names(self) -> List[str]:
+        """Names of the worksheets in the workbook."""
+        self.open()
+        return self.workbook.sheetnames
+        
+    def _iter_rows(self, sheet_name: str) -> Generator[Tuple, None, None]:
+        """Iterate over the raw row values of a sheet."""
+        self.open()
+        
+        sheet = self.workbook[sheet_name]
+        # Dimensions stored in the file are often wrong for generated exports
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+            
+    @staticmethod
+    def _make_columns(header: Tuple) -> List[str]:
+        """Build unique column names from a header row, as pandas does."""
+        columns = []
+        seen = {}
+        
+        for index, value in enumerate(header):
+            name = f"Unnamed: {index}" if value is None or value == '' else str(value)
+            
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+                
+            columns.append(name)
+            
+        return columns
+        
+    def stream_sheet(self, sheet_name: str, 
+                     chunk_size: int = DEFAULT_EXCEL_CHUNK_ROWS) -> Tuple[List[str], Generator[pd.DataFrame, None, None]]:
+        """
+        Stream a sheet in DataFrame chunks.
+        
+        The first non-empty row is used as the header. Empty rows are skipped.
+        
+        Args:
+            sheet_name: Name of the sheet
+            chunk_size: Number of rows in each chunk
+            
+        Returns:
+            Tuple of (column names, generator of DataFrame chunks)
+        """
+        rows = self._iter_rows(sheet_name)
+        
+        header = None
+        for row in rows:
+            if any(value is not None and value != '' for value in row):
+                header = row
+                break
+                
+        if header is None:
+            return [], iter(())
+            
+        # Trailing empty header cells are not columns
+        width = len(header)
+        while width and (header[width - 1] is None or header[width - 1] == ''):
+            width -= 1
+        columns = self._make_columns(header[:width])
+        
+        def chunks() -> Generator[pd.DataFrame, None, None]:
+            batch = []
+            
+            for row in rows:
+                if not any(value is not None and value != '' for value in row):
+                    continue
+                    
+                row = tuple(row[:width])
+                if len(row) < width:
+                    row = row + (None,) * (width - len(row))
+                batch.append(row)
+                
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=columns)
+                    batch = []
+                    
+            if batch:
+                yield pd.DataFrame(batch, columns=columns)
+                
+        return columns, chunks()
+
+
+class PandasExcelStreamer:
+    """
+    Read spreadsheets openpyxl cannot stream (.xls, .xlsb, .ods) with pandas.
+    
+    Has the interface of ExcelRowStreamer, but each sheet is read whole by
+    pandas (with the xlrd, pyxlsb or odf engine) before it is split into chunks.
+    """
+    
+    def __init__(self, file_path: str):
+        """Initialize with spreadsheet file path."""
+        self.file_path = file_path
+        self.excel_file = None
+        
+    def __enter__(self):
+        self.open()
+        return self
+        
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+        
+    def open(self):
+        """Open the spreadsheet."""
+        if self.excel_file is None:
+            self.excel_file = pd.ExcelFile(self.file_path)
+            
+    def close(self):
+        """Close the spreadsheet and release its file handle."""
+        if self.excel_file is not None:
+            self.excel_file.close()
+            self.excel_file = None
+            
+    @property
+    def sheet_names(self) -> List[str]:
+        """Names of the worksheets in the spreadsheet."""
+        self.open()
+        return self.excel_file.sheet_names
+        
+    def stream_sheet(self, sheet_name: str,
+                     chunk_size: int = DEFAULT_EXCEL_CHUNK_ROWS) -> Tuple[List[str], Generator[pd.DataFrame, None, None]]:
+        """
+        Read a sheet and split it into DataFrame chunks.
+        
+        Args:
+            sheet_name: Name of the sheet
+            chunk_size: Number of rows in each chunk
+            
+        Returns:
+            Tuple of (column names, generator of DataFrame chunks)
+        """
+        self.open()
+        data = self.excel_file.parse(sheet_name).dropna(how='all')
+        columns = [str(column) for column in data.columns]
+        data.columns = columns
+        
+        def chunks() -> Generator[pd.DataFrame, None, None]:
+            for start in range(0, len(data), chunk_size):
+                yield data.iloc[start:start + chunk_size].reset_index(drop=True)
+                
+        return columns, chunks()
+
+
+def open_excel_streamer(file_path: str) -> Union[ExcelRowStreamer, PandasExcelStreamer]:
+    """
+    Get the chunked reader for a spreadsheet.
+    
+    Args:
+        file_path: Path to the spreadsheet
+        
+    Returns:
+        ExcelRowStreamer for formats openpyxl can stream, PandasExcelStreamer otherwise
+    """
+    if HAS_OPENPYXL and os.path.splitext(file_path)[1].lower() in STREAMED_EXCEL_EXTENSIONS:
+        return ExcelRowStreamer(file_path)
+    return PandasExcelStreamer(file_path)
+
+
 class ChunkedTextProcessor:
     """Process extracted text in chunks to optimize regex performance."""
     
@@ -369,22 +587,11 @@ class ParallelTableExtractor:
         except Exception as e:
             logger.warning(f"Camelot failed for pages {pages}: {e}")
             
-            # Fall back to tabula
+            # Fall back to the warm table extraction service
             try:
-                tabula_tables = tabula.read_pdf(self.file_path, pages=pages, multiple_tables=True)
-                
-                # Convert to common format
-                for i, df in enumerate(tabula_tables):
-                    if isinstance(df, pd.DataFrame) and not df.empty:
-                        tables.append({
-                            "page": int(pages.split('-')[0]) + i,  # Approximate page number
-                            "rows": len(df),
-                            "columns": len(df.columns),
-                            "headers": df.columns.tolist(),
-                            "data": df.to_dict(orient='records')
-                        })
+                tables.extend(get_table_extraction_service().extract_tables(self.file_path, pages))
             except Exception as e2:
-                logger.error(f"Tabula also failed for pages {pages}: {e2}")
+                logger.error(f"Table extraction service also failed for pages {pages}: {e2}")
         
         return tables
     
@@ -398,19 +605,8 @@ class ParallelTableExtractor:
         tables = []
         
         try:
-            # Use tabula for table extraction
-            tabula_tables = tabula.read_pdf(self.file_path, pages='all', multiple_tables=True)
-            
-            # Convert to common format
-            for i, df in enumerate(tabula_tables):
-                if isinstance(df, pd.DataFrame) and not df.empty:
-                    tables.append({
-                        "page": i + 1,  # Approximate page number
-                        "rows": len(df),
-                        "columns": len(df.columns),
-                        "headers": df.columns.tolist(),
-                        "data": df.to_dict(orient='records')
-                    })
+            # Use the warm table extraction service
+            tables = get_table_extraction_service().extract_tables(self.file_path, 'all')
         except Exception as e:
             logger.error(f"Error extracting tables sequentially: {e}", exc_info=True)
         
@@ -597,27 +793,63 @@ class MemoryOptimizedProcessor:
 
 
 class TaskQueue:
-    """Queue system for handling large batch processing jobs."""
+    """
+    Priority queue system for handling large batch processing jobs.
     
-    def __init__(self, max_size: int = DEFAULT_QUEUE_SIZE, num_workers: int = DEFAULT_MAX_WORKERS):
+    Worker threads pull tasks in priority order and either run them inline
+    ("thread" executor) or hand them to a process pool ("process" executor) so
+    CPU-bound work is not limited by the GIL. Finished results are kept in an
+    LRU store bounded by size and idle time, and status counters are updated
+    as tasks change state.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_QUEUE_SIZE, num_workers: int = DEFAULT_MAX_WORKERS,
+                 executor: Union[str, Executor] = "thread", max_results: int = DEFAULT_MAX_RESULTS,
+                 result_ttl: Optional[float] = DEFAULT_RESULT_TTL):
         """
         Initialize the task queue.
         
         Args:
             max_size: Maximum queue size
             num_workers: Number of worker threads
+            executor: "thread", "process" or an Executor instance to run tasks on.
+                Tasks given to a process executor must be picklable.
+            max_results: Maximum number of finished results to keep
+            result_ttl: Seconds a finished result is kept after its last access
+                (None to keep results until evicted by max_results)
         """
-        self.queue = queue.Queue(maxsize=max_size)
-        self.results = {}
+        if isinstance(executor, str) and executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type: {executor}")
+            
+        self.queue = queue.PriorityQueue(maxsize=max_size)
         self.num_workers = num_workers
+        self.executor_type = executor
+        self.executor = None
+        self.max_results = max_results
+        self.result_ttl = result_ttl
         self.workers = []
         self.running = False
         self.lock = threading.Lock()
         
+        # Tasks that are queued or running, by task ID
+        self.active = {}
+        # Finished tasks in least recently used order
+        self.results = OrderedDict()
+        
+        self.counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self.total_tasks = 0
+        self.evicted_results = 0
+        self._sequence = itertools.count()
+        
     def start_workers(self):
         """Start worker threads."""
         self.running = True
         
+        if self.executor_type == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        elif isinstance(self.executor_type, Executor):
+            self.executor = self.executor_type
+        
         for _ in range(self.num_workers):
             worker = threading.Thread(target=self._worker_loop)
             worker.daemon = True
@@ -628,9 +860,9 @@ class TaskQueue:
         """Stop worker threads."""
         self.running = False
         
-        # Add None tasks to unblock workers
-        for _ in range(self.num_workers):
-            self.queue.put(None)
+        # Add stop markers ahead of any queued task to unblock workers
+        for _ in range(len(self.workers)):
+            self.queue.put((float("-inf"), next(self._sequence), None))
             
         # Wait for all workers to finish
         for worker in self.workers:
@@ -638,39 +870,100 @@ class TaskQueue:
             
         self.workers = []
         
+        # Only shut down executors created by the queue itself
+        if self.executor is not None and self.executor is not self.executor_type:
+            self.executor.shutdown(wait=True)
+        self.executor = None
+        
     def _worker_loop(self):
         """Worker thread main loop."""
         while self.running:
-            task = self.queue.get()
+            _, _, task = self.queue.get()
             
             if task is None:
                 self.queue.task_done()
                 break
                 
             try:
-                task_id, task_func, args, kwargs = task
-                result = task_func(*args, **kwargs)
-                
                 with self.lock:
-                    self.results[task_id] = {
-                        "status": "completed",
-                        "result": result,
-                        "error": None
-                    }
+                    # Skip tasks cancelled while they were queued
+                    if task["status"] != "queued":
+                        continue
+                    task["status"] = "running"
+                    task["started_at"] = time.time()
+                    self.counts["queued"] -= 1
+                    self.counts["running"] += 1
+                    
+                    if self.executor is not None:
+                        task["future"] = self.executor.submit(task["func"], *task["args"], **task["kwargs"])
+                        
+                if "future" in task:
+                    result = task["future"].result()
+                else:
+                    result = task["func"](*task["args"], **task["kwargs"])
+                    
+                self._finish_task(task, {
+                    "status": "completed",
+                    "result": result,
+                    "error": None
+                })
             except Exception as e:
                 error_traceback = traceback.format_exc()
                 
-                with self.lock:
-                    self.results[task_id] = {
-                        "status": "failed",
-                        "result": None,
-                        "error": str(e),
-                        "traceback": error_traceback
-                    }
+                self._finish_task(task, {
+                    "status": "failed",
+                    "result": None,
+                    "error": str(e),
+                    "traceback": error_traceback
+                })
             finally:
                 self.queue.task_done()
                 
-    def add_task(self, task_id: str, task_func: Callable, *args, **kwargs) -> str:
+    def _finish_task(self, task: Dict[str, Any], info: Dict[str, Any]):
+        """Move a task from the active set to the result store."""
+        with self.lock:
+            self._finish_task_locked(task, info)
+            
+    def _finish_task_locked(self, task: Dict[str, Any], info: Dict[str, Any]):
+        """Move a task from the active set to the result store. Caller holds the lock."""
+        # A cancelled process pool task still reports back from its worker
+        if task["status"] not in ("queued", "running"):
+            return
+            
+        if task["status"] == "running":
+            self.counts["running"] -= 1
+        elif task["status"] == "queued":
+            self.counts["queued"] -= 1
+            
+        task["status"] = info["status"]
+        self.counts[info["status"]] += 1
+        
+        # A newer task may have reused the same ID
+        if self.active.get(task["task_id"]) is task:
+            del self.active[task["task_id"]]
+            
+        info["last_access"] = time.time()
+        self.results[task["task_id"]] = info
+        self.results.move_to_end(task["task_id"])
+        self._prune_results()
+            
+    def _prune_results(self):
+        """Evict expired and least recently used results. Caller holds the lock."""
+        if self.result_ttl is not None:
+            cutoff = time.time() - self.result_ttl
+            while self.results:
+                task_id, info = next(iter(self.results.items()))
+                if info["last_access"] >= cutoff:
+                    break
+                del self.results[task_id]
+                self.evicted_results += 1
+                
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+            self.evicted_results += 1
+                
+    def add_task(self, task_id: str, task_func: Callable, *args, 
+                 priority: int = DEFAULT_TASK_PRIORITY, **kwargs) -> str:
         """
         Add a task to the queue.
         
@@ -678,21 +971,59 @@ class TaskQueue:
             task_id: Unique identifier for the task
             task_func: Function to execute
             *args: Positional arguments for the function
+            priority: Task priority, lower values run first
             **kwargs: Keyword arguments for the function
             
         Returns:
             Task identifier
         """
+        task = {
+            "task_id": task_id,
+            "status": "queued",
+            "func": task_func,
+            "args": args,
+            "kwargs": kwargs,
+            "priority": priority
+        }
+        
         with self.lock:
-            self.results[task_id] = {
-                "status": "queued",
-                "result": None,
-                "error": None
-            }
+            self.results.pop(task_id, None)
+            self.active[task_id] = task
+            self.counts["queued"] += 1
+            self.total_tasks += 1
             
-        self.queue.put((task_id, task_func, args, kwargs))
+        self.queue.put((priority, next(self._sequence), task))
         return task_id
         
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        Cancel a task that has not started running.
+        
+        Args:
+            task_id: Task identifier
+            
+        Returns:
+            True if the task was cancelled
+        """
+        with self.lock:
+            task = self.active.get(task_id)
+            if task is None:
+                return False
+                
+            if task["status"] == "running":
+                # Only a process pool future that has not started can still be cancelled
+                future = task.get("future")
+                if future is None or not future.cancel():
+                    return False
+                    
+            # Finish under the same lock so a worker cannot start the task in between
+            self._finish_task_locked(task, {
+                "status": "cancelled",
+                "result": None,
+                "error": "Task cancelled"
+            })
+            return True
+        
     def get_result(self, task_id: str) -> Dict[str, Any]:
         """
         Get the result of a task.
@@ -704,7 +1035,18 @@ class TaskQueue:
             Task result information
         """
         with self.lock:
-            return self.results.get(task_id, {"status": "unknown", "result": None, "error": "Task not found"})
+            task = self.active.get(task_id)
+            if task is not None:
+                return {"status": task["status"], "result": None, "error": None}
+                
+            self._prune_results()
+            info = self.results.get(task_id)
+            if info is None:
+                return {"status": "unknown", "result": None, "error": "Task not found"}
+                
+            info["last_access"] = time.time()
+            self.results.move_to_end(task_id)
+            return {key: value for key, value in info.items() if key != "last_access"}
             
     def wait_for_all(self):
         """Wait for all tasks to complete."""
@@ -718,19 +1060,37 @@ class TaskQueue:
             Queue status information
         """
         with self.lock:
-            pending = sum(1 for info in self.results.values() if info["status"] == "queued")
-            completed = sum(1 for info in self.results.values() if info["status"] == "completed")
-            failed = sum(1 for info in self.results.values() if info["status"] == "failed")
-            
             return {
                 "queue_size": self.queue.qsize(),
-                "pending_tasks": pending,
-                "completed_tasks": completed,
-                "failed_tasks": failed,
-                "total_tasks": len(self.results)
+                "pending_tasks": self.counts["queued"],
+                "running_tasks": self.counts["running"],
+                "completed_tasks": self.counts["completed"],
+                "failed_tasks": self.counts["failed"],
+                "cancelled_tasks": self.counts["cancelled"],
+                "total_tasks": self.total_tasks,
+                "retained_results": len(self.results),
+                "evicted_results": self.evicted_results
             }
 
 
+def _process_document_in_worker(upload_dir: str, memory_limit: float, file_path: str, file_type: str,
+                                processing_options: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Process a document inside a task queue worker process.
+    
+    Each worker process keeps one processor so it is only created once.
+    """
+    global _worker_processor
+    
+    if _worker_processor is None:
+        _worker_processor = OptimizedDocumentProcessor(upload_dir, max_workers=1, memory_limit=memory_limit)
+        
+    return _worker_processor.process_document(file_path, file_type, processing_options)
+
+
+_worker_processor = None
+
+
 class OptimizedDocumentProcessor:
     """
     Enhanced document processor optimized for large PDFs and high-volume processing.
@@ -738,7 +1098,8 @@ class OptimizedDocumentProcessor:
     """
     
     def __init__(self, upload_dir: str = "uploads", max_workers: int = DEFAULT_MAX_WORKERS, 
-                 memory_limit: float = DEFAULT_MEMORY_LIMIT):
+                 memory_limit: float = DEFAULT_MEMORY_LIMIT, task_executor: str = "thread",
+                 max_results: int = DEFAULT_MAX_RESULTS, result_ttl: Optional[float] = DEFAULT_RESULT_TTL):
         """
         Initialize the optimized document processor.
         
@@ -746,6 +1107,9 @@ class OptimizedDocumentProcessor:
             upload_dir: Directory for uploaded files
             max_workers: Maximum number of worker processes/threads
             memory_limit: Maximum memory usage as percentage of total
+            task_executor: "thread" or "process" execution of asynchronous tasks
+            max_results: Maximum number of finished task results to keep
+            result_ttl: Seconds a finished task result is kept after its last access
         """
         self.upload_dir = upload_dir
         os.makedirs(upload_dir, exist_ok=True)
@@ -757,7 +1121,9 @@ class OptimizedDocumentProcessor:
         self.base_processor = DocumentProcessor(upload_dir)
         
         # Initialize task queue for batch processing
-        self.task_queue = TaskQueue(num_workers=max_workers)
+        self.task_executor = task_executor
+        self.task_queue = TaskQueue(num_workers=max_workers, executor=task_executor,
+                                    max_results=max_results, result_ttl=result_ttl)
         self.task_queue.start_workers()
         
         # Initialize metrics tracker
@@ -868,7 +1234,8 @@ class OptimizedDocumentProcessor:
             }
             
     def process_document_async(self, file_path: str, file_type: str, 
-                             processing_options: Optional[Dict] = None) -> str:
+                             processing_options: Optional[Dict] = None,
+                             priority: int = DEFAULT_TASK_PRIORITY) -> str:
         """
         Process a document asynchronously.
         
@@ -876,14 +1243,34 @@ class OptimizedDocumentProcessor:
             file_path: Path to the document
             file_type: Type of the document
             processing_options: Options for processing
+            priority: Task priority, lower values run first
             
         Returns:
             Task ID for retrieving results
         """
         task_id = f"task_{int(time.time())}_{os.path.basename(file_path)}"
-        self.task_queue.add_task(task_id, self.process_document, file_path, file_type, processing_options)
+        
+        if self.task_executor == "process":
+            # Bound methods of this processor cannot be sent to another process
+            self.task_queue.add_task(task_id, _process_document_in_worker, self.upload_dir, self.memory_limit,
+                                     file_path, file_type, processing_options, priority=priority)
+        else:
+            self.task_queue.add_task(task_id, self.process_document, file_path, file_type, processing_options,
+                                     priority=priority)
         return task_id
         
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        Cancel an asynchronous task that has not started running.
+        
+        Args:
+            task_id: Task identifier
+            
+        Returns:
+            True if the task was cancelled
+        """
+        return self.task_queue.cancel_task(task_id)
+        
     def get_task_result(self, task_id: str) -> Dict[str, Any]:
         """
         Get result of an asynchronous task.
@@ -959,7 +1346,7 @@ class OptimizedDocumentProcessor:
             for task_id in task_ids:
                 if task_id not in results:
                     status = self.get_task_result(task_id)
-                    if status["status"] in ["completed", "failed"]:
+                    if status["status"] in FINISHED_TASK_STATUSES:
                         results[task_id] = status
                         
             # Sleep briefly to avoid tight loop
@@ -1005,6 +1392,29 @@ class OptimizedDocumentProcessor:
             
         return result
         
+    def _extract_isins_from_data(self, data: pd.DataFrame) -> List[str]:
+        """
+        Find the ISINs in the text cells of a DataFrame.
+        
+        Args:
+            data: Table data
+            
+        Returns:
+            ISINs in order of first occurrence, column by column
+        """
+        isins = {}
+        for column in data.columns:
+            values = data[column]
+            if not (values.dtype == object or pd.api.types.is_string_dtype(values)):
+                continue
+                
+            for value in values:
+                if isinstance(value, str):
+                    for isin in ISIN_PATTERN.findall(value):
+                        isins.setdefault(isin, None)
+                        
+        return list(isins)
+        
     def _process_large_excel(self, file_path: str, options: Dict) -> Dict[str, Any]:
         """
         Process large Excel files with memory optimization.
@@ -1028,70 +1438,74 @@ class OptimizedDocumentProcessor:
         }
         
         try:
-            # Use chunks to read Excel file
-            excel_file = pd.ExcelFile(file_path)
-            
-            # Determine which sheets to process
-            sheet_names = options.get('sheet_names', 'all')
-            if sheet_names == 'all':
-                sheet_names = excel_file.sheet_names
-            elif isinstance(sheet_names, str):
-                sheet_names = [sheet_names]
+            # Stream rows from a single read-only handle on the workbook, or
+            # read a sheet at a time for formats openpyxl cannot stream
+            with open_excel_streamer(file_path) as streamer:
                 
-            # Process each sheet with chunking for large files
-            for sheet_name in sheet_names:
-                try:
-                    self.metrics.start_stage(f"excel_sheet_{sheet_name}")
+                # Determine which sheets to process
+                sheet_names = options.get('sheet_names', 'all')
+                if sheet_names == 'all':
+                    sheet_names = streamer.sheet_names
+                elif isinstance(sheet_names, str):
+                    sheet_names = [sheet_names]
                     
-                    # Get sheet dimensions first
-                    df_info = pd.read_excel(file_path, sheet_name=sheet_name, nrows=0)
-                    
-                    # Extract basic sheet info
-                    sheet_info = {
-                        "name": sheet_name,
-                        "columns": len(df_info.columns),
-                        "column_names": df_info.columns.tolist()
-                    }
-                    
-                    # Process in chunks to limit memory usage
-                    chunk_size = 1000
-                    chunks = []
-                    row_count = 0
-                    
-                    for chunk in pd.read_excel(file_path, sheet_name=sheet_name, chunksize=chunk_size):
-                        row_count += len(chunk)
+                chunk_size = options.get('excel_chunk_size', DEFAULT_EXCEL_CHUNK_ROWS)
+                
+                # ISINs seen so far, in order of first occurrence
+                isins = {}
+                
+                # Process each sheet chunk by chunk to bound memory usage
+                for sheet_name in sheet_names:
+                    try:
+                        self.metrics.start_stage(f"excel_sheet_{sheet_name}")
+                        
+                        columns, chunks = streamer.stream_sheet(sheet_name, chunk_size)
+                        
+                        # Extract basic sheet info
+                        sheet_info = {
+                            "name": sheet_name,
+                            "columns": len(columns),
+                            "column_names": columns
+                        }
+                        
+                        preview = None
+                        row_count = 0
                         
-                        # Extract ISINs from the chunk
-                        isins = self.base_processor._extract_isins_from_data(chunk)
-                        if isins:
-                            result["isins"].extend(isins)
+                        for chunk in chunks:
+                            row_count += len(chunk)
                             
-                        # Keep only first chunk for table preview
-                        if not chunks:
-                            chunks.append(chunk)
+                            # Extract ISINs from the chunk
+                            for isin in self._extract_isins_from_data(chunk):
+                                isins.setdefault(isin, None)
+                                
+                            # Keep only the first rows for table preview
+                            if preview is None:
+                                preview = chunk.head(10)
+                            elif len(preview) < 10:
+                                preview = pd.concat([preview, chunk.head(10 - len(preview))], ignore_index=True)
+                                
+                        # Update sheet info with row count
+                        sheet_info["rows"] = row_count
+                        result["sheets"].append(sheet_info)
+                        
+                        # Extract tables if requested (using only the first rows for preview)
+                        if options.get('extract_tables', True) and preview is not None:
+                            table_info = {
+                                "sheet": sheet_name,
+                                "rows": row_count,
+                                "columns": len(columns),
+                                "headers": columns,
+                                "data": preview.to_dict(orient='records')  # First 10 rows for preview
+                            }
+                            result["tables"].append(table_info)
                             
-                    # Update sheet info with row count
-                    sheet_info["rows"] = row_count
-                    result["sheets"].append(sheet_info)
-                    
-                    # Extract tables if requested (using only the first chunk for preview)
-                    if options.get('extract_tables', True) and chunks:
-                        table_info = {
-                            "sheet": sheet_name,
-                            "rows": row_count,
-                            "columns": len(df_info.columns),
-                            "headers": df_info.columns.tolist(),
-                            "data": chunks[0].head(10).to_dict(orient='records')  # First 10 rows for preview
-                        }
-                        result["tables"].append(table_info)
+                        self.metrics.end_stage(f"excel_sheet_{sheet_name}")
+                        self.metrics.record_memory_usage()
                         
-                    self.metrics.end_stage(f"excel_sheet_{sheet_name}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing sheet {sheet_name}: {e}")
-                    
-            # Remove duplicates from ISINs
-            result["isins"] = list(set(result["isins"]))
+                    except Exception as e:
+                        logger.error(f"Error processing sheet {sheet_name}: {e}")
+                        
+            result["isins"] = list(isins)
             
             self.metrics.end_stage("large_excel_processing")
             return result
@@ -1141,7 +1555,7 @@ class OptimizedDocumentProcessor:
                 row_count += len(chunk)
                 
                 # Extract ISINs from the chunk
-                isins = self.base_processor._extract_isins_from_data(chunk)
+                isins = self._extract_isins_from_data(chunk)
                 if isins:
                     result["isins"].extend(isins)
                     
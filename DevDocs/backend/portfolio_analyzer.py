@@ -11,6 +11,181 @@ import math
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Look-back windows of the period returns
+RETURN_PERIODS = {
+    "1m": timedelta(days=30),
+    "3m": timedelta(days=90),
+    "6m": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "3y": timedelta(days=365 * 3),
+    "5y": timedelta(days=365 * 5),
+}
+
+# Trading days per year used to annualize daily figures
+TRADING_DAYS_PER_YEAR = 252
+
+class PricePanel:
+    """
+    Price histories of several securities aligned on one date index.
+    
+    Dates are parsed once. ``prices`` is a (dates x securities) matrix holding NaN
+    where a security has no price point on a date, so lookups and returns are
+    computed for all securities at once.
+    """
+    
+    def __init__(self, historical_data: Dict[str, List[Dict[str, Any]]],
+                 identifiers: Optional[List[str]] = None):
+        """
+        Build the price panel.
+        
+        Args:
+            historical_data: Price points ({"date": ..., "price": ...}) by security identifier
+            identifiers: Securities to include (defaults to all securities in historical_data)
+        """
+        if identifiers is None:
+            identifiers = list(historical_data)
+        identifiers = [identifier for identifier in dict.fromkeys(identifiers) if historical_data.get(identifier)]
+        
+        histories = [historical_data[identifier] for identifier in identifiers]
+        columns = np.repeat(np.arange(len(identifiers)), [len(history) for history in histories])
+        dates = self.parse_dates([point.get("date") for history in histories for point in history]).values
+        prices = self._parse_prices([point.get("price", 0) for history in histories for point in history])
+        
+        # Drop points without a usable date
+        parsed = ~np.isnat(dates)
+        columns, dates, prices = columns[parsed], dates[parsed], prices[parsed]
+        
+        # Keep securities with at least one price point
+        kept = np.flatnonzero(np.bincount(columns, minlength=len(identifiers)))
+        self.identifiers = [identifiers[column] for column in kept]
+        columns = np.searchsorted(kept, columns)
+        
+        self.dates = pd.DatetimeIndex(np.unique(dates))
+        rows = self.dates.searchsorted(dates)
+        
+        # Keep the first point of a security on a date
+        _, first = np.unique(columns * len(self.dates) + rows, return_index=True)
+        self.prices = np.full((len(self.dates), len(self.identifiers)), np.nan)
+        self.prices[rows[first], columns[first]] = prices[first]
+        
+        # Last row with a price at or before each row and first row with one at or after it
+        valid = ~np.isnan(self.prices)
+        row_numbers = np.arange(len(self.dates))[:, None]
+        self._previous_rows = np.maximum.accumulate(np.where(valid, row_numbers, -1), axis=0)
+        self._next_rows = np.minimum.accumulate(
+            np.where(valid, row_numbers, len(self.dates))[::-1], axis=0
+        )[::-1]
+        
+        if self.identifiers:
+            self.first_rows = self._next_rows[0]
+            self.last_rows = self._previous_rows[-1]
+        else:
+            self.first_rows = self.last_rows = np.zeros(0, dtype=int)
+    
+    @staticmethod
+    def parse_dates(values: List[Any]) -> pd.DatetimeIndex:
+        """
+        Parse ISO dates, converting timezone-aware dates to naive UTC.
+        
+        Args:
+            values: Date strings or datetimes
+        
+        Returns:
+            Parsed dates, NaT where a value could not be parsed
+        """
+        dates = pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce", utc=True)
+        return pd.DatetimeIndex(dates.dt.tz_localize(None))
+    
+    @staticmethod
+    def _parse_prices(values: List[Any]) -> np.ndarray:
+        """Convert prices to floats, using 0 for missing or invalid prices."""
+        try:
+            prices = np.array(values, dtype=float)
+        except (TypeError, ValueError):
+            prices = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+        
+        prices[np.isnan(prices)] = 0.0
+        return prices
+    
+    def closest_prices(self, targets: np.ndarray) -> np.ndarray:
+        """
+        Look up the price of each security closest to its target date.
+        
+        Args:
+            targets: One target date per security
+        
+        Returns:
+            Closest prices, the earlier point winning ties (NaN for securities without prices)
+        """
+        columns = np.arange(len(self.identifiers))
+        dates = self.dates.values
+        targets = np.asarray(targets).astype(dates.dtype)
+        last = len(dates) - 1
+        
+        # First date on or after each target
+        positions = np.searchsorted(dates, targets)
+        before = np.where(positions > 0, self._previous_rows[np.clip(positions - 1, 0, last), columns], -1)
+        after = np.where(positions <= last, self._next_rows[np.clip(positions, 0, last), columns], last + 1)
+        
+        has_before = before >= 0
+        has_after = after <= last
+        before_distance = targets - dates[np.clip(before, 0, last)]
+        after_distance = dates[np.clip(after, 0, last)] - targets
+        
+        use_before = has_before & (~has_after | (before_distance <= after_distance))
+        rows = np.clip(np.where(use_before, before, after), 0, last)
+        
+        return np.where(has_before | has_after, self.prices[rows, columns], np.nan)
+    
+    def period_returns(self) -> pd.DataFrame:
+        """
+        Calculate the returns of all securities over the standard periods.
+        
+        Returns:
+            DataFrame indexed by security with one column per period (NaN where unavailable)
+        """
+        columns = np.arange(len(self.identifiers))
+        current_dates = self.dates.values[self.last_rows]
+        current_prices = self.prices[self.last_rows, columns]
+        
+        def returns_since(base_prices: np.ndarray) -> np.ndarray:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(base_prices > 0, (current_prices - base_prices) / base_prices, np.nan)
+        
+        returns = {}
+        for period, delta in RETURN_PERIODS.items():
+            returns[period] = returns_since(self.closest_prices(current_dates - np.timedelta64(delta)))
+        
+        year_starts = pd.DatetimeIndex(current_dates).to_period("Y").to_timestamp().values
+        returns["ytd"] = returns_since(self.closest_prices(year_starts))
+        
+        # Return since the earliest available price
+        returns["max"] = returns_since(self.prices[self.first_rows, columns])
+        
+        with np.errstate(invalid="ignore"):
+            returns["3y_annualized"] = (1 + returns["3y"]) ** (1 / 3) - 1
+            returns["5y_annualized"] = (1 + returns["5y"]) ** (1 / 5) - 1
+            
+            ten_years_ago = current_dates - np.timedelta64(timedelta(days=365 * 10))
+            returns["10y"] = returns_since(self.closest_prices(ten_years_ago))
+            returns["10y_annualized"] = (1 + returns["10y"]) ** (1 / 10) - 1
+        
+        return pd.DataFrame(returns, index=self.identifiers)
+    
+    def daily_returns(self) -> pd.DataFrame:
+        """
+        Calculate the return of each security between its consecutive price points.
+        
+        Returns:
+            DataFrame of returns (dates x securities), NaN where a security has no return
+        """
+        previous = pd.DataFrame(self.prices).ffill().shift(1).to_numpy()
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(previous > 0, (self.prices - previous) / previous, np.nan)
+        
+        return pd.DataFrame(returns, index=self.dates, columns=self.identifiers)
+
 class PortfolioAnalyzer:
     """Analyze investment portfolios and calculate key metrics."""
     
@@ -50,15 +225,22 @@ class PortfolioAnalyzer:
             # Calculate asset allocation
             allocation = self._calculate_allocation(portfolio_data)
             
+            # Parse the price histories of the holdings once for performance and risk
+            panel = None
+            if historical_data:
+                panel = PricePanel(historical_data, [
+                    item.get("isin", item.get("ticker", "")) for item in portfolio_data
+                ])
+            
             # Calculate performance metrics if historical data is available
             performance = {}
             if historical_data:
-                performance = self._calculate_performance(portfolio_data, historical_data)
+                performance = self._calculate_performance(portfolio_data, historical_data, panel)
             
             # Calculate risk metrics if historical data is available
             risk = {}
             if historical_data:
-                risk = self._calculate_risk_metrics(portfolio_data, historical_data)
+                risk = self._calculate_risk_metrics(portfolio_data, historical_data, panel)
             else:
                 # Calculate basic risk metrics without historical data
                 risk = self._calculate_basic_risk_metrics(portfolio_data)
@@ -173,7 +355,8 @@ class PortfolioAnalyzer:
         return result
     
     def _calculate_performance(self, portfolio_data: List[Dict[str, Any]], 
-                              historical_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+                              historical_data: Dict[str, List[Dict[str, Any]]],
+                              panel: Optional[PricePanel] = None) -> Dict[str, Any]:
         """Calculate performance metrics using historical data."""
         # Initialize performance metrics
         performance = {
@@ -200,13 +383,37 @@ class PortfolioAnalyzer:
         if total_value <= 0:
             return performance
         
-        # Calculate weighted returns for each time period
+        # Weights of the securities with value and historical data
+        weights = self._historical_weights(portfolio_data, historical_data, total_value, positive_only=True)
+        
+        if not weights:
+            return performance
+        
+        # Calculate returns of all securities for all periods at once
+        if panel is None:
+            panel = PricePanel(historical_data, list(weights))
+        returns = panel.period_returns()
+        weight_vector = np.array([weights.get(identifier, 0) for identifier in panel.identifiers])
+        
+        # Add weighted returns, securities without a return for a period contribute nothing
+        for section in ("returns", "annualized_returns"):
+            for period in performance[section]:
+                if period in returns:
+                    performance[section][period] = float(np.nansum(returns[period].to_numpy() * weight_vector))
+        
+        return performance
+    
+    def _historical_weights(self, portfolio_data: List[Dict[str, Any]],
+                            historical_data: Dict[str, List[Dict[str, Any]]],
+                            total_value: float, positive_only: bool = False) -> Dict[str, float]:
+        """Calculate portfolio weights of the securities that have historical data."""
+        weights = {}
+        
         for item in portfolio_data:
             value = self._extract_numeric_value(item.get("value", 0))
-            weight = value / total_value if total_value > 0 else 0
             
             # Skip items with no value
-            if value <= 0:
+            if positive_only and value <= 0:
                 continue
             
             # Get identifier (ISIN or ticker)
@@ -216,109 +423,24 @@ class PortfolioAnalyzer:
             if not identifier or identifier not in historical_data:
                 continue
             
-            # Get historical prices
-            prices = historical_data[identifier]
-            
-            # Calculate returns for different time periods
-            returns = self._calculate_security_returns(prices)
-            
-            # Add weighted returns to portfolio returns
-            for period in performance["returns"]:
-                if period in returns:
-                    performance["returns"][period] += returns[period] * weight
-            
-            # Add weighted annualized returns
-            for period in performance["annualized_returns"]:
-                if period in returns:
-                    performance["annualized_returns"][period] += returns[period] * weight
+            weights[identifier] = weights.get(identifier, 0) + value / total_value
         
-        return performance
+        return weights
     
     def _calculate_security_returns(self, prices: List[Dict[str, Any]]) -> Dict[str, float]:
         """Calculate returns for a security over different time periods."""
-        # Sort prices by date
-        sorted_prices = sorted(prices, key=lambda x: x.get("date", ""))
+        panel = PricePanel({"security": prices})
         
-        if not sorted_prices:
+        if not panel.identifiers:
             return {}
         
-        # Get current price and date
-        current_price = sorted_prices[-1].get("price", 0)
-        current_date = datetime.fromisoformat(sorted_prices[-1].get("date", datetime.now().isoformat()))
-        
-        # Initialize returns
-        returns = {}
-        
-        # Define time periods
-        periods = {
-            "1m": timedelta(days=30),
-            "3m": timedelta(days=90),
-            "6m": timedelta(days=180),
-            "1y": timedelta(days=365),
-            "3y": timedelta(days=365 * 3),
-            "5y": timedelta(days=365 * 5),
-        }
-        
-        # Calculate returns for each period
-        for period, delta in periods.items():
-            target_date = current_date - delta
-            
-            # Find closest price to target date
-            closest_price = self._find_closest_price(sorted_prices, target_date)
-            
-            if closest_price > 0:
-                # Calculate return
-                period_return = (current_price - closest_price) / closest_price
-                returns[period] = period_return
-        
-        # Calculate YTD return
-        ytd_date = datetime(current_date.year, 1, 1)
-        ytd_price = self._find_closest_price(sorted_prices, ytd_date)
-        
-        if ytd_price > 0:
-            returns["ytd"] = (current_price - ytd_price) / ytd_price
-        
-        # Calculate max return (from earliest available price)
-        earliest_price = sorted_prices[0].get("price", 0)
-        
-        if earliest_price > 0:
-            returns["max"] = (current_price - earliest_price) / earliest_price
-        
-        # Calculate annualized returns
-        if "3y" in returns:
-            returns["3y_annualized"] = (1 + returns["3y"]) ** (1/3) - 1
-        
-        if "5y" in returns:
-            returns["5y_annualized"] = (1 + returns["5y"]) ** (1/5) - 1
-        
-        # Calculate 10-year return if data is available
-        ten_year_date = current_date - timedelta(days=365 * 10)
-        ten_year_price = self._find_closest_price(sorted_prices, ten_year_date)
+        returns = panel.period_returns().iloc[0]
         
-        if ten_year_price > 0:
-            ten_year_return = (current_price - ten_year_price) / ten_year_price
-            returns["10y"] = ten_year_return
-            returns["10y_annualized"] = (1 + ten_year_return) ** (1/10) - 1
-        
-        return returns
-    
-    def _find_closest_price(self, prices: List[Dict[str, Any]], target_date: datetime) -> float:
-        """Find the price closest to the target date."""
-        closest_price = 0
-        min_delta = timedelta(days=365 * 100)  # Large initial value
-        
-        for price_data in prices:
-            price_date = datetime.fromisoformat(price_data.get("date", ""))
-            delta = abs(price_date - target_date)
-            
-            if delta < min_delta:
-                min_delta = delta
-                closest_price = price_data.get("price", 0)
-        
-        return closest_price
+        return {period: float(value) for period, value in returns.items() if not np.isnan(value)}
     
     def _calculate_risk_metrics(self, portfolio_data: List[Dict[str, Any]], 
-                               historical_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+                               historical_data: Dict[str, List[Dict[str, Any]]],
+                               panel: Optional[PricePanel] = None) -> Dict[str, Any]:
         """Calculate comprehensive risk metrics using historical data."""
         # Initialize risk metrics
         risk = {
@@ -340,82 +462,46 @@ class PortfolioAnalyzer:
         if total_value <= 0:
             return risk
         
-        # Prepare data for portfolio return calculation
-        portfolio_returns = []
-        market_returns = []
+        # Calculate daily returns of all securities on a shared date index
+        weights = self._historical_weights(portfolio_data, historical_data, total_value)
+        if panel is None:
+            panel = PricePanel(historical_data, list(weights))
+        daily_returns = panel.daily_returns()
         
-        # Get market returns if available
-        market_data = historical_data.get("MARKET", [])
+        # Keep dates on which at least one security has a return
+        daily_returns = daily_returns[daily_returns.notna().any(axis=1).to_numpy()]
         
-        # Calculate weighted daily returns
-        dates = set()
-        security_returns = {}
+        # Calculate weighted portfolio returns for all dates at once
+        weight_vector = np.array([weights.get(identifier, 0) for identifier in panel.identifiers])
+        portfolio_returns_array = np.nan_to_num(daily_returns.to_numpy()) @ weight_vector
         
-        # First, collect all dates and calculate returns for each security
-        for item in portfolio_data:
-            identifier = item.get("isin", item.get("ticker", ""))
-            
-            if not identifier or identifier not in historical_data:
-                continue
-            
-            prices = historical_data[identifier]
-            
-            # Calculate daily returns
-            daily_returns = self._calculate_daily_returns(prices)
-            security_returns[identifier] = daily_returns
-            
-            # Collect all dates
-            dates.update(daily_returns.keys())
+        # Align market returns with the portfolio returns (0 where unavailable)
+        market_returns_array = np.zeros(len(portfolio_returns_array))
+        market_data = historical_data.get("MARKET", [])
         
-        # Sort dates
-        sorted_dates = sorted(dates)
-        
-        # Calculate portfolio returns for each date
-        for date in sorted_dates:
-            # Calculate weighted return for this date
-            portfolio_return = 0
-            
-            for item in portfolio_data:
-                identifier = item.get("isin", item.get("ticker", ""))
-                
-                if not identifier or identifier not in security_returns:
-                    continue
-                
-                value = self._extract_numeric_value(item.get("value", 0))
-                weight = value / total_value if total_value > 0 else 0
-                
-                if date in security_returns[identifier]:
-                    portfolio_return += security_returns[identifier][date] * weight
-            
-            portfolio_returns.append(portfolio_return)
-            
-            # Get market return for this date if available
-            market_return = 0
-            for price_data in market_data:
-                if price_data.get("date", "") == date:
-                    market_return = price_data.get("return", 0)
-                    break
-            
-            market_returns.append(market_return)
+        if market_data:
+            market_returns = pd.Series(
+                [price_data.get("return", 0) for price_data in market_data],
+                index=PricePanel.parse_dates([price_data.get("date") for price_data in market_data])
+            )
+            market_returns = market_returns[market_returns.index.notna() & ~market_returns.index.duplicated()]
+            market_returns_array = market_returns.reindex(daily_returns.index).fillna(0).to_numpy(dtype=float)
         
         # Calculate risk metrics
-        if portfolio_returns:
-            # Convert to numpy arrays for calculations
-            portfolio_returns_array = np.array(portfolio_returns)
-            
+        if len(portfolio_returns_array) > 0:
             # Calculate volatility (annualized standard deviation)
-            volatility = np.std(portfolio_returns_array) * np.sqrt(252)  # Annualize daily volatility
+            volatility = np.std(portfolio_returns_array) * np.sqrt(TRADING_DAYS_PER_YEAR)  # Annualize daily volatility
             risk["volatility"] = volatility
             
             # Calculate average return (annualized)
-            avg_return = np.mean(portfolio_returns_array) * 252  # Annualize daily return
+            avg_return = np.mean(portfolio_returns_array) * TRADING_DAYS_PER_YEAR  # Annualize daily return
             
             # Calculate Sharpe ratio
             risk["sharpe_ratio"] = (avg_return - self.risk_free_rate) / volatility if volatility > 0 else 0
             
             # Calculate Sortino ratio (using downside deviation)
             negative_returns = portfolio_returns_array[portfolio_returns_array < 0]
-            downside_deviation = np.std(negative_returns) * np.sqrt(252) if len(negative_returns) > 0 else 0
+            downside_deviation = np.std(negative_returns) * np.sqrt(TRADING_DAYS_PER_YEAR) if len(negative_returns) > 0 else 0
             risk["downside_deviation"] = downside_deviation
             risk["sortino_ratio"] = (avg_return - self.risk_free_rate) / downside_deviation if downside_deviation > 0 else 0
             
@@ -429,26 +515,22 @@ class PortfolioAnalyzer:
             risk["var_95"] = np.percentile(portfolio_returns_array, 5) * total_value  # 95% VaR
             risk["var_99"] = np.percentile(portfolio_returns_array, 1) * total_value  # 99% VaR
             
-            # Calculate Beta and Alpha if market data is available
-            if market_returns and len(market_returns) == len(portfolio_returns):
-                market_returns_array = np.array(market_returns)
-                
-                # Calculate covariance and market variance
-                covariance = np.cov(portfolio_returns_array, market_returns_array)[0, 1]
-                market_variance = np.var(market_returns_array)
-                
-                # Calculate beta
-                beta = covariance / market_variance if market_variance > 0 else 1
-                risk["beta"] = beta
-                
-                # Calculate alpha (annualized)
-                market_avg_return = np.mean(market_returns_array) * 252
-                alpha = avg_return - (self.risk_free_rate + beta * (market_avg_return - self.risk_free_rate))
-                risk["alpha"] = alpha
-                
-                # Calculate R-squared
-                correlation = np.corrcoef(portfolio_returns_array, market_returns_array)[0, 1]
-                risk["r_squared"] = correlation ** 2
+            # Calculate covariance and market variance
+            covariance = np.cov(portfolio_returns_array, market_returns_array)[0, 1]
+            market_variance = np.var(market_returns_array)
+            
+            # Calculate beta
+            beta = covariance / market_variance if market_variance > 0 else 1
+            risk["beta"] = beta
+            
+            # Calculate alpha (annualized)
+            market_avg_return = np.mean(market_returns_array) * TRADING_DAYS_PER_YEAR
+            alpha = avg_return - (self.risk_free_rate + beta * (market_avg_return - self.risk_free_rate))
+            risk["alpha"] = alpha
+            
+            # Calculate R-squared
+            correlation = np.corrcoef(portfolio_returns_array, market_returns_array)[0, 1]
+            risk["r_squared"] = correlation ** 2
         
         return risk
     
@@ -495,25 +577,6 @@ class PortfolioAnalyzer:
         
         return risk
     
-    def _calculate_daily_returns(self, prices: List[Dict[str, Any]]) -> Dict[str, float]:
-        """Calculate daily returns from price data."""
-        # Sort prices by date
-        sorted_prices = sorted(prices, key=lambda x: x.get("date", ""))
-        
-        # Calculate daily returns
-        daily_returns = {}
-        
-        for i in range(1, len(sorted_prices)):
-            current_price = sorted_prices[i].get("price", 0)
-            previous_price = sorted_prices[i-1].get("price", 0)
-            date = sorted_prices[i].get("date", "")
-            
-            if previous_price > 0 and date:
-                daily_return = (current_price - previous_price) / previous_price
-                daily_returns[date] = daily_return
-        
-        return daily_returns
-    
     def _identify_base_currency(self, portfolio_data: List[Dict[str, Any]]) -> str:
         """Identify the base currency of the portfolio (most common currency)."""
         currency_counts = {}
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for the table extraction service.
+
+Compares cold extraction with warm extraction through the shared service, both
+measured in this process after the extraction libraries are imported:
+
+- pymupdf and pdfplumber: a cold call uses a new service and opens the PDF
+  itself; a warm call reuses the shared service and an already opened document.
+- tabula: a cold call launches its own Java process, as tabula does without
+  jpype; a warm call runs on the JVM the service started once in this process.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from typing import Dict, List, Any
+
+# Add the backend directory to the path so we can import the services
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from services import table_extraction_service
+from services.table_extraction_service import TableExtractionService, get_table_extraction_service
+
+# Directories with the sample PDFs bundled with the repository
+DEFAULT_PDF_DIRS = [
+    os.path.join(BACKEND_DIR, 'tests', 'samples'),
+    os.path.join(BACKEND_DIR, '..', '..', 'test-pdfs'),
+    os.path.join(BACKEND_DIR, '..', '..', 'test_documents')
+]
+
+def find_sample_pdfs(pdf_dirs: List[str]) -> List[str]:
+    """Find the PDF files in the given directories."""
+    pdf_paths = []
+    for pdf_dir in pdf_dirs:
+        if os.path.isdir(pdf_dir):
+            pdf_paths.extend(
+                os.path.abspath(os.path.join(pdf_dir, f))
+                for f in sorted(os.listdir(pdf_dir)) if f.lower().endswith('.pdf')
+            )
+    return pdf_paths
+
+def run_cold(pdf_path: str, backend: str, iterations: int) -> int:
+    """Extract the tables of a PDF repeatedly without reusing any state and return the table count."""
+    count = 0
+    for _ in range(iterations):
+        if backend == 'tabula':
+            # A new Java process for every call
+            count = len(table_extraction_service.tabula.read_pdf(
+                pdf_path,
+                pages='all',
+                multiple_tables=True,
+                output_format='json',
+                silent=True,
+                force_subprocess=True
+            ))
+        else:
+            # A new service that opens and closes the document itself
+            count = len(TableExtractionService([backend]).extract_tables(pdf_path))
+    return count
+
+def run_warm(pdf_path: str, backend: str, iterations: int) -> int:
+    """Extract the tables of a PDF repeatedly from one opened document and return the table count."""
+    service = get_table_extraction_service()
+    count = 0
+    if backend == 'tabula':
+        # tabula reads from the file; the service keeps its JVM running
+        for _ in range(iterations):
+            count = len(service.extract_tables(pdf_path, backends=[backend]))
+        return count
+
+    document = service.open_document(pdf_path, backend)
+    try:
+        for _ in range(iterations):
+            count = len(service.extract_tables(document, backends=[backend]))
+    finally:
+        document.close()
+    return count
+
+def run_benchmark(pdf_paths: List[str], backends: List[str], iterations: int = 3) -> Dict[str, Any]:
+    """
+    Run the cold and warm benchmarks.
+
+    Args:
+        pdf_paths: List of paths to PDF files
+        backends: Backends to benchmark
+        iterations: Number of extraction calls per PDF and mode
+
+    Returns:
+        Dictionary with benchmark results per backend
+    """
+    service = get_table_extraction_service()
+    results = {}
+
+    for backend in backends:
+        if not service.is_available(backend):
+            print(f"Skipping {backend}: library not installed")
+            continue
+        if backend == 'tabula' and not shutil.which('java'):
+            print("Skipping tabula: java not found")
+            continue
+        if backend == 'tabula' and not table_extraction_service.HAS_JPYPE:
+            print("Skipping tabula: jpype not installed, so there is no in-process JVM to compare with")
+            continue
+
+        # Start the backend once so the warm run measures steady-state throughput
+        service.warm_up()
+
+        result = {
+            'warm_before_run': service.is_warm(backend),
+            'calls': len(pdf_paths) * iterations,
+            'tables': {},
+            'cold_seconds': 0.0,
+            'warm_seconds': 0.0
+        }
+
+        for pdf_path in pdf_paths:
+            try:
+                # Skip files the backend cannot open, before timing anything
+                run_warm(pdf_path, backend, 1)
+            except Exception as e:
+                print(f"Skipping {os.path.basename(pdf_path)} for {backend}: {e}")
+                result['calls'] -= iterations
+                continue
+
+            start = time.perf_counter()
+            cold_count = run_cold(pdf_path, backend, iterations)
+            result['cold_seconds'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            warm_count = run_warm(pdf_path, backend, iterations)
+            result['warm_seconds'] += time.perf_counter() - start
+
+            result['tables'][os.path.basename(pdf_path)] = {'cold': cold_count, 'warm': warm_count}
+
+        result['cold_calls_per_second'] = result['calls'] / result['cold_seconds'] if result['cold_seconds'] else 0.0
+        result['warm_calls_per_second'] = result['calls'] / result['warm_seconds'] if result['warm_seconds'] else 0.0
+        result['speedup'] = result['cold_seconds'] / result['warm_seconds'] if result['warm_seconds'] else 0.0
+        results[backend] = result
+
+    return results
+
+def main():
+    """Run the benchmark script."""
+    parser = argparse.ArgumentParser(description="Benchmark cold and warm table extraction")
+    parser.add_argument("--pdf_dir", "-d", action="append", help="Directory containing PDF files (repeatable)")
+    parser.add_argument("--backend", "-b", action="append", help="Backend to benchmark (repeatable, default: all available)")
+    parser.add_argument("--iterations", "-i", type=int, default=3, help="Number of extraction calls per PDF")
+    parser.add_argument("--output", "-o", help="File to save the results to as JSON")
+
+    args = parser.parse_args()
+
+    pdf_paths = find_sample_pdfs(args.pdf_dir or DEFAULT_PDF_DIRS)
+    if not pdf_paths:
+        print("No PDF files found. Please specify a directory containing PDFs.")
+        return
+
+    backends = args.backend or get_table_extraction_service().available_backends
+    print(f"Benchmarking {', '.join(backends)} on {len(pdf_paths)} PDF files, {args.iterations} calls each")
+
+    results = run_benchmark(pdf_paths, backends, args.iterations)
+
+    for backend, result in results.items():
+        print(
+            f"{backend:>10}: cold {result['cold_calls_per_second']:.2f} calls/s, "
+            f"warm {result['warm_calls_per_second']:.2f} calls/s "
+            f"({result['speedup']:.1f}x)"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print("Results saved to", args.output)
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ and validation capabilities, supporting:
 import re
 import logging
 import json
+import sqlite3
+import threading
 import requests
 from typing import List, Dict, Any, Optional, Tuple, Set
 from datetime import datetime
@@ -23,6 +25,103 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# File names of the security cache inside the cache directory
+SECURITY_CACHE_FILE_NAME = 'security_cache.sqlite'
+LEGACY_CACHE_FILE_NAME = 'security_cache.json'
+
+# All security identifiers in a single pass. An optional context label (like
+# "ISIN:") may precede an identifier. The label, or the identifier itself
+# without one, must be a separate word. ISINs may contain a space or hyphen
+# after the country code and before the check digit.
+SECURITY_ID_PATTERN = re.compile(r'''
+    (?<![A-Za-z0-9])
+    (?:(?P<label>ISIN|International\s+Securities\s+Identification\s+Number|Security\s+ID|ID|No\.?|Code|Symbol)(?![A-Za-z0-9])[:\s]*)?
+    (?:
+        (?P<isin>[A-Z]{2}[ -]?[A-Z0-9]{9}[ -]?\d)
+        |(?P<cusip>[0-9A-Z]{9})
+        |(?P<sedol>[0-9A-Z]{7})
+    )
+    (?![A-Za-z0-9])
+''', re.VERBOSE)
+
+# Formats of the individual identifiers
+ISIN_FORMAT = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}\d$')
+CUSIP_FORMAT = re.compile(r'^[0-9A-Z]{9}$')
+SEDOL_FORMAT = re.compile(r'^[0-9A-Z]{7}$')
+
+class SecurityCacheStore:
+    """
+    SQLite key/value store of enriched security data.
+    
+    Each security is read and written on its own, so lookups and updates do not
+    depend on the size of the cache. Without a path the store is kept in memory.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the security cache store.
+        
+        Args:
+            db_path: Path to the SQLite file, or None for an in-memory store
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(db_path or ':memory:', check_same_thread=False, isolation_level=None)
+        if db_path:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS securities (
+            cache_key TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated REAL NOT NULL
+        )
+        ''')
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cached data of a security, or None if it is not cached."""
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM securities WHERE cache_key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, key: str, data: Dict[str, Any]):
+        """Add or replace the cached data of a security."""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO securities (cache_key, data, updated) VALUES (?, ?, ?)',
+                (key, json.dumps(data), datetime.now().timestamp())
+            )
+    
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        """Add or replace the cached data of many securities in one transaction."""
+        updated = datetime.now().timestamp()
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO securities (cache_key, data, updated) VALUES (?, ?, ?)',
+                    [(key, json.dumps(data), updated) for key, data in items.items()]
+                )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+    
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM securities WHERE cache_key = ?', (key,)).fetchone()
+        return row is not None
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM securities').fetchone()[0]
+    
+    def close(self):
+        """Close the database connection."""
+        with self.lock:
+            self.conn.close()
+
 class ISINExtractorService:
     def __init__(self, api_key=None, cache_dir=None):
         """
@@ -37,22 +136,8 @@ class ISINExtractorService:
         if cache_dir and not os.path.exists(cache_dir):
             os.makedirs(cache_dir, exist_ok=True)
         
-        # Regular expression patterns for security identifiers
-        self.isin_pattern = re.compile(r'\b[A-Z]{2}[A-Z0-9]{9}\d\b')
-        self.cusip_pattern = re.compile(r'\b[0-9A-Z]{9}\b')
-        self.sedol_pattern = re.compile(r'\b[0-9A-Z]{7}\b')
-        
-        # Context patterns to improve accuracy (common text near ISINs)
-        self.context_patterns = [
-            r'ISIN[:\s]+([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'International\s+Securities\s+Identification\s+Number[:\s]+([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'Security\s+ID[:\s]+([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'([A-Z]{2}[A-Z0-9]{9}\d)[\s\)]',
-            r'ID:\s*([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'No\.?\s*([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'Code:?\s*([A-Z]{2}[A-Z0-9]{9}\d)',
-            r'Symbol:?\s*([A-Z]{2}[A-Z0-9]{9}\d)',
-        ]
+        # Single scanner for all security identifiers
+        self.security_id_pattern = SECURITY_ID_PATTERN
         
         # Known country codes for validation
         self.country_codes = set([
@@ -74,34 +159,67 @@ class ISINExtractorService:
             'VI', 'VN', 'VU', 'WF', 'WS', 'XK', 'YE', 'YT', 'ZA', 'ZM', 'ZW'
         ])
         
-        # Cache for security data
-        self.security_cache = {}
+        # Cache for security data, keyed by "<id_type>_<identifier>"
+        cache_path = os.path.join(cache_dir, SECURITY_CACHE_FILE_NAME) if cache_dir else None
+        self.security_cache = SecurityCacheStore(cache_path)
         
-        # Load cache if exists
-        self._load_cache()
+        # Import the cache of earlier versions, which was a single JSON file
+        self._import_legacy_cache()
 
-    def _load_cache(self):
-        """Load the security cache from disk if available"""
-        if self.cache_dir:
-            cache_file = os.path.join(self.cache_dir, 'security_cache.json')
-            if os.path.exists(cache_file):
-                try:
-                    with open(cache_file, 'r') as f:
-                        self.security_cache = json.load(f)
-                    logger.info(f"Loaded {len(self.security_cache)} securities from cache")
-                except Exception as e:
-                    logger.error(f"Error loading security cache: {e}")
+    def _import_legacy_cache(self):
+        """Import the security cache from the legacy JSON file into the store"""
+        if not self.cache_dir:
+            return
+        
+        legacy_file = os.path.join(self.cache_dir, LEGACY_CACHE_FILE_NAME)
+        if not os.path.exists(legacy_file):
+            return
+        
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy_cache = json.load(f)
+            self.security_cache.put_many(legacy_cache)
+            os.replace(legacy_file, legacy_file + '.imported')
+            logger.info(f"Imported {len(legacy_cache)} securities from legacy cache")
+        except Exception as e:
+            logger.error(f"Error importing legacy security cache: {e}")
 
-    def _save_cache(self):
-        """Save the security cache to disk"""
-        if self.cache_dir:
-            cache_file = os.path.join(self.cache_dir, 'security_cache.json')
-            try:
-                with open(cache_file, 'w') as f:
-                    json.dump(self.security_cache, f)
-                logger.info(f"Saved {len(self.security_cache)} securities to cache")
-            except Exception as e:
-                logger.error(f"Error saving security cache: {e}")
+    def scan_identifiers(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find all security identifiers in the text in a single pass
+        
+        Args:
+            text: The text to search for security identifiers
+            
+        Returns:
+            Matches in text order, each with 'type' ('isin', 'cusip' or 'sedol'),
+            'value', 'position' and 'context' (the label before it, if any)
+        """
+        if not text:
+            return []
+        
+        matches = []
+        for match in self.security_id_pattern.finditer(text):
+            id_type = match.lastgroup
+            value = match.group(id_type)
+            
+            if id_type == 'isin':
+                value = value.replace(' ', '').replace('-', '')
+                valid = self.validate_isin(value)
+            elif id_type == 'cusip':
+                valid = self._is_potential_cusip(value)
+            else:
+                valid = self._is_potential_sedol(value)
+            
+            if valid:
+                matches.append({
+                    'type': id_type,
+                    'value': value,
+                    'position': match.start(id_type),
+                    'context': match.group('label')
+                })
+        
+        return matches
 
     def extract_isins(self, text: str) -> List[str]:
         """
@@ -111,26 +229,14 @@ class ISINExtractorService:
             text: The text to search for ISINs
             
         Returns:
-            A list of ISIN codes found in the text
+            A list of unique valid ISIN codes found in the text, in order of appearance
         """
-        # Clean text - remove hyphens, spaces, etc. that might break the pattern
-        cleaned_text = self._clean_text(text)
-        
-        # Find all potential ISINs using regex
-        potential_isins = self.isin_pattern.findall(cleaned_text)
+        isins = {}
+        for match in self.scan_identifiers(text):
+            if match['type'] == 'isin':
+                isins.setdefault(match['value'], None)
         
-        # Search for ISINs in contextual patterns
-        for pattern in self.context_patterns:
-            matches = re.findall(pattern, cleaned_text)
-            potential_isins.extend(matches)
-        
-        # Deduplicate and validate ISINs
-        valid_isins = []
-        for isin in set(potential_isins):
-            if self.validate_isin(isin):
-                valid_isins.append(isin)
-        
-        return valid_isins
+        return list(isins)
 
     def extract_securities(self, text: str) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -142,58 +248,19 @@ class ISINExtractorService:
         Returns:
             A dictionary with categorized security identifiers
         """
-        # Clean text
-        cleaned_text = self._clean_text(text)
-        
-        # Find all security identifiers
-        isins = [isin for isin in self.isin_pattern.findall(cleaned_text) if self.validate_isin(isin)]
-        cusips = [cusip for cusip in self.cusip_pattern.findall(cleaned_text) if self._is_potential_cusip(cusip)]
-        sedols = [sedol for sedol in self.sedol_pattern.findall(cleaned_text) if self._is_potential_sedol(sedol)]
-        
-        # Extract contextual securities (ISINs with context)
-        contextual_isins = []
-        for pattern in self.context_patterns:
-            for match in re.finditer(pattern, cleaned_text):
-                if match.groups():
-                    isin = match.group(1)
-                    if self.validate_isin(isin) and isin not in isins:
-                        contextual_isins.append(isin)
-        
-        # Combine all ISINs
-        all_isins = isins + contextual_isins
-        
-        # Return categorized results
-        return {
-            'isins': all_isins,
-            'cusips': cusips,
-            'sedols': sedols
+        securities = {
+            'isins': [],
+            'cusips': [],
+            'sedols': []
         }
-
-    def _clean_text(self, text: str) -> str:
-        """
-        Clean text for better security identifier extraction
-        
-        Args:
-            text: The text to clean
-            
-        Returns:
-            Cleaned text
-        """
-        if not text:
-            return ""
-        
-        # Replace common character issues
-        result = text.replace('-', '')  # Remove hyphens
-        result = result.replace(' ', '')  # Remove spaces
-        result = result.replace('\n', ' ')  # Replace newlines with spaces
-        result = result.replace('\t', ' ')  # Replace tabs with spaces
         
-        # Re-insert spaces after potential identifiers to help with regex boundary matching
-        result = re.sub(r'([A-Z]{2}[A-Z0-9]{9}\d)', r'\1 ', result)  # ISIN
-        result = re.sub(r'([0-9A-Z]{9})', r'\1 ', result)  # CUSIP
-        result = re.sub(r'([0-9A-Z]{7})', r'\1 ', result)  # SEDOL
+        for match in self.scan_identifiers(text):
+            identifiers = securities[f"{match['type']}s"]
+            # ISINs are listed once each
+            if match['type'] != 'isin' or match['value'] not in identifiers:
+                identifiers.append(match['value'])
         
-        return result
+        return securities
 
     def validate_isin(self, isin: str) -> bool:
         """
@@ -209,7 +276,7 @@ class ISINExtractorService:
             return False
         
         # Check format: 12 characters, starting with 2 letters
-        if not re.match(r'^[A-Z]{2}[A-Z0-9]{9}\d$', isin):
+        if not ISIN_FORMAT.match(isin):
             return False
         
         # Check country code
@@ -232,7 +299,7 @@ class ISINExtractorService:
         total = 0
         for i, digit in enumerate(reversed(digits_str)):
             d = int(digit)
-            if i % 2 == 1:  # Odd positions (from right)
+            if i % 2 == 0:  # Every other digit, starting with the rightmost
                 d *= 2
                 if d > 9:
                     d -= 9
@@ -258,7 +325,7 @@ class ISINExtractorService:
             return False
         
         # Basic format check: 9 characters
-        if not re.match(r'^[0-9A-Z]{9}$', cusip):
+        if not CUSIP_FORMAT.match(cusip):
             return False
         
         # Check for common CUSIP patterns
@@ -293,7 +360,7 @@ class ISINExtractorService:
             return False
         
         # Basic format check: 7 characters
-        if not re.match(r'^[0-9A-Z]{7}$', sedol):
+        if not SEDOL_FORMAT.match(sedol):
             return False
         
         # Check for common SEDOL patterns
@@ -326,8 +393,9 @@ class ISINExtractorService:
         """
         # Check cache first
         cache_key = f"{id_type}_{security_id}"
-        if cache_key in self.security_cache:
-            return self.security_cache[cache_key]
+        cached = self.security_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # If no API key, return minimal data
         if not self.api_key:
@@ -362,8 +430,7 @@ class ISINExtractorService:
             
             # Cache the result
             if data:
-                self.security_cache[cache_key] = data
-                self._save_cache()
+                self.security_cache.put(cache_key, data)
                 
             return data
             
@@ -10,7 +10,6 @@ import os
 import sys
 import json
 import argparse
-import shutil
 from datetime import datetime
 import logging
 from typing import Dict, Any, List, Optional
@@ -35,46 +34,20 @@ def get_stats(cache_service: DocumentCacheService) -> Dict[str, Any]:
     """
     stats = cache_service.get_cache_stats()
     
-    # Add disk usage information
-    cache_dir = cache_service.cache_dir
-    total_size = 0
-    file_count = 0
-    
-    for root, _, files in os.walk(cache_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_path = os.path.join(root, file)
-                total_size += os.path.getsize(file_path)
-                file_count += 1
+    # Add disk usage information from the cache index
+    total_size = stats['total_bytes']
     
     stats['disk_usage'] = {
         'total_bytes': total_size,
         'total_mb': round(total_size / (1024 * 1024), 2),
-        'file_count': file_count
+        'file_count': stats['total_entries']
     }
     
     # Add tenant information
     tenant_dirs = []
-    for item in os.listdir(cache_dir):
-        item_path = os.path.join(cache_dir, item)
-        if os.path.isdir(item_path) and not item.startswith('.'):
-            # Count files and size for this tenant
-            tenant_size = 0
-            tenant_file_count = 0
-            
-            for root, _, files in os.walk(item_path):
-                for file in files:
-                    if file.endswith('.json'):
-                        file_path = os.path.join(root, file)
-                        tenant_size += os.path.getsize(file_path)
-                        tenant_file_count += 1
-            
-            tenant_dirs.append({
-                'tenant_id': item,
-                'file_count': tenant_file_count,
-                'size_bytes': tenant_size,
-                'size_mb': round(tenant_size / (1024 * 1024), 2)
-            })
+    for tenant in cache_service.get_tenant_stats():
+        tenant['size_mb'] = round(tenant['size_bytes'] / (1024 * 1024), 2)
+        tenant_dirs.append(tenant)
     
     stats['tenants'] = tenant_dirs
     
@@ -102,16 +75,9 @@ def get_tenant_stats(cache_service: DocumentCacheService, tenant_id: str) -> Dic
             'exists': False
         }
     
-    # Count files and size for this tenant
-    tenant_size = 0
-    tenant_file_count = 0
-    
-    for root, _, files in os.walk(tenant_cache_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_path = os.path.join(root, file)
-                tenant_size += os.path.getsize(file_path)
-                tenant_file_count += 1
+    # Count files and size for this tenant from the cache index
+    tenant_size = cache_service.get_tenant_cache_size(tenant_id)
+    tenant_file_count = cache_service.get_tenant_entry_count(tenant_id)
     
     return {
         'tenant_id': tenant_id,
@@ -180,18 +146,8 @@ def clear_tenant_cache(cache_service: DocumentCacheService, tenant_id: str) -> D
             'timestamp': datetime.now().isoformat()
         }
     
-    # Count files before deletion
-    file_count = 0
-    for root, _, files in os.walk(tenant_cache_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_count += 1
-    
-    # Remove tenant cache directory
-    shutil.rmtree(tenant_cache_dir)
-    
-    # Recreate empty directory
-    os.makedirs(tenant_cache_dir, exist_ok=True)
+    # Remove the tenant's entries and their index rows
+    file_count = cache_service.clear_tenant_cache(tenant_id)
     
     return {
         'tenant_id': tenant_id,
@@ -210,22 +166,8 @@ def clear_all_cache(cache_service: DocumentCacheService) -> Dict[str, Any]:
     Returns:
         Dictionary with operation result
     """
-    cache_dir = cache_service.cache_dir
-    
-    # Count files before deletion
-    file_count = 0
-    for root, _, files in os.walk(cache_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_count += 1
-    
-    # Remove all files and subdirectories
-    for item in os.listdir(cache_dir):
-        item_path = os.path.join(cache_dir, item)
-        if os.path.isdir(item_path):
-            shutil.rmtree(item_path)
-        elif item.endswith('.json'):
-            os.remove(item_path)
+    # Remove all entries and their index rows
+    file_count = cache_service.clear_all_cache()
     
     return {
         'cleared': True,
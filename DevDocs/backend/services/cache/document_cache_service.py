@@ -3,27 +3,211 @@ Document Cache Service
 
 This service provides caching functionality for document processing results.
 It generates unique fingerprints for documents and stores/retrieves results from the cache.
+
+Entries are stored as zlib-compressed JSON in sharded directories, and a small
+SQLite index (fingerprint, tenant, size, created, expires, last access) answers
+lookups, statistics, expiry sweeps and LRU eviction without walking the cache
+directory.
 """
 
 import os
 import json
+import mmap
+import zlib
 import hashlib
 import logging
+import sqlite3
+import threading
 import time
 from typing import Dict, Any, Optional, List, Union
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# File name of the cache index inside the cache directory
+INDEX_FILE_NAME = '.cache_index.sqlite'
+
+# Extension of compressed cache entry files
+CACHE_FILE_EXTENSION = '.json.z'
+
+# Chunk size used when hashing document content
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+class CacheIndex:
+    """
+    SQLite index of the entries stored in the document cache.
+    
+    Entries are keyed by (tenant, fingerprint); the tenant is an empty string
+    for entries that are not tenant-isolated.
+    """
+    
+    def __init__(self, index_path: str):
+        """
+        Initialize the cache index.
+        
+        Args:
+            index_path: Path to the SQLite index file
+        """
+        self.index_path = index_path
+        self.created = not os.path.exists(index_path)
+        self.lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+        CREATE TABLE IF NOT EXISTS entries (
+            tenant TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            expires REAL NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (tenant, fingerprint)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires);
+        CREATE INDEX IF NOT EXISTS idx_entries_tenant_access ON entries (tenant, last_access);
+        CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access);
+        CREATE TABLE IF NOT EXISTS content_digests (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            hashed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_content_digests_hashed ON content_digests (hashed_at);
+        ''')
+    
+    def get(self, tenant: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Get the index row of an entry, or None if it is not indexed."""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT * FROM entries WHERE tenant = ? AND fingerprint = ?',
+                (tenant, fingerprint)
+            ).fetchone()
+        return dict(row) if row else None
+    
+    def put(self, tenant: str, fingerprint: str, path: str, size: int, created: float, expires: float):
+        """Add or replace the index row of an entry."""
+        with self.lock:
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO entries
+                (tenant, fingerprint, path, size, created, expires, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (tenant, fingerprint, path, size, created, expires, created)
+            )
+    
+    def touch(self, tenant: str, fingerprint: str, accessed: float):
+        """Record an access to an entry for LRU eviction."""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE entries SET last_access = ? WHERE tenant = ? AND fingerprint = ?',
+                (accessed, tenant, fingerprint)
+            )
+    
+    def remove(self, entries: List[Dict[str, Any]]):
+        """Remove the index rows of the given entries."""
+        with self.lock:
+            self.conn.executemany(
+                'DELETE FROM entries WHERE tenant = ? AND fingerprint = ?',
+                [(entry['tenant'], entry['fingerprint']) for entry in entries]
+            )
+    
+    def expired(self, now: float) -> List[Dict[str, Any]]:
+        """Get all entries that expired before the given time."""
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM entries WHERE expires <= ?', (now,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def least_recently_used(self, tenant: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get the least recently used entries, optionally for one tenant."""
+        with self.lock:
+            if tenant is None:
+                rows = self.conn.execute(
+                    'SELECT * FROM entries ORDER BY last_access LIMIT ?', (limit,)
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT * FROM entries WHERE tenant = ? ORDER BY last_access LIMIT ?', (tenant, limit)
+                ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def entries(self, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all entries, optionally for one tenant."""
+        with self.lock:
+            if tenant is None:
+                rows = self.conn.execute('SELECT * FROM entries').fetchall()
+            else:
+                rows = self.conn.execute('SELECT * FROM entries WHERE tenant = ?', (tenant,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def totals(self, tenant: Optional[str] = None) -> Dict[str, int]:
+        """Get the entry count and total size, optionally for one tenant."""
+        with self.lock:
+            if tenant is None:
+                row = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            else:
+                row = self.conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE tenant = ?', (tenant,)
+                ).fetchone()
+        return {'count': row[0], 'size': row[1]}
+    
+    def tenant_totals(self) -> List[Dict[str, Any]]:
+        """Get the entry count and total size of every tenant."""
+        with self.lock:
+            rows = self.conn.execute(
+                '''SELECT tenant, COUNT(*) AS count, SUM(size) AS size
+                FROM entries WHERE tenant != '' GROUP BY tenant ORDER BY tenant'''
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def get_content_digest(self, path: str, size: int, mtime_ns: int, inode: int) -> Optional[str]:
+        """Get the memoized content digest of a file if it has not changed since hashing."""
+        with self.lock:
+            row = self.conn.execute(
+                '''SELECT digest FROM content_digests
+                WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?''',
+                (path, size, mtime_ns, inode)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def put_content_digest(self, path: str, size: int, mtime_ns: int, inode: int, digest: str,
+                           max_entries: int = 10000):
+        """Memoize the content digest of a file, keeping at most max_entries rows."""
+        with self.lock:
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO content_digests
+                (path, size, mtime_ns, inode, digest, hashed_at)
+                VALUES (?, ?, ?, ?, ?, ?)''',
+                (path, size, mtime_ns, inode, digest, time.time())
+            )
+            self.conn.execute(
+                '''DELETE FROM content_digests WHERE path IN (
+                    SELECT path FROM content_digests ORDER BY hashed_at DESC LIMIT -1 OFFSET ?
+                )''',
+                (max_entries,)
+            )
+    
+    def close(self):
+        """Close the index connection."""
+        with self.lock:
+            self.conn.close()
+
 class DocumentCacheService:
     """
     Service for caching document processing results based on document content fingerprints.
-    Supports file-based caching with TTL (Time-To-Live) and tenant isolation.
+    Supports file-based caching with TTL (Time-To-Live), tenant isolation and
+    per-tenant/global size caps with LRU eviction.
     """
     
-    def __init__(self, cache_dir: Optional[str] = None, default_ttl: int = 86400, use_tenant_isolation: bool = True):
+    def __init__(self, cache_dir: Optional[str] = None, default_ttl: int = 86400, use_tenant_isolation: bool = True,
+                 max_tenant_bytes: Optional[int] = None, max_total_bytes: Optional[int] = None,
+                 compression_level: int = 6, use_mmap: bool = False, max_memoized_digests: int = 10000):
         """
         Initialize the document cache service.
         
@@ -31,10 +215,20 @@ class DocumentCacheService:
             cache_dir: Directory to store cache files (defaults to ./cache)
             default_ttl: Default Time-To-Live in seconds (defaults to 24 hours)
             use_tenant_isolation: Whether to isolate cache by tenant
+            max_tenant_bytes: Maximum cache size per tenant (None for no limit)
+            max_total_bytes: Maximum total cache size (None for no limit)
+            compression_level: zlib compression level for cache entries
+            use_mmap: Whether to memory-map files when hashing their content
+            max_memoized_digests: Number of file content digests remembered between runs
         """
         self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), '../../../cache')
         self.default_ttl = default_ttl
         self.use_tenant_isolation = use_tenant_isolation
+        self.max_tenant_bytes = max_tenant_bytes
+        self.max_total_bytes = max_total_bytes
+        self.compression_level = compression_level
+        self.use_mmap = use_mmap
+        self.max_memoized_digests = max_memoized_digests
         
         # Create cache directory if it doesn't exist
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -42,13 +236,35 @@ class DocumentCacheService:
         # For statistics
         self.cache_hits = 0
         self.cache_misses = 0
+        self.evictions = 0
+        
+        # Open the entry index, importing entries written in the old JSON format
+        self.index = CacheIndex(os.path.join(self.cache_dir, INDEX_FILE_NAME))
+        if self.index.created:
+            self._import_legacy_entries()
         
         logger.info(f"Document cache service initialized with cache directory: {self.cache_dir}")
     
+    def _get_tenant_key(self, tenant_id: Optional[str]) -> str:
+        """
+        Get the index key for a tenant.
+        
+        Args:
+            tenant_id: Tenant ID for multi-tenant isolation
+            
+        Returns:
+            Tenant ID, or an empty string when entries are not tenant-isolated
+        """
+        if self.use_tenant_isolation and tenant_id:
+            return tenant_id
+        return ''
+    
     def _get_cache_path(self, document_fingerprint: str, tenant_id: Optional[str] = None) -> str:
         """
         Get the path to the cache file for a document.
         
+        Files are sharded by the first two characters of the fingerprint.
+        
         Args:
             document_fingerprint: Unique fingerprint of the document
             tenant_id: Tenant ID for multi-tenant isolation
@@ -56,13 +272,156 @@ class DocumentCacheService:
         Returns:
             Path to the cache file
         """
-        if self.use_tenant_isolation and tenant_id:
-            # Create tenant-specific subdirectory
-            tenant_cache_dir = os.path.join(self.cache_dir, tenant_id)
-            os.makedirs(tenant_cache_dir, exist_ok=True)
-            return os.path.join(tenant_cache_dir, f"{document_fingerprint}.json")
+        tenant_key = self._get_tenant_key(tenant_id)
+        base_dir = os.path.join(self.cache_dir, tenant_key) if tenant_key else self.cache_dir
+        shard_dir = os.path.join(base_dir, document_fingerprint[:2])
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, f"{document_fingerprint}{CACHE_FILE_EXTENSION}")
+    
+    def _remove_entries(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Delete the files of the given entries and drop them from the index.
+        
+        Args:
+            entries: Index rows of the entries to remove
+            
+        Returns:
+            Number of entries removed
+        """
+        for entry in entries:
+            try:
+                os.remove(entry['path'])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error removing cache file {entry['path']}: {e}")
+        
+        self.index.remove(entries)
+        return len(entries)
+    
+    def _import_legacy_entries(self) -> int:
+        """
+        Import entries stored as plain JSON files into the compressed format.
+        
+        Returns:
+            Number of entries imported
+        """
+        imported = 0
+        
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith('.json'):
+                    continue
+                
+                file_path = os.path.join(root, file)
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        cache_data = json.load(f)
+                    
+                    fingerprint = cache_data['fingerprint']
+                    expiration_time = datetime.fromisoformat(cache_data['expiration_time'])
+                    ttl = int((expiration_time - datetime.now()).total_seconds())
+                    
+                    if ttl > 0:
+                        self.save_to_cache(fingerprint, cache_data['data'], ttl=ttl, tenant_id=cache_data.get('tenant_id'))
+                        imported += 1
+                    
+                    os.remove(file_path)
+                except Exception as e:
+                    logger.error(f"Error importing legacy cache entry {file_path}: {e}")
+        
+        if imported:
+            logger.info(f"Imported {imported} legacy cache entries")
+        return imported
+    
+    def _enforce_size_limits(self, tenant_key: str):
+        """
+        Evict least recently used entries until the size caps are met.
+        
+        Args:
+            tenant_key: Tenant whose cap is checked along with the global cap
+        """
+        if self.max_tenant_bytes is not None and tenant_key:
+            self._evict_lru(self.max_tenant_bytes, tenant_key)
+        
+        if self.max_total_bytes is not None:
+            self._evict_lru(self.max_total_bytes)
+    
+    def _evict_lru(self, max_bytes: int, tenant_key: Optional[str] = None):
+        """
+        Evict least recently used entries until their total size is within max_bytes.
+        
+        Args:
+            max_bytes: Size cap in bytes
+            tenant_key: Restrict eviction to one tenant (None for all entries)
+        """
+        excess = self.index.totals(tenant_key)['size'] - max_bytes
+        
+        while excess > 0:
+            victims = []
+            for entry in self.index.least_recently_used(tenant_key):
+                victims.append(entry)
+                excess -= entry['size']
+                if excess <= 0:
+                    break
+            
+            if not victims:
+                break
+            
+            self.evictions += self._remove_entries(victims)
+            logger.debug(f"Evicted {len(victims)} cache entries to stay within {max_bytes} bytes")
+    
+    def _hash_file_content(self, file_path: str) -> str:
+        """
+        Compute the SHA-256 digest of a file's full content.
+        
+        The file is hashed in fixed-size chunks (or through a memory map when
+        use_mmap is set), so memory use does not grow with the file size.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Hexadecimal content digest
+        """
+        hasher = hashlib.sha256()
+        
+        with open(file_path, 'rb') as f:
+            if self.use_mmap and os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset in range(0, len(mapped), FINGERPRINT_CHUNK_SIZE):
+                        hasher.update(mapped[offset:offset + FINGERPRINT_CHUNK_SIZE])
+            else:
+                for chunk in iter(lambda: f.read(FINGERPRINT_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+        
+        return hasher.hexdigest()
+    
+    def get_content_digest(self, file_path: str) -> str:
+        """
+        Get the SHA-256 digest of a file's content, reusing a memoized digest.
+        
+        Digests are remembered by (path, size, mtime_ns, inode), so a file that
+        has not changed since it was last hashed is not read again.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Hexadecimal content digest
+        """
+        real_path = os.path.realpath(file_path)
+        file_stat = os.stat(real_path)
+        key = (real_path, file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+        
+        digest = self.index.get_content_digest(*key)
+        if digest is None:
+            digest = self._hash_file_content(real_path)
+            self.index.put_content_digest(*key, digest, max_entries=self.max_memoized_digests)
         else:
-            return os.path.join(self.cache_dir, f"{document_fingerprint}.json")
+            logger.debug(f"Reusing memoized content digest for {file_path}")
+        
+        return digest
     
     def generate_document_fingerprint(self, file_path: str, metadata: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -78,25 +437,9 @@ class DocumentCacheService:
         # Initialize hash object
         hasher = hashlib.sha256()
         
-        # Add file content to hash
+        # Add the digest of the full file content to hash
         try:
-            # For smaller files, read the entire content
-            if os.path.getsize(file_path) < 10 * 1024 * 1024:  # Less than 10MB
-                with open(file_path, 'rb') as f:
-                    hasher.update(f.read())
-            else:
-                # For larger files, read in chunks and sample parts
-                with open(file_path, 'rb') as f:
-                    # Read first 1MB
-                    hasher.update(f.read(1024 * 1024))
-                    
-                    # Seek to middle and read 1MB
-                    f.seek(os.path.getsize(file_path) // 2)
-                    hasher.update(f.read(1024 * 1024))
-                    
-                    # Seek to near end and read last 1MB
-                    f.seek(-1024 * 1024, 2)
-                    hasher.update(f.read())
+            hasher.update(self.get_content_digest(file_path).encode())
         except Exception as e:
             logger.error(f"Error reading file for fingerprinting: {e}")
             # If we can't read the file, use file metadata
@@ -125,30 +468,34 @@ class DocumentCacheService:
         Returns:
             Cached processing results or None if not found
         """
-        cache_path = self._get_cache_path(document_fingerprint, tenant_id)
+        tenant_key = self._get_tenant_key(tenant_id)
+        entry = self.index.get(tenant_key, document_fingerprint)
         
-        if not os.path.exists(cache_path):
+        if entry is None:
+            self.cache_misses += 1
+            return None
+        
+        now = time.time()
+        
+        # Check if cache entry has expired
+        if entry['expires'] <= now:
+            logger.info(f"Cache entry for {document_fingerprint} has expired.")
+            self._remove_entries([entry])
             self.cache_misses += 1
             return None
         
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # Check if cache entry has expired
-            if 'expiration_time' in cache_data:
-                expiration_time = datetime.fromisoformat(cache_data['expiration_time'])
-                if datetime.now() > expiration_time:
-                    logger.info(f"Cache entry for {document_fingerprint} has expired.")
-                    self.cache_misses += 1
-                    return None
+            with open(entry['path'], 'rb') as f:
+                cache_data = json.loads(zlib.decompress(f.read()))
             
+            self.index.touch(tenant_key, document_fingerprint, now)
             self.cache_hits += 1
             logger.info(f"Cache hit for document fingerprint: {document_fingerprint}")
-            return cache_data['data']
+            return cache_data
             
         except Exception as e:
             logger.error(f"Error reading cache for {document_fingerprint}: {e}")
+            self._remove_entries([entry])
             self.cache_misses += 1
             return None
     
@@ -167,23 +514,25 @@ class DocumentCacheService:
             Whether the data was successfully cached
         """
         ttl = ttl or self.default_ttl
+        tenant_key = self._get_tenant_key(tenant_id)
         cache_path = self._get_cache_path(document_fingerprint, tenant_id)
         
-        # Calculate expiration time
-        expiration_time = (datetime.now() + timedelta(seconds=ttl)).isoformat()
-        
-        # Prepare cache entry
-        cache_entry = {
-            'fingerprint': document_fingerprint,
-            'data': data,
-            'created_at': datetime.now().isoformat(),
-            'expiration_time': expiration_time,
-            'tenant_id': tenant_id
-        }
+        created = time.time()
         
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_entry, f, indent=2, ensure_ascii=False)
+            payload = zlib.compress(
+                json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                self.compression_level
+            )
+            
+            # Write to a temporary file first so readers never see a partial entry
+            temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, cache_path)
+            
+            self.index.put(tenant_key, document_fingerprint, cache_path, len(payload), created, created + ttl)
+            self._enforce_size_limits(tenant_key)
             
             logger.info(f"Saved document processing results to cache: {document_fingerprint}")
             return True
@@ -203,11 +552,11 @@ class DocumentCacheService:
         Returns:
             Whether the cache entry was successfully invalidated
         """
-        cache_path = self._get_cache_path(document_fingerprint, tenant_id)
+        entry = self.index.get(self._get_tenant_key(tenant_id), document_fingerprint)
         
-        if os.path.exists(cache_path):
+        if entry is not None:
             try:
-                os.remove(cache_path)
+                self._remove_entries([entry])
                 logger.info(f"Invalidated cache for document fingerprint: {document_fingerprint}")
                 return True
             except Exception as e:
@@ -224,30 +573,32 @@ class DocumentCacheService:
         Returns:
             Number of cache entries cleared
         """
-        cleared_count = 0
-        
-        # Walk through all files in cache directory and its subdirectories
-        for root, _, files in os.walk(self.cache_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            cache_data = json.load(f)
-                        
-                        # Check if cache entry has expired
-                        if 'expiration_time' in cache_data:
-                            expiration_time = datetime.fromisoformat(cache_data['expiration_time'])
-                            if datetime.now() > expiration_time:
-                                os.remove(file_path)
-                                cleared_count += 1
-                                logger.debug(f"Cleared expired cache entry: {file_path}")
-                    except Exception as e:
-                        logger.error(f"Error checking cache expiration for {file_path}: {e}")
+        cleared_count = self._remove_entries(self.index.expired(time.time()))
         
         logger.info(f"Cleared {cleared_count} expired cache entries")
         return cleared_count
     
+    def clear_tenant_cache(self, tenant_id: str) -> int:
+        """
+        Clear all cache entries of a tenant.
+        
+        Args:
+            tenant_id: Tenant ID
+            
+        Returns:
+            Number of cache entries cleared
+        """
+        return self._remove_entries(self.index.entries(self._get_tenant_key(tenant_id)))
+    
+    def clear_all_cache(self) -> int:
+        """
+        Clear all cache entries.
+        
+        Returns:
+            Number of cache entries cleared
+        """
+        return self._remove_entries(self.index.entries())
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
@@ -255,25 +606,46 @@ class DocumentCacheService:
         Returns:
             Dictionary with cache statistics
         """
-        # Count total cache entries
-        total_entries = 0
-        for root, _, files in os.walk(self.cache_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    total_entries += 1
+        totals = self.index.totals()
         
         # Calculate hit rate
         total_requests = self.cache_hits + self.cache_misses
         hit_rate = (self.cache_hits / total_requests) * 100 if total_requests > 0 else 0
         
         return {
-            'total_entries': total_entries,
+            'total_entries': totals['count'],
+            'total_bytes': totals['size'],
             'cache_hits': self.cache_hits,
             'cache_misses': self.cache_misses,
+            'evictions': self.evictions,
             'hit_rate': f"{hit_rate:.2f}%",
             'cache_directory': self.cache_dir
         }
     
+    def get_tenant_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the entry count and size of every tenant's cache.
+        
+        Returns:
+            List of dictionaries with tenant_id, file_count and size_bytes
+        """
+        return [
+            {'tenant_id': row['tenant'], 'file_count': row['count'], 'size_bytes': row['size']}
+            for row in self.index.tenant_totals()
+        ]
+    
+    def get_tenant_entry_count(self, tenant_id: str) -> int:
+        """
+        Get the number of cache entries for a specific tenant.
+        
+        Args:
+            tenant_id: Tenant ID
+            
+        Returns:
+            Number of the tenant's cache entries
+        """
+        return self.index.totals(self._get_tenant_key(tenant_id))['count']
+    
     def get_tenant_cache_size(self, tenant_id: str) -> int:
         """
         Get the size of cache entries for a specific tenant.
@@ -288,20 +660,7 @@ class DocumentCacheService:
             logger.warning("Tenant isolation is disabled, cannot get tenant cache size.")
             return 0
         
-        tenant_cache_dir = os.path.join(self.cache_dir, tenant_id)
-        
-        if not os.path.exists(tenant_cache_dir):
-            return 0
-        
-        total_size = 0
-        for root, _, files in os.walk(tenant_cache_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    file_path = os.path.join(root, file)
-                    total_size += os.path.getsize(file_path)
-        
-        return total_size
-
+        return self.index.totals(tenant_id)['size']
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,383 @@
+"""
+Table Extraction Ensemble
+
+Helpers for running several table extractors over a PDF and merging their
+results.
+
+Extractors are tried in order of preference. Each one runs concurrently over
+contiguous ranges of the pages that still lack a good table, so once a page
+yields a table whose quality reaches the threshold, the remaining extractors
+skip that page. Duplicate tables
+are found with content hashes and shingled signatures of their normalized cells,
+looked up in per-page indexes instead of comparing every pair of tables.
+"""
+
+import os
+import re
+import math
+import hashlib
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable
+
+from services.table_extraction_service import get_table_extraction_service, parse_pages
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default number of page ranges extracted at the same time
+DEFAULT_MAX_WORKERS = max(1, min(os.cpu_count() or 1, 8))
+
+# Default minimum quality of a table that ends extraction for its page
+DEFAULT_QUALITY_THRESHOLD = 0.7
+
+# Default similarity thresholds for duplicate tables
+DEFAULT_HEADER_SIMILARITY = 0.7  # Fraction of equal headers at the same positions
+DEFAULT_CONTENT_SIMILARITY = 0.8  # Jaccard similarity of the cell shingles
+DEFAULT_BBOX_OVERLAP = 0.5  # Overlap as a fraction of the smaller table's area
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# An extractor: a name and a function extracting the tables of a page selection like '3' or '1,4'
+Extractor = Tuple[str, Callable[[str], List[Dict[str, Any]]]]
+
+def normalize_cell(value: Any) -> str:
+    """Normalize a cell value for comparison: lowercase, collapsed whitespace, empty for missing values."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return WHITESPACE_PATTERN.sub(' ', str(value)).strip().lower()
+
+def table_cells(table: Dict[str, Any]) -> Tuple[List[str], List[List[str]]]:
+    """
+    Get the normalized headers and body rows of a table.
+    
+    Body rows are read from 'rows' when it holds the row values, and from the
+    'data' records otherwise.
+    
+    Args:
+        table: Table dictionary
+    
+    Returns:
+        Tuple of (headers, rows)
+    """
+    headers = [normalize_cell(header) for header in table.get('headers') or []]
+    
+    rows = table.get('rows')
+    if not isinstance(rows, list):
+        rows = table.get('data') or []
+    if not isinstance(rows, list):
+        rows = []
+    
+    body = []
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        body.append([normalize_cell(value) for value in values])
+    return headers, body
+
+def _has_generic_headers(headers: List[str]) -> bool:
+    """Check whether headers are only column positions, like the headers camelot produces."""
+    return all(header in ('', str(i)) for i, header in enumerate(headers))
+
+def table_quality(table: Dict[str, Any]) -> float:
+    """
+    Score the quality of an extracted table between 0 and 1.
+    
+    The score is the extraction confidence (percentages are scaled to 0-1)
+    times the fraction of non-empty cells. Tables with fewer than two columns
+    or without body rows score 0.
+    
+    Args:
+        table: Table dictionary
+    
+    Returns:
+        Quality score
+    """
+    return _quality(table, *table_cells(table))
+
+def _quality(table: Dict[str, Any], headers: List[str], rows: List[List[str]]) -> float:
+    """Score the quality of a table from its normalized cells."""
+    columns = max([len(headers)] + [len(row) for row in rows])
+    if columns < 2 or not rows:
+        return 0.0
+    
+    confidence = float(table.get('confidence') or 0)
+    if confidence > 1:
+        confidence /= 100
+    confidence = min(max(confidence, 0.0), 1.0)
+    
+    cells = rows if _has_generic_headers(headers) else [headers] + rows
+    total = sum(len(row) for row in cells)
+    filled = sum(1 for row in cells for cell in row if cell)
+    return confidence * filled / total if total else 0.0
+
+def split_pages(pages: List[int], parts: int) -> List[List[int]]:
+    """
+    Split page numbers into at most `parts` contiguous runs of nearly equal size.
+    
+    Args:
+        pages: Page numbers, in order
+        parts: Maximum number of runs
+    
+    Returns:
+        Non-empty runs of consecutive entries of `pages`
+    """
+    parts = max(1, min(parts, len(pages)))
+    size, extra = divmod(len(pages), parts)
+    runs = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        runs.append(pages[start:end])
+        start = end
+    return [run for run in runs if run]
+
+def run_extractor_ensemble(
+    extractors: List[Extractor],
+    page_numbers: Optional[List[int]],
+    quality_threshold: float = DEFAULT_QUALITY_THRESHOLD,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    batched: Iterable[str] = ('tabula',)
+) -> List[Dict[str, Any]]:
+    """
+    Run table extractors over the pages of a document.
+    
+    The extractors run in the given order. Each one extracts the pending pages
+    concurrently, one call per contiguous range of pages (see split_pages), so
+    an extractor that opens and parses the document opens it once per range
+    rather than once per page. Pages on which a table reaches the quality
+    threshold are not passed to the following extractors. Extractors named in
+    `batched` get all pending pages in a single call instead, for extractors with
+    a high cost per call.
+    
+    Args:
+        extractors: Extractors in order of preference
+        page_numbers: 1-based page numbers to extract, or None to pass 'all' to
+            every extractor without stopping early
+        quality_threshold: Table quality (see table_quality) that ends extraction for a page
+        max_workers: Maximum number of page ranges extracted at the same time
+        batched: Names of the extractors called once for all pending pages
+    
+    Returns:
+        Tables found by all extractors, in extractor order
+    """
+    batched = set(batched)
+    tables = []
+    
+    def extract(name, extractor, pages):
+        try:
+            return extractor(pages)
+        except Exception as e:
+            logger.error(f"Error extracting tables with {name}: {str(e)}")
+            return []
+    
+    def selection(pages):
+        return ','.join(str(page) for page in pages)
+    
+    max_workers = max(1, max_workers)
+    pending = list(page_numbers) if page_numbers is not None else None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for name, extractor in extractors:
+            if pending is None:
+                found = extract(name, extractor, 'all')
+            elif not pending:
+                break
+            elif name in batched or len(pending) == 1:
+                found = extract(name, extractor, selection(pending))
+            else:
+                found = []
+                ranges = split_pages(pending, max_workers)
+                for range_tables in executor.map(lambda pages: extract(name, extractor, selection(pages)), ranges):
+                    found.extend(range_tables)
+            
+            tables.extend(found)
+            logger.info(f"Extracted {len(found)} tables with {name}")
+            
+            if pending is not None:
+                done = {table.get('page') for table in found if table_quality(table) >= quality_threshold}
+                pending = [page for page in pending if page not in done]
+    
+    return tables
+
+def resolve_pages(pdf_path: str, pages: Any) -> Optional[List[int]]:
+    """
+    Resolve a page selection of a PDF into page numbers.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: Page selection, like 'all', '1,3-5' or a list of page numbers
+    
+    Returns:
+        Sorted page numbers, or None if the page count could not be determined
+    """
+    try:
+        document = get_table_extraction_service().open_document(pdf_path)
+    except Exception as e:
+        logger.warning(f"Could not count the pages of {pdf_path}: {e}")
+        return None
+    
+    try:
+        page_count = document.page_count if hasattr(document, 'page_count') else len(document.pages)
+    finally:
+        document.close()
+    return parse_pages(pages, page_count)
+
+class TableDeduplicator:
+    """
+    Incremental duplicate detection for extracted tables.
+    
+    A table is a duplicate of an earlier kept table on the same page when:
+    
+    - its normalized content is identical,
+    - its bounding box mostly overlaps the other table's,
+    - enough of its (non-generic) headers are equal at the same positions, or
+    - the Jaccard similarity of its cell shingles (pairs of adjacent cells in a
+      row) is high enough.
+    
+    Headers and shingles are looked up in inverted indexes, so adding a table
+    costs time proportional to its size rather than to the number of kept tables.
+    """
+    
+    def __init__(
+        self,
+        header_similarity: float = DEFAULT_HEADER_SIMILARITY,
+        content_similarity: float = DEFAULT_CONTENT_SIMILARITY,
+        bbox_overlap: float = DEFAULT_BBOX_OVERLAP
+    ):
+        """
+        Initialize the deduplicator.
+        
+        Args:
+            header_similarity: Fraction of equal headers making tables duplicates
+            content_similarity: Jaccard similarity of cell shingles making tables duplicates
+            bbox_overlap: Bounding box overlap, as a fraction of the smaller area, making tables duplicates
+        """
+        self.header_similarity = header_similarity
+        self.content_similarity = content_similarity
+        self.bbox_overlap = bbox_overlap
+        
+        self.content_hashes = set()  # (page, hash)
+        self.header_index = defaultdict(list)  # (page, columns, position, header) -> kept table numbers
+        self.shingle_index = defaultdict(list)  # (page, shingle) -> kept table numbers
+        self.shingle_counts = []  # Number of shingles of each kept table
+        self.bboxes = defaultdict(list)  # page -> bounding boxes of kept tables
+    
+    @staticmethod
+    def _shingles(headers: List[str], rows: List[List[str]]) -> set:
+        """Get the shingles of a table: pairs of adjacent cells, or single cells of one-column rows."""
+        shingles = set()
+        for row in ([] if _has_generic_headers(headers) else [headers]) + rows:
+            if len(row) == 1:
+                if row[0]:
+                    shingles.add((row[0],))
+                continue
+            for left, right in zip(row, row[1:]):
+                if left or right:
+                    shingles.add((left, right))
+        return shingles
+    
+    def _overlaps(self, page: Any, bbox: Any) -> bool:
+        """Check whether a bounding box mostly overlaps a kept table's on the same page."""
+        try:
+            x0, y0, x1, y1 = (float(value) for value in bbox)
+        except (TypeError, ValueError):
+            return False
+        
+        area = (x1 - x0) * (y1 - y0)
+        for kx0, ky0, kx1, ky1 in self.bboxes.get(page, ()):
+            x_overlap = max(0.0, min(x1, kx1) - max(x0, kx0))
+            y_overlap = max(0.0, min(y1, ky1) - max(y0, ky0))
+            if x_overlap * y_overlap > self.bbox_overlap * min(area, (kx1 - kx0) * (ky1 - ky0)):
+                return True
+        return False
+    
+    def add(self, table: Dict[str, Any], cells: Optional[Tuple[List[str], List[List[str]]]] = None) -> bool:
+        """
+        Add a table unless it duplicates a kept table.
+        
+        Args:
+            table: Table dictionary
+            cells: The table's normalized (headers, rows), if already computed
+        
+        Returns:
+            True if the table was kept, False if it is a duplicate
+        """
+        page = table.get('page', 1)
+        headers, rows = cells if cells is not None else table_cells(table)
+        
+        content_hash = hashlib.sha1(
+            '\x1e'.join('\x1f'.join(row) for row in [headers] + rows).encode('utf-8')
+        ).hexdigest()
+        if (page, content_hash) in self.content_hashes:
+            return False
+        
+        if table.get('bbox') is not None and self._overlaps(page, table['bbox']):
+            return False
+        
+        generic_headers = _has_generic_headers(headers)
+        if headers and not generic_headers:
+            hits = Counter()
+            for position, header in enumerate(headers):
+                hits.update(self.header_index.get((page, len(headers), position, header), ()))
+            if hits and max(hits.values()) >= self.header_similarity * len(headers):
+                return False
+        
+        shingles = self._shingles(headers, rows)
+        if shingles:
+            shared = Counter()
+            for shingle in shingles:
+                shared.update(self.shingle_index.get((page, shingle), ()))
+            for number, count in shared.items():
+                union = len(shingles) + self.shingle_counts[number] - count
+                if count / union >= self.content_similarity:
+                    return False
+        
+        # Keep the table and index it
+        number = len(self.shingle_counts)
+        self.shingle_counts.append(len(shingles))
+        self.content_hashes.add((page, content_hash))
+        if headers and not generic_headers:
+            for position, header in enumerate(headers):
+                self.header_index[(page, len(headers), position, header)].append(number)
+        for shingle in shingles:
+            self.shingle_index[(page, shingle)].append(number)
+        if table.get('bbox') is not None:
+            try:
+                self.bboxes[page].append(tuple(float(value) for value in table['bbox']))
+            except (TypeError, ValueError):
+                pass
+        return True
+
+def remove_duplicate_tables(tables: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """
+    Remove duplicate tables, keeping the best table of each group of duplicates.
+    
+    Tables are grouped by page and considered from the highest quality down.
+    
+    Args:
+        tables: List of tables
+        **kwargs: Similarity thresholds for TableDeduplicator
+    
+    Returns:
+        List of unique tables, by page in order of first appearance and by quality within a page
+    """
+    if not tables:
+        return []
+    
+    tables_by_page = defaultdict(list)
+    for table in tables:
+        tables_by_page[table.get('page', 1)].append(table)
+    
+    deduplicator = TableDeduplicator(**kwargs)
+    unique_tables = []
+    for page_tables in tables_by_page.values():
+        scored = []
+        for table in page_tables:
+            cells = table_cells(table)
+            scored.append((_quality(table, *cells), cells, table))
+        
+        for _, cells, table in sorted(scored, key=lambda item: item[0], reverse=True):
+            if deduplicator.add(table, cells):
+                unique_tables.append(table)
+    return unique_tables
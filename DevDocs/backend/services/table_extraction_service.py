@@ -0,0 +1,444 @@
+"""
+Table Extraction Service
+
+This service extracts tables from PDF documents with backends that stay warm
+for the lifetime of the process, so table-heavy batch jobs do not pay a start-up
+cost per call.
+
+PyMuPDF and pdfplumber run in-process on an already opened document. Tabula is
+used through an in-process JVM (via jpype) that is started once and reused; without
+jpype every tabula call launches a new Java process, so tabula is only used when
+the in-process backends are unavailable or explicitly requested.
+
+All backends return tables in the same structure:
+    
+    {
+        "id": "pdfplumber_3_1",
+        "page": 3,                       # 1-based page number
+        "table_number": 1,               # 1-based index of the table on its page
+        "extraction_method": "pdfplumber",
+        "headers": [...],
+        "data": [{header: value, ...}],  # One record per body row
+        "rows": 12,                      # Number of body rows
+        "columns": 4,
+        "confidence": 0.8
+    }
+"""
+
+import io
+import os
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Union
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = hasattr(fitz.Page, 'find_tables')
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+try:
+    import tabula
+    HAS_TABULA = True
+except ImportError:
+    HAS_TABULA = False
+
+try:
+    import jpype
+    HAS_JPYPE = True
+except ImportError:
+    HAS_JPYPE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference
+DEFAULT_BACKENDS = ('pymupdf', 'pdfplumber', 'tabula')
+
+# Confidence reported for the tables of each backend
+BACKEND_CONFIDENCE = {
+    'pymupdf': 0.8,
+    'pdfplumber': 0.8,
+    'tabula': 0.75
+}
+
+# A document: an opened PyMuPDF or pdfplumber document, a file path or PDF bytes
+DocumentSource = Union[str, os.PathLike, bytes, Any]
+
+def parse_pages(pages: Union[None, str, int, Iterable[int]], page_count: int) -> List[int]:
+    """
+    Convert a page selection into a sorted list of 1-based page numbers.
+    
+    Args:
+        pages: None or 'all' for all pages, a page number, a list of page numbers
+            or a string like '1,3-5'
+        page_count: Number of pages in the document
+    
+    Returns:
+        Sorted unique page numbers within the document
+    """
+    if pages is None or (isinstance(pages, str) and pages.strip().lower() in ('', 'all')):
+        return list(range(1, page_count + 1))
+    
+    if isinstance(pages, int):
+        numbers = {pages}
+    elif isinstance(pages, str):
+        numbers = set()
+        for part in pages.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                start, end = part.split('-', 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else page_count
+                numbers.update(range(start, end + 1))
+            else:
+                numbers.add(int(part))
+    else:
+        numbers = {int(page) for page in pages}
+    
+    return sorted(page for page in numbers if 1 <= page <= page_count)
+
+def unique_headers(cells: List[Any], width: int) -> List[str]:
+    """
+    Make column names from a header row that can be used as record keys.
+    
+    Blank and missing headers are named ``column_<n>`` and repeated headers get
+    ``.1``, ``.2``... suffixes, like pandas does, so no column is dropped.
+    
+    Args:
+        cells: Header row cells
+        width: Number of columns
+    
+    Returns:
+        Distinct column names
+    """
+    headers = []
+    seen = set()
+    for index in range(width):
+        cell = cells[index] if index < len(cells) else None
+        name = str(cell).strip() if cell is not None else ''
+        base = name or f'column_{index + 1}'
+        
+        name = base
+        suffix = 0
+        while name in seen:
+            suffix += 1
+            name = f'{base}.{suffix}'
+        seen.add(name)
+        headers.append(name)
+    return headers
+
+def make_table(rows: List[List[Any]], page: int, table_number: int, method: str,
+               confidence: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Build a table in the common structure from its rows.
+    
+    The first row is used as the header row, with its column names made
+    distinct (see unique_headers).
+    
+    Args:
+        rows: Table rows, each a list of cell values
+        page: 1-based page number
+        table_number: 1-based index of the table on its page
+        method: Name of the extraction backend
+        confidence: Confidence of the extraction, or None for the backend default
+    
+    Returns:
+        Table dictionary, or None if the table has no rows
+    """
+    if not rows or not rows[0]:
+        return None
+    
+    body = [list(row) for row in rows[1:]]
+    headers = unique_headers(list(rows[0]), max(len(row) for row in rows))
+    
+    return {
+        'id': f'{method}_{page}_{table_number}',
+        'page': page,
+        'table_number': table_number,
+        'extraction_method': method,
+        'headers': headers,
+        'data': [dict(zip(headers, row)) for row in body],
+        'rows': len(body),
+        'columns': len(headers),
+        'confidence': BACKEND_CONFIDENCE.get(method, 0.5) if confidence is None else confidence
+    }
+
+def _open_handle(backend: str, content: Union[str, io.BytesIO]) -> Any:
+    """Open a document with an in-process backend from a path or an in-memory stream."""
+    if backend == 'pymupdf':
+        if isinstance(content, io.BytesIO):
+            return fitz.open(stream=content.getvalue(), filetype='pdf')
+        return fitz.open(content)
+    return pdfplumber.open(content)
+
+class _OpenedDocument:
+    """
+    The document handles used by one extraction call.
+    
+    Handles passed in by the caller are used as they are; handles opened here
+    are opened at most once per call and closed afterwards.
+    """
+    
+    def __init__(self, source: DocumentSource):
+        self.source = source
+        self.handles = {}
+        self.owned = []
+        
+        if HAS_PYMUPDF and isinstance(source, fitz.Document):
+            self.handles['pymupdf'] = source
+        elif HAS_PDFPLUMBER and isinstance(source, pdfplumber.PDF):
+            self.handles['pdfplumber'] = source
+    
+    @property
+    def native_backend(self) -> Optional[str]:
+        """The backend the caller's document handle belongs to, if any."""
+        return next(iter(self.handles), None)
+    
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the document on disk, if known."""
+        if isinstance(self.source, (str, os.PathLike)):
+            return os.fspath(self.source)
+        
+        handle = self.handles.get('pymupdf') or self.handles.get('pdfplumber')
+        path = getattr(handle, 'name', None) or getattr(handle, 'path', None)
+        return os.fspath(path) if path else None
+    
+    def content(self) -> Union[str, io.BytesIO]:
+        """Get the document as a path, or as an in-memory stream if it has no path."""
+        if self.path:
+            return self.path
+        if isinstance(self.source, bytes):
+            return io.BytesIO(self.source)
+        
+        if 'pymupdf' in self.handles:
+            return io.BytesIO(self.handles['pymupdf'].tobytes())
+        stream = self.handles['pdfplumber'].stream
+        stream.seek(0)
+        return io.BytesIO(stream.read())
+    
+    def get(self, backend: str) -> Any:
+        """Get the handle of the document for an in-process backend, opening it if needed."""
+        handle = self.handles.get(backend)
+        if handle is not None:
+            return handle
+        
+        handle = _open_handle(backend, self.content())
+        self.handles[backend] = handle
+        self.owned.append(handle)
+        return handle
+    
+    def close(self):
+        """Close the handles opened for this call."""
+        for handle in self.owned:
+            try:
+                handle.close()
+            except Exception as e:
+                logger.debug(f"Error closing document handle: {e}")
+        self.owned = []
+
+class TableExtractionService:
+    """
+    Table extraction with warm in-process backends.
+    
+    A single instance is meant to be shared by all extractors of a process (see
+    get_table_extraction_service), so the tabula JVM is started at most once.
+    """
+    
+    def __init__(self, backends: Iterable[str] = DEFAULT_BACKENDS):
+        """
+        Initialize the table extraction service.
+        
+        Args:
+            backends: Backends to use, in order of preference
+        """
+        self.backends = [backend for backend in backends if backend in DEFAULT_BACKENDS]
+        self.lock = threading.Lock()
+        self._warned_cold_tabula = False
+    
+    def is_available(self, backend: str) -> bool:
+        """Check whether a backend's library is installed."""
+        if backend == 'pymupdf':
+            return HAS_PYMUPDF
+        if backend == 'pdfplumber':
+            return HAS_PDFPLUMBER
+        if backend == 'tabula':
+            return HAS_TABULA
+        return False
+    
+    def is_warm(self, backend: str) -> bool:
+        """
+        Check whether a backend runs without a start-up cost per call.
+        
+        The in-process backends are always warm; tabula is warm once its JVM
+        runs inside this process.
+        """
+        if backend == 'tabula':
+            return HAS_TABULA and HAS_JPYPE and jpype.isJVMStarted()
+        return self.is_available(backend)
+    
+    @property
+    def available_backends(self) -> List[str]:
+        """The configured backends whose libraries are installed."""
+        return [backend for backend in self.backends if self.is_available(backend)]
+    
+    def warm_up(self):
+        """Start the tabula JVM inside this process so later calls reuse it."""
+        if not (HAS_TABULA and HAS_JPYPE) or 'tabula' not in self.backends:
+            return
+        
+        with self.lock:
+            if jpype.isJVMStarted():
+                return
+            try:
+                from tabula.backend import jar_path
+                jpype.addClassPath(jar_path())
+                jpype.startJVM(convertStrings=False)
+                logger.info("Started in-process JVM for tabula")
+            except Exception as e:
+                logger.warning(f"Could not start in-process JVM for tabula: {e}")
+    
+    def open_document(self, source: Union[str, os.PathLike, bytes], backend: Optional[str] = None) -> Any:
+        """
+        Open a document for repeated extraction calls.
+        
+        Args:
+            source: Path to the PDF file or PDF bytes
+            backend: In-process backend to open the document for; defaults to the
+                first available one
+        
+        Returns:
+            Opened PyMuPDF or pdfplumber document; the caller closes it
+        """
+        if backend is None:
+            backend = next((b for b in self.available_backends if b != 'tabula'), None)
+        if backend not in ('pymupdf', 'pdfplumber') or not self.is_available(backend):
+            raise ValueError(f"No in-process backend available to open the document (requested: {backend})")
+        
+        content = io.BytesIO(source) if isinstance(source, bytes) else os.fspath(source)
+        return _open_handle(backend, content)
+    
+    def extract_tables(self, document: DocumentSource,
+                       pages: Union[None, str, int, Iterable[int]] = None,
+                       backends: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Extract the tables of a document.
+        
+        The backends are tried in order until one of them runs without error;
+        a backend finding no tables is a valid result. The backend owning an
+        opened document handle is tried first, so the document is not reopened.
+        
+        Args:
+            document: Opened PyMuPDF or pdfplumber document, path to the PDF file or PDF bytes
+            pages: Pages to extract tables from: None or 'all', a page number, a list of
+                page numbers or a string like '1,3-5'
+            backends: Backends to try, defaulting to the service's backends
+        
+        Returns:
+            List of tables in the common structure
+        """
+        opened = _OpenedDocument(document)
+        order = [b for b in (backends or self.backends) if self.is_available(b)]
+        native = opened.native_backend
+        if native in order:
+            order.remove(native)
+            order.insert(0, native)
+        
+        if not order:
+            logger.warning("No table extraction backend available. Install PyMuPDF, pdfplumber or tabula-py")
+            return []
+        
+        try:
+            for backend in order:
+                try:
+                    if backend == 'pymupdf':
+                        return self._extract_with_pymupdf(opened.get(backend), pages)
+                    if backend == 'pdfplumber':
+                        return self._extract_with_pdfplumber(opened.get(backend), pages, close_pages=opened.handles[backend] in opened.owned)
+                    return self._extract_with_tabula(opened, pages)
+                except Exception as e:
+                    logger.warning(f"Table extraction with {backend} failed: {e}")
+            return []
+        finally:
+            opened.close()
+    
+    def _extract_with_pymupdf(self, doc: Any, pages) -> List[Dict[str, Any]]:
+        """Extract tables with PyMuPDF's table finder."""
+        tables = []
+        for page_number in parse_pages(pages, doc.page_count):
+            page = doc.load_page(page_number - 1)
+            for i, found in enumerate(page.find_tables().tables):
+                table = make_table(found.extract(), page_number, i + 1, 'pymupdf')
+                if table:
+                    tables.append(table)
+        return tables
+    
+    def _extract_with_pdfplumber(self, pdf: Any, pages, close_pages: bool = False) -> List[Dict[str, Any]]:
+        """Extract tables with pdfplumber."""
+        tables = []
+        for page_number in parse_pages(pages, len(pdf.pages)):
+            page = pdf.pages[page_number - 1]
+            for i, rows in enumerate(page.extract_tables()):
+                table = make_table(rows, page_number, i + 1, 'pdfplumber')
+                if table:
+                    tables.append(table)
+            
+            # Free the parsed page objects of documents opened for this call
+            if close_pages:
+                page.close()
+        return tables
+    
+    def _extract_with_tabula(self, opened: _OpenedDocument, pages) -> List[Dict[str, Any]]:
+        """Extract tables with tabula, on the in-process JVM when jpype is installed."""
+        if HAS_JPYPE:
+            self.warm_up()
+        elif not self._warned_cold_tabula:
+            logger.warning("jpype is not installed; every tabula call starts a new Java process")
+            self._warned_cold_tabula = True
+        
+        if pages is None or isinstance(pages, str):
+            tabula_pages = pages or 'all'
+        else:
+            tabula_pages = [pages] if isinstance(pages, int) else list(pages)
+        
+        # The JSON output keeps the page number of each table
+        results = tabula.read_pdf(
+            opened.content(),
+            pages=tabula_pages,
+            multiple_tables=True,
+            output_format='json',
+            silent=True
+        )
+        
+        tables = []
+        page_counts = {}
+        for result in results:
+            page_number = int(result.get('page_number') or 0)
+            page_counts[page_number] = page_counts.get(page_number, 0) + 1
+            rows = [[cell.get('text', '') for cell in row] for row in result.get('data', [])]
+            table = make_table(rows, page_number, page_counts[page_number], 'tabula')
+            if table:
+                tables.append(table)
+        return tables
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_table_extraction_service() -> TableExtractionService:
+    """Get the table extraction service shared by this process."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TableExtractionService()
+    return _service
@@ -0,0 +1,124 @@
+"""
+Tests for the agent executor.
+"""
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the agents
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.agent_manager import AgentManager
+from agents.agent_executor import AgentExecutor, AgentTimeoutError, AgentBusyError
+
+class SleepingAgent:
+    """Agent stub that blocks for a while and records peak concurrency."""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def __init__(self, api_key=None):
+        """Initialize the agent."""
+        self.name = "Sleeping Agent"
+
+    def process(self, task):
+        """Block for the requested time."""
+        with SleepingAgent.lock:
+            SleepingAgent.active += 1
+            SleepingAgent.peak = max(SleepingAgent.peak, SleepingAgent.active)
+        time.sleep(task.get("delay", 0.05))
+        with SleepingAgent.lock:
+            SleepingAgent.active -= 1
+        return {"status": "success", "thread": threading.get_ident()}
+
+_manager = AgentManager(api_key="test-key")
+_manager.register_agent("sleeper", SleepingAgent)
+
+def get_manager():
+    """Return the test agent manager."""
+    return _manager
+
+class TestAgentExecutor(unittest.TestCase):
+    """Tests for running agents off the event loop."""
+
+    def setUp(self):
+        """Set up the test."""
+        SleepingAgent.active = 0
+        SleepingAgent.peak = 0
+
+    def test_runs_off_event_loop_with_agent_limit(self):
+        """Agent calls run in worker threads, limited per agent."""
+        executor = AgentExecutor(get_manager, max_workers=4, agent_limits={"sleeper": 2})
+
+        async def run():
+            return await asyncio.gather(*(executor.run_agent("sleeper") for _ in range(6)))
+
+        results = asyncio.run(run())
+        executor.shutdown()
+
+        self.assertTrue(all(result["thread"] != threading.get_ident() for result in results))
+        self.assertEqual(SleepingAgent.peak, 2)
+
+        metrics = executor.get_metrics()
+        self.assertEqual(metrics["agents"]["sleeper"]["completed"], 6)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["running"], 0)
+
+    def test_timeout_and_queue_limit(self):
+        """Slow calls time out and calls beyond the queue limit are rejected."""
+        executor = AgentExecutor(get_manager, agent_limits={"sleeper": 1}, max_queue_size=1, timeout=0.1)
+
+        async def run():
+            return await asyncio.gather(
+                executor.run_agent("sleeper", delay=0.3),
+                executor.run_agent("sleeper", delay=0.3),
+                executor.run_agent("sleeper", delay=0.3),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        executor.shutdown()
+
+        self.assertIsInstance(results[0], AgentTimeoutError)
+        self.assertIsInstance(results[1], AgentTimeoutError)
+        self.assertIsInstance(results[2], AgentBusyError)
+
+        stats = executor.get_metrics()["agents"]["sleeper"]
+        self.assertEqual(stats["timeouts"], 2)
+        self.assertEqual(stats["rejected"], 1)
+
+    def test_pipeline_steps_use_agent_limits(self):
+        """Pipeline steps run through the executor and respect its per-agent limits."""
+        executor = AgentExecutor(get_manager, max_workers=8, agent_limits={"sleeper": 2})
+
+        results = asyncio.run(executor.run_pipeline([
+            {"agent_id": "sleeper", "id": "fan", "depends_on": [], "for_each": "items",
+             "params": {"delay": 0.05}, "output_key": "results"}
+        ], {"items": list(range(6))}))
+        executor.shutdown()
+
+        self.assertTrue(results["steps"][0]["success"])
+        self.assertEqual(len(results["results"]), 6)
+        self.assertEqual(SleepingAgent.peak, 2)
+        self.assertEqual(executor.get_metrics()["agents"]["sleeper"]["completed"], 6)
+
+    def test_pipeline_step_timeout_is_reported(self):
+        """A step timing out in the executor fails with the timeout error type."""
+        executor = AgentExecutor(get_manager, timeout=0.05)
+
+        results = asyncio.run(executor.run_pipeline([
+            {"agent_id": "sleeper", "id": "slow", "depends_on": [], "params": {"delay": 0.2}},
+            {"agent_id": "sleeper", "id": "after", "depends_on": ["slow"]}
+        ]))
+        executor.shutdown()
+
+        steps = {step["id"]: step for step in results["steps"]}
+        self.assertEqual(steps["slow"]["error_type"], "AgentTimeoutError")
+        self.assertTrue(steps["after"]["skipped"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+Tests for the agent manager.
+"""
+import sys
+import asyncio
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the agents
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.agent_manager import AgentManager
+
+class CountingAgent:
+    """Agent stub that counts how often it is created."""
+
+    instances = 0
+
+    def __init__(self, api_key=None, delay=0.0, **kwargs):
+        """Initialize the agent, optionally slowly."""
+        time.sleep(delay)
+        CountingAgent.instances += 1
+        self.api_key = api_key
+        self.name = "Counting Agent"
+        self.options = kwargs
+
+    def process(self, task):
+        """Echo the task."""
+        return {"status": "success", "task": task}
+
+class TestAgentManager(unittest.TestCase):
+    """Tests for lazily created agents in the AgentManager."""
+
+    def setUp(self):
+        """Set up the test."""
+        CountingAgent.instances = 0
+        self.manager = AgentManager(api_key="test-key")
+
+    def test_registered_agent_created_on_first_use(self):
+        """Registered agents are only created when used, then reused."""
+        self.manager.register_agent("counter", CountingAgent, option=1)
+        self.assertEqual(CountingAgent.instances, 0)
+
+        result = self.manager.run_agent("counter", value=42)
+        self.manager.run_agent("counter", value=43)
+
+        self.assertEqual(result["task"], {"value": 42})
+        self.assertEqual(CountingAgent.instances, 1)
+        self.assertEqual(self.manager.get_agent("counter").options, {"option": 1})
+        self.assertIsNone(self.manager.get_agent("missing"))
+
+    def test_concurrent_first_use_creates_one_agent(self):
+        """Concurrent requests for a new agent share a single instance."""
+        self.manager.register_agent("counter", CountingAgent, delay=0.05)
+        agents = []
+
+        threads = [
+            threading.Thread(target=lambda: agents.append(self.manager.get_agent("counter")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(CountingAgent.instances, 1)
+        self.assertTrue(all(agent is agents[0] for agent in agents))
+
+    def test_warm_up_and_reload(self):
+        """Warm-up creates agents ahead of use and reload re-creates them."""
+        self.manager.register_agent("counter", CountingAgent)
+
+        self.assertEqual(self.manager.warm_up(["counter", "missing"]), ["counter"])
+        first = self.manager.get_agent("counter")
+
+        self.manager.reload(api_key="new-key")
+        second = self.manager.get_agent("counter")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.api_key, "new-key")
+        self.assertEqual(CountingAgent.instances, 2)
+
+class SleepingAgent:
+    """Agent stub that sleeps and returns a value from its task."""
+
+    def __init__(self, api_key=None, **kwargs):
+        """Initialize the agent."""
+        self.name = "Sleeping Agent"
+
+    def process(self, task):
+        """Sleep, then return the task value."""
+        time.sleep(task.get("delay", 0))
+        if task.get("fail"):
+            raise RuntimeError("Agent failed")
+        return {"value": task.get("value", task.get("input"))}
+
+class TestAgentPipeline(unittest.TestCase):
+    """Tests for running pipelines as dependency graphs."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.manager = AgentManager(api_key="test-key")
+        self.manager.register_agent("sleeper", SleepingAgent)
+
+    def test_linear_chain(self):
+        """Steps without depends_on run as a chain."""
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "output_key": "first"},
+            {"agent_id": "sleeper", "output_key": "second"}
+        ], "document")
+
+        self.assertEqual(results["first"], {"value": "document"})
+        self.assertEqual(results["second"], {"value": {"value": "document"}})
+        self.assertEqual(results["output"], results["second"])
+        self.assertEqual([step["id"] for step in results["steps"]], ["first", "second"])
+        self.assertTrue(all(step["duration"] >= 0 for step in results["steps"]))
+
+    def test_fan_out_and_fan_in_run_concurrently(self):
+        """Items of a for_each step and independent steps run at the same time."""
+        tables = [{"data": i} for i in range(4)]
+
+        started = time.perf_counter()
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "id": "detect", "depends_on": [], "params": {"value": tables}},
+            {"agent_id": "sleeper", "id": "analyze", "depends_on": ["detect"], "for_each": "value",
+             "params": {"delay": 0.2}, "inputs": {"value": "data"}, "output_key": "analyses"},
+            {"agent_id": "sleeper", "id": "integrate", "depends_on": ["detect"], "params": {"delay": 0.2}},
+            {"agent_id": "sleeper", "id": "report", "depends_on": ["analyze", "integrate"]}
+        ], None, max_workers=8)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([analysis["value"] for analysis in results["analyses"]], [0, 1, 2, 3])
+        self.assertEqual(set(results["output"]["value"]), {"analyze", "integrate"})
+        self.assertLess(elapsed, 0.6)
+
+        analyze_step = results["steps"][1]
+        self.assertEqual(len(analyze_step["item_durations"]), 4)
+
+    def test_failure_skips_dependents(self):
+        """Steps depending on a failed step are skipped."""
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "id": "first", "params": {"fail": True}},
+            {"agent_id": "sleeper", "id": "second"},
+            {"agent_id": "sleeper", "id": "other", "depends_on": [], "params": {"value": 1}}
+        ], "document")
+
+        steps = {step["id"]: step for step in results["steps"]}
+        self.assertFalse(steps["first"]["success"])
+        self.assertTrue(steps["second"]["skipped"])
+        self.assertTrue(steps["other"]["success"])
+
+    def test_dependency_on_later_step_finishing_without_agent_calls(self):
+        """Steps depending on a later-listed step that finishes at once still run."""
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "id": "b", "depends_on": ["fan"]},
+            {"agent_id": "sleeper", "id": "fan", "depends_on": [], "for_each": "items"}
+        ], {"items": []})
+
+        steps = {step["id"]: step for step in results["steps"]}
+        self.assertEqual(set(steps), {"b", "fan"})
+        self.assertEqual(steps["fan"]["output"], [])
+        self.assertTrue(steps["b"]["success"])
+        self.assertEqual(steps["b"]["output"], {"value": []})
+
+    def test_preparation_error_skips_earlier_listed_dependents(self):
+        """A step failing before any agent call is reported, and so are its dependents."""
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "id": "b", "depends_on": ["fan"]},
+            {"agent_id": "sleeper", "id": "fan", "depends_on": [], "for_each": "missing"}
+        ], {"items": []})
+
+        steps = {step["id"]: step for step in results["steps"]}
+        self.assertFalse(steps["fan"]["success"])
+        self.assertEqual(steps["fan"]["error_type"], "KeyError")
+        self.assertTrue(steps["b"]["skipped"])
+
+    def test_params_are_defaults_for_missing_inputs(self):
+        """A parameter given in params is kept when its input path is missing."""
+        results = self.manager.run_pipeline([
+            {"agent_id": "sleeper", "id": "items", "depends_on": [], "for_each": "tables",
+             "params": {"value": "unknown"}, "inputs": {"value": "region.table_type"}}
+        ], {"tables": [{"region": {"table_type": "portfolio"}}, {"region": {}}]})
+
+        self.assertEqual([item["value"] for item in results["output"]], ["portfolio", "unknown"])
+
+    def test_invalid_graph(self):
+        """Unknown dependencies and cycles are rejected."""
+        with self.assertRaises(ValueError):
+            self.manager.run_pipeline([{"agent_id": "sleeper", "depends_on": ["missing"]}], None)
+
+        with self.assertRaises(ValueError):
+            self.manager.run_pipeline([
+                {"agent_id": "sleeper", "id": "a", "depends_on": ["b"]},
+                {"agent_id": "sleeper", "id": "b", "depends_on": ["a"]}
+            ], None)
+
+    def test_sync_pipeline_rejected_inside_event_loop(self):
+        """Calling the blocking run_pipeline from async code fails with a clear error."""
+        async def call_from_loop():
+            return self.manager.run_pipeline([{"agent_id": "sleeper"}], "document")
+
+        with self.assertRaisesRegex(RuntimeError, "run_pipeline_async"):
+            asyncio.run(call_from_loop())
+
+if __name__ == "__main__":
+    unittest.main()
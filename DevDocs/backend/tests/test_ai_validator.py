@@ -0,0 +1,159 @@
+"""
+Tests for batched field completion in the AI validator.
+"""
+import re
+import sys
+import json
+import time
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the enhanced processing modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from enhanced_processing.ai_validator import AIValidator, FieldCompletionCache
+
+ISIN_PATTERN = re.compile(r'^ISIN: ([A-Z0-9]{12})$', re.MULTILINE)
+
+def make_statement(count):
+    """Make a statement text with one line per position."""
+    isins = [f"XS{i:09d}0" for i in range(count)]
+    text = "\n".join(f"{isin} Bond {i} 2030 Qty 1000 Price 99.5" for i, isin in enumerate(isins))
+    return isins, text
+
+class FakeModelClient:
+    """Local model client answering field completion prompts from the prompt itself."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            isins = ISIN_PATTERN.findall(prompt)
+            if not isins:
+                return "{}"
+            return json.dumps({
+                isin: {'name': f"Security {isin}", 'quantity': 1000, 'price': 99.5, 'asset_class': 'Bonds'}
+                for isin in isins
+            })
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+class TestBatchedFieldCompletion(unittest.TestCase):
+    """Tests for completing missing security fields in batches."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.client = FakeModelClient()
+        self.cache = FieldCompletionCache()
+        self.isins, self.text = make_statement(150)
+
+    def make_validator(self, **kwargs):
+        """Create a validator using the fake client and the test's cache."""
+        kwargs.setdefault('model_client', self.client)
+        kwargs.setdefault('field_cache', self.cache)
+        return AIValidator(**kwargs)
+
+    def test_many_securities_in_few_requests(self):
+        """Missing fields of all securities are completed with far fewer requests than securities."""
+        validator = self.make_validator(batch_token_budget=3000)
+        securities = validator._validate_securities([{'isin': isin} for isin in self.isins], self.text)
+
+        self.assertEqual(len(securities), 150)
+        self.assertLess(len(self.client.prompts), 20)
+        for security in securities:
+            self.assertEqual(security['name'], f"Security {security['isin']}")
+            self.assertEqual(security['value'], 1000 * 99.5)
+
+    def test_batches_stay_within_token_budget(self):
+        """Every security is requested exactly once and a smaller budget means more requests."""
+        validator = self.make_validator(batch_token_budget=800)
+        validator._validate_securities([{'isin': isin} for isin in self.isins], self.text)
+
+        requested = [isin for prompt in self.client.prompts for isin in ISIN_PATTERN.findall(prompt)]
+        self.assertEqual(sorted(requested), sorted(self.isins))
+        self.assertGreater(len(self.client.prompts), 5)
+        for prompt in self.client.prompts:
+            self.assertLessEqual(len(prompt) // 4, 800)
+
+    def test_results_are_cached(self):
+        """Unchanged securities are not requested again, changed contexts are."""
+        securities = [{'isin': isin} for isin in self.isins[:20]]
+        self.make_validator(context_chars=20)._validate_securities(securities, self.text)
+        calls = len(self.client.prompts)
+
+        self.make_validator(context_chars=20)._validate_securities(securities, self.text)
+        self.assertEqual(len(self.client.prompts), calls)
+
+        changed_text = self.text.replace(f"{self.isins[3]} Bond", f"{self.isins[3]} Bank")
+        self.make_validator(context_chars=20)._validate_securities(securities, changed_text)
+        self.assertEqual(ISIN_PATTERN.findall(self.client.prompts[-1]), [self.isins[3]])
+
+    def test_requested_fields_are_part_of_cache_key(self):
+        """A security missing other fields is requested again."""
+        validator = self.make_validator()
+        validator._validate_securities([{'isin': isin} for isin in self.isins[:10]], self.text)
+        calls = len(self.client.prompts)
+
+        validator._validate_securities([{'isin': isin, 'name': 'Known'} for isin in self.isins[:10]], self.text)
+        self.assertEqual(len(self.client.prompts), calls + 1)
+
+    def test_same_isin_with_different_fields(self):
+        """Requests for the same ISIN with different fields each get their own fields."""
+        validator = self.make_validator()
+        context = self.text.splitlines()[0]
+        results = validator._complete_fields_with_ai([
+            (self.isins[0], context, ['name']),
+            (self.isins[0], context, ['quantity', 'price'])
+        ])
+
+        self.assertEqual(results[0], {'name': f"Security {self.isins[0]}"})
+        self.assertEqual(results[1], {'quantity': 1000, 'price': 99.5})
+        self.assertEqual(self.cache.get(self.cache.make_key(self.isins[0], context, ['name'])), results[0])
+
+    def test_batches_are_sent_concurrently(self):
+        """Batches run concurrently, up to the configured limit."""
+        self.client.delay = 0.05
+        validator = self.make_validator(batch_token_budget=400, max_concurrent_requests=3)
+        validator._validate_securities([{'isin': isin} for isin in self.isins], self.text)
+
+        self.assertGreater(self.client.max_in_flight, 1)
+        self.assertLessEqual(self.client.max_in_flight, 3)
+
+    def test_missing_isins_are_completed_in_batches(self):
+        """ISINs found in the text but not extracted are added once each with their fields."""
+        validator = self.make_validator()
+        financial_data = validator._check_for_missing_isins(
+            {'securities': [{'isin': self.isins[0]}]}, self.text + "\n" + self.isins[1]
+        )
+
+        self.assertEqual([s['isin'] for s in financial_data['securities']], self.isins)
+        self.assertEqual(financial_data['securities'][1]['name'], f"Security {self.isins[1]}")
+        self.assertLess(len(self.client.prompts), 20)
+
+    def test_failed_requests_are_not_cached(self):
+        """A failing model call leaves the fields missing and is retried later."""
+        def failing_client(prompt):
+            raise RuntimeError("model unavailable")
+
+        securities = [{'isin': isin} for isin in self.isins[:5]]
+        result = self.make_validator(model_client=failing_client)._validate_securities(securities, self.text)
+        self.assertNotIn('name', result[0])
+        self.assertEqual(len(self.cache), 0)
+
+        result = self.make_validator()._validate_securities(securities, self.text)
+        self.assertEqual(result[0]['name'], f"Security {self.isins[0]}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for breadth-first page discovery and concurrent crawling in the crawler.
+"""
+import os
+import sys
+import json
+import asyncio
+import builtins
+import tempfile
+import importlib
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+# The crawler lives in the app directory, which is shadowed by app.py
+sys.path.append(str(Path(__file__).parent.parent / "app"))
+
+ROOT_URL = "https://docs.example.com/"
+
+# Internal links of each page of the mock site
+SITE = {
+    "https://docs.example.com/": [
+        "/a", "/b", "https://other.example.com/x", "/a#install", "/login"
+    ],
+    "https://docs.example.com/a": ["/c", "/b"],
+    "https://docs.example.com/b": ["/d"],
+    "https://docs.example.com/c": ["/e"],
+    "https://docs.example.com/d": [],
+    "https://docs.example.com/e": []
+}
+
+crawler = None
+original_cwd = None
+storage_dir = None
+
+def setUpModule():
+    """Import the crawler in a scratch directory and undo its open() redirection."""
+    global crawler, original_cwd, storage_dir
+    original_cwd = os.getcwd()
+    storage_dir = tempfile.TemporaryDirectory()
+    os.chdir(storage_dir.name)
+
+    original_open = builtins.open
+    crawler = importlib.import_module("crawler")
+    builtins.open = original_open
+
+def tearDownModule():
+    """Leave the scratch directory."""
+    os.chdir(original_cwd)
+    storage_dir.cleanup()
+
+class MockCrawl4AI:
+    """Crawl4AI API served by an httpx mock transport."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.submitted = []
+
+    async def __call__(self, request):
+        if request.method == "POST" and request.url.path == "/crawl":
+            url = json.loads(request.content)["urls"]
+            self.submitted.append(url)
+            return httpx.Response(200, json={"task_id": str(len(self.submitted) - 1)})
+
+        url = self.submitted[int(request.url.path.rsplit("/", 1)[-1])]
+        await asyncio.sleep(self.delays.get(url, 0))
+        path = url.replace("https://docs.example.com", "") or "/"
+        return httpx.Response(200, json={"status": "completed", "result": {
+            "title": f"Page {path}",
+            "markdown": f"Content of {path}",
+            "links": {"internal": [{"href": href, "text": href} for href in SITE.get(url, [])]}
+        }})
+
+class TestCrawler(unittest.TestCase):
+    """Tests for discover_pages and crawl_pages against a mock Crawl4AI service."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.saved = []
+
+    def run_with_service(self, service, coroutine_function, *args, **kwargs):
+        """Run a crawler coroutine with the mock service as its HTTP client."""
+        async def run():
+            client = httpx.AsyncClient(base_url="http://crawl4ai", transport=httpx.MockTransport(service))
+            with patch.object(crawler, "get_http_client", lambda: client), \
+                    patch.object(crawler, "save_consolidated_result",
+                                 lambda url, *rest: self.saved.append(url)):
+                try:
+                    return await coroutine_function(*args, **kwargs)
+                finally:
+                    await client.aclose()
+
+        return asyncio.run(run())
+
+    def test_discovery_is_breadth_first_and_same_domain(self):
+        """Pages are found level by level, once each, on the root's domain only."""
+        service = MockCrawl4AI(delays={"https://docs.example.com/a": 0.05})
+        pages = self.run_with_service(service, crawler.discover_pages, ROOT_URL, max_depth=3)
+
+        expected = [
+            "https://docs.example.com/",
+            "https://docs.example.com/a",
+            "https://docs.example.com/b",
+            "https://docs.example.com/c",
+            "https://docs.example.com/d"
+        ]
+        self.assertEqual([page.url for page in pages], expected)
+        self.assertEqual(sorted(service.submitted), sorted(expected))
+        self.assertEqual([link.href for link in pages[0].internalLinks], expected[1:3])
+        self.assertEqual(sorted(self.saved), sorted(expected))
+
+    def test_crawl_pages_once_each_in_order(self):
+        """Duplicate pages are crawled once, the first one wins and order is kept."""
+        pages = [
+            crawler.DiscoveredPage(url=url, title=f"Title {i}")
+            for i, url in enumerate([
+                "https://docs.example.com/b",
+                "https://docs.example.com/a",
+                "https://docs.example.com/b",
+                "https://docs.example.com/c"
+            ])
+        ]
+        service = MockCrawl4AI(delays={"https://docs.example.com/b": 0.05})
+        result = self.run_with_service(service, crawler.crawl_pages, pages, ROOT_URL)
+
+        self.assertEqual(sorted(service.submitted), sorted({page.url for page in pages}))
+        urls = [line[5:] for line in result.markdown.splitlines() if line.startswith("URL: ")]
+        self.assertEqual(urls, [
+            "https://docs.example.com/b",
+            "https://docs.example.com/a",
+            "https://docs.example.com/c"
+        ])
+        self.assertIn("# Title 0\n", result.markdown)
+        self.assertNotIn("# Title 2\n", result.markdown)
+        self.assertEqual(pages[0].status, "crawled")
+        self.assertEqual(pages[2].status, "pending")
+        self.assertEqual(result.stats.pages_crawled, 3)
+        self.assertEqual(result.stats.errors_encountered, 0)
+
+if __name__ == "__main__":
+    unittest.main()
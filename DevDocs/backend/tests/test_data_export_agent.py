@@ -0,0 +1,134 @@
+"""
+Tests for the streaming exports of the DataExportAgent.
+"""
+import sys
+import csv
+import json
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the agents
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.data_export_agent import DataExportAgent
+
+def make_transactions(count, clients=3):
+    """Generate transaction records for several clients."""
+    for i in range(count):
+        yield {
+            'client': f"client-{i % clients}",
+            'date': '2025-05-08',
+            'isin': f"XS{i:010d}",
+            'amount': i * 1.5,
+            'currency': 'USD',
+            'note': None if i % 2 else f"Transaction {i}"
+        }
+
+class TestStreamingExport(unittest.TestCase):
+    """Tests for exporting iterators of records."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.export_dir = tempfile.mkdtemp()
+        self.agent = DataExportAgent(export_dir=self.export_dir)
+
+    def tearDown(self):
+        """Clean up the test."""
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+
+    def test_json_matches_json_dump(self):
+        """Streamed JSON is identical to dumping the whole list."""
+        records = list(make_transactions(25))
+        for indent in (2, None):
+            result = self.agent.export_records(iter(records), 'json', f"tx_{indent}", {'indent': indent, 'chunk_size': 7})
+            self.assertEqual(result['status'], 'success')
+            self.assertEqual(result['row_count'], 25)
+            with open(result['file_path'], encoding='utf-8') as f:
+                self.assertEqual(f.read(), json.dumps(records, indent=indent))
+
+        result = self.agent.export_records(iter([]), 'json', 'empty')
+        with open(result['file_path'], encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_jsonl(self):
+        """JSON Lines exports have one record per line."""
+        result = self.agent.export_records(make_transactions(10), 'jsonl', 'tx')
+        self.assertTrue(result['file_path'].endswith('.jsonl'))
+        with open(result['file_path'], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], list(make_transactions(10)))
+
+    def test_csv(self):
+        """CSV exports have a header row and one row per record."""
+        result = self.agent.export_records(make_transactions(2500), 'csv', 'tx', {'chunk_size': 1000})
+        self.assertEqual(result['row_count'], 2500)
+        self.assertEqual(result['column_count'], 6)
+        with open(result['file_path'], encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[2]['note'], 'Transaction 2')
+        self.assertEqual(rows[3]['note'], '')
+
+    def test_columns_from_sample_and_ignored_keys(self):
+        """Columns come from the leading records; later keys are reported as ignored."""
+        records = [{'a': 1}, {'a': 2, 'b': 3}, {'a': 4, 'c': 5}]
+        result = self.agent.export_records(iter(records), 'csv', 'sample', {'column_sample_size': 2})
+        self.assertEqual(result['column_count'], 2)
+        self.assertEqual(result['ignored_columns'], ['c'])
+
+        result = self.agent.export_records(iter(records), 'csv', 'columns', {'columns': ['c', 'a']})
+        with open(result['file_path'], encoding='utf-8', newline='') as f:
+            self.assertEqual(list(csv.reader(f)), [['c', 'a'], ['', '1'], ['', '2'], ['5', '4']])
+
+    def test_excel(self):
+        """Excel exports are written with a write-only worksheet."""
+        from openpyxl import load_workbook
+
+        result = self.agent.export_records(make_transactions(100), 'excel', 'tx', {'sheet_name': 'Transactions'})
+        self.assertEqual(result['status'], 'success')
+        workbook = load_workbook(result['file_path'], read_only=True)
+        rows = list(workbook['Transactions'].iter_rows(values_only=True))
+        workbook.close()
+        self.assertEqual(len(rows), 101)
+        self.assertEqual(rows[0][0], 'client')
+        self.assertEqual(rows[10][3], 13.5)
+
+    def test_html(self):
+        """HTML exports contain one table row per record."""
+        result = self.agent.export_records(make_transactions(30), 'html', 'tx', {'chunk_size': 8})
+        with open(result['file_path'], encoding='utf-8') as f:
+            content = f.read()
+        self.assertEqual(content.count('<tr>'), 31)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+    def test_export_data_streams_iterators(self):
+        """export_data exports generators without materializing them."""
+        result = self.agent.export_data(make_transactions(10), 'csv', 'generator')
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['row_count'], 10)
+
+    def test_unsupported_format(self):
+        """PDF is not available as a streaming format."""
+        result = self.agent.export_records(make_transactions(10), 'pdf')
+        self.assertEqual(result['status'], 'error')
+
+    def test_memory_does_not_grow_with_rows(self):
+        """Peak memory of a streaming export does not depend on the number of records."""
+        def peak_memory(count, format_type):
+            tracemalloc.start()
+            try:
+                self.agent.export_records(make_transactions(count), format_type, f"mem_{count}")
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        for format_type in ('csv', 'jsonl', 'html'):
+            small = peak_memory(5000, format_type)
+            large = peak_memory(50000, format_type)
+            self.assertLess(large, small * 2, format_type)
+
+if __name__ == '__main__':
+    unittest.main()
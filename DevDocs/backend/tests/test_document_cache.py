@@ -11,6 +11,7 @@ import tempfile
 import shutil
 import json
 import time
+import zlib
 from datetime import datetime, timedelta
 import hashlib
 
@@ -80,6 +81,66 @@ class TestDocumentCacheService(unittest.TestCase):
         # Should be different with metadata
         self.assertNotEqual(fingerprint1, fingerprint_with_metadata)
     
+    def test_fingerprint_covers_full_content(self):
+        """Test that large files differing outside sampled regions get different fingerprints."""
+        size = 12 * 1024 * 1024
+        path1 = os.path.join(self.test_doc_dir, 'large1.pdf')
+        path2 = os.path.join(self.test_doc_dir, 'large2.pdf')
+        
+        content = bytearray(size)
+        with open(path1, 'wb') as f:
+            f.write(content)
+        content[3 * 1024 * 1024] = 1
+        with open(path2, 'wb') as f:
+            f.write(content)
+        
+        # Same file name so only the content differs
+        fingerprint1 = self.cache_service.generate_document_fingerprint(path1)
+        os.rename(path2, path1 + '.tmp')
+        os.replace(path1 + '.tmp', path1)
+        fingerprint2 = self.cache_service.generate_document_fingerprint(path1)
+        
+        self.assertNotEqual(fingerprint1, fingerprint2)
+    
+    def test_content_digest_memoized(self):
+        """Test that unchanged files are not hashed again."""
+        original_hash = self.cache_service._hash_file_content
+        calls = []
+        
+        def counting_hash(file_path):
+            calls.append(file_path)
+            return original_hash(file_path)
+        
+        self.cache_service._hash_file_content = counting_hash
+        
+        fingerprint1 = self.cache_service.generate_document_fingerprint(self.test_doc_path)
+        fingerprint2 = self.cache_service.generate_document_fingerprint(self.test_doc_path)
+        self.assertEqual(fingerprint1, fingerprint2)
+        self.assertEqual(len(calls), 1)
+        
+        # The memo survives a new service instance on the same cache directory
+        cache_service = DocumentCacheService(cache_dir=self.cache_dir)
+        cache_service._hash_file_content = counting_hash
+        self.assertEqual(cache_service.generate_document_fingerprint(self.test_doc_path), fingerprint1)
+        self.assertEqual(len(calls), 1)
+        
+        # Changing the file invalidates the memoized digest
+        with open(self.test_doc_path, 'ab') as f:
+            f.write(b'more content')
+        fingerprint3 = self.cache_service.generate_document_fingerprint(self.test_doc_path)
+        self.assertNotEqual(fingerprint1, fingerprint3)
+        self.assertEqual(len(calls), 2)
+    
+    def test_mmap_digest_matches_streaming(self):
+        """Test that memory-mapped hashing gives the same digest as streaming."""
+        mmap_service = DocumentCacheService(cache_dir=tempfile.mkdtemp(), use_mmap=True)
+        try:
+            expected = hashlib.sha256(open(self.test_doc_path, 'rb').read()).hexdigest()
+            self.assertEqual(mmap_service._hash_file_content(self.test_doc_path), expected)
+            self.assertEqual(self.cache_service._hash_file_content(self.test_doc_path), expected)
+        finally:
+            shutil.rmtree(mmap_service.cache_dir, ignore_errors=True)
+    
     def test_cache_operations(self):
         """Test basic cache operations."""
         # Generate fingerprint
@@ -191,6 +252,88 @@ class TestDocumentCacheService(unittest.TestCase):
         self.assertEqual(stats['cache_hits'], 1)
         self.assertEqual(stats['cache_misses'], 1)
 
+    
+    def test_entries_are_compressed_and_sharded(self):
+        """Test that entries are stored compressed in shard directories."""
+        fingerprint = self.cache_service.generate_document_fingerprint(self.test_doc_path)
+        self.cache_service.save_to_cache(fingerprint, self.test_data, tenant_id='tenant1')
+        
+        cache_path = self.cache_service._get_cache_path(fingerprint, 'tenant1')
+        self.assertEqual(os.path.basename(os.path.dirname(cache_path)), fingerprint[:2])
+        
+        with open(cache_path, 'rb') as f:
+            self.assertEqual(json.loads(zlib.decompress(f.read())), self.test_data)
+        
+        stats = self.cache_service.get_cache_stats()
+        self.assertEqual(stats['total_entries'], 1)
+        self.assertEqual(stats['total_bytes'], os.path.getsize(cache_path))
+    
+    def test_tenant_size_limit_evicts_lru(self):
+        """Test that the per-tenant size cap evicts least recently used entries."""
+        entry_size = len(zlib.compress(json.dumps(self.test_data, separators=(',', ':')).encode('utf-8'), 6))
+        cache_service = DocumentCacheService(
+            cache_dir=self.cache_dir,
+            default_ttl=60,
+            max_tenant_bytes=entry_size * 2
+        )
+        
+        cache_service.save_to_cache('fingerprint-a', self.test_data, tenant_id='tenant1')
+        cache_service.save_to_cache('fingerprint-b', self.test_data, tenant_id='tenant1')
+        cache_service.save_to_cache('fingerprint-c', self.test_data, tenant_id='tenant2')
+        
+        # Touch the first entry so the second one is least recently used
+        time.sleep(0.01)
+        self.assertIsNotNone(cache_service.get_from_cache('fingerprint-a', tenant_id='tenant1'))
+        cache_service.save_to_cache('fingerprint-d', self.test_data, tenant_id='tenant1')
+        
+        self.assertIsNotNone(cache_service.get_from_cache('fingerprint-a', tenant_id='tenant1'))
+        self.assertIsNone(cache_service.get_from_cache('fingerprint-b', tenant_id='tenant1'))
+        self.assertIsNotNone(cache_service.get_from_cache('fingerprint-d', tenant_id='tenant1'))
+        self.assertIsNotNone(cache_service.get_from_cache('fingerprint-c', tenant_id='tenant2'))
+        self.assertEqual(cache_service.get_cache_stats()['evictions'], 1)
+    
+    def test_total_size_limit_evicts_lru(self):
+        """Test that the global size cap evicts across tenants."""
+        entry_size = len(zlib.compress(json.dumps(self.test_data, separators=(',', ':')).encode('utf-8'), 6))
+        cache_service = DocumentCacheService(
+            cache_dir=self.cache_dir,
+            default_ttl=60,
+            max_total_bytes=entry_size * 2
+        )
+        
+        cache_service.save_to_cache('fingerprint-a', self.test_data, tenant_id='tenant1')
+        time.sleep(0.01)
+        cache_service.save_to_cache('fingerprint-b', self.test_data, tenant_id='tenant2')
+        time.sleep(0.01)
+        cache_service.save_to_cache('fingerprint-c', self.test_data, tenant_id='tenant3')
+        
+        self.assertIsNone(cache_service.get_from_cache('fingerprint-a', tenant_id='tenant1'))
+        self.assertEqual(cache_service.get_cache_stats()['total_entries'], 2)
+    
+    def test_legacy_entries_imported(self):
+        """Test that entries in the old JSON format are imported on first use."""
+        legacy_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(legacy_dir, 'tenant1'))
+            legacy_entry = {
+                'fingerprint': 'legacy-fingerprint',
+                'data': self.test_data,
+                'created_at': datetime.now().isoformat(),
+                'expiration_time': (datetime.now() + timedelta(hours=1)).isoformat(),
+                'tenant_id': 'tenant1'
+            }
+            legacy_path = os.path.join(legacy_dir, 'tenant1', 'legacy-fingerprint.json')
+            with open(legacy_path, 'w', encoding='utf-8') as f:
+                json.dump(legacy_entry, f, indent=2)
+            
+            cache_service = DocumentCacheService(cache_dir=legacy_dir)
+            
+            self.assertFalse(os.path.exists(legacy_path))
+            cached_data = cache_service.get_from_cache('legacy-fingerprint', tenant_id='tenant1')
+            self.assertEqual(cached_data['document_id'], self.test_data['document_id'])
+        finally:
+            shutil.rmtree(legacy_dir, ignore_errors=True)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
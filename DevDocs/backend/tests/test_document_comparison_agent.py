@@ -0,0 +1,86 @@
+"""
+Tests for the document comparison agent.
+"""
+import sys
+import copy
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the agents
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents.document_comparison_agent import DocumentComparisonAgent
+
+class TestSecuritiesComparison(unittest.TestCase):
+    """Tests for comparing holdings across document snapshots."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.agent = DocumentComparisonAgent()
+        self.documents = [
+            {"securities": [
+                {"isin": "A", "name": "Alpha", "value": 100},
+                {"isin": "B", "name": "Beta", "value": 50}
+            ]},
+            {"securities": [
+                {"isin": "A", "name": "Alpha", "value": 120, "price": 12.0},
+                {"isin": "C", "name": "Gamma", "value": 0}
+            ]},
+            {"securities": [
+                {"isin": "A", "name": "Alpha", "value": 120, "price": 12.0},
+                {"isin": "C", "name": "Gamma", "value": 10}
+            ]}
+        ]
+
+    def test_added_removed_and_changed(self):
+        """Added, removed and changed securities are found between snapshots."""
+        result = self.agent._compare_securities(self.documents)
+
+        self.assertEqual(result["total_unique_securities"], 3)
+        self.assertEqual(result["securities_with_changes"], 2)
+        self.assertEqual(
+            [(sec["security_id"], sec["document_index"]) for sec in result["added_securities"]],
+            [("isin:c", 1)]
+        )
+        self.assertEqual(
+            [(sec["security_id"], sec["document_index"]) for sec in result["removed_securities"]],
+            [("isin:b", 0)]
+        )
+
+        alpha_changes = result["changes"][0]["changes"]
+        self.assertEqual([change["field"] for change in alpha_changes], ["price", "value"])
+        self.assertEqual(alpha_changes[0]["change_type"], "added")
+        self.assertEqual(alpha_changes[1]["absolute_change"], 20)
+        self.assertEqual(alpha_changes[1]["percent_change"], 20.0)
+        self.assertTrue(alpha_changes[1]["is_significant"])
+
+        gamma_change = result["changes"][1]
+        self.assertEqual((gamma_change["old_document_index"], gamma_change["new_document_index"]), (1, 2))
+        self.assertEqual(gamma_change["changes"][0]["percent_change"], float("inf"))
+
+    def test_matches_pairwise_comparison(self):
+        """Column-wise changes match comparing each pair of securities."""
+        result = self.agent._compare_securities(self.documents)
+        old = self.documents[0]["securities"][0]
+        new = self.documents[1]["securities"][0]
+
+        expected = self.agent._compare_security_attributes(old, new)["changes"]
+        self.assertEqual(result["changes"][0]["changes"], expected)
+
+    def test_inputs_not_modified(self):
+        """Comparing documents leaves the input documents untouched."""
+        documents = copy.deepcopy(self.documents)
+        for document in documents:
+            document["summary"] = {"total_value": 100}
+            document["transactions"] = [{"transaction_id": "t1", "type": "buy"}]
+
+        expected = copy.deepcopy(documents)
+        self.agent._compare_securities(documents)
+        self.agent._compare_positions(documents)
+        self.agent._compare_transactions(documents)
+        self.agent._compare_summary_data(documents)
+
+        self.assertEqual(documents, expected)
+
+if __name__ == "__main__":
+    unittest.main()
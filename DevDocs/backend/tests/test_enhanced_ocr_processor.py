@@ -0,0 +1,242 @@
+"""
+Tests for page scheduling and output handling in the enhanced OCR processor.
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import patch
+
+import pdfplumber
+from PIL import Image
+
+# Add the parent directory to the path so we can import the enhanced processing modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    from enhanced_processing import enhanced_ocr_processor
+    from enhanced_processing.enhanced_ocr_processor import EnhancedOCRProcessor
+    HAS_OCR_DEPENDENCIES = True
+except ImportError:
+    HAS_OCR_DEPENDENCIES = False
+
+PAGE_COUNT = 5
+
+def fake_convert_from_path(pdf_path, dpi=300, first_page=None, last_page=None):
+    """Render a blank page instead of calling poppler."""
+    return [Image.new('RGB', (40, 60), 'white')]
+
+def fake_ocr_page(self, page_number, lang_param, dpi, keep_image=False):
+    """OCR stub; later pages finish first so results arrive out of order."""
+    time.sleep(0.01 * (PAGE_COUNT - page_number))
+    page_image = None
+    if keep_image:
+        buffer = io.BytesIO()
+        self._render_page(page_number, dpi).save(buffer, format='JPEG')
+        page_image = buffer.getvalue()
+    return f"page {page_number}", 0.9, page_image
+
+class FailingPool:
+    """Process pool stand-in that breaks after returning the first two pages."""
+
+    def __init__(self, max_workers=None, initializer=None):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, fn, pages, *args):
+        pages = list(pages)
+        for page_number in pages[:2]:
+            yield fn(page_number, 'eng', 300, False)
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+@unittest.skipUnless(HAS_OCR_DEPENDENCIES, "pytesseract or pdf2image not installed")
+class TestEnhancedOCRPages(unittest.TestCase):
+    """Tests for OCRing pages in order, in parallel and sequentially."""
+
+    def setUp(self):
+        """Set up the test with a placeholder PDF and stubbed rendering."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.pdf_path = os.path.join(self.temp_dir.name, 'statement.pdf')
+        with open(self.pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4\n')
+
+        for target, value in (
+            ('convert_from_path', fake_convert_from_path),
+            ('pdfinfo_from_path', lambda pdf_path: {'Pages': PAGE_COUNT})
+        ):
+            patcher = patch.object(enhanced_ocr_processor, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(EnhancedOCRProcessor, '_ocr_page', fake_ocr_page)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Temporary output files are created in the test's directory
+        patcher = patch.object(tempfile, 'tempdir', self.temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_processor(self, max_workers):
+        """Create a processor that skips OCRmyPDF and document detection."""
+        processor = EnhancedOCRProcessor(self.pdf_path, max_workers=max_workers)
+        processor._is_ocrmypdf_available = lambda: False
+        processor._detect_document_properties = lambda image: None
+        processor.page_count = PAGE_COUNT
+        return processor
+
+    def test_sequential_pages_in_order(self):
+        """A single worker OCRs the pages one after the other."""
+        results = list(self.make_processor(1)._ocr_pages('eng', 300, False))
+
+        self.assertEqual([text for text, _, _ in results], [f"page {i}" for i in range(1, PAGE_COUNT + 1)])
+
+    def test_parallel_pages_in_order(self):
+        """Pages finishing out of order are still yielded in page order."""
+        with patch.object(enhanced_ocr_processor, 'ProcessPoolExecutor', ThreadPoolExecutor):
+            results = list(self.make_processor(4)._ocr_pages('eng', 300, False))
+
+        self.assertEqual([text for text, _, _ in results], [f"page {i}" for i in range(1, PAGE_COUNT + 1)])
+
+    def test_broken_pool_continues_sequentially(self):
+        """Pages the pool did not return are OCRed sequentially, none twice."""
+        with patch.object(enhanced_ocr_processor, 'ProcessPoolExecutor', FailingPool):
+            results = list(self.make_processor(4)._ocr_pages('eng', 300, False))
+
+        self.assertEqual([text for text, _, _ in results], [f"page {i}" for i in range(1, PAGE_COUNT + 1)])
+
+    def test_text_only_leaves_no_output_files(self):
+        """Without an output PDF, process returns None and writes no temporary files."""
+        processor = self.make_processor(1)
+        output_path = processor.process(output_pdf=False)
+
+        self.assertIsNone(output_path)
+        self.assertIsNone(processor.output_path)
+        self.assertEqual(processor.extract_text(), "\n\n".join(f"page {i}" for i in range(1, PAGE_COUNT + 1)))
+        self.assertEqual(os.listdir(self.temp_dir.name), ['statement.pdf'])
+
+    def test_output_pdf_contains_all_pages(self):
+        """The output PDF and its text file are written when requested."""
+        processor = self.make_processor(1)
+        output_path = processor.process(output_pdf=True)
+
+        with pdfplumber.open(output_path) as pdf:
+            self.assertEqual(len(pdf.pages), PAGE_COUNT)
+        with open(output_path.replace('.pdf', '.txt'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), processor.ocr_text)
+
+        processor.cleanup()
+        self.assertFalse(os.path.exists(output_path))
+
+def tesseract_data(words):
+    """image_to_data output for (block, line, word, confidence) tuples."""
+    return {
+        'block_num': [block for block, _, _, _ in words],
+        'par_num': [1 for _ in words],
+        'line_num': [line for _, line, _, _ in words],
+        'text': [word for _, _, word, _ in words],
+        'conf': [conf for _, _, _, conf in words]
+    }
+
+@unittest.skipUnless(HAS_OCR_DEPENDENCIES, "pytesseract or pdf2image not installed")
+class TestEnhancedOCRConfidence(unittest.TestCase):
+    """Tests for scoring pages by word confidence and trying variants only when needed."""
+
+    def setUp(self):
+        """Set up a processor for a placeholder PDF whose pages render blank."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        pdf_path = os.path.join(self.temp_dir.name, 'statement.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4\n')
+
+        patcher = patch.object(enhanced_ocr_processor, 'convert_from_path', fake_convert_from_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.processor = EnhancedOCRProcessor(pdf_path, max_workers=1, confidence_threshold=0.8)
+        self.processor.page_count = 1
+
+    def score_passes(self, confidences):
+        """Make each OCR pass return the next confidence; return the calls made."""
+        calls = []
+
+        def ocr_with_confidence(image, lang_param):
+            calls.append(image)
+            return f"pass {len(calls)}", confidences[len(calls) - 1]
+
+        self.processor._ocr_with_confidence = ocr_with_confidence
+        return calls
+
+    def test_text_and_mean_word_confidence(self):
+        """Words are joined per line and unscored or blank entries are ignored."""
+        data = tesseract_data([
+            (1, 1, '', -1),
+            (1, 1, 'Total', 90),
+            (1, 1, '1,000', 70),
+            (1, 2, 'USD', 80),
+            (2, 1, ' ', -1),
+            (2, 1, 'Page', -1)
+        ])
+
+        with patch.object(enhanced_ocr_processor.pytesseract, 'image_to_data', return_value=data) as image_to_data:
+            text, confidence = self.processor._ocr_with_confidence(None, 'eng')
+
+        self.assertEqual(image_to_data.call_count, 1)
+        self.assertEqual(text, "Total 1,000\nUSD\nPage")
+        self.assertAlmostEqual(confidence, 0.8)
+
+        with patch.object(enhanced_ocr_processor.pytesseract, 'image_to_data', return_value=tesseract_data([])):
+            self.assertEqual(self.processor._ocr_with_confidence(None, 'eng'), ("", 0.0))
+
+    def test_confident_page_is_read_once(self):
+        """A financial page above the confidence threshold is not OCRed again."""
+        self.processor.document_type = "portfolio_statement"
+        calls = self.score_passes([0.9])
+
+        text, confidence, _ = self.processor._ocr_page(1, 'eng', 300)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((text, confidence), ("pass 1", 0.9))
+
+    def test_variants_tried_below_threshold(self):
+        """A low-confidence financial page keeps the best scoring variant."""
+        self.processor.document_type = "portfolio_statement"
+        calls = self.score_passes([0.5, 0.7, 0.6])
+
+        text, confidence, _ = self.processor._ocr_page(1, 'eng', 300)
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual((text, confidence), ("pass 2", 0.7))
+
+    def test_other_documents_read_once(self):
+        """Variants are only tried for financial documents."""
+        self.processor.document_type = "unknown"
+        calls = self.score_passes([0.5])
+
+        self.assertEqual(self.processor._ocr_page(1, 'eng', 300)[:2], ("pass 1", 0.5))
+        self.assertEqual(len(calls), 1)
+
+    def test_debug_images_only_when_requested(self):
+        """Preprocessed page images are only written to the debug directory."""
+        self.score_passes([0.9, 0.9])
+        self.processor._ocr_page(1, 'eng', 300)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['statement.pdf'])
+
+        self.processor.debug_image_dir = os.path.join(self.temp_dir.name, 'debug')
+        self.processor._ocr_page(2, 'eng', 300)
+        self.assertEqual(os.listdir(self.processor.debug_image_dir), ['page_2.jpg'])
+
+if __name__ == '__main__':
+    unittest.main()
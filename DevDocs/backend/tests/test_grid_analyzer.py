@@ -0,0 +1,181 @@
+"""
+Tests for building page grids in the grid analyzer.
+"""
+import sys
+import random
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the enhanced processing modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    from enhanced_processing.grid_analyzer import GridAnalyzer
+    HAS_GRID_ANALYZER = True
+except ImportError:
+    HAS_GRID_ANALYZER = False
+
+class FakeElement:
+    """Page element with the metadata the grid analyzer reads."""
+
+    def __init__(self, text, coordinates):
+        self.text = text
+        self.metadata = {'coordinates': coordinates}
+
+    def __str__(self):
+        return self.text
+
+def baseline_page_grid(elements):
+    """The list based grid construction the NumPy version replaced."""
+    grid = {'elements': [], 'rows': [], 'columns': [], 'cells': {}}
+
+    for element in elements:
+        coordinates = element.metadata.get('coordinates', {})
+        if coordinates:
+            grid['elements'].append({
+                'element': element,
+                'x0': coordinates.get('x0', 0),
+                'y0': coordinates.get('y0', 0),
+                'x1': coordinates.get('x1', 0),
+                'y1': coordinates.get('y1', 0),
+                'text': str(element)
+            })
+
+    grid['elements'].sort(key=lambda e: e['y0'])
+
+    current_row = []
+    current_y = None
+    for element in grid['elements']:
+        if current_y is None:
+            current_row.append(element)
+            current_y = element['y0']
+        elif abs(element['y0'] - current_y) <= 5:
+            current_row.append(element)
+        else:
+            current_row.sort(key=lambda e: e['x0'])
+            grid['rows'].append(current_row)
+            current_row = [element]
+            current_y = element['y0']
+    if current_row:
+        current_row.sort(key=lambda e: e['x0'])
+        grid['rows'].append(current_row)
+
+    x_positions = sorted({x for e in grid['elements'] for x in (e['x0'], e['x1'])})
+    column_boundaries = []
+    current_x = None
+    for x in x_positions:
+        if current_x is None or x - current_x <= 10:
+            current_x = x
+        else:
+            column_boundaries.append(current_x)
+            current_x = x
+    if current_x is not None:
+        column_boundaries.append(current_x)
+    grid['columns'] = column_boundaries
+
+    for row_idx, row in enumerate(grid['rows']):
+        for element in row:
+            start_col = None
+            end_col = None
+            for col_idx, col_x in enumerate(column_boundaries):
+                if start_col is None and abs(element['x0'] - col_x) <= 10:
+                    start_col = col_idx
+                if start_col is not None and end_col is None and abs(element['x1'] - col_x) <= 10:
+                    end_col = col_idx
+            if start_col is not None:
+                if end_col is None:
+                    end_col = start_col
+                grid['cells'][f"{row_idx}_{start_col}_{end_col}"] = {
+                    'element': element['element'],
+                    'row': row_idx,
+                    'col_start': start_col,
+                    'col_end': end_col
+                }
+
+    return grid
+
+def synthetic_page(seed):
+    """Generate a shuffled statement table with jittered, spanning and unaligned elements."""
+    rng = random.Random(seed)
+    column_x = [40, 160, 260, 380, 500]
+    elements = []
+
+    for row in range(40):
+        # Jitter stays within the row tolerance of every element in the row
+        y = 30 + row * 18
+        col = 0
+        while col < len(column_x) - 1:
+            span = 2 if rng.random() < 0.15 and col < len(column_x) - 2 else 1
+            x0 = column_x[col] + rng.uniform(-3, 3)
+            x1 = column_x[col + span] + rng.uniform(-3, 3) if rng.random() < 0.7 else x0 + rng.uniform(20, 60)
+            elements.append(FakeElement(f"r{row}c{col}", {
+                'x0': x0, 'y0': y + rng.uniform(-2, 2), 'x1': x1, 'y1': y + 12
+            }))
+            col += span
+
+        if rng.random() < 0.2:
+            # Free text that lines up with no column
+            x0 = rng.choice([100, 215, 320, 445])
+            elements.append(FakeElement(f"note {row}", {
+                'x0': x0, 'y0': y + rng.uniform(-2, 2), 'x1': x0 + 15, 'y1': y + 12
+            }))
+
+    elements.append(FakeElement("no coordinates", {}))
+    rng.shuffle(elements)
+    return elements
+
+@unittest.skipUnless(HAS_GRID_ANALYZER, "unstructured not installed")
+class TestPageGrid(unittest.TestCase):
+    """Tests for the NumPy page grid against the previous implementation."""
+
+    def setUp(self):
+        """Set up an analyzer without reading a PDF."""
+        self.analyzer = GridAnalyzer.__new__(GridAnalyzer)
+
+    def assert_matches_baseline(self, elements):
+        """Check that the grid of a page matches the baseline grid."""
+        grid = self.analyzer._create_page_grid(elements)
+        baseline = baseline_page_grid(elements)
+
+        page_elements = grid['elements']
+        self.assertEqual(page_elements, [e['element'] for e in baseline['elements']])
+        self.assertEqual(grid['texts'], [e['text'] for e in baseline['elements']])
+        self.assertEqual(
+            [[page_elements[i] for i in row.tolist()] for row in grid['rows']],
+            [[e['element'] for e in row] for row in baseline['rows']]
+        )
+        self.assertEqual(grid['columns'].tolist(), [float(x) for x in baseline['columns']])
+
+        # Baseline cells sharing a key overwrite each other in row order
+        cells = {}
+        for cell in grid['cells'].tolist():
+            element, row, col_start, col_end = cell
+            cells[f"{row}_{col_start}_{col_end}"] = {
+                'element': page_elements[element],
+                'row': row,
+                'col_start': col_start,
+                'col_end': col_end
+            }
+        self.assertEqual(cells, baseline['cells'])
+
+        for (row, col), element in grid['cell_lookup'].items():
+            self.assertEqual(grid['row_ids'][element], row)
+            self.assertEqual(grid['element_columns'][element], col)
+
+    def test_synthetic_pages_match_baseline(self):
+        """Rows, columns and cells match the previous implementation."""
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assert_matches_baseline(synthetic_page(seed))
+
+    def test_empty_page(self):
+        """A page without positioned elements has an empty grid."""
+        grid = self.analyzer._create_page_grid([FakeElement("no coordinates", {})])
+
+        self.assertEqual(grid['elements'], [])
+        self.assertEqual(grid['rows'], [])
+        self.assertEqual(len(grid['columns']), 0)
+        self.assertEqual(len(grid['cells']), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the ISIN extractor service.
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.ISINExtractorService import ISINExtractorService
+
+SAMPLE_TEXT = """
+Stock A has ISIN: US0378331005 (Apple Inc.)
+Bond B has code DE0001102341
+Security ID: FR0000131104
+Some text with an embedded ISIN GB0002634946 in the middle.
+The same ISIN written as US 037833100 5 is listed once.
+This is a CUSIP: 38259P508
+This is a SEDOL: B0YBKJ7
+Invalid ISIN: US0378331009 (wrong check digit)
+"""
+
+class TestIdentifierScanning(unittest.TestCase):
+    """Tests for finding security identifiers in text."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.service = ISINExtractorService()
+
+    def test_extract_isins(self):
+        """Valid ISINs are found once each, in order of appearance."""
+        self.assertEqual(
+            self.service.extract_isins(SAMPLE_TEXT),
+            ["US0378331005", "DE0001102341", "FR0000131104", "GB0002634946"]
+        )
+
+    def test_extract_securities(self):
+        """ISINs, CUSIPs and SEDOLs are found in a single scan."""
+        securities = self.service.extract_securities(SAMPLE_TEXT)
+
+        self.assertEqual(len(securities["isins"]), 4)
+        self.assertEqual(securities["cusips"], ["38259P508"])
+        self.assertEqual(securities["sedols"], ["B0YBKJ7"])
+
+    def test_context_label(self):
+        """The label before an identifier is reported with the match."""
+        matches = self.service.scan_identifiers("Security ID: FR0000131104 and DE0001102341")
+
+        self.assertEqual(
+            [(match["value"], match["context"]) for match in matches],
+            [("FR0000131104", "Security ID"), ("DE0001102341", None)]
+        )
+
+    def test_identifiers_inside_words_ignored(self):
+        """Identifiers embedded in longer alphanumeric runs are not matched."""
+        self.assertEqual(self.service.extract_isins("XUS0378331005 US03783310051"), [])
+        for text in ("VALIDDE0007164600", "RAPIDUS0378331005", "NoUS0378331005"):
+            self.assertEqual(self.service.extract_isins(text), [], text)
+
+    def test_validate_isin(self):
+        """ISINs are validated by format, country code and check digit."""
+        self.assertTrue(self.service.validate_isin("US0378331005"))
+        self.assertTrue(self.service.validate_isin("GB0002634946"))
+        self.assertFalse(self.service.validate_isin("US0378331009"))
+        self.assertFalse(self.service.validate_isin("ZZ0378331005"))
+
+class TestSecurityCache(unittest.TestCase):
+    """Tests for the persistent security cache."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up the test."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_cache_persists_per_security(self):
+        """Securities cached by one instance are read by the next one."""
+        service = ISINExtractorService(cache_dir=self.cache_dir)
+        service.security_cache.put("isin_US0378331005", {"name": "Apple Inc."})
+        service.security_cache.close()
+
+        service = ISINExtractorService(cache_dir=self.cache_dir)
+        self.assertIn("isin_US0378331005", service.security_cache)
+        self.assertEqual(len(service.security_cache), 1)
+        self.assertEqual(service.enrich_security_data("US0378331005"), {"name": "Apple Inc."})
+        service.security_cache.close()
+
+    def test_legacy_cache_imported(self):
+        """The JSON cache of earlier versions is imported once."""
+        legacy_file = os.path.join(self.cache_dir, "security_cache.json")
+        with open(legacy_file, "w") as f:
+            json.dump({"isin_DE0001102341": {"name": "Bund"}}, f)
+
+        service = ISINExtractorService(cache_dir=self.cache_dir)
+        self.assertEqual(service.security_cache.get("isin_DE0001102341"), {"name": "Bund"})
+        self.assertFalse(os.path.exists(legacy_file))
+        service.security_cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+Tests for the optimized document processor.
+"""
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the enhanced processing modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import openpyxl
+    from enhanced_processing import optimized_document_processor
+    from enhanced_processing.optimized_document_processor import (
+        OptimizedDocumentProcessor,
+        ExcelRowStreamer,
+        PandasExcelStreamer,
+        TaskQueue,
+        open_excel_streamer
+    )
+    HAS_PROCESSOR = True
+except ImportError:
+    HAS_PROCESSOR = False
+
+ISINS = ["US0378331005", "DE0007164600", "CH0012032048"]
+
+def write_workbook(path):
+    """Write a small workbook with a positions sheet, a notes sheet and an empty sheet."""
+    workbook = openpyxl.Workbook()
+    positions = workbook.active
+    positions.title = "Positions"
+    positions.append(["ISIN", "Name", "Quantity", "Price", "Name"])
+    for i in range(25):
+        if i == 10:
+            positions.append([])
+        positions.append([
+            ISINS[i % len(ISINS)] if i % 4 else f"Cash {i}",
+            f"Security {i}",
+            100 * (i + 1),
+            None if i % 5 == 0 else 99.5 + i,
+            f"Alias {i}"
+        ])
+
+    notes = workbook.create_sheet("Notes")
+    notes.append(["Note"])
+    notes.append(["Bought GB0002634946 in March"])
+    notes.append(["No identifiers here"])
+
+    workbook.create_sheet("Empty")
+    workbook.save(path)
+
+def normalize(result):
+    """Drop the processing time and turn NaN cells into None."""
+    def value(cell):
+        return None if isinstance(cell, float) and math.isnan(cell) else cell
+
+    result = dict(result)
+    result.pop("processed_at")
+    result["tables"] = [
+        dict(table, data=[{key: value(cell) for key, cell in row.items()} for row in table["data"]])
+        for table in result["tables"]
+    ]
+    return result
+
+@unittest.skipUnless(HAS_PROCESSOR, "document processing dependencies not installed")
+class TestLargeExcelProcessing(unittest.TestCase):
+    """Tests for processing large workbooks in chunks."""
+
+    def setUp(self):
+        """Set up a processor and a generated workbook."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.workbook_path = os.path.join(self.temp_dir.name, "positions.xlsx")
+        write_workbook(self.workbook_path)
+
+        self.processor = OptimizedDocumentProcessor(upload_dir=self.temp_dir.name, max_workers=1)
+        self.addCleanup(self.processor.task_queue.stop_workers)
+
+    def test_readers_by_format(self):
+        """Formats openpyxl can stream are streamed, the others are read with pandas."""
+        self.assertIsInstance(open_excel_streamer("book.xlsx"), ExcelRowStreamer)
+        self.assertIsInstance(open_excel_streamer("BOOK.XLSM"), ExcelRowStreamer)
+        for name in ("book.xls", "book.xlsb", "book.ods"):
+            self.assertIsInstance(open_excel_streamer(name), PandasExcelStreamer)
+
+    def test_streamed_rows_match_pandas(self):
+        """Streaming gives the same sheets, previews and ISINs as reading with pandas."""
+        options = {"excel_chunk_size": 7}
+        streamed = self.processor._process_large_excel(self.workbook_path, options)
+        with patch.object(optimized_document_processor, "HAS_OPENPYXL", False):
+            baseline = self.processor._process_large_excel(self.workbook_path, options)
+
+        self.assertEqual(normalize(streamed), normalize(baseline))
+
+        positions = streamed["sheets"][0]
+        self.assertEqual(positions["rows"], 25)
+        self.assertEqual(positions["column_names"], ["ISIN", "Name", "Quantity", "Price", "Name.1"])
+        self.assertEqual([sheet["name"] for sheet in streamed["sheets"]], ["Positions", "Notes", "Empty"])
+        self.assertEqual(streamed["sheets"][2]["rows"], 0)
+        self.assertEqual(len(streamed["tables"][0]["data"]), 10)
+        self.assertEqual(streamed["isins"], ISINS[1:] + ISINS[:1] + ["GB0002634946"])
+
+    def test_selected_sheets(self):
+        """Only the requested sheets are processed."""
+        result = self.processor._process_large_excel(self.workbook_path, {"sheet_names": "Notes"})
+
+        self.assertEqual([sheet["name"] for sheet in result["sheets"]], ["Notes"])
+        self.assertEqual(result["isins"], ["GB0002634946"])
+
+class SignallingLock:
+    """Lock that signals when the test thread releases it and then gives other threads a chance to take it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._test_thread = threading.get_ident()
+        self.released = threading.Event()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+        if threading.get_ident() == self._test_thread:
+            self.released.set()
+            time.sleep(0.001)
+
+@unittest.skipUnless(HAS_PROCESSOR, "document processing dependencies not installed")
+class TestTaskQueue(unittest.TestCase):
+    """Tests for ordering, cancelling and stopping queued tasks."""
+
+    def setUp(self):
+        """Set up a single worker queue whose workers are started by each test."""
+        self.queue = TaskQueue(num_workers=1)
+        self.addCleanup(self.stop_workers)
+        self.ran = []
+
+    def stop_workers(self):
+        """Stop the workers if a test left them running."""
+        if self.queue.workers:
+            self.queue.stop_workers()
+
+    def record(self, name):
+        """Task function remembering the order tasks ran in."""
+        self.ran.append(name)
+        return name
+
+    def test_priority_order(self):
+        """Queued tasks run lowest priority value first."""
+        for name, priority in (("low", 9), ("high", 1), ("normal", 5), ("urgent", 0)):
+            self.queue.add_task(name, self.record, name, priority=priority)
+
+        self.queue.start_workers()
+        self.queue.wait_for_all()
+
+        self.assertEqual(self.ran, ["urgent", "high", "normal", "low"])
+        self.assertEqual(self.queue.get_result("high")["result"], "high")
+
+    def test_equal_priorities_run_in_order_added(self):
+        """Tasks of the same priority run first in, first out."""
+        names = [f"task {i}" for i in range(10)]
+        for name in names:
+            self.queue.add_task(name, self.record, name, priority=5)
+        self.queue.add_task("first", self.record, "first", priority=1)
+
+        self.queue.start_workers()
+        self.queue.wait_for_all()
+
+        self.assertEqual(self.ran, ["first"] + names)
+
+    def test_cancel_queued_task(self):
+        """A cancelled task is never run and reports its cancellation."""
+        self.queue.add_task("kept", self.record, "kept")
+        self.queue.add_task("cancelled", self.record, "cancelled")
+
+        self.assertTrue(self.queue.cancel_task("cancelled"))
+        self.assertFalse(self.queue.cancel_task("cancelled"))
+        self.assertFalse(self.queue.cancel_task("missing"))
+
+        self.queue.start_workers()
+        self.queue.wait_for_all()
+
+        self.assertEqual(self.ran, ["kept"])
+        self.assertEqual(self.queue.get_result("cancelled")["status"], "cancelled")
+        status = self.queue.get_queue_status()
+        self.assertEqual((status["completed_tasks"], status["cancelled_tasks"], status["pending_tasks"]), (1, 1, 0))
+
+    def test_running_task_cannot_be_cancelled(self):
+        """A task already running in a worker thread finishes normally."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        self.queue.start_workers()
+        self.queue.add_task("running", blocking)
+        self.assertTrue(started.wait(5))
+
+        self.assertFalse(self.queue.cancel_task("running"))
+        release.set()
+        self.queue.wait_for_all()
+
+        self.assertEqual(self.queue.get_result("running"), {"status": "completed", "result": "done", "error": None})
+
+    def test_cancel_while_worker_picks_up_task(self):
+        """A task cancelled as a worker picks it up is never started by that worker."""
+        lock = SignallingLock()
+        picked_up = threading.Barrier(2)
+        get = self.queue.queue.get
+
+        def get_after_cancel_check(*args, **kwargs):
+            # Hold the task until cancel_task has released the lock for the first time
+            item = get(*args, **kwargs)
+            if item[2] is not None:
+                picked_up.wait(5)
+                lock.released.wait(5)
+            return item
+
+        self.queue.lock = lock
+        self.queue.queue.get = get_after_cancel_check
+        self.queue.start_workers()
+
+        for i in range(10):
+            name = f"task {i}"
+            self.queue.add_task(name, self.record, name)
+            lock.released.clear()
+            picked_up.wait(5)
+            self.assertTrue(self.queue.cancel_task(name))
+            self.queue.wait_for_all()
+            self.assertEqual(self.queue.get_result(name)["status"], "cancelled")
+
+        self.assertEqual(self.ran, [])
+        status = self.queue.get_queue_status()
+        self.assertEqual(status["cancelled_tasks"], 10)
+        self.assertEqual((status["completed_tasks"], status["running_tasks"], status["pending_tasks"]), (0, 0, 0))
+
+    def test_stop_workers_leaves_queued_tasks(self):
+        """Stopping lets the running task finish and does not start queued ones."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        self.queue.start_workers()
+        self.queue.add_task("running", blocking)
+        self.assertTrue(started.wait(5))
+        self.queue.add_task("queued", self.record, "queued")
+
+        stopper = threading.Thread(target=self.queue.stop_workers)
+        stopper.start()
+        release.set()
+        stopper.join(5)
+
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(self.queue.workers, [])
+        self.assertEqual(self.ran, [])
+        self.assertEqual(self.queue.get_result("running")["status"], "completed")
+        self.assertEqual(self.queue.get_result("queued")["status"], "queued")
+
+if __name__ == "__main__":
+    unittest.main()
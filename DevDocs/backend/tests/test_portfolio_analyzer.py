@@ -4,7 +4,7 @@ import json
 from datetime import datetime, timedelta
 
 # Import the module to test
-from portfolio_analyzer import PortfolioAnalyzer
+from portfolio_analyzer import PortfolioAnalyzer, PricePanel
 
 class TestPortfolioAnalyzer(unittest.TestCase):
     """Test cases for the PortfolioAnalyzer class."""
@@ -173,6 +173,43 @@ class TestPortfolioAnalyzer(unittest.TestCase):
                           len(result["security_recommendations"]) + 
                           len(result["risk_recommendations"]), 0)
     
+    def test_calculate_security_returns(self):
+        """Test period returns of a single security."""
+        returns = self.analyzer._calculate_security_returns(self.sample_historical_data["US0378331005"])
+        
+        # Closest prices are 30, 90 and 365 days back
+        self.assertAlmostEqual(returns["1m"], 175.25 / 170.0 - 1)
+        self.assertAlmostEqual(returns["3m"], 175.25 / 165.0 - 1)
+        self.assertAlmostEqual(returns["1y"], 175.25 / 150.0 - 1)
+        self.assertAlmostEqual(returns["max"], 175.25 / 150.0 - 1)
+        self.assertIn("10y_annualized", returns)
+    
+    def test_price_panel(self):
+        """Test closest-date lookups and daily returns on the price panel."""
+        panel = PricePanel({
+            "A": [
+                {"date": "2024-01-05", "price": 12.0},
+                {"date": "2024-01-01", "price": 10.0},
+                {"date": "2024-01-03", "price": 11.0}
+            ],
+            "B": [{"date": "2024-01-02T00:00:00+00:00", "price": 20.0}],
+            "C": []
+        })
+        
+        self.assertEqual(panel.identifiers, ["A", "B"])
+        self.assertEqual(len(panel.dates), 4)
+        
+        # Equally close points resolve to the earlier one
+        targets = panel.dates.values[[1, 0]]
+        self.assertEqual(list(panel.closest_prices(targets)), [10.0, 20.0])
+        targets = panel.dates.values[[3, 3]]
+        self.assertEqual(list(panel.closest_prices(targets)), [12.0, 20.0])
+        
+        daily_returns = panel.daily_returns()
+        self.assertAlmostEqual(daily_returns["A"].iloc[2], 0.1)
+        self.assertAlmostEqual(daily_returns["A"].iloc[3], 12.0 / 11.0 - 1)
+        self.assertEqual(int(daily_returns["B"].notna().sum()), 0)
+    
     def test_extract_numeric_value(self):
         """Test extraction of numeric values from various formats."""
         # Test integer
@@ -0,0 +1,135 @@
+"""
+Tests for the table extraction ensemble.
+"""
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.table_ensemble import (
+    run_extractor_ensemble,
+    remove_duplicate_tables,
+    split_pages,
+    table_quality
+)
+
+def make_table(method, page, headers, rows, confidence=0.8, **extra):
+    """Create a table in the structure returned by the extractors."""
+    table = {
+        "id": f"{method}_{page}",
+        "page": page,
+        "extraction_method": method,
+        "headers": headers,
+        "data": [dict(zip(headers, row)) for row in rows],
+        "rows": len(rows),
+        "columns": len(headers),
+        "confidence": confidence
+    }
+    table.update(extra)
+    return table
+
+HEADERS = ["Security", "ISIN", "Value"]
+ROWS = [["Apple Inc.", "US0378331005", "15,000.00"], ["Tesla Inc.", "US88160R1014", "6,000.00"]]
+
+class TestTableQuality(unittest.TestCase):
+    """Tests for scoring extracted tables."""
+
+    def test_quality(self):
+        """Quality is the confidence scaled by the fraction of filled cells."""
+        self.assertAlmostEqual(table_quality(make_table("pdfplumber", 1, HEADERS, ROWS)), 0.8)
+        half_empty = make_table("pdfplumber", 1, ["A", "B"], [["x", None]], confidence=1.0)
+        self.assertAlmostEqual(table_quality(half_empty), 0.75)
+
+    def test_percent_confidence_and_small_tables(self):
+        """Percent confidences are scaled and tables without body or columns score 0."""
+        self.assertAlmostEqual(table_quality(make_table("camelot", 1, HEADERS, ROWS, confidence=90)), 0.9)
+        self.assertEqual(table_quality(make_table("pdfplumber", 1, HEADERS, [])), 0.0)
+        self.assertEqual(table_quality(make_table("pdfplumber", 1, ["A"], [["x"]])), 0.0)
+
+class TestDuplicateTables(unittest.TestCase):
+    """Tests for removing duplicate tables."""
+
+    def test_same_table_from_several_extractors(self):
+        """The best copy of a table found by several extractors is kept."""
+        pdfplumber = make_table("pdfplumber", 1, HEADERS, ROWS)
+        camelot = make_table("camelot", 1, [0, 1, 2], [HEADERS] + ROWS, confidence=95)
+        tabula = make_table("tabula", 1, ["security", "ISIN ", "Value"], ROWS, confidence=0.75)
+
+        unique = remove_duplicate_tables([pdfplumber, camelot, tabula])
+
+        self.assertEqual([table["extraction_method"] for table in unique], ["camelot"])
+
+    def test_distinct_tables_kept(self):
+        """Different tables and copies on other pages are kept, ordered by page."""
+        holdings = make_table("pdfplumber", 1, HEADERS, ROWS)
+        allocation = make_table("pdfplumber", 1, ["Asset Class", "Percentage"], [["Equity", "55%"], ["Bonds", "45%"]])
+        next_page = make_table("pdfplumber", 2, HEADERS, ROWS)
+
+        unique = remove_duplicate_tables([next_page, allocation, holdings])
+
+        self.assertEqual(unique, [next_page, allocation, holdings])
+
+    def test_overlapping_bounding_boxes(self):
+        """Tables covering the same area of a page are duplicates."""
+        first = make_table("camelot", 1, [0, 1], [["a", "b"]], confidence=90, bbox=(0, 0, 100, 100))
+        second = make_table("camelot", 1, [0, 1], [["c", "d"]], confidence=80, bbox=(10, 10, 100, 100))
+        elsewhere = make_table("camelot", 1, [0, 1], [["e", "f"]], confidence=80, bbox=(0, 200, 100, 300))
+
+        self.assertEqual(remove_duplicate_tables([second, elsewhere, first]), [first, elsewhere])
+
+class TestExtractorEnsemble(unittest.TestCase):
+    """Tests for running extractors over the pages of a document."""
+
+    def test_early_exit_per_page(self):
+        """Later extractors only get the pages without a good table."""
+        calls = []
+
+        def first(pages):
+            calls.append(("first", pages))
+            return [make_table("first", 1, HEADERS, ROWS)] if "1" in pages.split(",") else []
+
+        def second(pages):
+            calls.append(("second", pages))
+            return [make_table("second", int(page), HEADERS, ROWS) for page in pages.split(",")]
+
+        def batched(pages):
+            calls.append(("tabula", pages))
+            return []
+
+        tables = run_extractor_ensemble(
+            [("first", first), ("second", second), ("tabula", batched)],
+            [1, 2, 3],
+            quality_threshold=0.7,
+            max_workers=2
+        )
+
+        self.assertEqual(sorted(calls[:2]), [("first", "1,2"), ("first", "3")])
+        self.assertEqual(sorted(calls[2:]), [("second", "2"), ("second", "3")])
+        self.assertEqual([table["page"] for table in tables], [1, 2, 3])
+
+    def test_split_pages(self):
+        """Pages are split into contiguous runs of nearly equal size."""
+        self.assertEqual(split_pages([1, 2, 3, 4, 5], 2), [[1, 2, 3], [4, 5]])
+        self.assertEqual(split_pages([2, 4, 9], 8), [[2], [4], [9]])
+        self.assertEqual(split_pages(list(range(1, 101)), 1), [list(range(1, 101))])
+
+    def test_batched_extractor_and_errors(self):
+        """Batched extractors get all pending pages at once and failing extractors are skipped."""
+        calls = []
+
+        def failing(pages):
+            raise RuntimeError("broken")
+
+        def batched(pages):
+            calls.append(pages)
+            return []
+
+        tables = run_extractor_ensemble([("broken", failing), ("tabula", batched)], [2, 5])
+
+        self.assertEqual(tables, [])
+        self.assertEqual(calls, ["2,5"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests for the table extraction service.
+"""
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.table_extraction_service import (
+    TableExtractionService,
+    parse_pages,
+    make_table,
+    HAS_PYMUPDF,
+    HAS_PDFPLUMBER
+)
+
+# Sample PDF with a single holdings table on its first page
+SAMPLE_PDF = Path(__file__).parent.parent.parent.parent / "test_documents" / "simple_test.pdf"
+
+class TestTableHelpers(unittest.TestCase):
+    """Tests for page selection and the common table structure."""
+
+    def test_parse_pages(self):
+        """Page selections are converted to sorted page numbers within the document."""
+        self.assertEqual(parse_pages(None, 3), [1, 2, 3])
+        self.assertEqual(parse_pages("all", 2), [1, 2])
+        self.assertEqual(parse_pages("4,1-2", 5), [1, 2, 4])
+        self.assertEqual(parse_pages("3-", 5), [3, 4, 5])
+        self.assertEqual(parse_pages([2, 9, 2], 3), [2])
+        self.assertEqual(parse_pages(1, 3), [1])
+
+    def test_make_table(self):
+        """The first row is used as headers and the others as records."""
+        table = make_table([["Name", "Value"], ["A", "1"], ["B", None]], 2, 1, "pdfplumber")
+
+        self.assertEqual(table["id"], "pdfplumber_2_1")
+        self.assertEqual(table["headers"], ["Name", "Value"])
+        self.assertEqual(table["data"], [{"Name": "A", "Value": "1"}, {"Name": "B", "Value": None}])
+        self.assertEqual((table["rows"], table["columns"]), (2, 2))
+        self.assertIsNone(make_table([], 1, 1, "pdfplumber"))
+
+    def test_blank_and_duplicate_headers(self):
+        """Blank, repeated and missing headers get distinct names so no cell is lost."""
+        table = make_table([
+            ["", None, "Value", "Value", "Value.1"],
+            ["Apple", "US0378331005", "100", "15000", "x", "extra"]
+        ], 1, 1, "tabula")
+
+        self.assertEqual(table["headers"], ["column_1", "column_2", "Value", "Value.1", "Value.1.1", "column_6"])
+        self.assertEqual(table["data"], [{
+            "column_1": "Apple",
+            "column_2": "US0378331005",
+            "Value": "100",
+            "Value.1": "15000",
+            "Value.1.1": "x",
+            "column_6": "extra"
+        }])
+        self.assertEqual(table["columns"], 6)
+
+@unittest.skipUnless(SAMPLE_PDF.exists(), "sample PDF not available")
+class TestTableExtraction(unittest.TestCase):
+    """Tests for extracting tables with the in-process backends."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.service = TableExtractionService()
+
+    def check_sample_tables(self, tables, method):
+        """Check the table found in the sample PDF."""
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(tables[0]["extraction_method"], method)
+        self.assertEqual(tables[0]["page"], 1)
+        self.assertEqual(tables[0]["headers"], ["Security", "ISIN", "Quantity", "Price", "Value"])
+        self.assertEqual(tables[0]["data"][0]["ISIN"], "US0378331005")
+
+    @unittest.skipUnless(HAS_PDFPLUMBER, "pdfplumber not installed")
+    def test_pdfplumber_from_path_and_handle(self):
+        """pdfplumber extracts the same tables from a path and an opened document."""
+        from_path = self.service.extract_tables(str(SAMPLE_PDF), backends=["pdfplumber"])
+        self.check_sample_tables(from_path, "pdfplumber")
+
+        document = self.service.open_document(str(SAMPLE_PDF), "pdfplumber")
+        try:
+            self.assertEqual(self.service.extract_tables(document, "1"), from_path)
+            self.assertEqual(self.service.extract_tables(document, [2]), [])
+        finally:
+            document.close()
+
+    @unittest.skipUnless(HAS_PYMUPDF, "PyMuPDF not installed")
+    def test_pymupdf_handle_used_first(self):
+        """An opened PyMuPDF document is read with PyMuPDF without reopening it."""
+        document = self.service.open_document(str(SAMPLE_PDF), "pymupdf")
+        try:
+            self.check_sample_tables(self.service.extract_tables(document), "pymupdf")
+            self.assertFalse(document.is_closed)
+        finally:
+            document.close()
+
+    @unittest.skipUnless(HAS_PDFPLUMBER, "pdfplumber not installed")
+    def test_pdf_bytes(self):
+        """Tables are extracted from PDF bytes."""
+        tables = self.service.extract_tables(SAMPLE_PDF.read_bytes(), backends=["pdfplumber"])
+        self.check_sample_tables(tables, "pdfplumber")
+
+if __name__ == "__main__":
+    unittest.main()
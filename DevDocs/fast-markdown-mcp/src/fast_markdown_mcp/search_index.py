@@ -0,0 +1,372 @@
+import re
+import math
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.+)$')
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Bump when the layout of persisted index data changes
+INDEX_VERSION = 1
+
+# BM25 ranking parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+@dataclass
+class IndexedFile:
+    """Index data of a single markdown file."""
+    mtime: float
+    size: int
+    token_count: int
+    line_offsets: List[int]  # Number of the first token on each line
+    sections: List[Tuple[int, str]]  # (line number, title) of each header
+    terms: Dict[str, List[int]]  # Token numbers of each term
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "mtime": self.mtime,
+            "size": self.size,
+            "token_count": self.token_count,
+            "line_offsets": self.line_offsets,
+            "sections": self.sections,
+            "terms": self.terms
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndexedFile":
+        """Create from a dictionary made by to_dict."""
+        return cls(
+            mtime=float(data["mtime"]),
+            size=int(data["size"]),
+            token_count=int(data["token_count"]),
+            line_offsets=list(data["line_offsets"]),
+            sections=[(int(line), str(title)) for line, title in data["sections"]],
+            terms=dict(data["terms"])
+        )
+
+    def line_of(self, position: int) -> int:
+        """Get the line number of a token."""
+        return bisect.bisect_right(self.line_offsets, position) - 1
+
+    def section_of(self, line: int) -> Optional[str]:
+        """Get the title of the section containing a line."""
+        index = bisect.bisect_right(self.sections, (line, chr(0x10FFFF))) - 1
+        return self.sections[index][1] if index >= 0 else None
+
+@dataclass
+class SearchMatch:
+    """A file matching a search query."""
+    file_id: str
+    score: float
+    lines: List[int]  # Matching line numbers, best matches first
+    sections: List[Optional[str]] = field(default_factory=list)  # Section title of each line
+
+@dataclass
+class QueryClause:
+    """Part of a search query: a term, a term prefix or a phrase."""
+    kind: str  # "term", "prefix" or "phrase"
+    tokens: List[str]
+
+def parse_query(query: str) -> List[QueryClause]:
+    """
+    Parse a search query into clauses that must all match.
+
+    Quoted text and words made of several tokens (like ``api.get``) are phrases,
+    and words ending in ``*`` are prefixes.
+    """
+    clauses = []
+    for match in QUERY_PATTERN.finditer(query.lower()):
+        quoted, word = match.groups()
+        text = quoted if quoted is not None else word
+        tokens = TOKEN_PATTERN.findall(text)
+        if not tokens:
+            continue
+
+        if word is not None and word.endswith('*') and len(tokens) == 1:
+            clauses.append(QueryClause("prefix", tokens))
+        elif len(tokens) == 1:
+            clauses.append(QueryClause("term", tokens))
+        else:
+            clauses.append(QueryClause("phrase", tokens))
+    return clauses
+
+def _contains(positions: List[int], position: int) -> bool:
+    """Check whether a sorted list of token numbers contains a token number."""
+    index = bisect.bisect_left(positions, position)
+    return index < len(positions) and positions[index] == position
+
+class SearchIndex:
+    """In-memory inverted index mapping terms to file and token postings."""
+
+    def __init__(self):
+        self.files: Dict[str, IndexedFile] = {}
+        self.postings: Dict[str, Dict[str, List[int]]] = {}
+        self.total_tokens = 0
+        self._sorted_terms: Optional[List[str]] = None
+
+    @staticmethod
+    def build_file(content: str, mtime: float = 0.0, size: int = 0) -> IndexedFile:
+        """Tokenize markdown content into file index data."""
+        line_offsets = []
+        sections = []
+        terms: Dict[str, List[int]] = {}
+        position = 0
+
+        for line_number, line in enumerate(content.split('\n')):
+            line_offsets.append(position)
+
+            header = HEADER_PATTERN.match(line)
+            if header:
+                sections.append((line_number, header.group(2).strip()))
+
+            for token in TOKEN_PATTERN.findall(line.lower()):
+                positions = terms.get(token)
+                if positions is None:
+                    terms[token] = [position]
+                else:
+                    positions.append(position)
+                position += 1
+
+        return IndexedFile(
+            mtime=mtime,
+            size=size,
+            token_count=position,
+            line_offsets=line_offsets,
+            sections=sections,
+            terms=terms
+        )
+
+    def add_file(self, file_id: str, indexed: IndexedFile) -> None:
+        """Add or replace the index data of a file."""
+        self.remove_file(file_id)
+
+        self.files[file_id] = indexed
+        self.total_tokens += indexed.token_count
+        for term, positions in indexed.terms.items():
+            file_postings = self.postings.get(term)
+            if file_postings is None:
+                self.postings[term] = {file_id: positions}
+                self._sorted_terms = None
+            else:
+                file_postings[file_id] = positions
+
+    def remove_file(self, file_id: str) -> None:
+        """Remove a file from the index."""
+        indexed = self.files.pop(file_id, None)
+        if indexed is None:
+            return
+
+        self.total_tokens -= indexed.token_count
+        for term in indexed.terms:
+            file_postings = self.postings.get(term)
+            if file_postings is None:
+                continue
+            file_postings.pop(file_id, None)
+            if not file_postings:
+                del self.postings[term]
+                self._sorted_terms = None
+
+    def is_current(self, file_id: str, mtime: float, size: int) -> bool:
+        """Check whether a file is indexed with the given modification time and size."""
+        indexed = self.files.get(file_id)
+        return indexed is not None and indexed.mtime == mtime and indexed.size == size
+
+    def _terms_with_prefix(self, prefix: str) -> List[str]:
+        """Get all indexed terms starting with a prefix."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        end = bisect.bisect_left(self._sorted_terms, prefix + chr(0x10FFFF))
+        return self._sorted_terms[start:end]
+
+    def _clause_postings(self, clause: QueryClause) -> Dict[str, List[int]]:
+        """Get the token numbers at which a clause matches, by file."""
+        if clause.kind == "term":
+            return self.postings.get(clause.tokens[0], {})
+
+        if clause.kind == "prefix":
+            merged: Dict[str, List[int]] = {}
+            for term in self._terms_with_prefix(clause.tokens[0]):
+                for file_id, positions in self.postings[term].items():
+                    merged.setdefault(file_id, []).extend(positions)
+            return merged
+
+        # Phrase: tokens at consecutive positions, checked from the rarest token
+        token_postings = [self.postings.get(token, {}) for token in clause.tokens]
+        file_ids = set(min(token_postings, key=len))
+        for postings in token_postings:
+            file_ids.intersection_update(postings)
+
+        matches = {}
+        for file_id in file_ids:
+            file_positions = [postings[file_id] for postings in token_postings]
+            anchor = min(range(len(file_positions)), key=lambda i: len(file_positions[i]))
+            starts = [
+                position - anchor for position in file_positions[anchor]
+                if all(
+                    _contains(positions, position - anchor + offset)
+                    for offset, positions in enumerate(file_positions)
+                    if offset != anchor
+                )
+            ]
+            if starts:
+                matches[file_id] = starts
+        return matches
+
+    def search(self, query: str, limit: int = 20, lines_per_file: int = 5) -> List[SearchMatch]:
+        """
+        Find the files matching all clauses of a query, ranked by BM25 score.
+
+        Args:
+            query: Search query with terms, "quoted phrases" and prefix* terms
+            limit: Maximum number of files to return
+            lines_per_file: Maximum number of matching lines to return per file
+
+        Returns:
+            Matching files, best first
+        """
+        clauses = parse_query(query)
+        if not clauses or not self.files:
+            return []
+
+        clause_postings = [self._clause_postings(clause) for clause in clauses]
+        candidates = set(min(clause_postings, key=len))
+        for postings in clause_postings:
+            candidates.intersection_update(postings)
+        if not candidates:
+            return []
+
+        file_count = len(self.files)
+        average_length = self.total_tokens / file_count or 1
+        matches = []
+
+        for file_id in candidates:
+            indexed = self.files[file_id]
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * indexed.token_count / average_length)
+
+            score = 0.0
+            line_hits: Counter = Counter()
+            for postings in clause_postings:
+                positions = postings[file_id]
+                frequency = len(positions)
+                idf = math.log(1 + (file_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                score += idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+
+                # Count each clause once per line
+                line_hits.update({indexed.line_of(position) for position in positions})
+
+            lines = sorted(line_hits, key=lambda line: (-line_hits[line], line))[:lines_per_file]
+            matches.append(SearchMatch(
+                file_id=file_id,
+                score=score,
+                lines=lines,
+                sections=[indexed.section_of(line) for line in lines]
+            ))
+
+        matches.sort(key=lambda match: (-match.score, match.file_id))
+        return matches[:limit]
+
+@dataclass
+class MetadataSummary:
+    """The metadata fields of a file used for tag search and statistics."""
+    mtime: float
+    tags: List[str]
+    timestamp: str
+    word_count: int
+    char_count: int
+
+    @classmethod
+    def from_metadata(cls, metadata: dict, mtime: float = 0.0) -> "MetadataSummary":
+        """Summarize a metadata dictionary."""
+        tags = []
+        for source in (metadata.get('metadata', {}), metadata):
+            source_tags = source.get('tags', []) if isinstance(source, dict) else []
+            if isinstance(source_tags, list):
+                tags.extend(str(tag) for tag in source_tags)
+
+        stats = metadata.get('stats', {}) if isinstance(metadata.get('stats', {}), dict) else {}
+        return cls(
+            mtime=mtime,
+            tags=tags,
+            timestamp=str(metadata.get('timestamp', '') or ''),
+            word_count=stats.get('wordCount', 0) or 0,
+            char_count=stats.get('charCount', 0) or 0
+        )
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "mtime": self.mtime,
+            "tags": self.tags,
+            "timestamp": self.timestamp,
+            "word_count": self.word_count,
+            "char_count": self.char_count
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetadataSummary":
+        """Create from a dictionary made by to_dict."""
+        return cls(
+            mtime=float(data["mtime"]),
+            tags=[str(tag) for tag in data["tags"]],
+            timestamp=str(data["timestamp"]),
+            word_count=data["word_count"],
+            char_count=data["char_count"]
+        )
+
+class MetadataIndex:
+    """Tag lookup and statistics aggregates over file metadata, updated per file."""
+
+    def __init__(self):
+        self.summaries: Dict[str, MetadataSummary] = {}
+        self.tag_files: Dict[str, Set[str]] = {}
+        self.tag_counts: Counter = Counter()
+        self.files_by_month: Counter = Counter()
+        self.total_words = 0
+        self.total_chars = 0
+
+    def update(self, file_id: str, summary: MetadataSummary) -> None:
+        """Add or replace the metadata summary of a file."""
+        self.remove(file_id)
+
+        self.summaries[file_id] = summary
+        self.total_words += summary.word_count
+        self.total_chars += summary.char_count
+        if summary.timestamp:
+            self.files_by_month[summary.timestamp[:7]] += 1  # YYYY-MM
+        for tag in summary.tags:
+            self.tag_files.setdefault(tag.lower(), set()).add(file_id)
+            self.tag_counts[tag] += 1
+
+    def remove(self, file_id: str) -> None:
+        """Remove the metadata summary of a file."""
+        summary = self.summaries.pop(file_id, None)
+        if summary is None:
+            return
+
+        self.total_words -= summary.word_count
+        self.total_chars -= summary.char_count
+        if summary.timestamp:
+            month = summary.timestamp[:7]
+            self.files_by_month[month] -= 1
+            if self.files_by_month[month] <= 0:
+                del self.files_by_month[month]
+        for tag in summary.tags:
+            files = self.tag_files.get(tag.lower())
+            if files is not None:
+                files.discard(file_id)
+                if not files:
+                    del self.tag_files[tag.lower()]
+            self.tag_counts[tag] -= 1
+            if self.tag_counts[tag] <= 0:
+                del self.tag_counts[tag]
+
+    def files_with_tag(self, tag: str) -> List[str]:
+        """Get the files having a tag, ignoring case."""
+        return sorted(self.tag_files.get(tag.lower(), ()))
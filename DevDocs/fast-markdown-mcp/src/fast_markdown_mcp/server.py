@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import sys
 import logging
 import signal
@@ -16,33 +17,108 @@ from watchdog.events import FileSystemEventHandler
 logger = logging.getLogger(__name__)
 
 from .document_structure import DocumentStructure
+from .search_index import INDEX_VERSION, IndexedFile, SearchIndex, MetadataIndex, MetadataSummary
+
+INDEX_DIR_NAME = ".search_index"  # Persisted index segments, one per file
+MAX_SEARCH_FILES = 50
+MAX_MATCHES_PER_FILE = 5
 
 class MarkdownStore:
     """Manages markdown content and metadata."""
     
     def __init__(self, storage_path: str):
         self.base_path = Path(storage_path)
+        self.index_path = self.base_path / INDEX_DIR_NAME
         self.content_cache = {}
         self.metadata_cache = {}
         self.structure_cache = {}  # Cache for parsed document structures
+        self.search_index = SearchIndex()
+        self.metadata_index = MetadataIndex()
         
     async def sync_all_files(self):
         """Initial sync of all files in the storage directory."""
         logger.info("Starting initial sync of all files...")
         try:
-            for md_file in self.base_path.glob("*.md"):
-                file_id = md_file.stem
-                await self.sync_file(file_id)
-            logger.info("Initial sync completed successfully")
+            loaded = self.load_index()
+            file_ids = {path.stem for path in self.base_path.glob("*.md")}
+            file_ids.update(path.stem for path in self.base_path.glob("*.json"))
+            
+            # Only files changed since their segment was saved are re-read
+            for file_id in sorted(file_ids | set(loaded)):
+                await self.sync_file(file_id, force=False)
+            logger.info(
+                f"Initial sync completed successfully ({len(loaded)} files loaded from index, "
+                f"{len(self.search_index.files)} indexed)"
+            )
         except Exception as e:
             logger.error(f"Error during initial sync: {e}")
             raise
         
+    def load_index(self) -> List[str]:
+        """Load persisted index segments, returning the IDs of the loaded files."""
+        loaded = []
+        if not self.index_path.is_dir():
+            return loaded
+        
+        for segment_path in self.index_path.glob("*.json"):
+            file_id = segment_path.stem
+            try:
+                with open(segment_path, 'r', encoding='utf-8') as f:
+                    segment = json.load(f)
+                if segment.get("version") != INDEX_VERSION:
+                    segment_path.unlink()
+                    continue
+                
+                indexed = IndexedFile.from_dict(segment["file"]) if segment.get("file") is not None else None
+                summary = MetadataSummary.from_dict(segment["metadata"]) if segment.get("metadata") is not None else None
+            except Exception as e:
+                logger.warning(f"Discarding unreadable index segment for {file_id}: {e}")
+                segment_path.unlink(missing_ok=True)
+                continue
+            
+            if indexed is not None:
+                self.search_index.add_file(file_id, indexed)
+            if summary is not None:
+                self.metadata_index.update(file_id, summary)
+            loaded.append(file_id)
+        
+        return loaded
+        
+    def save_segment(self, file_id: str) -> None:
+        """Persist the index data of a file, or delete it if the file is gone."""
+        segment_path = self.index_path / f"{file_id}.json"
+        indexed = self.search_index.files.get(file_id)
+        summary = self.metadata_index.summaries.get(file_id)
+        try:
+            if indexed is None and summary is None:
+                segment_path.unlink(missing_ok=True)
+                return
+            
+            self.index_path.mkdir(exist_ok=True)
+            temp_path = segment_path.with_suffix(".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "file": indexed.to_dict() if indexed is not None else None,
+                        "metadata": summary.to_dict() if summary is not None else None
+                    },
+                    f,
+                    separators=(',', ':')
+                )
+            os.replace(temp_path, segment_path)
+        except Exception as e:
+            logger.warning(f"Error saving index segment for {file_id}: {e}")
+        
     async def get_content(self, file_id: str) -> str:
         """Get markdown content."""
+        if file_id in self.content_cache:
+            return self.content_cache[file_id]
+        
         file_path = self.base_path / f"{file_id}.md"
         try:
             content = file_path.read_text(encoding='utf-8')
+            self.content_cache[file_id] = content
             # Parse and cache document structure
             if file_id not in self.structure_cache:
                 structure = DocumentStructure()
@@ -142,20 +218,57 @@ class MarkdownStore:
             logger.error(f"Error getting index: {e}")
             return f"Error getting index: {str(e)}"
         
-    async def sync_file(self, file_id: str) -> str:
-        """Force sync a file."""
+    async def sync_file(self, file_id: str, force: bool = True) -> str:
+        """
+        Sync a file into the caches and indexes.
+        
+        Args:
+            file_id: ID of the file (without extension)
+            force: Re-read the file even if its indexed modification time and size are current
+        """
         try:
-            # Clear caches for this file
-            self.content_cache.pop(file_id, None)
-            self.metadata_cache.pop(file_id, None)
-            self.structure_cache.pop(file_id, None)
+            md_path = self.base_path / f"{file_id}.md"
+            json_path = self.base_path / f"{file_id}.json"
+            changed = False
             
-            # Reload content and metadata
-            content = await self.get_content(file_id)
-            metadata = await self.get_metadata(file_id)
-            self.content_cache[file_id] = content
-            self.metadata_cache[file_id] = metadata
-            logger.info(f"Successfully synced {file_id}")
+            md_stat = md_path.stat() if md_path.exists() else None
+            if md_stat is None:
+                changed = file_id in self.search_index.files
+                self.search_index.remove_file(file_id)
+                self.content_cache.pop(file_id, None)
+                self.structure_cache.pop(file_id, None)
+            elif force or not self.search_index.is_current(file_id, md_stat.st_mtime, md_stat.st_size):
+                # Clear caches for this file and reload content
+                self.content_cache.pop(file_id, None)
+                self.structure_cache.pop(file_id, None)
+                content = await self.get_content(file_id)
+                self.search_index.add_file(
+                    file_id,
+                    SearchIndex.build_file(content, md_stat.st_mtime, md_stat.st_size)
+                )
+                changed = True
+            
+            if md_stat is None and not json_path.exists():
+                changed = changed or file_id in self.metadata_index.summaries
+                self.metadata_index.remove(file_id)
+                self.metadata_cache.pop(file_id, None)
+            else:
+                summary = self.metadata_index.summaries.get(file_id)
+                json_mtime = json_path.stat().st_mtime if json_path.exists() else None
+                if force or summary is None or summary.mtime != json_mtime:
+                    # This creates default metadata when only the markdown file exists
+                    metadata = await self.get_metadata(file_id)
+                    self.metadata_cache[file_id] = metadata
+                    if json_path.exists():
+                        summary = MetadataSummary.from_metadata(metadata, json_path.stat().st_mtime)
+                        self.metadata_index.update(file_id, summary)
+                    else:
+                        self.metadata_index.remove(file_id)
+                    changed = True
+            
+            if changed:
+                self.save_segment(file_id)
+                logger.info(f"Successfully synced {file_id}")
             return f"Successfully synced {file_id}"
         except Exception as e:
             logger.error(f"Error syncing {file_id}: {e}")
@@ -193,24 +306,24 @@ Metadata:
             return f"Error reading file: {str(e)}"
 
     async def search_files(self, query: str) -> str:
-        """Search content across all markdown files."""
+        """Search content across all markdown files, best matching files first."""
         try:
             results = []
-            for md_file in self.base_path.glob("*.md"):
-                file_id = md_file.stem
-                content = await self.get_content(file_id)
-                metadata = await self.get_metadata(file_id)
-                
-                if query.lower() in content.lower():
-                    # Find the context around the match
-                    lines = content.split('\n')
-                    for i, line in enumerate(lines):
-                        if query.lower() in line.lower():
-                            context_start = max(0, i - 2)
-                            context_end = min(len(lines), i + 3)
-                            context = '\n'.join(lines[context_start:context_end])
-                            
-                            results.append(f"""Match in {file_id}.md:
+            matches = self.search_index.search(
+                query,
+                limit=MAX_SEARCH_FILES,
+                lines_per_file=MAX_MATCHES_PER_FILE
+            )
+            for match in matches:
+                # Only matching files are read, to show the context around each match
+                lines = (await self.get_content(match.file_id)).split('\n')
+                for i, section in zip(match.lines, match.sections):
+                    context_start = max(0, i - 2)
+                    context_end = min(len(lines), i + 3)
+                    context = '\n'.join(lines[context_start:context_end])
+                    location = f"section: {section}, line {i + 1}" if section else f"line {i + 1}"
+                    
+                    results.append(f"""Match in {match.file_id}.md ({location}):
 Context:
 {context}
 ---""")
@@ -226,17 +339,11 @@ Context:
         """Search files by metadata tags."""
         try:
             results = []
-            for json_file in self.base_path.glob("*.json"):
-                file_id = json_file.stem
-                metadata = await self.get_metadata(file_id)
-                
-                # Check both metadata.tags and top-level tags
-                tags = metadata.get('metadata', {}).get('tags', []) + metadata.get('tags', [])
-                
-                if tag.lower() in [t.lower() for t in tags]:
-                    results.append(f"""File: {file_id}.md
-Tags: {', '.join(tags)}
-Last modified: {metadata.get('timestamp', 'Unknown')}
+            for file_id in self.metadata_index.files_with_tag(tag):
+                summary = self.metadata_index.summaries[file_id]
+                results.append(f"""File: {file_id}.md
+Tags: {', '.join(summary.tags)}
+Last modified: {summary.timestamp or 'Unknown'}
 ---""")
             
             if not results:
@@ -249,29 +356,13 @@ Last modified: {metadata.get('timestamp', 'Unknown')}
     async def get_stats(self) -> str:
         """Get statistics about all markdown files."""
         try:
-            total_files = 0
-            total_words = 0
-            total_chars = 0
-            files_by_month = {}
-            all_tags = set()
-            
-            for json_file in self.base_path.glob("*.json"):
-                file_id = json_file.stem
-                metadata = await self.get_metadata(file_id)
-                
-                total_files += 1
-                total_words += metadata.get('stats', {}).get('wordCount', 0)
-                total_chars += metadata.get('stats', {}).get('charCount', 0)
-                
-                # Extract month from timestamp
-                timestamp = metadata.get('timestamp', '')
-                if timestamp:
-                    month = timestamp[:7]  # YYYY-MM
-                    files_by_month[month] = files_by_month.get(month, 0) + 1
-                
-                # Collect all tags
-                tags = metadata.get('metadata', {}).get('tags', []) + metadata.get('tags', [])
-                all_tags.update(tags)
+            # Aggregates are kept up to date as files are synced
+            metadata_index = self.metadata_index
+            total_files = len(metadata_index.summaries)
+            total_words = metadata_index.total_words
+            total_chars = metadata_index.total_chars
+            files_by_month = metadata_index.files_by_month
+            all_tags = metadata_index.tag_counts
             
             stats = f"""Markdown Files Statistics:
 
@@ -298,11 +389,11 @@ class MarkdownEventHandler(FileSystemEventHandler):
         self.loop = loop
         
     def sync_file(self, path: str):
-        """Sync a file when it's created or modified."""
+        """Sync a file when it's created, modified or deleted."""
         if path.endswith(('.md', '.json')):
             file_id = Path(path).stem
             asyncio.run_coroutine_threadsafe(
-                self.store.sync_file(file_id),
+                self.store.sync_file(file_id, force=False),
                 self.loop
             )
             
@@ -315,6 +406,17 @@ class MarkdownEventHandler(FileSystemEventHandler):
         """Handle file modification."""
         if not event.is_directory:
             self.sync_file(event.src_path)
+            
+    def on_deleted(self, event):
+        """Handle file deletion."""
+        if not event.is_directory:
+            self.sync_file(event.src_path)
+            
+    def on_moved(self, event):
+        """Handle file renaming."""
+        if not event.is_directory:
+            self.sync_file(event.src_path)
+            self.sync_file(event.dest_path)
 
 class FastMarkdownServer:
     """MCP server for markdown content management."""
@@ -419,7 +521,7 @@ class FastMarkdownServer:
                         "properties": {
                             "query": {
                                 "type": "string",
-                                "description": "Search query to find in markdown content"
+                                "description": "Search query to find in markdown content. All words must match; use \"quotes\" for phrases and a trailing * for prefixes"
                             }
                         },
                         "required": ["query"]
@@ -0,0 +1,129 @@
+"""
+Tests for the markdown search index and its persisted segments.
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to the path so we can import the server package
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from fast_markdown_mcp.search_index import SearchIndex, MetadataSummary, parse_query
+from fast_markdown_mcp.server import MarkdownStore
+
+DOCUMENTS = {
+    "install": "# Installation\nRun pip install fastapi.\n\n## Configuration\nSet the api.get timeout.",
+    "usage": "# Usage\nCall api.get with a path.\nInstalling plugins is optional.",
+    "faq": "# FAQ\nThe get api is documented elsewhere."
+}
+
+class TestSearchIndex(unittest.TestCase):
+    """Tests for term, phrase and prefix queries."""
+
+    def setUp(self):
+        """Set up the test with a few indexed documents."""
+        self.index = SearchIndex()
+        for file_id, content in DOCUMENTS.items():
+            self.index.add_file(file_id, SearchIndex.build_file(content))
+
+    def file_ids(self, query):
+        """Get the IDs of the files matching a query."""
+        return sorted(match.file_id for match in self.index.search(query))
+
+    def test_parse_query(self):
+        """Queries are split into terms, phrases and prefixes."""
+        clauses = parse_query('pip "api get" inst* api.get')
+        self.assertEqual([(c.kind, c.tokens) for c in clauses], [
+            ("term", ["pip"]),
+            ("phrase", ["api", "get"]),
+            ("prefix", ["inst"]),
+            ("phrase", ["api", "get"])
+        ])
+
+    def test_term(self):
+        """All terms of a query must occur in a file, in any case."""
+        self.assertEqual(self.file_ids("API"), ["faq", "install", "usage"])
+        self.assertEqual(self.file_ids("api path"), ["usage"])
+        self.assertEqual(self.file_ids("missing"), [])
+
+    def test_phrase(self):
+        """Phrase tokens must be consecutive and in order."""
+        self.assertEqual(self.file_ids('"api get"'), ["install", "usage"])
+        self.assertEqual(self.file_ids("api.get"), ["install", "usage"])
+        self.assertEqual(self.file_ids('"get api"'), ["faq"])
+
+    def test_prefix(self):
+        """Prefix clauses match every term starting with the prefix."""
+        self.assertEqual(self.file_ids("instal*"), ["install", "usage"])
+        self.assertEqual(self.file_ids("config*"), ["install"])
+
+    def test_matches_report_lines_and_sections(self):
+        """Matching lines are reported with the title of their section."""
+        match = self.index.search("timeout")[0]
+        self.assertEqual(match.lines, [4])
+        self.assertEqual(match.sections, ["Configuration"])
+
+    def test_remove_file(self):
+        """Removed files no longer match and their terms are dropped."""
+        self.index.remove_file("install")
+
+        self.assertEqual(self.file_ids("api"), ["faq", "usage"])
+        self.assertNotIn("pip", self.index.postings)
+        self.assertEqual(self.file_ids("config*"), [])
+        self.assertEqual(self.index.total_tokens,
+                         sum(indexed.token_count for indexed in self.index.files.values()))
+
+    def test_replace_file(self):
+        """Adding a file again replaces its previous content."""
+        self.index.add_file("faq", SearchIndex.build_file("# FAQ\nNothing here."))
+
+        self.assertEqual(self.file_ids("api"), ["install", "usage"])
+        self.assertEqual(self.file_ids("nothing"), ["faq"])
+
+class TestIndexSegments(unittest.TestCase):
+    """Tests for persisting index segments."""
+
+    def setUp(self):
+        """Set up the test with a temporary storage directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_segment_round_trip(self):
+        """Saved segments load into an equal index in a new store."""
+        store = MarkdownStore(self.temp_dir.name)
+        for file_id, content in DOCUMENTS.items():
+            store.search_index.add_file(file_id, SearchIndex.build_file(content, mtime=1.5, size=len(content)))
+        store.metadata_index.update("install", MetadataSummary.from_metadata(
+            {"timestamp": "2024-03-01T10:00:00", "tags": ["Setup"], "stats": {"wordCount": 12, "charCount": 80}},
+            mtime=2.5
+        ))
+        for file_id in DOCUMENTS:
+            store.save_segment(file_id)
+
+        loaded_store = MarkdownStore(self.temp_dir.name)
+        loaded = loaded_store.load_index()
+
+        self.assertEqual(sorted(loaded), sorted(DOCUMENTS))
+        self.assertEqual(loaded_store.search_index.files, store.search_index.files)
+        self.assertEqual(loaded_store.search_index.postings, store.search_index.postings)
+        self.assertEqual(loaded_store.metadata_index.summaries, store.metadata_index.summaries)
+        self.assertEqual(loaded_store.metadata_index.files_with_tag("setup"), ["install"])
+        self.assertEqual(loaded_store.search_index.search("timeout")[0].sections, ["Configuration"])
+        self.assertTrue(loaded_store.search_index.is_current("usage", 1.5, len(DOCUMENTS["usage"])))
+
+    def test_removed_and_unreadable_segments(self):
+        """Segments of removed files are deleted and unreadable ones discarded."""
+        store = MarkdownStore(self.temp_dir.name)
+        store.search_index.add_file("install", SearchIndex.build_file(DOCUMENTS["install"]))
+        store.save_segment("install")
+        store.search_index.remove_file("install")
+        store.save_segment("install")
+
+        store.index_path.joinpath("broken.json").write_text("{not json", encoding="utf-8")
+
+        self.assertEqual(MarkdownStore(self.temp_dir.name).load_index(), [])
+        self.assertEqual(list(store.index_path.iterdir()), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,8 @@ import pytesseract
 from typing import List, Dict, Any, Tuple, Optional
 import tempfile
 
+from table_ocr import assign_words_to_cells, join_cell_words, cell_confidence, is_blank_cell
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,7 +30,9 @@ class AdvancedImageProcessor:
         languages: List[str] = ['eng'],
         dpi: int = 300,
         debug: bool = False,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        table_ocr: bool = True,
+        min_cell_confidence: float = 0.6
     ):
         """
         Initialize the advanced image processor.
@@ -38,10 +42,16 @@ class AdvancedImageProcessor:
             dpi: DPI for image conversion
             debug: Whether to enable debug mode
             output_dir: Directory to save debug images
+            table_ocr: Whether to run OCR once per table and assign the words to cells,
+                instead of running OCR on every cell
+            min_cell_confidence: Minimum mean word confidence (0-1) of a cell from
+                table OCR below which the cell is recognized again on its own
         """
         self.languages = languages
         self.dpi = dpi
         self.debug = debug
+        self.table_ocr = table_ocr
+        self.min_cell_confidence = min_cell_confidence
         
         # Create output directory if provided
         if output_dir:
@@ -53,6 +63,7 @@ class AdvancedImageProcessor:
         # OCR configuration
         self.ocr_config = {
             'page_segmentation_mode': 6,  # Assume a single uniform block of text
+            'table_page_segmentation_mode': 11,  # Sparse text, for whole tables
             'ocr_engine_mode': 3,         # Default, based on what is available
             'lang': '+'.join(languages)
         }
@@ -702,6 +713,11 @@ class AdvancedImageProcessor:
         """
         Extract text from cells in a table.
         
+        In table OCR mode the whole table is recognized once and the words are
+        assigned to cells by position. Cells with words spanning several cells,
+        with low confidence, or with no words but visible ink are recognized
+        again on their own.
+        
         Args:
             table_img: Table image
             grid_structure: Grid structure information
@@ -709,7 +725,8 @@ class AdvancedImageProcessor:
         Returns:
             List of cells with extracted text
         """
-        cells_text = []
+        cells = []
+        cell_images = []
         
         for cell in grid_structure.get("cell_coordinates", []):
             # Extract cell region
@@ -725,8 +742,33 @@ class AdvancedImageProcessor:
             if np.mean(cell_img) > 250:
                 continue
             
-            # Perform OCR on cell
-            text = self._ocr_on_cell(cell_img)
+            cells.append(cell)
+            cell_images.append(cell_img)
+        
+        # Words by cell from a single OCR call on the whole table
+        words = self._ocr_table_words(table_img) if self.table_ocr and cells else None
+        if words is not None:
+            cell_words, split_cells = assign_words_to_cells(words, cells)
+        
+        cells_text = []
+        cell_ocr_count = 0
+        
+        for cell, cell_img in zip(cells, cell_images):
+            key = (cell["row"], cell["column"])
+            
+            words_in_cell = cell_words.get(key, []) if words is not None else []
+            reliable = words is not None and key not in split_cells and (
+                cell_confidence(words_in_cell) >= self.min_cell_confidence if words_in_cell
+                else is_blank_cell(cell_img)
+            )
+            
+            if reliable:
+                # Words from table OCR, or no text at all in a blank cell
+                text = join_cell_words(words_in_cell, line_separator="\n")
+            else:
+                # Perform OCR on cell
+                text = self._ocr_on_cell(cell_img)
+                cell_ocr_count += 1
             
             # Add cell with text
             cells_text.append({
@@ -735,8 +777,49 @@ class AdvancedImageProcessor:
                 "text": text.strip()
             })
         
+        if words is not None:
+            logger.debug(f"Table OCR found {len(words)} words, {cell_ocr_count} of {len(cells)} cells needed cell OCR")
+        
         return cells_text
     
+    def _ocr_table_words(self, table_img: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recognize the words of a whole table image.
+        
+        Args:
+            table_img: Table image
+            
+        Returns:
+            Words with text, confidence (0-1) and position, or None if OCR failed
+        """
+        try:
+            # Convert to PIL image
+            pil_img = Image.fromarray(table_img)
+            
+            # Perform OCR
+            config = f"--psm {self.ocr_config['table_page_segmentation_mode']} --oem {self.ocr_config['ocr_engine_mode']}"
+            boxes = pytesseract.image_to_data(pil_img, lang=self.ocr_config['lang'], config=config, output_type=pytesseract.Output.DICT)
+            
+            words = []
+            for i, text in enumerate(boxes["text"]):
+                conf = float(boxes["conf"][i])
+                if conf < 0 or not str(text).strip():
+                    continue
+                
+                words.append({
+                    "text": str(text).strip(),
+                    "conf": conf / 100,
+                    "x": boxes["left"][i],
+                    "y": boxes["top"][i],
+                    "width": boxes["width"][i],
+                    "height": boxes["height"][i]
+                })
+            
+            return words
+        except Exception as e:
+            logger.warning(f"OCR on table failed, falling back to cell OCR: {str(e)}")
+            return None
+    
     def _ocr_on_cell(self, cell_img: np.ndarray) -> str:
         """
         Perform OCR on a cell image.
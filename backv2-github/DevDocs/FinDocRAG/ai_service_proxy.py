@@ -5,13 +5,69 @@ import os
 import logging
 import json
 import time
-from typing import Dict, List, Any, Optional
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import google.generativeai as genai
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Providers in fallback order
+PROVIDERS = ["gemini", "openai", "anthropic", "openrouter"]
+
+# Models used for each provider and API type
+DEFAULT_MODELS = {
+    "gemini": {"text": "gemini-pro", "vision": "gemini-pro-vision"},
+    "openai": {"text": "gpt-4-turbo", "vision": "gpt-4-vision-preview"},
+    "anthropic": {"text": "claude-3-opus-20240229", "vision": "claude-3-opus-20240229"},
+    "openrouter": {"text": "anthropic/claude-3-opus-20240229", "vision": "anthropic/claude-3-opus-20240229"}
+}
+
+# Base URLs of the HTTP providers
+DEFAULT_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com/v1",
+    "openrouter": "https://openrouter.ai/api/v1"
+}
+
+# HTTP statuses after which a request is retried, and the first retry delay
+# in seconds when the provider does not send a Retry-After header
+RETRY_STATUS_CODES = (429, 503)
+RETRY_BACKOFF = 1.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+    
+    Args:
+        value: Header value, in seconds or as an HTTP date
+    
+    Returns:
+        Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AIServiceError(Exception):
+    """Raised when a call to an AI provider fails."""
+
 class UsageTracker:
     """
     Track API usage for billing purposes.
@@ -20,6 +76,7 @@ class UsageTracker:
     def __init__(self):
         """Initialize the usage tracker."""
         self.usage = {}
+        self._lock = threading.Lock()
     
     def log_request(self, client_id: str, endpoint: str) -> None:
         """
@@ -29,13 +86,14 @@ class UsageTracker:
             client_id: Client ID
             endpoint: API endpoint
         """
-        if client_id not in self.usage:
-            self.usage[client_id] = {}
-        
-        if endpoint not in self.usage[client_id]:
-            self.usage[client_id][endpoint] = 0
-        
-        self.usage[client_id][endpoint] += 1
+        with self._lock:
+            if client_id not in self.usage:
+                self.usage[client_id] = {}
+            
+            if endpoint not in self.usage[client_id]:
+                self.usage[client_id][endpoint] = 0
+            
+            self.usage[client_id][endpoint] += 1
     
     def get_usage(self, client_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -43,18 +101,225 @@ class UsageTracker:
         
         Args:
             client_id: Optional client ID to filter by
-            
+        
         Returns:
-            Usage statistics
+            Snapshot of the usage statistics
         """
-        if client_id:
-            return self.usage.get(client_id, {})
-        else:
-            return self.usage
+        with self._lock:
+            if client_id:
+                return dict(self.usage.get(client_id, {}))
+            else:
+                return copy.deepcopy(self.usage)
+
+class ResponseCache:
+    """
+    Content-addressed cache of AI responses with a TTL, in memory and optionally on disk.
+    """
+    
+    def __init__(self, ttl: Optional[float] = 86400, max_entries: int = 1024, cache_dir: Optional[str] = None):
+        """
+        Initialize the response cache.
+        
+        Args:
+            ttl: Seconds a response stays valid (None for no expiry)
+            max_entries: Maximum number of responses kept in memory
+            cache_dir: Optional directory for the disk tier
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.image_hashes = {}
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def _hash_image(self, image_path: str) -> str:
+        """
+        Hash the content of an image file, reusing the hash while the file is unchanged.
+        
+        Args:
+            image_path: Image path
+        
+        Returns:
+            Content hash of the image
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return f"missing:{image_path}"
+        
+        signature = (image_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self.image_hashes.get(signature)
+        if cached:
+            return cached
+        
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as image_file:
+            for chunk in iter(lambda: image_file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        
+        with self._lock:
+            self.image_hashes[signature] = digest.hexdigest()
+        return digest.hexdigest()
+    
+    def make_key(self, provider: str, model: str, prompt: str, image_paths: Optional[List[str]] = None) -> str:
+        """
+        Make the cache key of a request.
+        
+        Args:
+            provider: Provider name
+            model: Model name
+            prompt: Text prompt
+            image_paths: Optional list of image paths
+        
+        Returns:
+            Cache key
+        """
+        key_data = {
+            "provider": provider,
+            "model": model,
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "images": [self._hash_image(path) for path in image_paths or []]
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def _is_fresh(self, created: float) -> bool:
+        """Check whether an entry created at the given time is still valid."""
+        return self.ttl is None or time.time() - created < self.ttl
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached response, or None if missing or expired
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0]):
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self.entries[key]
+        
+        if self.cache_dir:
+            entry_path = os.path.join(self.cache_dir, f"{key}.json")
+            try:
+                with open(entry_path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if self._is_fresh(entry["created"]):
+                    self._remember(key, entry["created"], entry["response"])
+                    with self._lock:
+                        self.stats["disk_hits"] += 1
+                    return entry["response"]
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Error reading cached response {key}: {str(e)}")
+        
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+    
+    def set(self, key: str, response: str) -> None:
+        """
+        Cache a response.
+        
+        Args:
+            key: Cache key
+            response: Response text
+        """
+        created = time.time()
+        self._remember(key, created, response)
+        
+        if self.cache_dir:
+            entry_path = os.path.join(self.cache_dir, f"{key}.json")
+            temp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"created": created, "response": response}, f)
+                os.replace(temp_path, entry_path)
+            except Exception as e:
+                logger.warning(f"Error writing cached response {key}: {str(e)}")
+    
+    def _remember(self, key: str, created: float, response: str) -> None:
+        """Keep a response in memory, evicting the least recently used ones."""
+        with self._lock:
+            self.entries[key] = (created, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self.entries.clear()
+        
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+class ProviderRateLimiter:
+    """
+    Limit concurrent calls and the request rate to a provider.
+    """
+    
+    def __init__(self, max_concurrent: int = 4, requests_per_minute: Optional[float] = None):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            max_concurrent: Maximum number of calls in progress at once
+            requests_per_minute: Maximum request rate (None for no limit)
+        """
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.next_start = 0.0
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        self.semaphore.acquire()
+        # Reserve the next start slot, then wait for it outside the lock
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            if self.interval:
+                self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+    
+    def defer(self, seconds: float) -> None:
+        """
+        Hold back calls that have not started yet, e.g. after the provider asked to retry later.
+        
+        Args:
+            seconds: Seconds from now before the next call may start
+        """
+        with self._lock:
+            self.next_start = max(self.next_start, time.monotonic() + seconds)
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+        return False
 
 class AIServiceProxy:
     """
     Proxy service for managing API calls to various AI providers.
+    
+    Responses are cached by provider, model, prompt and image content, and
+    calls go through per-provider rate limiters and pooled HTTP sessions, so
+    batches of prompts can be sent concurrently.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -62,7 +327,20 @@ class AIServiceProxy:
         Initialize the AI service proxy.
         
         Args:
-            config: Configuration options
+            config: Configuration options. Besides the provider and API keys:
+                models: Model names by provider and API type ("text" or "vision")
+                base_urls: API base URLs by provider
+                enable_cache: Whether to cache responses (default True)
+                cache_ttl: Seconds a cached response stays valid (default one day)
+                cache_max_entries: Maximum number of responses cached in memory
+                cache_dir: Optional directory for cached responses on disk
+                provider_concurrency: Maximum concurrent calls by provider (default 4)
+                provider_rate_limits: Maximum requests per minute by provider
+                batch_workers: Default number of concurrent calls in batches
+                max_retries: Retries of HTTP requests rejected with status 429
+                    or 503 (default 2)
+                max_retry_wait: Maximum seconds to wait before a retry; requests
+                    asked to wait longer are not retried (default 30)
         """
         self.primary_provider = config.get("primary_provider", "gemini")
         self.api_keys = {
@@ -72,9 +350,41 @@ class AIServiceProxy:
             "openrouter": config.get("openrouter_api_key")
         }
         
+        self.models = copy.deepcopy(DEFAULT_MODELS)
+        for provider, models in config.get("models", {}).items():
+            self.models.setdefault(provider, {}).update(models)
+        self.base_urls = dict(DEFAULT_BASE_URLS, **config.get("base_urls", {}))
+        
         # Initialize usage tracker
         self.usage_tracker = UsageTracker()
         
+        # Initialize response cache
+        self.cache = None
+        if config.get("enable_cache", True):
+            self.cache = ResponseCache(
+                ttl=config.get("cache_ttl", 86400),
+                max_entries=config.get("cache_max_entries", 1024),
+                cache_dir=config.get("cache_dir")
+            )
+        
+        # Rate limiters and HTTP sessions by provider
+        provider_concurrency = config.get("provider_concurrency", {})
+        provider_rate_limits = config.get("provider_rate_limits", {})
+        self.concurrency = {provider: provider_concurrency.get(provider, 4) for provider in PROVIDERS}
+        self.rate_limiters = {
+            provider: ProviderRateLimiter(self.concurrency[provider], provider_rate_limits.get(provider))
+            for provider in PROVIDERS
+        }
+        self.batch_workers = config.get("batch_workers", 8)
+        self.max_retries = config.get("max_retries", 2)
+        self.max_retry_wait = config.get("max_retry_wait", 30.0)
+        self.sessions = {}
+        self._sessions_lock = threading.Lock()
+        
+        # Calls in progress by cache key, shared by identical concurrent calls
+        self.in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        
         # Initialize Gemini if it's the primary provider
         if self.primary_provider == "gemini" and self.api_keys["gemini"]:
             genai.configure(api_key=self.api_keys["gemini"])
@@ -114,80 +424,267 @@ class AIServiceProxy:
         
         return health
     
-    def call_vision_api(self, prompt: str, images: List[str], client_id: Optional[str] = None) -> str:
+    def _select_provider(self) -> str:
         """
-        Call a vision API with the primary provider.
+        Select the primary provider, or the first fallback with an API key.
+        
+        Returns:
+            Provider name
+        """
+        if self.primary_provider in self.api_keys and self.api_keys[self.primary_provider]:
+            return self.primary_provider
+        
+        # Try fallbacks
+        for provider in PROVIDERS:
+            if self.api_keys[provider]:
+                return provider
+        
+        raise ValueError("No valid API keys available")
+    
+    def _call(self, api_type: str, prompt: str, images: Optional[List[str]], client_id: Optional[str], use_cache: bool) -> str:
+        """
+        Call a text or vision API through the response cache.
+        
+        Identical calls made while one is in progress wait for its response
+        instead of calling the provider again.
         
         Args:
+            api_type: "text" or "vision"
             prompt: Text prompt
-            images: List of image paths
+            images: List of image paths for vision calls
             client_id: Optional client ID for usage tracking
-            
+            use_cache: Whether to use the response cache
+        
         Returns:
-            API response text
+            API response text, or an error message if the call failed
         """
+        endpoint = f"{api_type}_api"
+        
         # Track usage
         if client_id:
-            self.usage_tracker.log_request(client_id, "vision_api")
+            self.usage_tracker.log_request(client_id, endpoint)
         
-        # Call appropriate API
-        if self.primary_provider == "gemini" and self.api_keys["gemini"]:
-            return self._call_gemini_vision(prompt, images)
-        elif self.primary_provider == "openai" and self.api_keys["openai"]:
-            return self._call_openai_vision(prompt, images)
-        elif self.primary_provider == "anthropic" and self.api_keys["anthropic"]:
-            return self._call_anthropic_vision(prompt, images)
-        elif self.primary_provider == "openrouter" and self.api_keys["openrouter"]:
-            return self._call_openrouter_vision(prompt, images)
-        else:
-            # Try fallbacks
-            if self.api_keys["gemini"]:
-                return self._call_gemini_vision(prompt, images)
-            elif self.api_keys["openai"]:
-                return self._call_openai_vision(prompt, images)
-            elif self.api_keys["anthropic"]:
-                return self._call_anthropic_vision(prompt, images)
-            elif self.api_keys["openrouter"]:
-                return self._call_openrouter_vision(prompt, images)
-            else:
-                raise ValueError("No valid API keys available")
+        provider = self._select_provider()
+        
+        key = None
+        if use_cache and self.cache is not None:
+            key = self.cache.make_key(provider, self.models[provider][api_type], prompt, images)
+            response = self.cache.get(key)
+            if response is not None:
+                if client_id:
+                    self.usage_tracker.log_request(client_id, f"{endpoint}_cached")
+                return response
+        
+        if key is None:
+            return self._call_provider(api_type, provider, prompt, images)[0]
+        
+        with self._in_flight_lock:
+            pending = self.in_flight.get(key)
+            if pending is None:
+                future = self.in_flight[key] = Future()
+        
+        if pending is not None:
+            if client_id:
+                self.usage_tracker.log_request(client_id, f"{endpoint}_cached")
+            return pending.result()
+        
+        try:
+            response, succeeded = self._call_provider(api_type, provider, prompt, images)
+            if succeeded:
+                self.cache.set(key, response)
+            future.set_result(response)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self.in_flight[key]
+        
+        return response
+    
+    def _call_provider(self, api_type: str, provider: str, prompt: str, images: Optional[List[str]]) -> Tuple[str, bool]:
+        """
+        Call a provider's text or vision API.
+        
+        Args:
+            api_type: "text" or "vision"
+            provider: Provider name
+            prompt: Text prompt
+            images: List of image paths for vision calls
+        
+        Returns:
+            Tuple of (response text or error message, whether the call succeeded)
+        """
+        try:
+            if api_type == "vision":
+                return getattr(self, f"_call_{provider}_vision")(prompt, images), True
+            return getattr(self, f"_call_{provider}_text")(prompt), True
+        except AIServiceError as e:
+            # Errors are returned as text but never cached
+            return str(e), False
+    
+    def call_vision_api(self, prompt: str, images: List[str], client_id: Optional[str] = None, use_cache: bool = True) -> str:
+        """
+        Call a vision API with the primary provider.
+        
+        Args:
+            prompt: Text prompt
+            images: List of image paths
+            client_id: Optional client ID for usage tracking
+            use_cache: Whether to use the response cache
+        
+        Returns:
+            API response text
+        """
+        return self._call("vision", prompt, images, client_id, use_cache)
     
-    def call_text_api(self, prompt: str, client_id: Optional[str] = None) -> str:
+    def call_text_api(self, prompt: str, client_id: Optional[str] = None, use_cache: bool = True) -> str:
         """
         Call a text API with the primary provider.
         
         Args:
             prompt: Text prompt
             client_id: Optional client ID for usage tracking
-            
+            use_cache: Whether to use the response cache
+        
         Returns:
             API response text
         """
-        # Track usage
-        if client_id:
-            self.usage_tracker.log_request(client_id, "text_api")
+        return self._call("text", prompt, None, client_id, use_cache)
+    
+    def _run_batch(self, calls: List[Tuple[str, Optional[List[str]]]], api_type: str, client_id: Optional[str],
+                   max_workers: Optional[int], use_cache: bool) -> List[str]:
+        """
+        Run calls concurrently, sending each distinct request once.
         
-        # Call appropriate API
-        if self.primary_provider == "gemini" and self.api_keys["gemini"]:
-            return self._call_gemini_text(prompt)
-        elif self.primary_provider == "openai" and self.api_keys["openai"]:
-            return self._call_openai_text(prompt)
-        elif self.primary_provider == "anthropic" and self.api_keys["anthropic"]:
-            return self._call_anthropic_text(prompt)
-        elif self.primary_provider == "openrouter" and self.api_keys["openrouter"]:
-            return self._call_openrouter_text(prompt)
-        else:
-            # Try fallbacks
-            if self.api_keys["gemini"]:
-                return self._call_gemini_text(prompt)
-            elif self.api_keys["openai"]:
-                return self._call_openai_text(prompt)
-            elif self.api_keys["anthropic"]:
-                return self._call_anthropic_text(prompt)
-            elif self.api_keys["openrouter"]:
-                return self._call_openrouter_text(prompt)
-            else:
-                raise ValueError("No valid API keys available")
+        Args:
+            calls: (prompt, image paths) of each call
+            api_type: "text" or "vision"
+            client_id: Optional client ID for usage tracking
+            max_workers: Maximum number of concurrent calls
+            use_cache: Whether to use the response cache
+        
+        Returns:
+            API response texts, in the order of the calls
+        """
+        distinct = {}
+        for prompt, images in calls:
+            request = (prompt, tuple(images or ()))
+            if request in distinct and client_id:
+                # Repeated requests are answered by the first one, like a cache hit
+                self.usage_tracker.log_request(client_id, f"{api_type}_api")
+                self.usage_tracker.log_request(client_id, f"{api_type}_api_cached")
+            distinct.setdefault(request, None)
+        
+        if not distinct:
+            return []
+        
+        workers = min(max_workers or self.batch_workers, len(distinct))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-batch") as executor:
+            futures = {
+                request: executor.submit(
+                    self._call, api_type, request[0], list(request[1]) or None, client_id, use_cache
+                )
+                for request in distinct
+            }
+            responses = {request: future.result() for request, future in futures.items()}
+        
+        return [responses[(prompt, tuple(images or ()))] for prompt, images in calls]
+    
+    def batch_text_api(self, prompts: List[str], client_id: Optional[str] = None,
+                       max_workers: Optional[int] = None, use_cache: bool = True) -> List[str]:
+        """
+        Call a text API with many prompts concurrently.
+        
+        Args:
+            prompts: Text prompts
+            client_id: Optional client ID for usage tracking
+            max_workers: Maximum number of concurrent calls (defaults to batch_workers)
+            use_cache: Whether to use the response cache
+        
+        Returns:
+            API response texts, in the order of the prompts
+        """
+        return self._run_batch([(prompt, None) for prompt in prompts], "text", client_id, max_workers, use_cache)
+    
+    def batch_vision_api(self, requests_data: List[Tuple[str, List[str]]], client_id: Optional[str] = None,
+                         max_workers: Optional[int] = None, use_cache: bool = True) -> List[str]:
+        """
+        Call a vision API with many prompts concurrently, e.g. one per page.
+        
+        Args:
+            requests_data: (prompt, image paths) of each call
+            client_id: Optional client ID for usage tracking
+            max_workers: Maximum number of concurrent calls (defaults to batch_workers)
+            use_cache: Whether to use the response cache
+        
+        Returns:
+            API response texts, in the order of the calls
+        """
+        return self._run_batch(list(requests_data), "vision", client_id, max_workers, use_cache)
+    
+    def _get_session(self, provider: str) -> requests.Session:
+        """
+        Get the pooled HTTP session of a provider.
+        
+        Args:
+            provider: Provider name
+        
+        Returns:
+            HTTP session
+        """
+        with self._sessions_lock:
+            session = self.sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency[provider])
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[provider] = session
+            return session
+    
+    def _post(self, provider: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a POST request to a provider, subject to its rate limit.
+        
+        Requests rejected as rate limited or unavailable are retried after the
+        provider's Retry-After delay (or an exponential backoff), and other calls
+        to the provider are held back until then.
+        
+        Args:
+            provider: Provider name
+            path: API path relative to the provider's base URL
+            **kwargs: Keyword arguments for requests
+        
+        Returns:
+            HTTP response
+        """
+        rate_limiter = self.rate_limiters[provider]
+        attempt = 0
+        while True:
+            with rate_limiter:
+                response = self._get_session(provider).post(self.base_urls[provider] + path, **kwargs)
+            
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return response
+            
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = RETRY_BACKOFF * 2 ** attempt
+            if delay > self.max_retry_wait:
+                logger.warning(f"{provider} asked to retry after {delay:.1f} seconds, not retrying")
+                return response
+            
+            logger.warning(f"{provider} returned {response.status_code}, retrying in {delay:.1f} seconds")
+            rate_limiter.defer(delay)
+            attempt += 1
+    
+    def close(self) -> None:
+        """Close the HTTP sessions."""
+        with self._sessions_lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
     
     def summarize_document(self, document_data: Dict[str, Any]) -> str:
         """
@@ -335,6 +832,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         try:
             # Load images
@@ -353,15 +853,16 @@ class AIServiceProxy:
                 return "No valid images provided."
             
             # Get Gemini Pro Vision model
-            model = genai.GenerativeModel('gemini-pro-vision')
+            model = genai.GenerativeModel(self.models["gemini"]["vision"])
             
             # Generate content
-            response = model.generate_content([prompt] + images)
+            with self.rate_limiters["gemini"]:
+                response = model.generate_content([prompt] + images)
             
             return response.text
         except Exception as e:
             logger.error(f"Error calling Gemini Vision API: {str(e)}")
-            return f"Error calling Gemini Vision API: {str(e)}"
+            raise AIServiceError(f"Error calling Gemini Vision API: {str(e)}") from e
     
     def _call_openai_vision(self, prompt: str, image_paths: List[str]) -> str:
         """
@@ -373,6 +874,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         import base64
         
@@ -409,7 +913,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "gpt-4-vision-preview",
+            "model": self.models["openai"]["vision"],
             "messages": messages,
             "max_tokens": 4096,
             "temperature": 0.2
@@ -417,8 +921,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            response = self._post(
+                "openai",
+                "/chat/completions",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -429,10 +934,12 @@ class AIServiceProxy:
                 return result["choices"][0]["message"]["content"]
             else:
                 logger.error(f"OpenAI API error: {response.status_code} {response.text}")
-                return f"OpenAI API error: {response.status_code}"
+                raise AIServiceError(f"OpenAI API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenAI Vision API: {str(e)}")
-            return f"Error calling OpenAI Vision API: {str(e)}"
+            raise AIServiceError(f"Error calling OpenAI Vision API: {str(e)}") from e
     
     def _call_anthropic_vision(self, prompt: str, image_paths: List[str]) -> str:
         """
@@ -444,6 +951,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         import base64
         
@@ -483,7 +993,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "claude-3-opus-20240229",
+            "model": self.models["anthropic"]["vision"],
             "messages": messages,
             "max_tokens": 4096,
             "temperature": 0.2
@@ -491,8 +1001,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
+            response = self._post(
+                "anthropic",
+                "/messages",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -503,10 +1014,12 @@ class AIServiceProxy:
                 return result["content"][0]["text"]
             else:
                 logger.error(f"Anthropic API error: {response.status_code} {response.text}")
-                return f"Anthropic API error: {response.status_code}"
+                raise AIServiceError(f"Anthropic API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling Anthropic Vision API: {str(e)}")
-            return f"Error calling Anthropic Vision API: {str(e)}"
+            raise AIServiceError(f"Error calling Anthropic Vision API: {str(e)}") from e
     
     def _call_openrouter_vision(self, prompt: str, image_paths: List[str]) -> str:
         """
@@ -518,6 +1031,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         import base64
         
@@ -556,7 +1072,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "anthropic/claude-3-opus-20240229",
+            "model": self.models["openrouter"]["vision"],
             "messages": messages,
             "max_tokens": 4096,
             "temperature": 0.2
@@ -564,8 +1080,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+            response = self._post(
+                "openrouter",
+                "/chat/completions",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -576,10 +1093,12 @@ class AIServiceProxy:
                 return result["choices"][0]["message"]["content"]
             else:
                 logger.error(f"OpenRouter API error: {response.status_code} {response.text}")
-                return f"OpenRouter API error: {response.status_code}"
+                raise AIServiceError(f"OpenRouter API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenRouter Vision API: {str(e)}")
-            return f"Error calling OpenRouter Vision API: {str(e)}"
+            raise AIServiceError(f"Error calling OpenRouter Vision API: {str(e)}") from e
     
     def _call_gemini_text(self, prompt: str) -> str:
         """
@@ -590,18 +1109,22 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         try:
             # Get Gemini Pro model
-            model = genai.GenerativeModel('gemini-pro')
+            model = genai.GenerativeModel(self.models["gemini"]["text"])
             
             # Generate content
-            response = model.generate_content(prompt)
+            with self.rate_limiters["gemini"]:
+                response = model.generate_content(prompt)
             
             return response.text
         except Exception as e:
             logger.error(f"Error calling Gemini Text API: {str(e)}")
-            return f"Error calling Gemini Text API: {str(e)}"
+            raise AIServiceError(f"Error calling Gemini Text API: {str(e)}") from e
     
     def _call_openai_text(self, prompt: str) -> str:
         """
@@ -612,6 +1135,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         # Prepare API request
         headers = {
@@ -621,7 +1147,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "gpt-4-turbo",
+            "model": self.models["openai"]["text"],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
@@ -631,8 +1157,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            response = self._post(
+                "openai",
+                "/chat/completions",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -643,10 +1170,12 @@ class AIServiceProxy:
                 return result["choices"][0]["message"]["content"]
             else:
                 logger.error(f"OpenAI API error: {response.status_code} {response.text}")
-                return f"OpenAI API error: {response.status_code}"
+                raise AIServiceError(f"OpenAI API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenAI Text API: {str(e)}")
-            return f"Error calling OpenAI Text API: {str(e)}"
+            raise AIServiceError(f"Error calling OpenAI Text API: {str(e)}") from e
     
     def _call_anthropic_text(self, prompt: str) -> str:
         """
@@ -657,6 +1186,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         # Prepare API request
         headers = {
@@ -667,7 +1199,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "claude-3-opus-20240229",
+            "model": self.models["anthropic"]["text"],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
@@ -677,8 +1209,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
+            response = self._post(
+                "anthropic",
+                "/messages",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -689,10 +1222,12 @@ class AIServiceProxy:
                 return result["content"][0]["text"]
             else:
                 logger.error(f"Anthropic API error: {response.status_code} {response.text}")
-                return f"Anthropic API error: {response.status_code}"
+                raise AIServiceError(f"Anthropic API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling Anthropic Text API: {str(e)}")
-            return f"Error calling Anthropic Text API: {str(e)}"
+            raise AIServiceError(f"Error calling Anthropic Text API: {str(e)}") from e
     
     def _call_openrouter_text(self, prompt: str) -> str:
         """
@@ -703,6 +1238,9 @@ class AIServiceProxy:
             
         Returns:
             API response text
+            
+        Raises:
+            AIServiceError: If the API call fails
         """
         # Prepare API request
         headers = {
@@ -714,7 +1252,7 @@ class AIServiceProxy:
         
         # Prepare data
         data = {
-            "model": "anthropic/claude-3-opus-20240229",
+            "model": self.models["openrouter"]["text"],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
@@ -724,8 +1262,9 @@ class AIServiceProxy:
         
         # Call API
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+            response = self._post(
+                "openrouter",
+                "/chat/completions",
                 headers=headers,
                 json=data,
                 timeout=60
@@ -736,7 +1275,9 @@ class AIServiceProxy:
                 return result["choices"][0]["message"]["content"]
             else:
                 logger.error(f"OpenRouter API error: {response.status_code} {response.text}")
-                return f"OpenRouter API error: {response.status_code}"
+                raise AIServiceError(f"OpenRouter API error: {response.status_code}")
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenRouter Text API: {str(e)}")
-            return f"Error calling OpenRouter Text API: {str(e)}"
+            raise AIServiceError(f"Error calling OpenRouter Text API: {str(e)}") from e
@@ -49,6 +49,7 @@ ai_service = AIServiceProxy({
     "gemini_api_key": os.getenv("GEMINI_API_KEY"),
     "openai_api_key": os.getenv("OPENAI_API_KEY"),
     "anthropic_api_key": os.getenv("ANTHROPIC_API_KEY"),
+    "cache_dir": os.getenv("AI_CACHE_DIR"),
 })
 
 document_processor = DocumentProcessor()
@@ -4,10 +4,14 @@ ISIN extractor for financial document processing.
 import logging
 import re
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+# Every 12-character ISIN-shaped substring, including overlapping ones, so a
+# single scan finds all ISINs a substring test would
+ISIN_CANDIDATE_PATTERN = re.compile(r'(?=([A-Z]{2}[A-Z0-9]{10}))')
+
 class ISINExtractor:
     """
     Extract ISINs and financial data from documents.
@@ -104,15 +108,7 @@ class ISINExtractor:
         
         for sheet in sheets_data:
             if "data" in sheet:
-                for row in sheet["data"]:
-                    # Check if any cell contains an ISIN
-                    for cell in row.values():
-                        for isin in isins:
-                            if isin in str(cell):
-                                # Extract security data
-                                security = self._extract_security_from_row(row, isin)
-                                if security:
-                                    securities.append(security)
+                securities.extend(self._extract_securities_from_rows(sheet["data"], isins))
         
         # Extract total value
         total_value = 0
@@ -162,17 +158,7 @@ class ISINExtractor:
         isins = self.extract_isins(text)
         
         # Extract securities
-        securities = []
-        
-        for row in csv_data:
-            # Check if any cell contains an ISIN
-            for cell in row.values():
-                for isin in isins:
-                    if isin in str(cell):
-                        # Extract security data
-                        security = self._extract_security_from_row(row, isin)
-                        if security:
-                            securities.append(security)
+        securities = self._extract_securities_from_rows(csv_data, isins)
         
         # Extract total value
         total_value = 0
@@ -217,13 +203,8 @@ class ISINExtractor:
         
         # Check digit validation (Luhn algorithm)
         try:
-            # Convert letters to numbers (A=10, B=11, ..., Z=35)
-            digits = []
-            for char in isin:
-                if char.isalpha():
-                    digits.append(ord(char) - ord('A') + 10)
-                else:
-                    digits.append(int(char))
+            # Convert letters to numbers (A=10, B=11, ..., Z=35) and split them into digits
+            digits = [int(digit) for char in isin for digit in str(int(char, 36))]
             
             # Reverse the digits
             digits = digits[::-1]
@@ -259,31 +240,86 @@ class ISINExtractor:
             if "data" not in table:
                 continue
             
-            for row in table["data"]:
-                # Check if any cell contains an ISIN
-                for cell in row.values():
-                    for isin in isins:
-                        if isin in str(cell):
-                            # Extract security data
-                            security = self._extract_security_from_row(row, isin)
-                            if security:
-                                securities.append(security)
-        
-        # Extract securities from text
+            securities.extend(self._extract_securities_from_rows(table["data"], isins))
+        
+        # Securities by ISIN, to skip ISINs already extracted from tables
+        extracted = {}
+        for security in securities:
+            extracted.setdefault(security["identifier"], security)
+        
+        # Extract securities from text, finding the first position of every ISIN in one scan
+        positions = self._find_known_isins(text, set(isins))
         for isin in isins:
-            # Find context around ISIN
-            isin_index = text.find(isin)
-            if isin_index >= 0:
-                # Get context (100 characters before and after)
-                start = max(0, isin_index - 100)
-                end = min(len(text), isin_index + 100)
-                context = text[start:end]
+            if isin in extracted or isin not in positions:
+                continue
+            isin_index = positions[isin]
+            
+            # Get context (100 characters before and after)
+            start = max(0, isin_index - 100)
+            end = min(len(text), isin_index + 100)
+            context = text[start:end]
+            
+            # Extract security data
+            security = self._extract_security_from_text(context, isin)
+            if security:
+                extracted[isin] = security
+                securities.append(security)
+        
+        return securities
+    
+    def _find_known_isins(self, value: str, known_isins: Set[str]) -> Dict[str, int]:
+        """
+        Find known ISINs in a string in a single scan.
+        
+        Args:
+            value: String to search
+            known_isins: ISINs to look for
+            
+        Returns:
+            Position of the first occurrence of each ISIN found, in order of appearance
+        """
+        found = {}
+        if len(value) < 12:
+            return found
+        
+        for match in ISIN_CANDIDATE_PATTERN.finditer(value):
+            candidate = match.group(1)
+            if candidate in known_isins and candidate not in found:
+                found[candidate] = match.start()
+        
+        return found
+    
+    def _extract_securities_from_rows(self, rows: List[Dict[str, Any]], isins: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract a security for each ISIN found in each cell of each row.
+        
+        An ISIN found in several cells of a row gives a security for each of
+        them, and the ISINs of a cell are taken in the order of `isins`.
+        
+        Args:
+            rows: Table rows
+            isins: Known ISINs
+            
+        Returns:
+            List of extracted securities, in row and cell order
+        """
+        securities = []
+        order = {isin: i for i, isin in enumerate(isins)}
+        known_isins = set(order)
+        if not known_isins:
+            return securities
+        
+        for row in rows:
+            for cell in row.values():
+                if cell is None:
+                    continue
                 
-                # Extract security data
-                security = self._extract_security_from_text(context, isin)
-                if security:
-                    # Check if already extracted
-                    if not any(s["identifier"] == isin for s in securities):
+                # Scan the cell once instead of testing every ISIN against it
+                found = self._find_known_isins(str(cell), known_isins)
+                for isin in sorted(found, key=order.__getitem__):
+                    # Extract security data
+                    security = self._extract_security_from_row(row, isin)
+                    if security:
                         securities.append(security)
         
         return securities
@@ -24,6 +24,9 @@ from isin_validator import is_valid_isin
 # Import enhanced column detector
 from enhanced_column_detector import detect_column_type, detect_column_types
 
+# Import table OCR helpers
+from table_ocr import assign_words_to_cells, join_cell_words, cell_confidence, is_blank_cell
+
 # Try to import PaddleOCR
 try:
     from paddleocr import PaddleOCR
@@ -41,16 +44,23 @@ class GridAnalyzer:
     Analyzer for grid structures in financial documents.
     """
 
-    def __init__(self, debug: bool = False, use_ocr: bool = True):
+    def __init__(self, debug: bool = False, use_ocr: bool = True, table_ocr: bool = True,
+                 min_cell_confidence: float = 0.8):
         """
         Initialize the grid analyzer.
 
         Args:
             debug: Whether to print debug information
             use_ocr: Whether to use OCR for text extraction
+            table_ocr: Whether to run OCR once per table and assign the text to cells,
+                instead of running OCR on every cell
+            min_cell_confidence: Minimum mean confidence (0-1) of a cell's text from
+                table OCR below which the cell is recognized again on its own
         """
         self.debug = debug
         self.use_ocr = use_ocr and PADDLE_OCR_AVAILABLE
+        self.table_ocr = table_ocr
+        self.min_cell_confidence = min_cell_confidence
 
         # Initialize OCR if available
         if self.use_ocr:
@@ -504,6 +514,11 @@ class GridAnalyzer:
         """
         Extract text from table cells using OCR.
 
+        In table OCR mode the whole table is recognized once and the text boxes are
+        assigned to cells by position. Cells with text spanning several cells, with
+        low confidence, or with no text boxes but visible ink are recognized again
+        on their own.
+
         Args:
             table_image: Image of the table
             table_structure: Dictionary containing table structure information
@@ -513,56 +528,21 @@ class GridAnalyzer:
         """
         cell_texts = {}
 
-        # Get cells from table structure
-        cells = table_structure.get("cells", [])
-
-        # Process each cell
-        for cell in cells:
-            row = cell.get("row", 0)
-            col = cell.get("column", 0)
-            x = cell.get("x", 0)
-            y = cell.get("y", 0)
-            width = cell.get("width", 0)
-            height = cell.get("height", 0)
-
-            # Skip cells that are too small
-            if width < 10 or height < 10:
-                continue
-
-            # Extract cell image
-            cell_img = table_image[y:y+height, x:x+width]
-
-            # Extract text using OCR
-            if self.use_ocr:
-                try:
-                    # Save cell image to temporary file
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_cell_file:
-                        cv2.imwrite(tmp_cell_file.name, cell_img)
-                        cell_img_path = tmp_cell_file.name
-
-                    # Run OCR
-                    result = self.ocr.ocr(cell_img_path, cls=True)
-
-                    # Extract text
-                    text = ""
-                    if result and len(result) > 0 and result[0]:
-                        for line in result[0]:
-                            if len(line) >= 2 and line[1] and len(line[1]) >= 2:
-                                text += line[1][0] + " "
-
-                    # Clean up text
-                    text = text.strip()
+        # Get cells from table structure, skipping cells that are too small
+        cells = [
+            cell for cell in table_structure.get("cells", [])
+            if cell.get("width", 0) >= 10 and cell.get("height", 0) >= 10
+        ]
+
+        if not self.use_ocr:
+            # Use simple thresholding for text extraction
+            for cell in cells:
+                row = cell.get("row", 0)
+                col = cell.get("column", 0)
+                x = cell.get("x", 0)
+                y = cell.get("y", 0)
+                cell_img = table_image[y:y+cell["height"], x:x+cell["width"]]
 
-                    # Add to cell texts
-                    cell_texts[(row, col)] = text
-
-                    # Clean up temporary file
-                    os.unlink(cell_img_path)
-                except Exception as e:
-                    if self.debug:
-                        logger.error(f"Error extracting text from cell ({row}, {col}): {str(e)}")
-            else:
-                # Use simple thresholding for text extraction
                 try:
                     # Apply threshold
                     _, thresh = cv2.threshold(cell_img, 150, 255, cv2.THRESH_BINARY_INV)
@@ -577,8 +557,125 @@ class GridAnalyzer:
                     if self.debug:
                         logger.error(f"Error processing cell ({row}, {col}): {str(e)}")
 
+            return cell_texts
+
+        # Cells that need their own OCR call
+        fallback_cells = cells
+
+        if self.table_ocr and cells:
+            try:
+                words = self._ocr_table_words(table_image)
+                cell_words, split_cells = assign_words_to_cells(words, cells)
+
+                fallback_cells = []
+                for cell in cells:
+                    key = (cell.get("row", 0), cell.get("column", 0))
+                    words_in_cell = cell_words.get(key, [])
+
+                    if words_in_cell and key not in split_cells and (
+                        cell_confidence(words_in_cell) >= self.min_cell_confidence
+                    ):
+                        cell_texts[key] = join_cell_words(words_in_cell)
+                    elif not words_in_cell and key not in split_cells and is_blank_cell(
+                        table_image[cell.get("y", 0):cell.get("y", 0)+cell["height"], cell.get("x", 0):cell.get("x", 0)+cell["width"]]
+                    ):
+                        # Nothing to recognize in an empty cell
+                        cell_texts[key] = ""
+                    else:
+                        # Text missed by table OCR, split between cells or recognized with low confidence
+                        fallback_cells.append(cell)
+
+                if self.debug:
+                    logger.info(f"Table OCR found {len(words)} text boxes, {len(fallback_cells)} of {len(cells)} cells need cell OCR")
+            except Exception as e:
+                fallback_cells = cells
+                if self.debug:
+                    logger.error(f"Error extracting text from table, falling back to cell OCR: {str(e)}")
+
+        # Process each remaining cell
+        for cell in fallback_cells:
+            row = cell.get("row", 0)
+            col = cell.get("column", 0)
+            x = cell.get("x", 0)
+            y = cell.get("y", 0)
+
+            # Extract cell image
+            cell_img = table_image[y:y+cell["height"], x:x+cell["width"]]
+
+            try:
+                cell_texts[(row, col)] = self._ocr_cell(cell_img)
+            except Exception as e:
+                if self.debug:
+                    logger.error(f"Error extracting text from cell ({row}, {col}): {str(e)}")
+
         return cell_texts
 
+    def _run_ocr(self, image: np.ndarray) -> List[Any]:
+        """
+        Run PaddleOCR on an image.
+
+        Args:
+            image: Grayscale or BGR image
+
+        Returns:
+            Recognized text lines as [box, (text, confidence)]
+        """
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+        result = self.ocr.ocr(image, cls=True)
+
+        lines = []
+        if result and len(result) > 0 and result[0]:
+            for line in result[0]:
+                if len(line) >= 2 and line[1] and len(line[1]) >= 2:
+                    lines.append(line)
+
+        return lines
+
+    def _ocr_table_words(self, table_image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Recognize the text boxes of a whole table image.
+
+        Args:
+            table_image: Image of the table
+
+        Returns:
+            Text boxes with text, confidence and position
+        """
+        words = []
+        for line in self._run_ocr(table_image):
+            text, confidence = line[1][0], line[1][1]
+            points = np.array(line[0], dtype=float)
+            x_min, y_min = points.min(axis=0)
+            x_max, y_max = points.max(axis=0)
+            words.append({
+                "text": text,
+                "conf": float(confidence),
+                "x": x_min,
+                "y": y_min,
+                "width": x_max - x_min,
+                "height": y_max - y_min
+            })
+
+        return words
+
+    def _ocr_cell(self, cell_img: np.ndarray) -> str:
+        """
+        Recognize the text of a single cell image.
+
+        Args:
+            cell_img: Image of the cell
+
+        Returns:
+            Cell text
+        """
+        text = ""
+        for line in self._run_ocr(cell_img):
+            text += line[1][0] + " "
+
+        return text.strip()
+
     def _create_dataframe_from_cells(self, cell_texts: Dict[Tuple[int, int], str]) -> Optional[pd.DataFrame]:
         """
         Create a DataFrame from cell texts.
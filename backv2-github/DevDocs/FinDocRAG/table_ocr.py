@@ -0,0 +1,141 @@
+"""
+Table OCR helpers.
+
+This module assigns the word boxes recognized on a whole table image to the
+cells of the table's grid, so a table needs a single OCR call instead of one
+call per cell.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Tuple, Set
+
+def assign_words_to_cells(
+    words: List[Dict[str, Any]],
+    cells: List[Dict[str, Any]],
+    min_overlap: float = 0.6
+) -> Tuple[Dict[Tuple[int, int], List[Dict[str, Any]]], Set[Tuple[int, int]]]:
+    """
+    Assign words to the grid cells they lie in.
+
+    Args:
+        words: Words with "text", "conf", "x", "y", "width" and "height", in table image coordinates
+        cells: Cells with "row", "column", "x", "y", "width" and "height"
+        min_overlap: Minimum fraction of a word's box that must lie in a cell for the word to be assigned to it
+
+    Returns:
+        Tuple of (words by (row, column), cells overlapped by words spanning several cells)
+    """
+    cell_words = {}
+    split_cells = set()
+    if not words or not cells:
+        return cell_words, split_cells
+
+    word_boxes = np.array(
+        [[w["x"], w["y"], w["x"] + w["width"], w["y"] + w["height"]] for w in words],
+        dtype=float
+    )
+    cell_boxes = np.array(
+        [[c["x"], c["y"], c["x"] + c["width"], c["y"] + c["height"]] for c in cells],
+        dtype=float
+    )
+
+    # Intersection area of every word with every cell
+    overlap_width = (
+        np.minimum(word_boxes[:, None, 2], cell_boxes[None, :, 2]) -
+        np.maximum(word_boxes[:, None, 0], cell_boxes[None, :, 0])
+    )
+    overlap_height = (
+        np.minimum(word_boxes[:, None, 3], cell_boxes[None, :, 3]) -
+        np.maximum(word_boxes[:, None, 1], cell_boxes[None, :, 1])
+    )
+    overlap = np.clip(overlap_width, 0, None) * np.clip(overlap_height, 0, None)
+
+    word_areas = np.maximum(
+        (word_boxes[:, 2] - word_boxes[:, 0]) * (word_boxes[:, 3] - word_boxes[:, 1]),
+        1.0
+    )
+    fractions = overlap / word_areas[:, None]
+    best_cells = fractions.argmax(axis=1)
+
+    for i, word in enumerate(words):
+        best = best_cells[i]
+        if fractions[i, best] <= 0:
+            # Outside the grid
+            continue
+
+        if fractions[i, best] >= min_overlap:
+            cell = cells[best]
+            cell_words.setdefault((cell["row"], cell["column"]), []).append(word)
+        else:
+            # The word cannot be placed reliably, so its cells need their own OCR
+            for j in np.nonzero(fractions[i] > 0)[0]:
+                split_cells.add((cells[j]["row"], cells[j]["column"]))
+
+    return cell_words, split_cells
+
+def join_cell_words(words: List[Dict[str, Any]], line_separator: str = " ") -> str:
+    """
+    Join the words of a cell in reading order.
+
+    Args:
+        words: Words with "text", "x", "y" and "height"
+        line_separator: Separator between text lines
+
+    Returns:
+        Cell text
+    """
+    lines = []
+    line_bottom = None
+    for word in sorted(words, key=lambda w: w["y"]):
+        # A word whose center is above the bottom of the current line continues it
+        if lines and word["y"] + word["height"] / 2 < line_bottom:
+            lines[-1].append(word)
+            line_bottom = max(line_bottom, word["y"] + word["height"])
+        else:
+            lines.append([word])
+            line_bottom = word["y"] + word["height"]
+
+    return line_separator.join(
+        " ".join(str(w["text"]) for w in sorted(line, key=lambda w: w["x"]))
+        for line in lines
+    ).strip()
+
+def cell_confidence(words: List[Dict[str, Any]]) -> float:
+    """
+    Get the mean recognition confidence of the words in a cell.
+
+    Args:
+        words: Words with "conf" between 0 and 1
+
+    Returns:
+        Mean confidence, or 0.0 for no words
+    """
+    if not words:
+        return 0.0
+
+    return sum(float(w["conf"]) for w in words) / len(words)
+
+def is_blank_cell(cell_img: np.ndarray, ink_threshold: int = 150, margin: int = 3, min_ink_pixels: int = 5) -> bool:
+    """
+    Check whether a cell image contains no dark (text) pixels.
+
+    The border of the cell is ignored, so grid lines do not count as text.
+
+    Args:
+        cell_img: Grayscale or BGR image of the cell, dark text on a light background
+        ink_threshold: Gray level below which a pixel counts as ink
+        margin: Number of pixels ignored along each edge of the cell
+        min_ink_pixels: Minimum number of ink pixels for the cell to hold text
+
+    Returns:
+        True if the cell holds no text
+    """
+    if cell_img is None or cell_img.size == 0:
+        return True
+
+    gray = cell_img.mean(axis=2) if cell_img.ndim == 3 else cell_img
+    height, width = gray.shape[:2]
+    inner = gray[min(margin, height // 2):max(height - margin, height // 2),
+                 min(margin, width // 2):max(width - margin, width // 2)]
+
+    return int(np.count_nonzero(inner < ink_threshold)) < min_ink_pixels
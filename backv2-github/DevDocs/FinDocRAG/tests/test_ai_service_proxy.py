@@ -0,0 +1,255 @@
+"""
+Tests for response caching, batching and rate limiting in the AI service proxy.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service_proxy import AIServiceProxy, ResponseCache, parse_retry_after
+
+class StubProvider:
+    """OpenAI-compatible chat completions endpoint on a local HTTP server."""
+
+    def __init__(self):
+        self.requests = []
+        self.delay = 0.0
+        self.fail_status = None
+        self.rejections = []  # (status, Retry-After) of the next responses
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                provider.handle(self, body["messages"][0]["content"])
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def handle(self, handler, prompt):
+        """Answer a chat completion request with the upper-cased prompt."""
+        with self.lock:
+            self.requests.append((time.monotonic(), prompt))
+            rejection = self.rejections.pop(0) if self.rejections else None
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay)
+            if rejection is not None:
+                status, retry_after = rejection
+                headers = {"Retry-After": retry_after} if retry_after is not None else {}
+                self.respond(handler, status, {"error": "rate limited"}, headers)
+            elif self.fail_status:
+                self.respond(handler, self.fail_status, {"error": "unavailable"})
+            else:
+                self.respond(handler, 200, {"choices": [{"message": {"content": prompt.upper()}}]})
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def respond(self, handler, status, body, headers=None):
+        """Send a JSON response."""
+        data = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def prompts(self):
+        """Get the prompts received so far."""
+        return [prompt for _, prompt in self.requests]
+
+    def close(self):
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+class ProxyTestCase(unittest.TestCase):
+    """Base class running a proxy against a stub provider."""
+
+    def setUp(self):
+        """Set up the stub provider."""
+        self.provider = StubProvider()
+        self.addCleanup(self.provider.close)
+
+    def make_proxy(self, **config):
+        """Create a proxy using the stub provider."""
+        config.setdefault("primary_provider", "openai")
+        config.setdefault("openai_api_key", "test-key")
+        config.setdefault("base_urls", {"openai": self.provider.base_url})
+        proxy = AIServiceProxy(config)
+        self.addCleanup(proxy.close)
+        return proxy
+
+class TestResponseCache(ProxyTestCase):
+    """Tests for caching responses."""
+
+    def test_cache_hits_and_misses(self):
+        """Repeated prompts are answered from the cache, new ones call the provider."""
+        proxy = self.make_proxy()
+
+        self.assertEqual(proxy.call_text_api("summarize", client_id="client"), "SUMMARIZE")
+        self.assertEqual(proxy.call_text_api("summarize", client_id="client"), "SUMMARIZE")
+        self.assertEqual(proxy.call_text_api("extract"), "EXTRACT")
+        proxy.call_text_api("summarize", use_cache=False)
+
+        self.assertEqual(self.provider.prompts(), ["summarize", "extract", "summarize"])
+        self.assertEqual(proxy.cache.stats, {"hits": 1, "disk_hits": 0, "misses": 2})
+        self.assertEqual(proxy.usage_tracker.get_usage("client"), {"text_api": 2, "text_api_cached": 1})
+
+    def test_disk_tier_survives_restart(self):
+        """Responses cached on disk are used by a new proxy."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.make_proxy(cache_dir=cache_dir).call_text_api("summarize")
+            proxy = self.make_proxy(cache_dir=cache_dir)
+
+            self.assertEqual(proxy.call_text_api("summarize"), "SUMMARIZE")
+            self.assertEqual(proxy.cache.stats["disk_hits"], 1)
+            self.assertEqual(len(self.provider.requests), 1)
+
+    def test_expired_responses_are_misses(self):
+        """Responses older than the TTL are not returned."""
+        cache = ResponseCache(ttl=0.05)
+        cache.set("key", "response")
+        self.assertEqual(cache.get("key"), "response")
+
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("key"))
+
+    def test_errors_are_not_cached(self):
+        """Failed calls return an error text and are sent again next time."""
+        proxy = self.make_proxy()
+        self.provider.fail_status = 500
+
+        self.assertIn("500", proxy.call_text_api("summarize"))
+        self.provider.fail_status = None
+        self.assertEqual(proxy.call_text_api("summarize"), "SUMMARIZE")
+        self.assertEqual(len(self.provider.requests), 2)
+
+class TestConcurrentCalls(ProxyTestCase):
+    """Tests for in-flight dedupe, batches and rate limits."""
+
+    def test_identical_concurrent_calls_share_one_request(self):
+        """Calls made while an identical call is in progress wait for its response."""
+        proxy = self.make_proxy()
+        self.provider.delay = 0.2
+        responses = []
+
+        threads = [
+            threading.Thread(target=lambda: responses.append(proxy.call_text_api("summarize")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(responses, ["SUMMARIZE"] * 5)
+        self.assertEqual(len(self.provider.requests), 1)
+        self.assertEqual(proxy.in_flight, {})
+
+    def test_batch_sends_distinct_prompts_once_in_order(self):
+        """Batches return responses in prompt order and send repeated prompts once."""
+        proxy = self.make_proxy()
+
+        responses = proxy.batch_text_api(["b", "a", "b", "c"], client_id="client")
+
+        self.assertEqual(responses, ["B", "A", "B", "C"])
+        self.assertEqual(sorted(self.provider.prompts()), ["a", "b", "c"])
+        self.assertEqual(proxy.usage_tracker.get_usage("client")["text_api"], 4)
+
+    def test_provider_concurrency_limit(self):
+        """No more calls than the provider's concurrency run at once."""
+        proxy = self.make_proxy(provider_concurrency={"openai": 2})
+        self.provider.delay = 0.05
+
+        proxy.batch_text_api([f"prompt {i}" for i in range(6)], max_workers=6)
+
+        self.assertEqual(len(self.provider.requests), 6)
+        self.assertLessEqual(self.provider.max_in_flight, 2)
+
+    def test_rate_limit_spaces_requests(self):
+        """Requests to a provider are spaced by its requests-per-minute limit."""
+        proxy = self.make_proxy(provider_rate_limits={"openai": 600})
+
+        proxy.batch_text_api([f"prompt {i}" for i in range(4)], max_workers=4)
+
+        starts = sorted(started for started, _ in self.provider.requests)
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        self.assertEqual(len(starts), 4)
+        self.assertTrue(all(gap >= 0.08 for gap in gaps), gaps)
+
+class TestRetryAfter(ProxyTestCase):
+    """Tests for retrying rate-limited requests."""
+
+    def test_parse_retry_after(self):
+        """Retry-After values in seconds and as HTTP dates are parsed."""
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertEqual(parse_retry_after("0.5"), 0.5)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_retry_after_is_honoured(self):
+        """A rate-limited request is retried once the Retry-After delay has passed."""
+        proxy = self.make_proxy()
+        self.provider.rejections = [(429, "0.2")]
+
+        self.assertEqual(proxy.call_text_api("summarize"), "SUMMARIZE")
+
+        (first, _), (second, _) = self.provider.requests
+        self.assertGreaterEqual(second - first, 0.18)
+
+    def test_retry_after_holds_back_other_calls(self):
+        """Other calls to the provider wait for the Retry-After delay as well."""
+        proxy = self.make_proxy()
+        self.provider.rejections = [(429, "0.3")]
+
+        thread = threading.Thread(target=proxy.call_text_api, args=("first",))
+        thread.start()
+        time.sleep(0.1)
+        proxy.call_text_api("second")
+        thread.join()
+
+        rejected_at = self.provider.requests[0][0]
+        second_at = next(started for started, prompt in self.provider.requests if prompt == "second")
+        self.assertGreaterEqual(second_at - rejected_at, 0.28)
+
+    def test_retries_are_limited(self):
+        """Requests are retried at most max_retries times and never for too long a wait."""
+        proxy = self.make_proxy(max_retries=1)
+        self.provider.rejections = [(503, "0"), (503, "0"), (503, "0")]
+
+        self.assertIn("503", proxy.call_text_api("summarize"))
+        self.assertEqual(len(self.provider.requests), 2)
+
+        proxy = self.make_proxy(max_retry_wait=1)
+        self.provider.rejections = [(429, "120")]
+
+        started = time.monotonic()
+        self.assertIn("429", proxy.call_text_api("other"))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(self.provider.requests), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for extracting cell texts with table OCR in the grid analyzer.
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grid_analyzer import GridAnalyzer
+
+class TestExtractCellTexts(unittest.TestCase):
+    """Tests for GridAnalyzer._extract_cell_texts in table OCR mode."""
+
+    def setUp(self):
+        """Set up an analyzer whose OCR engine is replaced by synthetic results."""
+        self.analyzer = GridAnalyzer(use_ocr=False, table_ocr=True, min_cell_confidence=0.8)
+        self.analyzer.use_ocr = True
+        self.cell_ocr_calls = []
+        self.table_words = []
+        self.analyzer._ocr_table_words = lambda image: self.table_words
+        self.analyzer._ocr_cell = self._ocr_cell
+
+        # A 2x3 table: blank white background with ink in cells (0, 2) and (1, 2)
+        self.image = np.full((200, 300), 255, dtype=np.uint8)
+        self.image[140:160, 230:270] = 0
+        self.image[40:60, 230:270] = 0
+        self.structure = {"cells": [
+            {"row": r, "column": c, "x": c * 100, "y": r * 100, "width": 100, "height": 100}
+            for r in range(2) for c in range(3)
+        ]}
+
+    def _ocr_cell(self, cell_img):
+        """Record a cell OCR call."""
+        self.cell_ocr_calls.append(cell_img.shape)
+        return "cell ocr"
+
+    def word(self, text, x, y, conf=0.95, width=40):
+        """Make a word box."""
+        return {"text": text, "conf": conf, "x": x, "y": y, "width": width, "height": 20}
+
+    def test_cell_texts(self):
+        """Reliable words are used, other cells get their own OCR unless blank."""
+        self.table_words = [
+            self.word("ISIN", 10, 40),                     # (0, 0): reliable
+            self.word("Blurry", 110, 40, conf=0.3),        # (0, 1): low confidence
+            self.word("Wide", 60, 140, width=80),          # spans (1, 0) and (1, 1)
+        ]
+        cell_texts = self.analyzer._extract_cell_texts(self.image, self.structure)
+
+        self.assertEqual(cell_texts[(0, 0)], "ISIN")
+        self.assertEqual(cell_texts[(0, 1)], "cell ocr")
+        self.assertEqual(cell_texts[(1, 0)], "cell ocr")
+        self.assertEqual(cell_texts[(1, 1)], "cell ocr")
+        # No words but ink: missed by table OCR, so recognized on its own
+        self.assertEqual(cell_texts[(0, 2)], "cell ocr")
+        self.assertEqual(cell_texts[(1, 2)], "cell ocr")
+        self.assertEqual(len(self.cell_ocr_calls), 5)
+
+    def test_blank_cells_skip_cell_ocr(self):
+        """Cells without words and without ink are empty without another OCR call."""
+        self.image[:] = 255
+        cell_texts = self.analyzer._extract_cell_texts(self.image, self.structure)
+
+        self.assertEqual(set(cell_texts.values()), {""})
+        self.assertEqual(self.cell_ocr_calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for finding known ISINs in text and table rows with the ISIN extractor.
+"""
+import os
+import sys
+import unittest
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors.isin_extractor import ISINExtractor
+
+APPLE = "US0378331005"
+SIEMENS = "DE0007236101"
+NESTLE = "CH0038863350"
+
+class TestFindKnownISINs(unittest.TestCase):
+    """Tests for ISINExtractor._find_known_isins."""
+
+    def setUp(self):
+        """Set up the extractor."""
+        self.extractor = ISINExtractor()
+        self.known = {APPLE, SIEMENS, NESTLE}
+
+    def test_overlapping_candidates(self):
+        """ISINs starting inside another ISIN-shaped candidate are found."""
+        # A scan without overlaps would consume "XYUS03783310" and miss Apple
+        self.assertEqual(self.extractor._find_known_isins("XY" + APPLE, self.known), {APPLE: 2})
+
+        # Adjacent ISINs, with ISIN-shaped candidates spanning the join
+        text = NESTLE + APPLE
+        self.assertEqual(self.extractor._find_known_isins(text, self.known), {NESTLE: 0, APPLE: 12})
+
+    def test_identifiers_embedded_in_words(self):
+        """Known ISINs inside longer words are found, like a substring test would."""
+        for text in ("ISIN:" + APPLE, "ref" + APPLE + "x", "AB" + APPLE + "CD", APPLE.lower() + APPLE):
+            with self.subTest(text=text):
+                found = self.extractor._find_known_isins(text, self.known)
+                self.assertEqual(found, {APPLE: text.index(APPLE)})
+
+    def test_first_occurrence_in_order_of_appearance(self):
+        """Each ISIN is reported once, at its first position."""
+        text = f"{SIEMENS} then {APPLE} and again {SIEMENS}"
+
+        found = self.extractor._find_known_isins(text, self.known)
+
+        self.assertEqual(list(found.items()), [(SIEMENS, 0), (APPLE, text.index(APPLE))])
+
+    def test_only_known_isins(self):
+        """Valid but unknown ISINs and short strings are ignored."""
+        self.assertEqual(self.extractor._find_known_isins("GB0002634946 " + APPLE, {APPLE}), {APPLE: 13})
+        self.assertEqual(self.extractor._find_known_isins("US037833100", self.known), {})
+        self.assertEqual(self.extractor._find_known_isins(APPLE, set()), {})
+
+class TestExtractISINs(unittest.TestCase):
+    """Tests for validating and matching ISINs in documents."""
+
+    def setUp(self):
+        """Set up the extractor."""
+        self.extractor = ISINExtractor()
+
+    def test_check_digit_rejection(self):
+        """ISINs with a wrong check digit are not extracted."""
+        self.assertTrue(self.extractor._validate_isin(APPLE))
+        self.assertFalse(self.extractor._validate_isin("US0378331006"))
+        self.assertFalse(self.extractor._validate_isin("DE0007236102"))
+
+        isins = self.extractor.extract_isins(f"{APPLE} US0378331006 {SIEMENS} DE0007236102")
+        self.assertEqual(sorted(isins), sorted([APPLE, SIEMENS]))
+
+    def test_rows_match_each_cell(self):
+        """Each cell gives one security per ISIN it contains, in the order of the known ISINs."""
+        rows = [
+            {"Name": "Apple Inc", "ISIN": "ISIN:" + APPLE, "Note": APPLE, "Value": "1,000"},
+            {"Name": "Mixed", "ISIN": NESTLE + " / " + SIEMENS, "Value": "250"},
+            {"Name": "Bad check digit", "ISIN": "US0378331006", "Value": "10"},
+            {"Name": None, "ISIN": None}
+        ]
+
+        securities = self.extractor._extract_securities_from_rows(rows, [APPLE, SIEMENS, NESTLE])
+
+        self.assertEqual([s["identifier"] for s in securities], [APPLE, APPLE, SIEMENS, NESTLE])
+        self.assertEqual(securities[0]["name"], "Apple Inc")
+        self.assertEqual(securities[0]["value"], 1000.0)
+
+    def test_rows_match_like_substring_test(self):
+        """Rows give the same securities as testing every known ISIN against every cell."""
+        rows = [
+            {"A": f"{SIEMENS} {APPLE}", "B": NESTLE, "C": f"{APPLE}{APPLE}"},
+            {"A": "no identifiers", "B": f"x{NESTLE}y", "C": 12},
+            {"A": APPLE.lower(), "B": f"{SIEMENS}/{NESTLE}/{APPLE}"}
+        ]
+        isins = [NESTLE, APPLE, SIEMENS]
+
+        expected = [isin for row in rows for cell in row.values() for isin in isins if isin in str(cell)]
+        securities = self.extractor._extract_securities_from_rows(rows, isins)
+
+        self.assertEqual([s["identifier"] for s in securities], expected)
+
+    def test_text_securities_skip_table_isins(self):
+        """ISINs already taken from tables are not extracted again from the text."""
+        text = f"Holdings: Apple Inc {APPLE} 100 15,000 and Siemens AG {SIEMENS} 50 7,500"
+        tables = [{"data": [{"Name": "Apple Inc", "ISIN": APPLE, "Value": "15000"}]}]
+
+        securities = self.extractor._extract_securities(text, tables, [APPLE, SIEMENS])
+
+        self.assertEqual([s["identifier"] for s in securities], [APPLE, SIEMENS])
+        self.assertEqual(securities[0]["value"], 15000.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for assigning table OCR words to grid cells.
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_ocr import assign_words_to_cells, join_cell_words, cell_confidence, is_blank_cell
+
+def make_grid(rows, columns, size=100):
+    """Make the cells of a regular grid."""
+    return [
+        {"row": r, "column": c, "x": c * size, "y": r * size, "width": size, "height": size}
+        for r in range(rows) for c in range(columns)
+    ]
+
+def make_word(text, x, y, width=40, height=20, conf=0.95):
+    """Make a word box."""
+    return {"text": text, "conf": conf, "x": x, "y": y, "width": width, "height": height}
+
+class TestAssignWordsToCells(unittest.TestCase):
+    """Tests for assign_words_to_cells."""
+
+    def test_words_go_to_their_cells(self):
+        """Words inside a cell are assigned to it."""
+        words = [make_word("ISIN", 10, 10), make_word("Value", 110, 10), make_word("100", 110, 110)]
+        cell_words, split_cells = assign_words_to_cells(words, make_grid(2, 2))
+
+        self.assertEqual({key: [w["text"] for w in ws] for key, ws in cell_words.items()},
+                         {(0, 0): ["ISIN"], (0, 1): ["Value"], (1, 1): ["100"]})
+        self.assertEqual(split_cells, set())
+
+    def test_mostly_inside_word_is_assigned(self):
+        """A word slightly crossing a cell border goes to the cell holding most of it."""
+        cell_words, split_cells = assign_words_to_cells([make_word("Total", 70, 10)], make_grid(1, 2))
+
+        self.assertEqual(list(cell_words), [(0, 0)])
+        self.assertEqual(split_cells, set())
+
+    def test_word_spanning_cells_marks_them_split(self):
+        """A word spread over several cells is not assigned and its cells are marked."""
+        words = [make_word("Spanning", 60, 10, width=80), make_word("Corner", 80, 90, width=40, height=20)]
+        cell_words, split_cells = assign_words_to_cells(words, make_grid(2, 2))
+
+        self.assertEqual(cell_words, {})
+        self.assertEqual(split_cells, {(0, 0), (0, 1), (1, 0), (1, 1)})
+
+    def test_words_outside_the_grid_are_ignored(self):
+        """Words outside every cell are dropped."""
+        cell_words, split_cells = assign_words_to_cells([make_word("Page 1", 500, 500)], make_grid(2, 2))
+
+        self.assertEqual(cell_words, {})
+        self.assertEqual(split_cells, set())
+
+    def test_no_words_or_cells(self):
+        """Empty input gives empty results."""
+        self.assertEqual(assign_words_to_cells([], make_grid(1, 1)), ({}, set()))
+        self.assertEqual(assign_words_to_cells([make_word("A", 0, 0)], []), ({}, set()))
+
+class TestCellText(unittest.TestCase):
+    """Tests for joining and scoring the words of a cell."""
+
+    def test_join_in_reading_order(self):
+        """Words are joined left to right within lines and top to bottom across lines."""
+        words = [
+            make_word("Corp", 60, 12),
+            make_word("2030", 5, 40),
+            make_word("Acme", 5, 10),
+            make_word("Notes", 50, 42)
+        ]
+        self.assertEqual(join_cell_words(words), "Acme Corp 2030 Notes")
+        self.assertEqual(join_cell_words(words, line_separator="\n"), "Acme Corp\n2030 Notes")
+
+    def test_join_no_words(self):
+        """A cell without words has no text."""
+        self.assertEqual(join_cell_words([]), "")
+
+    def test_confidence(self):
+        """The confidence of a cell is the mean word confidence."""
+        words = [make_word("A", 0, 0, conf=0.9), make_word("B", 50, 0, conf=0.5)]
+        self.assertAlmostEqual(cell_confidence(words), 0.7)
+        self.assertEqual(cell_confidence([]), 0.0)
+
+class TestBlankCell(unittest.TestCase):
+    """Tests for detecting cells without text."""
+
+    def test_blank_cell_with_grid_lines(self):
+        """Grid lines along the border do not count as text."""
+        cell = np.full((40, 80), 255, dtype=np.uint8)
+        cell[0, :] = 0
+        cell[:, -1] = 0
+        self.assertTrue(is_blank_cell(cell))
+
+    def test_cell_with_ink(self):
+        """Dark pixels inside the cell count as text, also in color images."""
+        cell = np.full((40, 80, 3), 255, dtype=np.uint8)
+        cell[15:25, 20:30] = 0
+        self.assertFalse(is_blank_cell(cell))
+        self.assertFalse(is_blank_cell(cell[:, :, 0]))
+
+if __name__ == '__main__':
+    unittest.main()
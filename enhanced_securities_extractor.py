@@ -9,7 +9,10 @@ Fidelity, TD Ameritrade, and E*TRADE.
 import os
 import json
 import re
+import functools
+import threading
 import camelot
+from camelot.handlers import PDFHandler
 import pandas as pd
 import logging
 from typing import List, Dict, Any, Optional, Tuple
@@ -65,6 +68,144 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
+class ParsedDocument:
+    """
+    Lazily parsed, per-page view of a PDF shared by all extraction stages.
+
+    Each page is run through camelot at most once; later requests for the same
+    page (from any stage) are served from memory.
+    """
+
+    def __init__(self, pdf_path: str, flavor: str = 'stream'):
+        """
+        Initialize the ParsedDocument.
+
+        Args:
+            pdf_path: Path to the PDF file
+            flavor: Camelot parsing flavor
+        """
+        self.pdf_path = pdf_path
+        self.flavor = flavor
+        self._page_count: Optional[int] = None
+        self._page_tables: Dict[int, List[Any]] = {}
+        self._page_text: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+        if self._page_count is None:
+            self._page_count = len(PDFHandler(self.pdf_path, pages='all').pages)
+        return self._page_count
+
+    def resolve_pages(self, pages: str) -> List[int]:
+        """
+        Expand a camelot-style page spec ('1', '1-3', '2,4-end', 'all').
+
+        Pages past the end of the document are dropped.
+
+        Args:
+            pages: Page specification
+
+        Returns:
+            Sorted list of 1-based page numbers
+        """
+        if pages == '1':
+            return [1]
+        if pages == 'all':
+            return list(range(1, self.page_count + 1))
+
+        page_numbers = set()
+        for part in pages.split(','):
+            part = part.strip()
+            if '-' in part:
+                start, end = part.split('-', 1)
+                end = self.page_count if end == 'end' else int(end)
+                page_numbers.update(range(int(start), end + 1))
+            else:
+                page_numbers.add(int(part))
+
+        return sorted(p for p in page_numbers if p <= self.page_count)
+
+    def _parse_page(self, page: int) -> List[Any]:
+        """Parse a single page with camelot, caching the result."""
+        with self._lock:
+            if page not in self._page_tables:
+                tables = camelot.read_pdf(
+                    self.pdf_path,
+                    pages=str(page),
+                    flavor=self.flavor,
+                    suppress_stdout=True
+                )
+                self._page_tables[page] = list(tables)
+                logger.debug(f"Parsed page {page} of {self.pdf_path}: {len(tables)} tables")
+            return self._page_tables[page]
+
+    def get_tables(self, pages: str) -> List[Any]:
+        """
+        Get the tables found on the given pages, in page order.
+
+        Args:
+            pages: Page specification
+
+        Returns:
+            List of camelot tables
+        """
+        tables = []
+        for page in self.resolve_pages(pages):
+            tables.extend(self._parse_page(page))
+        return tables
+
+    def get_page_text(self, page: int) -> str:
+        """
+        Get the text of a page, built from the cells of its tables.
+
+        Args:
+            page: 1-based page number
+
+        Returns:
+            Page text
+        """
+        if page not in self._page_text:
+            self._page_text[page] = ' '.join(
+                ' '.join(' '.join(str(cell) for cell in row) for row in table.df.values.tolist())
+                for table in self._parse_page(page)
+            )
+        return self._page_text[page]
+
+    def get_text(self, pages: str) -> str:
+        """
+        Get the text of the given pages.
+
+        Args:
+            pages: Page specification
+
+        Returns:
+            Text of all pages joined with spaces
+        """
+        return ' '.join(self.get_page_text(page) for page in self.resolve_pages(pages))
+
+
+def _shares_parsed_document(method):
+    """
+    Run an extraction method with a ParsedDocument bound to the current thread.
+
+    Nested stages called for the same PDF reuse the bound document instead of
+    re-parsing the pages they need.
+    """
+    @functools.wraps(method)
+    def wrapper(self, pdf_path, *args, **kwargs):
+        current = getattr(self._local, 'document', None)
+        if not isinstance(pdf_path, str) or (current is not None and current.pdf_path == pdf_path):
+            return method(self, pdf_path, *args, **kwargs)
+
+        self._local.document = ParsedDocument(pdf_path)
+        try:
+            return method(self, pdf_path, *args, **kwargs)
+        finally:
+            self._local.document = current
+    return wrapper
+
 class SecurityExtractor:
     """
     Class for extracting securities information from financial documents.
@@ -129,6 +270,9 @@ class SecurityExtractor:
             logger.info(f"Loaded securities reference data from {reference_db_path}")
             if self.debug:
                 print(f"Loaded securities reference data from {reference_db_path}")
+
+        # Parsed document bound to the extraction running on this thread
+        self._local = threading.local()
     
     # Helper functions for safe type operations
     
@@ -225,6 +369,7 @@ class SecurityExtractor:
         return text
     
     @track_extraction_performance
+    @_shares_parsed_document
     def extract_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
         Extract securities information from a PDF file.
@@ -281,16 +426,10 @@ class SecurityExtractor:
                     # Get document information
                     default_result["document_type"] = doc_type
                     
-                    # Extract text from PDF using camelot for enhanced formats
-                    tables = camelot.read_pdf(
-                        pdf_path,
-                        pages='all',
-                        flavor='stream',
-                        suppress_stdout=True
-                    )
-                    
-                    # Convert to text
-                    all_text = ' '.join([' '.join([' '.join(cell) for cell in row]) for table in tables for row in table.df.values.tolist()])
+                    # Extract tables and text from all pages for enhanced formats
+                    document = self._get_document(pdf_path)
+                    tables = document.get_tables('all')
+                    all_text = document.get_text('all')
                     
                     # Get document currency
                     try:
@@ -329,6 +468,24 @@ class SecurityExtractor:
             default_result["error"] = f"Unexpected error in extraction: {str(e)}"
             return default_result
     
+    def _get_document(self, pdf_path: str) -> ParsedDocument:
+        """
+        Get the parsed document for a PDF.
+        
+        Returns the document bound to the running extraction when it is for the
+        same file, so that every stage shares the pages parsed so far.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            ParsedDocument for the PDF
+        """
+        document = getattr(self._local, 'document', None)
+        if document is not None and document.pdf_path == pdf_path:
+            return document
+        return ParsedDocument(pdf_path)
+    
     def _detect_document_type(self, pdf_path: str) -> str:
         """
         Detect the type of financial document.
@@ -340,12 +497,7 @@ class SecurityExtractor:
             Document type as a string
         """
         # Extract text from first page
-        tables = camelot.read_pdf(
-            pdf_path,
-            pages='1',
-            flavor='stream',
-            suppress_stdout=True
-        )
+        tables = self._get_document(pdf_path).get_tables('1')
         
         if len(tables) == 0:
             return "unknown"
@@ -401,12 +553,7 @@ class SecurityExtractor:
             Currency code (USD, EUR, etc.)
         """
         # First, try to extract from document text
-        tables = camelot.read_pdf(
-            pdf_path,
-            pages='1-3',  # Check first few pages
-            flavor='stream',
-            suppress_stdout=True
-        )
+        tables = self._get_document(pdf_path).get_tables('1-3')  # Check first few pages
         
         # Join all text
         full_text = ""
@@ -448,6 +595,7 @@ class SecurityExtractor:
         return self.doc_type_currency_map.get(doc_type, "USD")
         
     @track_extraction_performance
+    @_shares_parsed_document
     def _extract_from_messos(self, pdf_path: str) -> Dict[str, Any]:
         """
         Extract information from a messos PDF.
@@ -555,12 +703,7 @@ class SecurityExtractor:
             
             # Extract tables from summary page (usually page 3)
             try:
-                tables = camelot.read_pdf(
-                    pdf_path,
-                    pages='1-3',
-                    flavor='stream',
-                    suppress_stdout=True
-                )
+                tables = self._get_document(pdf_path).get_tables('1-3')
             except Exception as e:
                 summary["error"] = f"Error extracting tables from PDF: {str(e)}"
                 return summary
@@ -708,12 +851,7 @@ class SecurityExtractor:
             
             # Extract tables from asset allocation page (usually page 4-5)
             try:
-                tables = camelot.read_pdf(
-                    pdf_path,
-                    pages='3-5',
-                    flavor='stream',
-                    suppress_stdout=True
-                )
+                tables = self._get_document(pdf_path).get_tables('3-5')
             except Exception as e:
                 asset_allocation["error"] = f"Error extracting tables from asset allocation pages: {str(e)}"
                 return asset_allocation
@@ -940,12 +1078,7 @@ class SecurityExtractor:
                 
             # Extract tables from securities pages (usually pages 6-12)
             try:
-                tables = camelot.read_pdf(
-                    pdf_path,
-                    pages='6-12',
-                    flavor='stream',
-                    suppress_stdout=True
-                )
+                tables = self._get_document(pdf_path).get_tables('6-12')
                 
                 if self.debug:
                     print(f"Found {len(tables)} tables on pages 6-12")
@@ -1457,6 +1590,7 @@ class SecurityExtractor:
         return processed_securities
     
     @track_extraction_performance
+    @_shares_parsed_document
     def _extract_generic(self, pdf_path: str) -> Dict[str, Any]:
         """
         Generic extraction for other document types.
@@ -1510,12 +1644,7 @@ class SecurityExtractor:
             
             # Extract tables from all pages with error handling
             try:
-                tables = camelot.read_pdf(
-                    pdf_path,
-                    pages='all',
-                    flavor='stream',
-                    suppress_stdout=True
-                )
+                tables = self._get_document(pdf_path).get_tables('all')
                 
                 # Process tables to find securities
                 for i, table in enumerate(tables):
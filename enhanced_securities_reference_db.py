@@ -12,7 +12,9 @@ import re
 import logging
 import datetime
 import requests
-from typing import Dict, List, Any, Optional, Set, Tuple, Union
+import heapq
+from collections import Counter
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple, Union
 from difflib import SequenceMatcher
 
 # Set up logging
@@ -27,6 +29,142 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
+# Precompiled patterns and stop words used when preprocessing names
+NAME_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+NAME_STOP_WORDS = frozenset({'the', 'and', 'of', 'a', 'an', 'in', 'on', 'at', 'by', 'for'})
+
+class NameMatchIndex:
+    """
+    Character n-gram inverted index over preprocessed security names.
+    
+    Names are preprocessed once when they are added. Lookups gather candidates
+    from the postings of the query's n-grams and return only the top-k names,
+    so exact scoring never has to walk the whole name map.
+    """
+    
+    def __init__(self, preprocess: Callable[[str], str], ngram_size: int = 3, top_k: int = 50, min_name_length: int = 4):
+        """
+        Initialize the index.
+        
+        Args:
+            preprocess: Function used to preprocess names before indexing
+            ngram_size: Length of the character n-grams
+            top_k: Maximum number of candidates returned per lookup
+            min_name_length: Names shorter than this are not indexed
+        """
+        self.preprocess = preprocess
+        self.ngram_size = ngram_size
+        self.top_k = top_k
+        self.min_name_length = min_name_length
+        
+        self._processed: Dict[str, str] = {}
+        self._tokens: Dict[str, frozenset] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self._postings: Dict[str, Set[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._processed)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._processed
+    
+    def ngrams(self, processed_name: str) -> Set[str]:
+        """
+        Get the set of character n-grams of a preprocessed name.
+        
+        Args:
+            processed_name: Preprocessed name
+            
+        Returns:
+            Set of n-grams (the name is padded so short words still produce n-grams)
+        """
+        if not processed_name:
+            return set()
+        padded = f" {processed_name} "
+        return {padded[i:i + self.ngram_size] for i in range(len(padded) - self.ngram_size + 1)}
+    
+    def add(self, name: str) -> None:
+        """
+        Add a lowercased name to the index.
+        
+        Args:
+            name: Name key as stored in name_to_isin
+        """
+        if name in self._processed or len(name) < self.min_name_length:
+            return
+        
+        processed = self.preprocess(name)
+        grams = self.ngrams(processed)
+        
+        self._processed[name] = processed
+        self._tokens[name] = frozenset(processed.split())
+        self._gram_counts[name] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(name)
+    
+    def discard(self, name: str) -> None:
+        """
+        Remove a name from the index if present.
+        
+        Args:
+            name: Name key as stored in name_to_isin
+        """
+        processed = self._processed.pop(name, None)
+        if processed is None:
+            return
+        
+        self._tokens.pop(name, None)
+        self._gram_counts.pop(name, None)
+        for gram in self.ngrams(processed):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self._postings[gram]
+    
+    def get_processed(self, name: str) -> str:
+        """Get the preprocessed form of an indexed name."""
+        return self._processed[name]
+    
+    def get_tokens(self, name: str) -> frozenset:
+        """Get the token set of an indexed name."""
+        return self._tokens[name]
+    
+    def candidates(self, processed_query: str) -> List[str]:
+        """
+        Get the most promising names for a preprocessed query.
+        
+        Candidates are ranked by n-gram overlap, combining the overlap
+        coefficient (which favours containment) with the Dice coefficient.
+        
+        Args:
+            processed_query: Preprocessed query name
+            
+        Returns:
+            Up to top_k indexed names, best first
+        """
+        query_grams = self.ngrams(processed_query)
+        if not query_grams:
+            return []
+        
+        shared_counts = Counter()
+        for gram in query_grams:
+            postings = self._postings.get(gram)
+            if postings:
+                shared_counts.update(postings)
+        
+        query_size = len(query_grams)
+        
+        def rank(item: Tuple[str, int]) -> float:
+            name, shared = item
+            name_size = self._gram_counts[name]
+            overlap = shared / min(query_size, name_size)
+            dice = 2 * shared / (query_size + name_size)
+            return overlap + dice
+        
+        return [name for name, _ in heapq.nlargest(self.top_k, shared_counts.items(), key=rank)]
+
 class SecuritiesReferenceDB:
     """
     An enhanced reference database for securities information to improve extraction accuracy.
@@ -59,6 +197,9 @@ class SecuritiesReferenceDB:
         self.name_to_ticker = {}
         self.name_to_isin = {}
         
+        # Fuzzy matching index over the keys of name_to_isin
+        self.name_index = NameMatchIndex(self._preprocess_name)
+        
         # Maps for CUSIP, SEDOL, and other identifiers
         self.cusip_to_isin = {}
         self.sedol_to_isin = {}
@@ -362,7 +503,7 @@ class SecuritiesReferenceDB:
             if isin:
                 self.isin_to_name[isin] = name
                 self.isin_to_ticker[isin] = ticker
-                self.name_to_isin[name.lower()] = isin
+                self._index_name(name.lower(), isin)
                 
                 # Add sector and industry information
                 if sector:
@@ -417,6 +558,17 @@ class SecuritiesReferenceDB:
                 if 'figi' in data:
                     self.figi_to_isin[data['figi']] = isin
     
+    def _index_name(self, name_key: str, isin: str) -> None:
+        """
+        Map a lowercased name to an ISIN and add it to the fuzzy matching index.
+        
+        Args:
+            name_key: Lowercased name or name variation
+            isin: ISIN for the name
+        """
+        self.name_to_isin[name_key] = isin
+        self.name_index.add(name_key)
+    
     def _add_name_variations(self, name: str, isin: str) -> None:
         """
         Add variations of a company name to the lookup maps.
@@ -426,14 +578,14 @@ class SecuritiesReferenceDB:
             isin: ISIN for the company
         """
         name_lower = name.lower()
-        self.name_to_isin[name_lower] = isin
+        self._index_name(name_lower, isin)
         
         # Add without suffixes (Inc, Corp, etc.)
         for suffix in self.common_company_suffixes:
             pattern = r'\s+' + re.escape(suffix) + r'\.?$'
             simplified_name = re.sub(pattern, '', name, flags=re.IGNORECASE)
             if simplified_name != name:
-                self.name_to_isin[simplified_name.lower()] = isin
+                self._index_name(simplified_name.lower(), isin)
         
         # Add without legal form designations
         patterns = [
@@ -447,13 +599,13 @@ class SecuritiesReferenceDB:
         for pattern in patterns:
             simplified_name = re.sub(pattern, '', name, flags=re.IGNORECASE)
             if simplified_name != name:
-                self.name_to_isin[simplified_name.lower()] = isin
+                self._index_name(simplified_name.lower(), isin)
         
         # Add acronym/initials
         initials_match = re.findall(r'([A-Z])[a-z]+', name)
         if len(initials_match) > 1:
             initials = ''.join(initials_match)
-            self.name_to_isin[initials.lower()] = isin
+            self._index_name(initials.lower(), isin)
         
         # Add variations with common abbreviations
         abbreviation_map = {
@@ -473,15 +625,15 @@ class SecuritiesReferenceDB:
             pattern = r'\b' + re.escape(full) + r'\b'
             abbreviated_name = re.sub(pattern, abbr, name_lower, flags=re.IGNORECASE)
             if abbreviated_name != name_lower:
-                self.name_to_isin[abbreviated_name] = isin
+                self._index_name(abbreviated_name, isin)
         
         # Add "The" in front if not already there
         if not name.startswith('The '):
-            self.name_to_isin[f"the {name_lower}"] = isin
+            self._index_name(f"the {name_lower}", isin)
         
         # Remove "The" from the beginning if it's there
         if name.startswith('The '):
-            self.name_to_isin[name_lower[4:]] = isin
+            self._index_name(name_lower[4:], isin)
     
     def load_from_file(self, file_path: str) -> bool:
         """
@@ -527,7 +679,7 @@ class SecuritiesReferenceDB:
                 
                 if isin and name:
                     self.isin_to_name[isin] = name
-                    self.name_to_isin[name.lower()] = isin
+                    self._index_name(name.lower(), isin)
                     
                     # Add name variations for better matching
                     self._add_name_variations(name, isin)
@@ -1099,7 +1251,7 @@ class SecuritiesReferenceDB:
             # Add to database
             if 'name' in security_data and security_data['name']:
                 self.isin_to_name[isin] = security_data['name']
-                self.name_to_isin[security_data['name'].lower()] = isin
+                self._index_name(security_data['name'].lower(), isin)
                 
                 # Add name variations
                 self._add_name_variations(security_data['name'], isin)
@@ -1173,11 +1325,13 @@ class SecuritiesReferenceDB:
             if name:
                 if name.lower() in self.name_to_isin:
                     del self.name_to_isin[name.lower()]
+                    self.name_index.discard(name.lower())
                 
                 # Remove name variations (more complex, would require scanning all keys)
                 for key in list(self.name_to_isin.keys()):
                     if self.name_to_isin[key] == isin:
                         del self.name_to_isin[key]
+                        self.name_index.discard(key)
             
             # Remove from ticker maps
             ticker = self.isin_to_ticker.get(isin)
@@ -1253,18 +1407,20 @@ class SecuritiesReferenceDB:
         
         # Preprocess name for better matching
         processed_name = self._preprocess_name(name_lower)
+        tokens1 = set(processed_name.split())
         
-        # Find best matching name
+        # Find best matching name among the candidates from the index
+        # (very short names are never indexed, to avoid false matches)
         best_match = None
         best_score = 0
         
-        for db_name, isin in self.name_to_isin.items():
-            # Skip very short names to avoid false matches
-            if len(db_name) < 4:
+        for db_name in self.name_index.candidates(processed_name):
+            isin = self.name_to_isin.get(db_name)
+            if isin is None:
                 continue
             
-            # Preprocess database name
-            processed_db_name = self._preprocess_name(db_name)
+            # Preprocessed database name from the index
+            processed_db_name = self.name_index.get_processed(db_name)
             
             # Calculate similarity using multiple methods
             # 1. Simple containment
@@ -1277,8 +1433,7 @@ class SecuritiesReferenceDB:
             seqmatch_score = SequenceMatcher(None, processed_name, processed_db_name).ratio()
             
             # 3. Token set ratio (compare sets of words)
-            tokens1 = set(processed_name.split())
-            tokens2 = set(processed_db_name.split())
+            tokens2 = self.name_index.get_tokens(db_name)
             
             # Calculate Jaccard similarity
             if tokens1 or tokens2:  # Avoid division by zero
@@ -1315,18 +1470,17 @@ class SecuritiesReferenceDB:
         processed = name.lower()
         
         # Remove punctuation
-        processed = re.sub(r'[^\w\s]', ' ', processed)
+        processed = NAME_PUNCTUATION_PATTERN.sub(' ', processed)
         
         # Remove common stop words and company suffixes
-        stop_words = {'the', 'and', 'of', 'a', 'an', 'in', 'on', 'at', 'by', 'for'}
         tokens = processed.split()
-        tokens = [t for t in tokens if t not in stop_words and t not in self.common_company_suffixes]
+        tokens = [t for t in tokens if t not in NAME_STOP_WORDS and t not in self.common_company_suffixes]
         
         # Join back with spaces
         processed = ' '.join(tokens)
         
         # Remove extra spaces
-        processed = re.sub(r'\s+', ' ', processed).strip()
+        processed = WHITESPACE_PATTERN.sub(' ', processed).strip()
         
         return processed
     
@@ -381,15 +381,5 @@ def add_cors_headers(response):
 # Add CORS headers to all responses
 app.after_request(add_cors_headers)
 
-# Helper method to connect to the database
-def _get_db_connection():
-    """Get a connection to the SQLite database."""
-    import sqlite3
-    conn = sqlite3.connect(metrics.db_path)
-    return conn
-
-# Add this method to the metrics object for use in the API
-metrics._get_db_connection = _get_db_connection
-
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -8,13 +8,17 @@ of the Enhanced Securities Extractor.
 import os
 import json
 import time
+import atexit
+import queue
 import logging
 import datetime
+import functools
+import itertools
 import threading
 import sqlite3
 import psutil
 from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 
 # Configure logging
 logger = logging.getLogger('securities_monitor')
@@ -28,81 +32,384 @@ if not logger.handlers:
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
+def create_metrics_tables(conn: sqlite3.Connection):
+    """
+    Create the metrics tables if they don't exist.
+    
+    Args:
+        conn: Open SQLite connection
+    """
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS extraction_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        document_type TEXT,
+        tenant_id TEXT,
+        document_id TEXT,
+        processing_time_ms INTEGER,
+        success BOOLEAN,
+        error_message TEXT,
+        num_securities INTEGER,
+        num_complete_securities INTEGER,
+        memory_usage_mb REAL,
+        cpu_usage_percent REAL
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS extraction_errors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        extraction_job_id INTEGER,
+        error_type TEXT,
+        error_message TEXT,
+        trace TEXT,
+        FOREIGN KEY (extraction_job_id) REFERENCES extraction_jobs (id)
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cache_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        tenant_id TEXT,
+        cache_size INTEGER,
+        hit_count INTEGER,
+        miss_count INTEGER,
+        hit_rate_percent REAL
+    )
+    ''')
+    
+    conn.commit()
+
+class PendingJobId(int):
+    """
+    Process-local reference to an extraction job that may not be written yet.
+    
+    Returned by ExtractionMetrics.record_extraction_job. Passing it to
+    record_extraction_error links the error to the job's database row once the
+    background writer has inserted it.
+    """
+
+# Sentinel that tells the writer thread to stop
+_STOP = object()
+
+class MetricsWriter:
+    """
+    Background writer that batches metric records into the SQLite database.
+    
+    Records are buffered in a bounded queue and written by a single thread on a
+    persistent WAL-mode connection, one transaction per batch. When the queue is
+    full, records are dropped (after waiting up to put_timeout) and counted.
+    """
+    
+    _INSERTS = {
+        'job': '''
+            INSERT INTO extraction_jobs
+            (document_type, tenant_id, document_id, processing_time_ms, success, 
+            error_message, num_securities, num_complete_securities, memory_usage_mb, cpu_usage_percent)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        'error': '''
+            INSERT INTO extraction_errors
+            (extraction_job_id, error_type, error_message, trace)
+            VALUES (?, ?, ?, ?)
+        ''',
+        'cache': '''
+            INSERT INTO cache_metrics
+            (tenant_id, cache_size, hit_count, miss_count, hit_rate_percent)
+            VALUES (?, ?, ?, ?, ?)
+        '''
+    }
+    
+    def __init__(self, 
+                 db_path: str,
+                 max_queue_size: int = 10000,
+                 batch_size: int = 500,
+                 put_timeout: float = 0.0,
+                 max_pending_jobs: int = 10000):
+        """
+        Initialize the writer. The thread and connection are started on first use.
+        
+        Args:
+            db_path: Path to the SQLite database
+            max_queue_size: Maximum number of buffered records
+            batch_size: Maximum number of records written per transaction
+            put_timeout: Seconds to wait for queue space before dropping a record
+            max_pending_jobs: Number of recent job references kept for linking errors
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.max_pending_jobs = max_pending_jobs
+        
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.counters = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'batches': 0,
+            'write_errors': 0
+        }
+        self._counters_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        
+        # PendingJobId -> row id of the written job
+        self._job_row_ids = OrderedDict()
+    
+    def _count(self, counter: str, amount: int = 1):
+        with self._counters_lock:
+            self.counters[counter] += amount
+    
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+                self._thread.start()
+    
+    def submit(self, kind: str, params: Tuple, job_ref: Optional[PendingJobId] = None) -> bool:
+        """
+        Buffer a record for writing.
+        
+        Args:
+            kind: Record kind ('job', 'error' or 'cache')
+            params: Insert parameters
+            job_ref: Reference of the job being inserted (for 'job' records)
+            
+        Returns:
+            True if the record was buffered, False if it was dropped
+        """
+        if self._closed:
+            self._count('dropped')
+            return False
+        
+        self._ensure_started()
+        try:
+            if self.put_timeout > 0:
+                self.queue.put((kind, params, job_ref), timeout=self.put_timeout)
+            else:
+                self.queue.put_nowait((kind, params, job_ref))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        
+        self._count('enqueued')
+        return True
+    
+    def _run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            create_metrics_tables(conn)
+        except Exception as e:
+            logger.error(f"Error opening metrics database: {e}")
+        
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = any(record is _STOP for record in batch)
+            records = [record for record in batch if record is not _STOP]
+            
+            if records:
+                self._write_batch(conn, records)
+            
+            for _ in batch:
+                self.queue.task_done()
+            
+            if stop:
+                break
+        
+        if conn is not None:
+            conn.close()
+    
+    def _write_batch(self, conn: Optional[sqlite3.Connection], records: List[Tuple]):
+        if conn is None:
+            self._count('write_errors', len(records))
+            return
+        
+        try:
+            with conn:
+                cursor = conn.cursor()
+                for kind, params, job_ref in records:
+                    if kind == 'error' and isinstance(params[0], PendingJobId):
+                        params = (self._job_row_ids.get(params[0]),) + tuple(params[1:])
+                    
+                    cursor.execute(self._INSERTS[kind], params)
+                    
+                    if job_ref is not None:
+                        self._job_row_ids[job_ref] = cursor.lastrowid
+                        if len(self._job_row_ids) > self.max_pending_jobs:
+                            self._job_row_ids.popitem(last=False)
+            
+            self._count('written', len(records))
+            self._count('batches')
+        except Exception as e:
+            self._count('write_errors', len(records))
+            logger.error(f"Error writing metrics batch of {len(records)} records: {e}")
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all buffered records have been written.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            True if the buffer was drained, False on timeout
+        """
+        if self._thread is None:
+            return True
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Flush buffered records and stop the writer thread.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer to finish
+        """
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._thread is not None:
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("Metrics buffer still full at close, some records were not written")
+                return
+            self._thread.join(timeout)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get writer counters and the current queue depth.
+        
+        Returns:
+            Dictionary of counters
+        """
+        with self._counters_lock:
+            stats = dict(self.counters)
+        stats['queue_depth'] = self.queue.qsize()
+        return stats
+
 class ExtractionMetrics:
     """
     Class for tracking and storing metrics related to securities extraction.
+    
+    Records are written asynchronously by a MetricsWriter; queries flush the
+    buffer first so they see everything recorded so far.
     """
     
-    def __init__(self, db_path: str = 'securities_metrics.db'):
+    def __init__(self, 
+                 db_path: str = 'securities_metrics.db',
+                 max_queue_size: int = 10000,
+                 batch_size: int = 500,
+                 put_timeout: float = 0.0):
         """
         Initialize the extraction metrics.
         
+        The database is not touched until the first record or query.
+        
         Args:
             db_path: Path to the SQLite database for storing metrics
+            max_queue_size: Maximum number of records buffered for writing
+            batch_size: Maximum number of records written per transaction
+            put_timeout: Seconds to wait for buffer space before dropping a record
         """
         self.db_path = db_path
         self.memory_queue = deque(maxlen=100)  # For in-memory recent metrics
         self.process = psutil.Process(os.getpid())
         self.lock = threading.Lock()
         
-        # Initialize database
-        self._init_db()
+        self.writer = MetricsWriter(
+            db_path,
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            put_timeout=put_timeout
+        )
+        self._job_refs = itertools.count(1)
+        self._db_initialized = False
     
     def _init_db(self):
         """Initialize the SQLite database for storing metrics."""
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create tables if they don't exist
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS extraction_jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                document_type TEXT,
-                tenant_id TEXT,
-                document_id TEXT,
-                processing_time_ms INTEGER,
-                success BOOLEAN,
-                error_message TEXT,
-                num_securities INTEGER,
-                num_complete_securities INTEGER,
-                memory_usage_mb REAL,
-                cpu_usage_percent REAL
-            )
-            ''')
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS extraction_errors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                extraction_job_id INTEGER,
-                error_type TEXT,
-                error_message TEXT,
-                trace TEXT,
-                FOREIGN KEY (extraction_job_id) REFERENCES extraction_jobs (id)
-            )
-            ''')
-            
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cache_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                tenant_id TEXT,
-                cache_size INTEGER,
-                hit_count INTEGER,
-                miss_count INTEGER,
-                hit_rate_percent REAL
-            )
-            ''')
-            
-            conn.commit()
+            create_metrics_tables(conn)
             conn.close()
             
+            self._db_initialized = True
             logger.info(f"Successfully initialized metrics database at {self.db_path}")
         except Exception as e:
             logger.error(f"Error initializing metrics database: {e}")
     
+    def _get_db_connection(self) -> sqlite3.Connection:
+        """
+        Get a connection for reading metrics.
+        
+        Buffered records are flushed first so the reader sees them.
+        
+        Returns:
+            SQLite connection
+        """
+        self.flush(timeout=5.0)
+        if not self._db_initialized:
+            with self.lock:
+                if not self._db_initialized:
+                    self._init_db()
+        return sqlite3.connect(self.db_path)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all buffered records have been written.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            True if the buffer was drained, False on timeout
+        """
+        return self.writer.flush(timeout)
+    
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Flush buffered records and stop the background writer.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer to finish
+        """
+        self.writer.close(timeout)
+    
+    def get_writer_stats(self) -> Dict[str, int]:
+        """
+        Get counters of the background writer (enqueued, written, dropped, ...).
+        
+        Returns:
+            Dictionary of counters
+        """
+        return self.writer.get_stats()
+    
     def record_extraction_job(self, 
                              document_type: str,
                              tenant_id: Optional[str] = None,
@@ -126,31 +433,23 @@ class ExtractionMetrics:
             num_complete_securities: Number of complete securities (with all fields)
             
         Returns:
-            ID of the inserted record
+            PendingJobId referencing the job, or -1 if the record was dropped
         """
         try:
             # Get current resource usage
             memory_usage_mb = self.process.memory_info().rss / 1024 / 1024
             cpu_usage_percent = self.process.cpu_percent()
             
-            # Insert record into database
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                INSERT INTO extraction_jobs
-                (document_type, tenant_id, document_id, processing_time_ms, success, 
-                error_message, num_securities, num_complete_securities, memory_usage_mb, cpu_usage_percent)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    document_type, tenant_id, document_id, processing_time_ms, success,
-                    error_message, num_securities, num_complete_securities, memory_usage_mb, cpu_usage_percent
-                ))
-                
-                job_id = cursor.lastrowid
-                conn.commit()
-                conn.close()
+            # Buffer record for the background writer
+            job_id = PendingJobId(next(self._job_refs))
+            buffered = self.writer.submit('job', (
+                document_type, tenant_id, document_id, processing_time_ms, success,
+                error_message, num_securities, num_complete_securities, memory_usage_mb, cpu_usage_percent
+            ), job_ref=job_id)
+            
+            if not buffered:
+                logger.warning("Metrics buffer full, dropped extraction job metrics")
+                return -1
             
             # Add to in-memory queue for quick access to recent metrics
             self.memory_queue.append({
@@ -168,7 +467,7 @@ class ExtractionMetrics:
                 'cpu_usage_percent': cpu_usage_percent
             })
             
-            logger.info(f"Recorded extraction job metrics with ID {job_id}")
+            logger.debug(f"Buffered extraction job metrics with ID {job_id}")
             return job_id
             
         except Exception as e:
@@ -184,26 +483,17 @@ class ExtractionMetrics:
         Record an error that occurred during extraction.
         
         Args:
-            extraction_job_id: ID of the related extraction job
+            extraction_job_id: ID of the related extraction job (a database row ID
+                or the PendingJobId returned by record_extraction_job)
             error_type: Type of error
             error_message: Error message
             trace: Stack trace if available
         """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                INSERT INTO extraction_errors
-                (extraction_job_id, error_type, error_message, trace)
-                VALUES (?, ?, ?, ?)
-                ''', (extraction_job_id, error_type, error_message, trace))
-                
-                conn.commit()
-                conn.close()
-            
-            logger.info(f"Recorded extraction error for job ID {extraction_job_id}")
+            if self.writer.submit('error', (extraction_job_id, error_type, error_message, trace)):
+                logger.debug(f"Buffered extraction error for job ID {extraction_job_id}")
+            else:
+                logger.warning(f"Metrics buffer full, dropped extraction error for job ID {extraction_job_id}")
             
         except Exception as e:
             logger.error(f"Error recording extraction error: {e}")
@@ -227,20 +517,10 @@ class ExtractionMetrics:
             if hit_count is not None and miss_count is not None and (hit_count + miss_count) > 0:
                 hit_rate_percent = (hit_count / (hit_count + miss_count)) * 100
             
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                INSERT INTO cache_metrics
-                (tenant_id, cache_size, hit_count, miss_count, hit_rate_percent)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (tenant_id, cache_size, hit_count, miss_count, hit_rate_percent))
-                
-                conn.commit()
-                conn.close()
-            
-            logger.info(f"Recorded cache metrics for tenant {tenant_id}")
+            if self.writer.submit('cache', (tenant_id, cache_size, hit_count, miss_count, hit_rate_percent)):
+                logger.debug(f"Buffered cache metrics for tenant {tenant_id}")
+            else:
+                logger.warning(f"Metrics buffer full, dropped cache metrics for tenant {tenant_id}")
             
         except Exception as e:
             logger.error(f"Error recording cache metrics: {e}")
@@ -256,19 +536,18 @@ class ExtractionMetrics:
             List of recent extraction metrics
         """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                SELECT * FROM extraction_jobs
-                ORDER BY timestamp DESC
-                LIMIT ?
-                ''', (limit,))
-                
-                rows = cursor.fetchall()
-                conn.close()
+            conn = self._get_db_connection()
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            SELECT * FROM extraction_jobs
+            ORDER BY timestamp DESC
+            LIMIT ?
+            ''', (limit,))
+            
+            rows = cursor.fetchall()
+            conn.close()
             
             return [dict(row) for row in rows]
             
@@ -290,19 +569,18 @@ class ExtractionMetrics:
             List of extraction metrics within the time range
         """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                SELECT * FROM extraction_jobs
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-                ''', (start_time.isoformat(), end_time.isoformat()))
-                
-                rows = cursor.fetchall()
-                conn.close()
+            conn = self._get_db_connection()
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            SELECT * FROM extraction_jobs
+            WHERE timestamp BETWEEN ? AND ?
+            ORDER BY timestamp DESC
+            ''', (start_time.isoformat(), end_time.isoformat()))
+            
+            rows = cursor.fetchall()
+            conn.close()
             
             return [dict(row) for row in rows]
             
@@ -321,19 +599,18 @@ class ExtractionMetrics:
             List of extraction metrics for the tenant
         """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                SELECT * FROM extraction_jobs
-                WHERE tenant_id = ?
-                ORDER BY timestamp DESC
-                ''', (tenant_id,))
-                
-                rows = cursor.fetchall()
-                conn.close()
+            conn = self._get_db_connection()
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            SELECT * FROM extraction_jobs
+            WHERE tenant_id = ?
+            ORDER BY timestamp DESC
+            ''', (tenant_id,))
+            
+            rows = cursor.fetchall()
+            conn.close()
             
             return [dict(row) for row in rows]
             
@@ -349,112 +626,111 @@ class ExtractionMetrics:
             Dictionary with summary statistics
         """
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Get total jobs and success rate
-                cursor.execute('''
-                SELECT COUNT(*) AS total_jobs,
-                       SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) AS successful_jobs
-                FROM extraction_jobs
-                ''')
-                
-                row = cursor.fetchone()
-                total_jobs = row[0] if row else 0
-                successful_jobs = row[1] if row else 0
-                success_rate = (successful_jobs / total_jobs * 100) if total_jobs > 0 else 0
-                
-                # Get average processing time
-                cursor.execute('''
-                SELECT AVG(processing_time_ms) AS avg_processing_time
-                FROM extraction_jobs
-                WHERE processing_time_ms IS NOT NULL
-                ''')
-                
-                row = cursor.fetchone()
-                avg_processing_time = row[0] if row and row[0] is not None else 0
-                
-                # Get document type distribution
-                cursor.execute('''
-                SELECT document_type, COUNT(*) AS count
-                FROM extraction_jobs
-                GROUP BY document_type
-                ORDER BY count DESC
-                ''')
-                
-                document_types = {}
-                for row in cursor.fetchall():
-                    document_types[row[0]] = row[1]
-                
-                # Get common error types
-                cursor.execute('''
-                SELECT error_type, COUNT(*) AS count
-                FROM extraction_errors
-                GROUP BY error_type
-                ORDER BY count DESC
-                LIMIT 10
-                ''')
-                
-                error_types = {}
-                for row in cursor.fetchall():
-                    error_types[row[0]] = row[1]
-                
-                # Get resource usage trends
-                cursor.execute('''
-                SELECT AVG(memory_usage_mb) AS avg_memory_usage,
-                       MAX(memory_usage_mb) AS max_memory_usage,
-                       AVG(cpu_usage_percent) AS avg_cpu_usage,
-                       MAX(cpu_usage_percent) AS max_cpu_usage
-                FROM extraction_jobs
-                WHERE memory_usage_mb IS NOT NULL AND cpu_usage_percent IS NOT NULL
-                ''')
-                
-                row = cursor.fetchone()
-                resource_usage = {
-                    'avg_memory_usage_mb': row[0] if row and row[0] is not None else 0,
-                    'max_memory_usage_mb': row[1] if row and row[1] is not None else 0,
-                    'avg_cpu_usage_percent': row[2] if row and row[2] is not None else 0,
-                    'max_cpu_usage_percent': row[3] if row and row[3] is not None else 0
-                }
-                
-                # Get cache performance
-                cursor.execute('''
-                SELECT AVG(hit_rate_percent) AS avg_hit_rate,
-                       MAX(hit_rate_percent) AS max_hit_rate,
-                       MIN(hit_rate_percent) AS min_hit_rate
-                FROM cache_metrics
-                WHERE hit_rate_percent IS NOT NULL
-                ''')
-                
-                row = cursor.fetchone()
-                cache_performance = {
-                    'avg_hit_rate_percent': row[0] if row and row[0] is not None else 0,
-                    'max_hit_rate_percent': row[1] if row and row[1] is not None else 0,
-                    'min_hit_rate_percent': row[2] if row and row[2] is not None else 0
+            conn = self._get_db_connection()
+            cursor = conn.cursor()
+            
+            # Get total jobs and success rate
+            cursor.execute('''
+            SELECT COUNT(*) AS total_jobs,
+                   SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) AS successful_jobs
+            FROM extraction_jobs
+            ''')
+            
+            row = cursor.fetchone()
+            total_jobs = row[0] if row else 0
+            successful_jobs = row[1] if row else 0
+            success_rate = (successful_jobs / total_jobs * 100) if total_jobs > 0 else 0
+            
+            # Get average processing time
+            cursor.execute('''
+            SELECT AVG(processing_time_ms) AS avg_processing_time
+            FROM extraction_jobs
+            WHERE processing_time_ms IS NOT NULL
+            ''')
+            
+            row = cursor.fetchone()
+            avg_processing_time = row[0] if row and row[0] is not None else 0
+            
+            # Get document type distribution
+            cursor.execute('''
+            SELECT document_type, COUNT(*) AS count
+            FROM extraction_jobs
+            GROUP BY document_type
+            ORDER BY count DESC
+            ''')
+            
+            document_types = {}
+            for row in cursor.fetchall():
+                document_types[row[0]] = row[1]
+            
+            # Get common error types
+            cursor.execute('''
+            SELECT error_type, COUNT(*) AS count
+            FROM extraction_errors
+            GROUP BY error_type
+            ORDER BY count DESC
+            LIMIT 10
+            ''')
+            
+            error_types = {}
+            for row in cursor.fetchall():
+                error_types[row[0]] = row[1]
+            
+            # Get resource usage trends
+            cursor.execute('''
+            SELECT AVG(memory_usage_mb) AS avg_memory_usage,
+                   MAX(memory_usage_mb) AS max_memory_usage,
+                   AVG(cpu_usage_percent) AS avg_cpu_usage,
+                   MAX(cpu_usage_percent) AS max_cpu_usage
+            FROM extraction_jobs
+            WHERE memory_usage_mb IS NOT NULL AND cpu_usage_percent IS NOT NULL
+            ''')
+            
+            row = cursor.fetchone()
+            resource_usage = {
+                'avg_memory_usage_mb': row[0] if row and row[0] is not None else 0,
+                'max_memory_usage_mb': row[1] if row and row[1] is not None else 0,
+                'avg_cpu_usage_percent': row[2] if row and row[2] is not None else 0,
+                'max_cpu_usage_percent': row[3] if row and row[3] is not None else 0
+            }
+            
+            # Get cache performance
+            cursor.execute('''
+            SELECT AVG(hit_rate_percent) AS avg_hit_rate,
+                   MAX(hit_rate_percent) AS max_hit_rate,
+                   MIN(hit_rate_percent) AS min_hit_rate
+            FROM cache_metrics
+            WHERE hit_rate_percent IS NOT NULL
+            ''')
+            
+            row = cursor.fetchone()
+            cache_performance = {
+                'avg_hit_rate_percent': row[0] if row and row[0] is not None else 0,
+                'max_hit_rate_percent': row[1] if row and row[1] is not None else 0,
+                'min_hit_rate_percent': row[2] if row and row[2] is not None else 0
+            }
+            
+            # Get time-based trends (last 24 hours)
+            cursor.execute('''
+            SELECT strftime('%H', timestamp) AS hour,
+                   COUNT(*) AS count,
+                   AVG(processing_time_ms) AS avg_processing_time,
+                   SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS success_rate
+            FROM extraction_jobs
+            WHERE timestamp >= datetime('now', '-1 day')
+            GROUP BY hour
+            ORDER BY hour
+            ''')
+            
+            hourly_trends = {}
+            for row in cursor.fetchall():
+                hourly_trends[row[0]] = {
+                    'count': row[1],
+                    'avg_processing_time_ms': row[2] if row[2] is not None else 0,
+                    'success_rate_percent': row[3] if row[3] is not None else 0
                 }
-                
-                # Get time-based trends (last 24 hours)
-                cursor.execute('''
-                SELECT strftime('%H', timestamp) AS hour,
-                       COUNT(*) AS count,
-                       AVG(processing_time_ms) AS avg_processing_time,
-                       SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS success_rate
-                FROM extraction_jobs
-                WHERE timestamp >= datetime('now', '-1 day')
-                GROUP BY hour
-                ORDER BY hour
-                ''')
-                
-                hourly_trends = {}
-                for row in cursor.fetchall():
-                    hourly_trends[row[0]] = {
-                        'count': row[1],
-                        'avg_processing_time_ms': row[2] if row[2] is not None else 0,
-                        'success_rate_percent': row[3] if row[3] is not None else 0
-                    }
-                
-                conn.close()
+            
+            conn.close()
             
             # Combine all metrics into a summary
             summary = {
@@ -484,14 +760,22 @@ class ExtractionPerformanceTracker:
     Decorator class for tracking securities extraction performance.
     """
     
-    def __init__(self, metrics: ExtractionMetrics):
+    def __init__(self, metrics: Optional[ExtractionMetrics] = None):
         """
         Initialize the tracker.
         
         Args:
             metrics: ExtractionMetrics instance for storing metrics
+                (defaults to the global instance, created on first use)
         """
-        self.metrics = metrics
+        self._metrics = metrics
+    
+    @property
+    def metrics(self) -> ExtractionMetrics:
+        """ExtractionMetrics instance the tracker records into."""
+        if self._metrics is None:
+            return get_extraction_metrics()
+        return self._metrics
     
     def __call__(self, func):
         """
@@ -503,6 +787,7 @@ class ExtractionPerformanceTracker:
         Returns:
             Decorated function
         """
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Extract document info from arguments if available
             document_type = kwargs.get('document_type', 'unknown')
@@ -585,8 +870,14 @@ class ExtractionPerformanceTracker:
         
         return wrapper
 
-# Initialize singleton instance
-metrics = ExtractionMetrics()
+# Global instance, created on first use
+_metrics: Optional[ExtractionMetrics] = None
+_metrics_lock = threading.Lock()
+
+def _close_metrics():
+    """Flush buffered metrics when the interpreter exits."""
+    if _metrics is not None:
+        _metrics.close()
 
 def track_extraction_performance(func):
     """
@@ -598,14 +889,29 @@ def track_extraction_performance(func):
     Returns:
         Decorated function
     """
-    tracker = ExtractionPerformanceTracker(metrics)
+    tracker = ExtractionPerformanceTracker()
     return tracker(func)
 
 def get_extraction_metrics():
     """
     Get the global extraction metrics instance.
     
+    The instance is created on first call and flushed at interpreter exit.
+    
     Returns:
         ExtractionMetrics instance
     """
-    return metrics
\ No newline at end of file
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = ExtractionMetrics()
+                atexit.register(_close_metrics)
+    return _metrics
+
+def __getattr__(name):
+    # Keep `from securities_extraction_monitor import metrics` working
+    # without creating the metrics database at import time
+    if name == 'metrics':
+        return get_extraction_metrics()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
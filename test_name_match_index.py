@@ -0,0 +1,52 @@
+"""
+Tests for the indexed fuzzy name matcher of the enhanced securities reference database.
+"""
+
+import unittest
+
+from enhanced_securities_reference_db import SecuritiesReferenceDB, NameMatchIndex
+
+
+class TestNameMatchIndex(unittest.TestCase):
+    """Tests for NameMatchIndex and fuzzy lookups that use it."""
+
+    def setUp(self):
+        """Set up the reference database."""
+        self.db = SecuritiesReferenceDB()
+
+    def test_index_covers_name_keys(self):
+        """Every name key long enough to match is indexed."""
+        for name in self.db.name_to_isin:
+            if len(name) >= self.db.name_index.min_name_length:
+                self.assertIn(name, self.db.name_index)
+
+    def test_candidates_ranked_by_overlap(self):
+        """Names sharing the most n-grams with the query come first."""
+        index = NameMatchIndex(lambda name: name, top_k=2)
+        for name in ["microsoft", "micron technology", "apple computer"]:
+            index.add(name)
+
+        candidates = index.candidates("microsof")
+        self.assertEqual(candidates[0], "microsoft")
+        self.assertNotIn("apple computer", candidates)
+
+    def test_fuzzy_match(self):
+        """Fuzzy matching keeps the same API and results."""
+        match = self.db.find_best_match_for_name("Microsoft Corp")
+        self.assertIsNotNone(match)
+        self.assertEqual(match['isin'], "US5949181045")
+
+        self.assertIsNone(self.db.find_best_match_for_name("random noise xyz"))
+
+    def test_added_and_removed_securities(self):
+        """The index follows securities added to and removed from the database."""
+        self.db.add_security({"isin": "XS1234567895", "name": "BNP Paribas SA"})
+        self.assertEqual(self.db._fuzzy_match_name("BNP Paribas group"), "XS1234567895")
+
+        self.db.remove_security("XS1234567895")
+        self.assertIsNone(self.db._fuzzy_match_name("BNP Paribas group"))
+        self.assertNotIn("bnp paribas sa", self.db.name_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests for the parse-once page model used by the enhanced securities extractor.
+
+These tests mock camelot so they can check how often each page is parsed
+without needing real sample PDFs.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+import securities_extraction_monitor
+from enhanced_securities_extractor import SecurityExtractor, ParsedDocument
+from securities_extraction_monitor import ExtractionMetrics
+
+
+def _make_table(page, rows):
+    table = MagicMock()
+    table.page = page
+    table.df = pd.DataFrame(rows)
+    return table
+
+
+class TestParsedDocument(unittest.TestCase):
+    """Tests for ParsedDocument and its use across extraction stages."""
+
+    def setUp(self):
+        """Set up a placeholder PDF file, a scratch metrics database and the camelot mocks."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.temp_dir.name, "statement.pdf")
+        open(self.pdf_path, "wb").close()
+
+        # Record extraction metrics in the scratch directory, not the working directory
+        self.metrics = ExtractionMetrics(db_path=os.path.join(self.temp_dir.name, "securities_metrics.db"))
+        self.metrics_patch = patch.object(securities_extraction_monitor, '_metrics', self.metrics)
+        self.metrics_patch.start()
+
+        self.page_count = 12
+        handler = MagicMock()
+        handler.pages = list(range(1, self.page_count + 1))
+        self.handler_patch = patch('enhanced_securities_extractor.PDFHandler', return_value=handler)
+        self.handler_patch.start()
+
+        def read_pdf(path, pages, **kwargs):
+            page = int(pages)
+            if page == 1:
+                return [_make_table(1, [["MESSOS ENTERPRISES", "Valuation currency USD"]])]
+            return [_make_table(page, [["Page", str(page)]])]
+
+        self.read_pdf = MagicMock(side_effect=read_pdf)
+        self.read_pdf_patch = patch('enhanced_securities_extractor.camelot.read_pdf', self.read_pdf)
+        self.read_pdf_patch.start()
+
+    def tearDown(self):
+        """Clean up the mocks, the metrics database and the placeholder file."""
+        self.read_pdf_patch.stop()
+        self.handler_patch.stop()
+        self.metrics_patch.stop()
+        self.metrics.close()
+        self.temp_dir.cleanup()
+
+    def test_resolve_pages(self):
+        """Page specs are expanded and clamped to the document length."""
+        document = ParsedDocument(self.pdf_path)
+        self.assertEqual(document.resolve_pages('1'), [1])
+        self.assertEqual(document.resolve_pages('1-3'), [1, 2, 3])
+        self.assertEqual(document.resolve_pages('2,4-5'), [2, 4, 5])
+        self.assertEqual(document.resolve_pages('10-end'), [10, 11, 12])
+        self.assertEqual(document.resolve_pages('11-14'), [11, 12])
+        self.assertEqual(len(document.resolve_pages('all')), self.page_count)
+
+    def test_pages_parsed_once(self):
+        """Overlapping page requests only parse each page once."""
+        document = ParsedDocument(self.pdf_path)
+        document.get_tables('1-3')
+        document.get_tables('3-5')
+        text = document.get_text('1')
+
+        self.assertIn("MESSOS ENTERPRISES", text)
+        parsed_pages = [call.kwargs['pages'] for call in self.read_pdf.call_args_list]
+        self.assertEqual(parsed_pages, ['1', '2', '3', '4', '5'])
+
+    def test_extraction_shares_document(self):
+        """A full messos extraction parses every page at most once."""
+        extractor = SecurityExtractor()
+        result = extractor.extract_from_pdf(self.pdf_path)
+
+        self.assertEqual(result["document_type"], "messos")
+        parsed_pages = [call.kwargs['pages'] for call in self.read_pdf.call_args_list]
+        self.assertEqual(len(parsed_pages), len(set(parsed_pages)))
+        self.assertEqual(sorted(parsed_pages, key=int), [str(p) for p in range(1, 13)])
+
+    def test_separate_extractions_do_not_share_pages(self):
+        """Each extraction starts from a fresh document."""
+        extractor = SecurityExtractor()
+        extractor._detect_document_type(self.pdf_path)
+        extractor._detect_document_type(self.pdf_path)
+
+        self.assertEqual(self.read_pdf.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
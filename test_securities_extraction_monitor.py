@@ -0,0 +1,83 @@
+"""
+Tests for the batched metrics writer of the securities extraction monitor.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from securities_extraction_monitor import ExtractionMetrics, MetricsWriter, PendingJobId
+
+
+class TestExtractionMetrics(unittest.TestCase):
+    """Tests for ExtractionMetrics backed by the background MetricsWriter."""
+
+    def setUp(self):
+        """Set up a metrics instance on a temporary database."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'metrics.db')
+        self.metrics = ExtractionMetrics(db_path=self.db_path)
+
+    def tearDown(self):
+        """Stop the writer and remove the temporary database."""
+        self.metrics.close()
+        self.temp_dir.cleanup()
+
+    def test_database_created_lazily(self):
+        """Creating the metrics object does not touch the database."""
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_jobs_and_errors_written(self):
+        """Buffered jobs and their errors are written and linked."""
+        job_ids = [
+            self.metrics.record_extraction_job(document_type='messos', success=(i % 2 == 0))
+            for i in range(20)
+        ]
+        self.assertTrue(all(isinstance(job_id, PendingJobId) for job_id in job_ids))
+        self.metrics.record_extraction_error(job_ids[1], 'Error', 'Something failed')
+
+        self.assertEqual(len(self.metrics.get_recent_metrics(limit=100)), 20)
+
+        conn = sqlite3.connect(self.db_path)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        error_job_id = conn.execute('SELECT extraction_job_id FROM extraction_errors').fetchone()[0]
+        second_job_id = conn.execute('SELECT id FROM extraction_jobs ORDER BY id LIMIT 1 OFFSET 1').fetchone()[0]
+        conn.close()
+
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(error_job_id, second_job_id)
+
+        stats = self.metrics.get_writer_stats()
+        self.assertEqual(stats['written'], 21)
+        self.assertEqual(stats['dropped'], 0)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_summary_includes_cache_metrics(self):
+        """Cache metrics go through the writer as well."""
+        self.metrics.record_cache_metrics(tenant_id='t1', cache_size=10, hit_count=3, miss_count=1)
+        summary = self.metrics.get_extraction_summary()
+        self.assertEqual(summary['cache_performance']['avg_hit_rate_percent'], 75.0)
+
+
+class TestMetricsWriter(unittest.TestCase):
+    """Tests for MetricsWriter back-pressure handling."""
+
+    def test_drops_when_full(self):
+        """Records beyond the queue bound are dropped and counted."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            writer = MetricsWriter(os.path.join(temp_dir, 'metrics.db'), max_queue_size=2)
+            # Keep the writer thread from draining the queue
+            writer._ensure_started = lambda: None
+
+            results = [writer.submit('cache', (None, 1, 1, 0, 100.0)) for _ in range(5)]
+
+            self.assertEqual(results, [True, True, False, False, False])
+            stats = writer.get_stats()
+            self.assertEqual(stats['enqueued'], 2)
+            self.assertEqual(stats['dropped'], 3)
+            self.assertEqual(stats['queue_depth'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()